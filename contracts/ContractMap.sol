@@ -16,21 +16,36 @@ contract ContractMap is IContractMap, Ownable {
     mapping(address => address) public remoteToLocal;
 
     function addPair(address _local, address _remote) public override onlyOwner {
+        _addPair(_local, _remote);
+    }
+
+    function addPairs(address[] calldata _locals, address[] calldata _remotes) public override onlyOwner {
+        require(_locals.length > 0, "ContractMap: there is no pair to add!");
+        require(_locals.length == _remotes.length, "ContractMap: array lengths are not equal!");
+
+        for (uint256 i = 0; i < _locals.length; ++i) {
+            _addPair(_locals[i], _remotes[i]);
+        }
+    }
+
+    function getRemote(address _local) public view override returns (address remote) {
+        remote = localToRemote[_local];
+        require(remote != address(0), "ContractMap: addr is not in the localToRemote!");
+    }
+
+    function getLocal(address _remote) public view override returns (address local) {
+        local = remoteToLocal[_remote];
+        require(local != address(0), "ContractMap: addr is not in the remoteToLocal!");
+    }
+
+    function _addPair(address _local, address _remote) internal {
         require(localToRemote[_local] == address(0), "ContractMap: addr is already in the localToRemote!");
         require(remoteToLocal[_remote] == address(0), "ContractMap: addr is already in the remoteToLocal!");
         require(_local != _remote, "ContractMap: addrs are equal!");
 
         localToRemote[_local] = _remote;
         remoteToLocal[_remote] = _local;
-    }
-
-    function getRemote(address _local) public view override returns (address) {
-        require(localToRemote[_local] != address(0), "ContractMap: addr is not in the localToRemote!");
-        return localToRemote[_local];
-    }
 
-    function getLocal(address _remote) public view override returns (address) {
-        require(remoteToLocal[_remote] != address(0), "ContractMap: addr is not in the remoteToLocal!");
-        return remoteToLocal[_remote];
+        emit PairAdded(_local, _remote);
     }
-}
\ No newline at end of file
+}
@@ -4,18 +4,33 @@ pragma solidity >=0.4.22 <0.9.0;
 import {ISpokeBridge} from "./interfaces/ISpokeBridge.sol";
 import {IDstSpokeBridge} from "./interfaces/IDstSpokeBridge.sol";
 import {IWrappedERC721} from "./interfaces/IWrappedERC721.sol";
+import {IWrappedERC721Factory} from "./interfaces/IWrappedERC721Factory.sol";
 
 import {SpokeBridge} from "./SpokeBridge.sol";
 
+import {BidQueue} from "./libraries/BidQueue.sol";
+import {ProofCodec} from "./libraries/ProofCodec.sol";
+
 import {Counters} from "@openzeppelin/contracts/utils/Counters.sol";
+import {SafeCast} from "@openzeppelin/contracts/utils/math/SafeCast.sol";
 
 /**
  * @notice This contract implements the functonalities for a bridge on the destination chain.
  */
 abstract contract DstSpokeBridge is IDstSpokeBridge, SpokeBridge {
     using Counters for Counters.Counter;
-
-    constructor(address _hub) SpokeBridge(_hub) {
+    using BidQueue for BidQueue.Queue;
+
+    // it deploys the wrapped contracts of `mintingWithDeployment`, zero disables it
+    address public wrappedErc721Factory;
+
+    constructor(
+        address _hub,
+        uint256 _challengePeriod,
+        uint256 _stakeAmount,
+        uint256 _challengeAmount,
+        uint256 _timeLimitOfUndeposit
+    ) SpokeBridge(_hub, _challengePeriod, _stakeAmount, _challengeAmount, _timeLimitOfUndeposit) {
     }
 
     function createBid(
@@ -24,173 +39,359 @@ abstract contract DstSpokeBridge is IDstSpokeBridge, SpokeBridge {
         address _erc721Contract,
         uint256 _incomingBidId) public override payable {
         require(msg.value > 0, "DstSpokeBridge: there is no fee for relayers!");
-        require(incomingBids[_incomingBidId].status == IncomingBidStatus.Relayed, "DstSpokeBridge: incoming bid is not relayed!");
-        require(incomingBids[_incomingBidId].timestampOfRelayed + 4 hours < block.timestamp, "DstSpokeBridge: too early unwrapping!");
+
+        _createBid(_receiver, _tokenId, _erc721Contract, _incomingBidId, msg.value);
+    }
+
+    function createBids(
+        address _receiver,
+        uint256[] calldata _tokenIds,
+        address _erc721Contract,
+        uint256[] calldata _incomingBidIds) public override payable {
+        uint256 count = _tokenIds.length;
+        require(count > 0, "DstSpokeBridge: there is no token to bridge!");
+        require(count == _incomingBidIds.length, "DstSpokeBridge: array lengths are not equal!");
+        require(msg.value >= count, "DstSpokeBridge: there is no fee for relayers!");
+
+        uint256 fee = msg.value / count;
+
+        for (uint256 i = 0; i < count; ++i) {
+            // The last bid gets the remainder of the division
+            _createBid(
+                _receiver,
+                _tokenIds[i],
+                _erc721Contract,
+                _incomingBidIds[i],
+                i == count - 1 ? msg.value - fee * (count - 1) : fee
+            );
+        }
+    }
+
+    function buyBid(uint256 _bidId) public override(ISpokeBridge, SpokeBridge) onlyActiveRelayer() {
+        super.buyBid(_bidId);
+
+        OutgoingBid storage bid = outgoingBids[_bidId];
+        IWrappedERC721(bid.localErc721Contract).burn(bid.tokenId);
+    }
+
+    function buyBids(uint256[] calldata _bidIds) public override(ISpokeBridge, SpokeBridge) onlyActiveRelayer() {
+        super.buyBids(_bidIds);
+
+        // Burning the tokens with one call per consecutive run of the same wrapped contract
+        uint256 start = 0;
+        for (uint256 i = 1; i <= _bidIds.length; ++i) {
+            address erc721Contract = outgoingBids[_bidIds[start]].localErc721Contract;
+            if (i < _bidIds.length && outgoingBids[_bidIds[i]].localErc721Contract == erc721Contract) {
+                continue;
+            }
+
+            uint256[] memory tokenIds = new uint256[](i - start);
+            for (uint256 j = start; j < i; ++j) {
+                tokenIds[j - start] = outgoingBids[_bidIds[j]].tokenId;
+            }
+            IWrappedERC721(erc721Contract).burnBatch(tokenIds);
+
+            start = i;
+        }
+    }
+
+    function challengeMinting(uint256 _bidId) public override payable {
+        super._challengeUnlocking(_bidId);
+    }
+
+    function receiveProof(bytes memory _proof) public override onlyHub {
+        ProofResult result = _receiveProof(ProofCodec.decode(_proof), true);
+
+        require(result != ProofResult.NoLocalBid, "DstSpokeBrdige: There is no corresponding local bid!");
+        require(result != ProofResult.TimeWindowExpired, "DstSpokeBridge: Time window is expired!");
+        require(result != ProofResult.TimeWindowNotExpired, "DstSpokeBridge: Time window is not expired!");
+        require(result != ProofResult.FalseChallenge, "DstSpokeBridge: False challenging!");
+    }
+
+    function minting(
+        uint256 _bidId,
+        address _to,
+        uint256 _tokenId,
+        address _erc721Contract
+    )  public override onlyActiveRelayer {
+        _relayIncomingBid(_bidId, _to, _tokenId, _erc721Contract);
+
+        IWrappedERC721(_erc721Contract).mint(_to, _tokenId);
+    }
+
+    /**
+     * @notice Mints into the wrapped contract of `_originalErc721Contract` and deploys it by the factory
+     * at the first use. The address of the wrapped contract depends on the name and the symbol, so a wrong
+     * one is a wrong relaying, which can be proved by the outgoing bid of the source side.
+     */
+    function mintingWithDeployment(
+        uint256 _bidId,
+        address _to,
+        uint256 _tokenId,
+        address _originalErc721Contract,
+        string calldata _name,
+        string calldata _symbol
+    ) public override onlyActiveRelayer {
+        address factory = wrappedErc721Factory;
+        require(factory != address(0), "DstSpokeBridge: there is no factory of wrapped contracts!");
+
+        address erc721Contract = IWrappedERC721Factory(factory)
+            .predictAddress(_originalErc721Contract, _name, _symbol, address(this));
+        if (erc721Contract.code.length == 0) {
+            IWrappedERC721Factory(factory).deploy(_originalErc721Contract, _name, _symbol, address(this));
+        }
+
+        _relayIncomingBid(_bidId, _to, _tokenId, erc721Contract);
+
+        IWrappedERC721(erc721Contract).mint(_to, _tokenId);
+    }
+
+    function setWrappedErc721Factory(address _factory) public override onlyOwner {
+        wrappedErc721Factory = _factory;
+
+        emit WrappedErc721FactorySet(_factory);
+    }
+
+    function mintingBatch(
+        uint256[] calldata _bidIds,
+        address[] calldata _to,
+        uint256[] calldata _tokenIds,
+        address _erc721Contract
+    ) public override onlyActiveRelayer {
+        require(_bidIds.length > 0, "DstSpokeBridge: there is no bid to relay!");
+        require(_bidIds.length == _to.length && _bidIds.length == _tokenIds.length,
+            "DstSpokeBridge: array lengths are not equal!");
+
+        for (uint256 i = 0; i < _bidIds.length; ++i) {
+            _relayIncomingBid(_bidIds[i], _to[i], _tokenIds[i], _erc721Contract);
+        }
+
+        // Minting with one call per consecutive run of the same receiver
+        uint256 start = 0;
+        for (uint256 i = 1; i <= _bidIds.length; ++i) {
+            if (i < _bidIds.length && _to[i] == _to[start]) {
+                continue;
+            }
+
+            uint256[] memory tokenIds = new uint256[](i - start);
+            for (uint256 j = start; j < i; ++j) {
+                tokenIds[j - start] = _tokenIds[j];
+            }
+            IWrappedERC721(_erc721Contract).mintBatch(_to[start], tokenIds);
+
+            start = i;
+        }
+    }
+
+    function _relayIncomingBid(uint256 _bidId, address _to, uint256 _tokenId, address _erc721Contract) internal {
+        require(incomingBids[_bidId].status == IncomingBidStatus.None,
+            "DstSpokeBridge: there is an incoming bid with the same id!");
+
+        incomingBids[_bidId] = IncomingBid({
+            outgoingId:0,
+            status:IncomingBidStatus.Relayed,
+            receiver:_to,
+            tokenId:_tokenId,
+            remoteErc721Contract:_erc721Contract,
+            timestampOfRelayed:uint40(block.timestamp),
+            relayer:_msgSender()
+        });
+
+        emit BidRelayed(_bidId, _msgSender(), _to, _erc721Contract, _tokenId);
+
+        _commitBid(false, _bidId);
+    }
+
+    function _createBid(
+        address _receiver,
+        uint256 _tokenId,
+        address _erc721Contract,
+        uint256 _incomingBidId,
+        uint256 _fee) internal {
+        IncomingBid storage incomingBid = incomingBids[_incomingBidId];
+        require(incomingBid.status == IncomingBidStatus.Relayed, "DstSpokeBridge: incoming bid is not relayed!");
+        require(incomingBid.timestampOfRelayed + CHALLENGE_PERIOD < block.timestamp, "DstSpokeBridge: too early unwrapping!");
 
         IWrappedERC721(_erc721Contract).safeTransferFrom(msg.sender, address(this), _tokenId);
 
         outgoingBids[id.current()] = OutgoingBid({
             status:OutgoingBidStatus.Created,
-            fee:msg.value,
+            fee:SafeCast.toUint96(_fee),
             maker:_msgSender(),
             receiver:_receiver,
             tokenId:_tokenId,
+            collectionId:0,
             localErc721Contract:_erc721Contract,
-            remoteErc721Contract:address(0),
             timestampOfBought:0,
             buyer:address(0)
         });
 
+        openBids.push(id.current());
+
+        emit BidCreated(id.current(), _msgSender(), _receiver, _erc721Contract, _tokenId, _fee, _incomingBidId);
+
         id.increment();
     }
 
-    function buyBid(uint256 _bidId) public override(ISpokeBridge, SpokeBridge) onlyActiveRelayer() {
-        super.buyBid(_bidId);
-        IWrappedERC721(outgoingBids[_bidId].localErc721Contract).burn(outgoingBids[_bidId].tokenId);
-    }
+    function _encodeProof(bool _isOutgoingBid, uint256 _bidId) internal override returns (bytes memory) {
+        ProofCodec.Proof memory proof = _toProof(_isOutgoingBid, _bidId);
+        if (!_isOutgoingBid) {
+            require(incomingBids[_bidId].timestampOfRelayed + CHALLENGE_PERIOD < block.timestamp,
+                "DstSpokeBridge: too early to send proof!");
 
-    function challengeMinting(uint256 _bidId) public override payable {
-        super._challengeUnlocking(_bidId);
+            proof.challenger = _msgSender();
+        }
+
+        emit ProofSent(_msgSender(), _bidId, _isOutgoingBid);
+
+        return ProofCodec.encode(proof);
     }
 
-    function sendProof(bool _isOutgoingBid, uint256 _bidId) public override {
+    function _toProof(bool _isOutgoingBid, uint256 _bidId) internal view override returns (ProofCodec.Proof memory) {
         if (_isOutgoingBid) {
             OutgoingBid memory bid = outgoingBids[_bidId];
-            bytes memory data = abi.encode(
-                _bidId,
-                bid.status,
-                bid.receiver,
-                bid.tokenId,
-                bid.localErc721Contract,
-                bid.buyer
-            );
-
-            data = abi.encode(data, true);
+            return ProofCodec.Proof({
+                isOutgoingBid:true,
+                status:uint8(bid.status),
+                bidId:_bidId,
+                receiver:bid.receiver,
+                tokenId:bid.tokenId,
+                erc721Contract:bid.localErc721Contract,
+                relayer:bid.buyer,
+                challenger:address(0)
+            });
+        }
 
-            _sendMessage(data);
-        } else {
-            require(incomingBids[_bidId].timestampOfRelayed + 4 hours < block.timestamp,
-                "DstSpokeBridge: too early to send proof!");
+        IncomingBid memory bid = incomingBids[_bidId];
+        return ProofCodec.Proof({
+            isOutgoingBid:false,
+            status:uint8(bid.status),
+            bidId:_bidId,
+            receiver:bid.receiver,
+            tokenId:bid.tokenId,
+            erc721Contract:bid.remoteErc721Contract,
+            relayer:bid.relayer,
+            challenger:address(0)
+        });
+    }
 
-            IncomingBid memory bid = incomingBids[_bidId];
-            bytes memory data = abi.encode(
-                _bidId,
-                bid.status,
-                bid.receiver,
-                bid.tokenId,
-                bid.remoteErc721Contract,
-                bid.relayer,
-                _msgSender()
-            );
+    function _receiveProof(ProofCodec.Proof memory _proof, bool _isCurrentState) internal override returns (ProofResult) {
+        uint256 bidId = _proof.bidId;
+        if (_proof.isOutgoingBid) {
+            // On the dest chain during minting(wrong relaying), revert minting
+            IncomingBid storage localChallengedBid = incomingBids[bidId];
 
-            data = abi.encode(data, false);
+            // A replayed proof of a proved bid does not revert the other proofs of the message
+            if (localChallengedBid.status == IncomingBidStatus.None ||
+                localChallengedBid.status == IncomingBidStatus.Malicious) {
+                return ProofResult.NoLocalBid;
+            }
+            if (localChallengedBid.timestampOfRelayed + CHALLENGE_PERIOD <= block.timestamp) {
+                return ProofResult.TimeWindowExpired;
+            }
 
-            _sendMessage(data);
-        }
-    }
+            address relayer = localChallengedBid.relayer;
+            uint256 tokenId = localChallengedBid.tokenId;
+            address erc721Contract = localChallengedBid.remoteErc721Contract;
+            Challenge storage challenge = challengedIncomingBids[bidId];
 
-    function receiveProof(bytes memory _proof) public override onlyHub {
-        (bytes memory bidBytes, bool isBidOutgoing) = abi.decode(_proof, (bytes, bool));
-        if (isBidOutgoing) {
-            // On the dest chain during minting(wrong relaying), revert minting
-            (
-                uint256 bidId,
-                OutgoingBidStatus status,
-                address receiver,
-                uint256 tokenId,
-                address localContract,
-                address relayer
-            ) = abi.decode(bidBytes, (uint256, OutgoingBidStatus, address, uint256, address, address));
-
-            IncomingBid memory localChallengedBid = incomingBids[bidId];
-
-            require(localChallengedBid.status != IncomingBidStatus.None, "DstSpokeBrdige: There is no corresponding local bid!");
-            require(localChallengedBid.timestampOfRelayed + 4 hours > block.timestamp, "DstSpokeBridge: Time window is expired!");
-
-            if (status == OutgoingBidStatus.Bought &&
-                localChallengedBid.receiver == receiver &&
-                localChallengedBid.tokenId == tokenId &&
-                localChallengedBid.remoteErc721Contract == localContract &&
-                localChallengedBid.relayer == relayer) {
+            if (_proof.status == uint8(OutgoingBidStatus.Bought) &&
+                localChallengedBid.receiver == _proof.receiver &&
+                tokenId == _proof.tokenId &&
+                erc721Contract == _proof.erc721Contract &&
+                relayer == _proof.relayer) {
                 // False challenging
+                if (!_isCurrentState) {
+                    // The outgoing bid could be proved malicious since the record was committed
+                    return ProofResult.FalseChallenge;
+                }
+
+                emit ProofReceived(bidId, true);
+
                 localChallengedBid.status = IncomingBidStatus.Relayed;
-                relayers[localChallengedBid.relayer].status = RelayerStatus.Active;
-                challengedIncomingBids[bidId].status = ChallengeStatus.None;
+                relayers[relayer].status = RelayerStatus.Active;
+                challenge.status = ChallengeStatus.None;
+
+                emit ChallengeRejected(bidId, false);
+
+                return ProofResult.Rejected;
             } else {
+                emit ProofReceived(bidId, true);
+
                 // Proved malicious bid(behavior)
                 localChallengedBid.status = IncomingBidStatus.Malicious;
-                relayers[localChallengedBid.relayer].status = RelayerStatus.Malicious;
+                relayers[relayer].status = RelayerStatus.Malicious;
 
                 // Burning the wrong minted token
-                IWrappedERC721(localChallengedBid.remoteErc721Contract).burn(localChallengedBid.tokenId);
+                IWrappedERC721(erc721Contract).burn(tokenId);
 
                 // Dealing with the challenger
-                if (challengedIncomingBids[bidId].status == ChallengeStatus.Challenged) {
-                    incomingChallengeRewards[bidId].challenger = challengedIncomingBids[bidId].challenger;
-                    incomingChallengeRewards[bidId].amount = CHALLENGE_AMOUNT + STAKE_AMOUNT / 4;
+                address challenger = challenge.challenger;
+                if (challenge.status == ChallengeStatus.Challenged) {
+                    incomingChallengeRewards[bidId] = Reward({
+                        challenger:challenger,
+                        amount:SafeCast.toUint96(CHALLENGE_AMOUNT + STAKE_AMOUNT / 4)
+                    });
                 }
-                challengedIncomingBids[bidId].status = ChallengeStatus.Proved;
+                challenge.status = ChallengeStatus.Proved;
+
+                emit RelayerSlashed(relayer, bidId);
+                emit ChallengeProved(bidId, false, challenger);
+
+                return ProofResult.Proved;
             }
         } else {
             // On the dest chain during burning(no relaying), revert burning
-            (
-                uint256 bidId,
-                IncomingBidStatus status,
-                address receiver,
-                uint256 tokenId,
-                address localContract,
-                address relayer,
-                address challenger
-            ) = abi.decode(bidBytes, (uint256, IncomingBidStatus, address, uint256, address, address, address));
-
-            OutgoingBid memory localChallengedBid = outgoingBids[bidId];
-
-            require(localChallengedBid.status != OutgoingBidStatus.None, "DstSpokeBrdige: There is no corresponding local bid!");
-            require(localChallengedBid.timestampOfBought + 4 hours < block.timestamp, "DstSpokeBridge: Time window is not expired!");
-
-            if (status == IncomingBidStatus.Relayed &&
-                localChallengedBid.receiver == receiver &&
-                localChallengedBid.tokenId == tokenId &&
-                localChallengedBid.localErc721Contract == localContract &&
-                localChallengedBid.buyer == relayer
+            OutgoingBid storage localChallengedBid = outgoingBids[bidId];
+
+            // Only the burned token of a bought bid can be minted back, so a replayed proof does not revert
+            // the other proofs of the message
+            if (localChallengedBid.status != OutgoingBidStatus.Bought) {
+                return ProofResult.NoLocalBid;
+            }
+            if (localChallengedBid.timestampOfBought + CHALLENGE_PERIOD >= block.timestamp) {
+                return ProofResult.TimeWindowNotExpired;
+            }
+
+            address buyer = localChallengedBid.buyer;
+            uint256 tokenId = localChallengedBid.tokenId;
+            address erc721Contract = localChallengedBid.localErc721Contract;
+
+            // The source side sets the relayed bid to Unlocked when its receiver claims the token
+            if ((_proof.status == uint8(IncomingBidStatus.Relayed) ||
+                    _proof.status == uint8(IncomingBidStatus.Unlocked)) &&
+                localChallengedBid.receiver == _proof.receiver &&
+                tokenId == _proof.tokenId &&
+                erc721Contract == _proof.erc721Contract &&
+                buyer == _proof.relayer
             ) {
                 // False challenging
-                require(false, "DstSpokeBridge: False challenging!");
+                return ProofResult.FalseChallenge;
             } else {
+                emit ProofReceived(bidId, false);
+
+                // The fields are cleared by `_finalizeMaliciousOutgoingBid`
+                address maker = localChallengedBid.maker;
+
                 // Proved malicious bid(behavior)
-                localChallengedBid.status = OutgoingBidStatus.Malicious;
-                relayers[localChallengedBid.buyer].status = RelayerStatus.Malicious;
+                relayers[buyer].status = RelayerStatus.Malicious;
+                _finalizeMaliciousOutgoingBid(bidId);
 
                 // Minting the wrong burned token
-                IWrappedERC721(localChallengedBid.localErc721Contract).mint(
-                    localChallengedBid.maker, localChallengedBid.tokenId);
+                IWrappedERC721(erc721Contract).mint(maker, tokenId);
 
-                outgoingChallengeRewards[bidId].challenger = challenger;
-                outgoingChallengeRewards[bidId].amount = STAKE_AMOUNT / 4;
+                outgoingChallengeRewards[bidId] = Reward({
+                    challenger:_proof.challenger,
+                    amount:SafeCast.toUint96(STAKE_AMOUNT / 4)
+                });
 
                 challengedIncomingBids[bidId].status = ChallengeStatus.Proved;
-            }
-        }
-    }
 
-    function minting(
-        uint256 _bidId,
-        address _to,
-        uint256 _tokenId,
-        address _erc721Contract
-    )  public override onlyActiveRelayer {
-        require(incomingBids[_bidId].status == IncomingBidStatus.None);
+                emit RelayerSlashed(buyer, bidId);
+                emit ChallengeProved(bidId, true, _proof.challenger);
 
-        IWrappedERC721(_erc721Contract).mint(_to, _tokenId);
-
-        incomingBids[_bidId] = IncomingBid({
-            outgoingId:0,
-            status:IncomingBidStatus.Relayed,
-            receiver:_to,
-            tokenId:_tokenId,
-            remoteErc721Contract:_erc721Contract,
-            timestampOfRelayed:block.timestamp,
-            relayer:_msgSender()
-        });
+                return ProofResult.Proved;
+            }
+        }
     }
-}
\ No newline at end of file
+}
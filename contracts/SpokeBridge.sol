@@ -3,15 +3,24 @@ pragma solidity >=0.4.22 <0.9.0;
 
 import {ISpokeBridge} from "./interfaces/ISpokeBridge.sol";
 
+import {BidQueue} from "./libraries/BidQueue.sol";
+import {MerkleTree} from "./libraries/MerkleTree.sol";
+import {ProofCodec} from "./libraries/ProofCodec.sol";
+
 import {Ownable} from "@openzeppelin/contracts/access/Ownable.sol";
 import {Counters} from "@openzeppelin/contracts/utils/Counters.sol";
+import {SafeCast} from "@openzeppelin/contracts/utils/math/SafeCast.sol";
 
 /**
  * @notice This abstract contract is the common base class for src and dst bridges.
  * The src and dst bridges have lots of common functionalities.
+ * The checks revert with strings instead of custom errors: the tests, the clients and the model match on
+ * the messages, and a string costs gas only at the deployment and on the reverting path, not in a successful call.
  */
 abstract contract SpokeBridge is ISpokeBridge, Ownable {
     using Counters for Counters.Counter;
+    using BidQueue for BidQueue.Queue;
+    using MerkleTree for MerkleTree.Tree;
 
     // FIXME outgoing and incoming bid are different a little bit on dst and src sides
     enum OutgoingBidStatus {
@@ -31,30 +40,41 @@ abstract contract SpokeBridge is ISpokeBridge, Ownable {
         Unlocked // it is used only on src
     }
 
+    /**
+     * @dev The fields are ordered to be packed into as few storage slots as possible:
+     *      [maker, fee], [receiver, collectionId], [localErc721Contract],
+     *      [buyer, timestampOfBought, status], [tokenId].
+     *      `buyBid` updates only the slot of the buyer.
+     */
     struct OutgoingBid {
-        OutgoingBidStatus status;
-        uint256 fee;
         // the original owner
         address maker;
+        uint96 fee;
         // the new owner
         address receiver;
-        uint256 tokenId;
+        // the id of the pair of the local and the remote contract, it is not relevant on the dst side
+        uint96 collectionId;
         address localErc721Contract;
-        address remoteErc721Contract; // it is not relevant on the dst side
-        uint256 timestampOfBought;
         // the relayer
         address buyer;
+        uint40 timestampOfBought;
+        OutgoingBidStatus status;
+        uint256 tokenId;
     }
 
+    /**
+     * @dev The fields are packed into the storage slots:
+     *      [receiver, outgoingId], [remoteErc721Contract], [relayer, timestampOfRelayed, status], [tokenId].
+     */
     struct IncomingBid {
-        uint256 outgoingId; // it is not relevant on the dst side
-        IncomingBidStatus status;
         address receiver;
-        uint256 tokenId;
+        uint96 outgoingId; // it is not relevant on the dst side
         // it is always an address on the dst chain
         address remoteErc721Contract; // it is not relevant on the src side
-        uint256 timestampOfRelayed;
         address relayer;
+        uint40 timestampOfRelayed;
+        IncomingBidStatus status;
+        uint256 tokenId;
     }
 
     enum RelayerStatus {
@@ -67,9 +87,9 @@ abstract contract SpokeBridge is ISpokeBridge, Ownable {
 
     struct Relayer {
         RelayerStatus status;
-        uint dateOfUndeposited;
+        uint40 dateOfUndeposited;
         // TODO use versioning chain for managing bridge interactions
-        uint256 stakedAmount;
+        uint96 stakedAmount;
     }
 
     /**
@@ -84,15 +104,52 @@ abstract contract SpokeBridge is ISpokeBridge, Ownable {
         Proved
     }
 
+    /**
+     * @dev Outcome of a received proof:
+     *      0 - the challenge is proved, the relayer is slashed
+     *      1 - the challenge is rejected, the relayer is active again
+     *      2 - there is no corresponding local bid
+     *      3 - the time window of the challenge is expired
+     *      4 - the time window of the relaying is not expired yet
+     *      5 - the proof does not prove anything, the relayer did its job
+     *      6 - the proof of a batch reverted, e.g. the maker contract rejected its token, nothing is changed
+     */
+    enum ProofResult {
+        Proved,
+        Rejected,
+        NoLocalBid,
+        TimeWindowExpired,
+        TimeWindowNotExpired,
+        FalseChallenge,
+        Reverted
+    }
+
     struct Challenge {
         address challenger;
         ChallengeStatus status;
     }
 
+    /**
+     * @dev The claimed rewards are deleted, so the challenger is zero after claiming.
+     */
     struct Reward {
         address challenger;
-        uint256 amount;
-        bool isClaimed;
+        uint96 amount;
+    }
+
+    /**
+     * @dev Everything that belongs to a bid id, returned by `getBidSnapshot`.
+     */
+    struct BidSnapshot {
+        OutgoingBid outgoingBid;
+        IncomingBid incomingBid;
+        Challenge challenge;
+        Reward outgoingChallengeReward;
+        Reward incomingChallengeReward;
+        // the relayer who bought the outgoing bid
+        Relayer buyer;
+        // the relayer who relayed the incoming bid
+        Relayer relayer;
     }
 
     mapping(address => Relayer) public relayers;
@@ -105,21 +162,51 @@ abstract contract SpokeBridge is ISpokeBridge, Ownable {
     mapping(uint256 => Reward) public incomingChallengeRewards;
     mapping(uint256 => Reward) public outgoingChallengeRewards;
 
+    // outgoing bids in Created state, in the order of creation
+    BidQueue.Queue internal openBids;
+
+    // the records of the bought outgoing bids and the relayed incoming bids, see `_commitBid`
+    MerkleTree.Tree internal bidTree;
+
+    // the bids are appended to the bid tree only when the owner turned it on
+    bool public isCommittingBids;
+
+    // the roots of the bid tree of the other side
+    mapping(bytes32 => bool) public remoteRoots;
+
     uint256 public immutable STAKE_AMOUNT;
 
     uint256 public immutable CHALLENGE_AMOUNT;
 
     uint256 public immutable TIME_LIMIT_OF_UNDEPOSIT;
 
+    // the length of the window in which a relayed bid can be challenged
+    uint256 public immutable CHALLENGE_PERIOD;
+
     Counters.Counter public id;
 
     address public immutable HUB;
 
-    constructor(address _hub) {
+    // the range views return at most this many bids, so an `eth_call` cannot run out of gas or memory
+    uint256 public constant MAX_PAGE_SIZE = 500;
+
+    // the gas of a proof of a batch, a receiver hook of a maker cannot use up the gas of the whole batch
+    uint256 public constant MAX_PROOF_GAS = 500000;
+
+    constructor(
+        address _hub,
+        uint256 _challengePeriod,
+        uint256 _stakeAmount,
+        uint256 _challengeAmount,
+        uint256 _timeLimitOfUndeposit
+    ) {
+        require(_challengePeriod > 0, "SpokeBridge: challenge period is zero!");
+
         HUB = _hub;
-        STAKE_AMOUNT = 20 ether;
-        CHALLENGE_AMOUNT = 10 ether;
-        TIME_LIMIT_OF_UNDEPOSIT = 2 days;
+        CHALLENGE_PERIOD = _challengePeriod;
+        STAKE_AMOUNT = _stakeAmount;
+        CHALLENGE_AMOUNT = _challengeAmount;
+        TIME_LIMIT_OF_UNDEPOSIT = _timeLimitOfUndeposit;
     }
 
     modifier onlyActiveRelayer() {
@@ -139,61 +226,254 @@ abstract contract SpokeBridge is ISpokeBridge, Ownable {
     }
 
     function buyBid(uint256 _bidId) public virtual override onlyActiveRelayer() {
-        require(outgoingBids[_bidId].status == OutgoingBidStatus.Created,
-            "SpokeBridge: bid does not have Created state");
-        outgoingBids[_bidId].status = OutgoingBidStatus.Bought;
-        outgoingBids[_bidId].buyer = _msgSender();
-        outgoingBids[_bidId].timestampOfBought = block.timestamp;
+        uint256 fee = _buyBid(_bidId);
 
-        (bool isSent,) = _msgSender().call{value: outgoingBids[_bidId].fee}("");
+        (bool isSent,) = _msgSender().call{value: fee}("");
         require(isSent, "Failed to send Ether");
     }
 
+    function buyBids(uint256[] calldata _bidIds) public virtual override onlyActiveRelayer() {
+        require(_bidIds.length > 0, "SpokeBridge: there is no bid to buy!");
+
+        uint256 fees;
+        for (uint256 i = 0; i < _bidIds.length; ++i) {
+            fees += _buyBid(_bidIds[i]);
+        }
+
+        // The fees of the whole batch are paid out at once
+        (bool isSent,) = _msgSender().call{value: fees}("");
+        require(isSent, "Failed to send Ether");
+    }
+
+    function sendProof(bool _isOutgoingBid, uint256 _bidId) public override {
+        _sendMessage(_encodeProof(_isOutgoingBid, _bidId));
+    }
+
+    function sendProofs(bool[] calldata _isOutgoingBids, uint256[] calldata _bidIds) public override {
+        require(_bidIds.length > 0, "SpokeBridge: there is no proof to send!");
+        require(_isOutgoingBids.length == _bidIds.length, "SpokeBridge: array lengths are not equal!");
+
+        // The proofs are concatenated, their headers determine their lengths
+        bytes memory data;
+        for (uint256 i = 0; i < _bidIds.length; ++i) {
+            data = bytes.concat(data, _encodeProof(_isOutgoingBids[i], _bidIds[i]));
+        }
+
+        _sendMessages(data);
+    }
+
+    /**
+     * @notice Every proof of the batch is processed independently, a failing one does not revert the others.
+     * The outcomes are emitted in `ProofProcessed` events. A proof which reverts, e.g. because the receiver
+     * hook of a maker contract rejects its token, is rolled back alone and its result is `Reverted`.
+     */
+    function receiveProofs(bytes memory _proofs) public override onlyHub {
+        uint256 offset;
+        while (offset < _proofs.length) {
+            ProofCodec.Proof memory proof;
+            (proof, offset) = ProofCodec.decodeAt(_proofs, offset);
+
+            ProofResult result;
+            try this.receiveProofEntry{gas: MAX_PROOF_GAS}(proof) returns (ProofResult entryResult) {
+                result = entryResult;
+            } catch {
+                result = ProofResult.Reverted;
+            }
+
+            emit ProofProcessed(proof.bidId, proof.isOutgoingBid, uint8(result));
+        }
+    }
+
+    /**
+     * @dev A proof of `receiveProofs` in its own call frame, it can be called only by the bridge itself.
+     */
+    function receiveProofEntry(ProofCodec.Proof memory _proof) external returns (ProofResult) {
+        require(_msgSender() == address(this), "SpokeBridge: caller is not the bridge!");
+
+        return _receiveProof(_proof, true);
+    }
+
+    /**
+     * @notice Turns the bid tree on or off. Committing a bid costs a Merkle insertion and an event on
+     * every buy and relay, so only the deployments which prove bids by `proveBids` turn it on. The
+     * bids of the time when it is off can be proved only by `sendProof`.
+     */
+    function setCommittingBids(bool _isCommittingBids) public override onlyOwner {
+        isCommittingBids = _isCommittingBids;
+    }
+
+    /**
+     * @notice Sends the root of the bid tree to the other side, so the committed bids can be proved there
+     * by `proveBids` instead of sending every proof through the hub.
+     */
+    function commitRoot() public override {
+        bytes32 root = bidTree.root();
+
+        emit RootCommitted(root, bidTree.count);
+
+        _sendRoot(root, bidTree.count);
+    }
+
+    function receiveRoot(bytes32 _root, uint256 _leafCount) public override onlyHub {
+        remoteRoots[_root] = true;
+
+        emit RootReceived(_root, _leafCount);
+    }
+
+    /**
+     * @notice Processes the committed records of the other side, `_proofs` is their concatenation and
+     * `_siblings` are their Merkle paths in the tree of `_root`. The outcomes are emitted in `ProofProcessed`
+     * events. A record is a snapshot, so it can prove that a relayer misbehaved but it cannot reject a
+     * challenge, those need a proof sent by `sendProof`.
+     */
+    function proveBids(
+        bytes32 _root,
+        bytes memory _proofs,
+        uint256[] calldata _leafIndices,
+        bytes32[32][] calldata _siblings
+    ) public override {
+        require(remoteRoots[_root], "SpokeBridge: root is not committed by the other side!");
+        require(_leafIndices.length > 0, "SpokeBridge: there is no proof to verify!");
+        require(_leafIndices.length == _siblings.length, "SpokeBridge: array lengths are not equal!");
+
+        uint256 offset;
+        for (uint256 i = 0; i < _leafIndices.length; ++i) {
+            ProofCodec.Proof memory proof;
+            (proof, offset) = ProofCodec.decodeAt(_proofs, offset);
+
+            require(MerkleTree.verify(_root, keccak256(ProofCodec.encode(proof)), _leafIndices[i], _siblings[i]),
+                "SpokeBridge: invalid inclusion proof!");
+
+            // The records have no challenger, the reward goes to the prover
+            proof.challenger = _msgSender();
+
+            ProofResult result = _receiveProof(proof, false);
+
+            emit ProofProcessed(proof.bidId, proof.isOutgoingBid, uint8(result));
+        }
+
+        require(offset == _proofs.length, "ProofCodec: invalid proof length!");
+    }
+
     function deposite() public override payable {
         require(RelayerStatus.None == relayers[_msgSender()].status, "SpokeBridge: caller cannot be a relayer!");
         require(msg.value == STAKE_AMOUNT, "SpokeBridge: msg.value is not appropriate!");
 
         relayers[_msgSender()].status = RelayerStatus.Active;
-        relayers[_msgSender()].stakedAmount = msg.value;
+        relayers[_msgSender()].stakedAmount = SafeCast.toUint96(msg.value);
+
+        emit RelayerDeposited(_msgSender(), msg.value);
     }
 
     function undeposite() public override onlyActiveRelayer {
         relayers[_msgSender()].status = RelayerStatus.Undeposited;
-        relayers[_msgSender()].dateOfUndeposited = block.timestamp;
+        relayers[_msgSender()].dateOfUndeposited = uint40(block.timestamp);
+
+        emit RelayerUndeposited(_msgSender());
     }
 
     function claimDeposite() public override onlyUndepositedRelayer {
         require(block.timestamp > relayers[_msgSender()].dateOfUndeposited + TIME_LIMIT_OF_UNDEPOSIT,
-            "SpokeBridge: 2 days is not expired from the undepositing!");
+            "SpokeBridge: the undepositing period is not expired yet!");
 
         (bool isSent,) = _msgSender().call{value: STAKE_AMOUNT}("");
         require(isSent, "Failed to send Ether");
 
-        relayers[_msgSender()].status = RelayerStatus.None;
+        // Deleting the whole record refunds its slot, None is the default status
+        delete relayers[_msgSender()];
+
+        emit DepositClaimed(_msgSender(), STAKE_AMOUNT);
     }
 
     function claimChallengeReward(uint256 _challengeId, bool _isOutgoingBid) public override {
-        if (_isOutgoingBid) {
-            require(!outgoingChallengeRewards[_challengeId].isClaimed, "SpokeBridge: reward is already claimed!");
-            require(outgoingChallengeRewards[_challengeId].challenger == _msgSender(),
-                "SpokeBridge: challenger is not the sender!");
+        uint256 amount = _claimChallengeReward(_challengeId, _isOutgoingBid);
 
-            outgoingChallengeRewards[_challengeId].isClaimed = true;
+        (bool isSent,) = _msgSender().call{value: amount}("");
+        require(isSent, "Failed to send Ether");
+    }
 
-            (bool isSent,) = _msgSender().call{value: outgoingChallengeRewards[_challengeId].amount}("");
-            require(isSent, "Failed to send Ether");
-        } else {
-            require(!incomingChallengeRewards[_challengeId].isClaimed, "SpokeBridge: reward is already claimed!");
-            require(incomingChallengeRewards[_challengeId].challenger == _msgSender(),
-                "SpokeBridge: challenger is not the sender!");
-
-            incomingChallengeRewards[_challengeId].isClaimed = true;
-            
-            (bool isSent,) = _msgSender().call{value: incomingChallengeRewards[_challengeId].amount}("");
-            require(isSent, "Failed to send Ether");
+    function claimChallengeRewards(uint256[] calldata _challengeIds, bool[] calldata _isOutgoingBids) public override {
+        require(_challengeIds.length > 0, "SpokeBridge: there is no reward to claim!");
+        require(_challengeIds.length == _isOutgoingBids.length, "SpokeBridge: array lengths are not equal!");
+
+        uint256 amount;
+        for (uint256 i = 0; i < _challengeIds.length; ++i) {
+            amount += _claimChallengeReward(_challengeIds[i], _isOutgoingBids[i]);
+        }
+
+        // The rewards of the whole batch are paid out at once
+        (bool isSent,) = _msgSender().call{value: amount}("");
+        require(isSent, "Failed to send Ether");
+    }
+
+    /**
+     * @dev Returns at most `_count` outgoing bids starting from `_fromId`. The range is cut at the last bid
+     *      and at `MAX_PAGE_SIZE` bids.
+     */
+    function getOutgoingBids(uint256 _fromId, uint256 _count) public view returns (OutgoingBid[] memory bids) {
+        uint256 lastId = id.current();
+        if (_fromId >= lastId) {
+            return bids;
+        }
+        if (_count > lastId - _fromId) {
+            _count = lastId - _fromId;
+        }
+        if (_count > MAX_PAGE_SIZE) {
+            _count = MAX_PAGE_SIZE;
+        }
+
+        bids = new OutgoingBid[](_count);
+        for (uint256 i = 0; i < _count; ++i) {
+            bids[i] = outgoingBids[_fromId + i];
         }
     }
 
+    /**
+     * @dev Returns at most `_count` incoming bids starting from `_fromId`, the range is cut at `MAX_PAGE_SIZE`
+     *      bids. The ids of the incoming bids are set by the other side, so the bids which are not relayed
+     *      yet are returned with None status.
+     */
+    function getIncomingBids(uint256 _fromId, uint256 _count) public view returns (IncomingBid[] memory bids) {
+        if (_count > MAX_PAGE_SIZE) {
+            _count = MAX_PAGE_SIZE;
+        }
+
+        bids = new IncomingBid[](_count);
+        for (uint256 i = 0; i < _count; ++i) {
+            bids[i] = incomingBids[_fromId + i];
+        }
+    }
+
+    /**
+     * @dev Returns at most `_count` bids in Created state, the oldest first. Pass zero as `_cursor` for the
+     *      first page and the returned cursor for the next one. The returned cursor is zero at the end.
+     */
+    function getOpenBids(uint256 _cursor, uint256 _count) public view returns (uint256[] memory, uint256) {
+        return openBids.page(_cursor, _count);
+    }
+
+    function getOpenBidCount() public view returns (uint256) {
+        return openBids.length;
+    }
+
+    function getRoot() public view returns (bytes32) {
+        return bidTree.root();
+    }
+
+    function getLeafCount() public view returns (uint256) {
+        return bidTree.count;
+    }
+
+    function getBidSnapshot(uint256 _bidId) public view returns (BidSnapshot memory snapshot) {
+        snapshot.outgoingBid = outgoingBids[_bidId];
+        snapshot.incomingBid = incomingBids[_bidId];
+        snapshot.challenge = challengedIncomingBids[_bidId];
+        snapshot.outgoingChallengeReward = outgoingChallengeRewards[_bidId];
+        snapshot.incomingChallengeReward = incomingChallengeRewards[_bidId];
+        snapshot.buyer = relayers[snapshot.outgoingBid.buyer];
+        snapshot.relayer = relayers[snapshot.incomingBid.relayer];
+    }
+
     /**
      * Always returns `IERC721Receiver.onERC721Received.selector`.
      */
@@ -201,21 +481,117 @@ abstract contract SpokeBridge is ISpokeBridge, Ownable {
         return this.onERC721Received.selector;
     }
 
+    function _buyBid(uint256 _bidId) internal returns (uint256 fee) {
+        OutgoingBid storage bid = outgoingBids[_bidId];
+
+        require(bid.status == OutgoingBidStatus.Created, "SpokeBridge: bid does not have Created state");
+        // The three fields share a slot
+        bid.buyer = _msgSender();
+        bid.timestampOfBought = uint40(block.timestamp);
+        bid.status = OutgoingBidStatus.Bought;
+        fee = bid.fee;
+
+        openBids.remove(_bidId);
+
+        emit BidBought(_msgSender(), _bidId);
+
+        _commitBid(true, _bidId);
+    }
+
+    /**
+     * @dev Appends the current record of a bid to the bid tree. It is called when an outgoing bid is bought
+     *      and when an incoming bid is relayed, these records cannot change later, only the status can.
+     *      Nothing is committed while `isCommittingBids` is off.
+     */
+    function _commitBid(bool _isOutgoingBid, uint256 _bidId) internal {
+        if (!isCommittingBids) {
+            return;
+        }
+
+        bytes memory record = ProofCodec.encode(_toProof(_isOutgoingBid, _bidId));
+        uint256 leafIndex = bidTree.insert(keccak256(record));
+
+        emit BidCommitted(_bidId, _isOutgoingBid, leafIndex, record);
+    }
+
+    /**
+     * @dev Keeps only the buyer, the timestamp and the status of a malicious outgoing bid. The other side
+     *      proves its relaying malicious by the status alone, so the other fields are not needed anymore.
+     */
+    function _finalizeMaliciousOutgoingBid(uint256 _bidId) internal {
+        OutgoingBid storage bid = outgoingBids[_bidId];
+
+        bid.status = OutgoingBidStatus.Malicious;
+
+        delete bid.maker;
+        delete bid.fee;
+        delete bid.receiver;
+        delete bid.collectionId;
+        delete bid.localErc721Contract;
+        delete bid.tokenId;
+    }
+
+    /**
+     * @dev Deletes the reward and returns its amount, the caller pays it out.
+     */
+    function _claimChallengeReward(uint256 _challengeId, bool _isOutgoingBid) internal returns (uint256) {
+        Reward memory reward;
+        if (_isOutgoingBid) {
+            reward = outgoingChallengeRewards[_challengeId];
+            require(reward.challenger == _msgSender(), "SpokeBridge: challenger is not the sender!");
+
+            delete outgoingChallengeRewards[_challengeId];
+        } else {
+            reward = incomingChallengeRewards[_challengeId];
+            require(reward.challenger == _msgSender(), "SpokeBridge: challenger is not the sender!");
+
+            delete incomingChallengeRewards[_challengeId];
+            // The challenge is over, the bid is not Relayed anymore so it cannot be challenged again
+            delete challengedIncomingBids[_challengeId];
+        }
+
+        emit ChallengeRewardClaimed(_msgSender(), _challengeId, _isOutgoingBid, reward.amount);
+
+        return reward.amount;
+    }
+
     function _sendMessage(bytes memory _data) internal virtual;
 
+    function _sendMessages(bytes memory _data) internal virtual;
+
+    function _sendRoot(bytes32 _root, uint256 _leafCount) internal virtual;
+
+    /**
+     * @dev Returns the local state of a bid as a proof without challenger.
+     */
+    function _toProof(bool _isOutgoingBid, uint256 _bidId) internal view virtual returns (ProofCodec.Proof memory);
+
+    function _encodeProof(bool _isOutgoingBid, uint256 _bidId) internal virtual returns (bytes memory);
+
+    /**
+     * @dev `_isCurrentState` is false for the committed records, those cannot reject a challenge.
+     */
+    function _receiveProof(ProofCodec.Proof memory _proof, bool _isCurrentState) internal virtual returns (ProofResult);
+
     function _getCrossMessageSender() internal virtual returns (address);
 
     function _challengeUnlocking(uint256 _bidId) internal {
+        IncomingBid storage bid = incomingBids[_bidId];
+        Challenge storage challenge = challengedIncomingBids[_bidId];
+
         require(msg.value == CHALLENGE_AMOUNT, "SpokeBridge: No enough amount of ETH to stake!");
-        require(incomingBids[_bidId].status == IncomingBidStatus.Relayed, "SpokeBridge: Corresponding incoming bid status is not relayed!");
-        require(incomingBids[_bidId].timestampOfRelayed + 4 hours > block.timestamp, "SpokeBridge: The dispute period is expired!");
-        require(challengedIncomingBids[_bidId].status == ChallengeStatus.None, "SpokeBridge: bid is already challenged!");
+        require(bid.status == IncomingBidStatus.Relayed, "SpokeBridge: Corresponding incoming bid status is not relayed!");
+        require(bid.timestampOfRelayed + CHALLENGE_PERIOD > block.timestamp, "SpokeBridge: The dispute period is expired!");
+        require(challenge.status == ChallengeStatus.None, "SpokeBridge: bid is already challenged!");
+
+        bid.status = IncomingBidStatus.Challenged;
 
-        incomingBids[_bidId].status = IncomingBidStatus.Challenged;
+        challenge.challenger = _msgSender();
+        challenge.status = ChallengeStatus.Challenged;
 
-        challengedIncomingBids[_bidId].challenger = _msgSender();
-        challengedIncomingBids[_bidId].status = ChallengeStatus.Challenged;
+        address relayer = bid.relayer;
+        relayers[relayer].status = RelayerStatus.Challenged;
 
-        relayers[incomingBids[_bidId].relayer].status = RelayerStatus.Challenged;
+        emit BidChallenged(_msgSender(), relayer, _bidId);
     }
 }
\ No newline at end of file
@@ -6,15 +6,35 @@ import {ISrcSpokeBridge} from "./interfaces/ISrcSpokeBridge.sol";
 
 import {SpokeBridge} from "./SpokeBridge.sol";
 
+import {BidQueue} from "./libraries/BidQueue.sol";
+import {ProofCodec} from "./libraries/ProofCodec.sol";
+
 import {IERC721} from "@openzeppelin/contracts/token/ERC721/IERC721.sol";
 import {Counters} from "@openzeppelin/contracts/utils/Counters.sol";
+import {SafeCast} from "@openzeppelin/contracts/utils/math/SafeCast.sol";
 
 abstract contract SrcSpokeBridge is ISrcSpokeBridge, SpokeBridge {
     using Counters for Counters.Counter;
+    using BidQueue for BidQueue.Queue;
 
     address public contractMap;
 
-    constructor(address _contractMap, address _hub) SpokeBridge(_hub) {
+    // the ids of the registered local contracts, zero means that the contract is not registered yet
+    mapping(address => uint96) public collectionIds;
+
+    // the remote contracts of the registered collections
+    mapping(uint96 => address) public remoteErc721Contracts;
+
+    uint96 public collectionCount;
+
+    constructor(
+        address _contractMap,
+        address _hub,
+        uint256 _challengePeriod,
+        uint256 _stakeAmount,
+        uint256 _challengeAmount,
+        uint256 _timeLimitOfUndeposit
+    ) SpokeBridge(_hub, _challengePeriod, _stakeAmount, _challengeAmount, _timeLimitOfUndeposit) {
         contractMap = _contractMap;
     }
 
@@ -24,182 +44,341 @@ abstract contract SrcSpokeBridge is ISrcSpokeBridge, SpokeBridge {
         address _erc721Contract) public override payable {
         require(msg.value > 0, "SrcSpokeBridge: there is no fee for relayers!");
 
+        _createBid(_receiver, _tokenId, _erc721Contract, _getCollectionId(_erc721Contract), msg.value);
+    }
+
+    function createBids(
+        address _receiver,
+        uint256[] calldata _tokenIds,
+        address _erc721Contract) public override payable {
+        uint256 count = _tokenIds.length;
+        require(count > 0, "SrcSpokeBridge: there is no token to bridge!");
+        require(msg.value >= count, "SrcSpokeBridge: there is no fee for relayers!");
+
+        // The collection is the same for every bid of the batch
+        uint96 collectionId = _getCollectionId(_erc721Contract);
+        uint256 fee = msg.value / count;
+
+        for (uint256 i = 0; i < count; ++i) {
+            // The last bid gets the remainder of the division
+            _createBid(
+                _receiver,
+                _tokenIds[i],
+                _erc721Contract,
+                collectionId,
+                i == count - 1 ? msg.value - fee * (count - 1) : fee
+            );
+        }
+    }
+
+    /**
+     * @notice Copies the pairs of `_erc721Contracts` from the contract map. The pairs of the map cannot
+     * change, so anyone can register them. `createBid` registers the unregistered contracts as well.
+     */
+    function registerCollections(address[] calldata _erc721Contracts) public override {
+        require(_erc721Contracts.length > 0, "SrcSpokeBridge: there is no contract to register!");
+
+        for (uint256 i = 0; i < _erc721Contracts.length; ++i) {
+            _getCollectionId(_erc721Contracts[i]);
+        }
+    }
+
+    function challengeUnlocking(uint256 _bidId) public override payable {
+        super._challengeUnlocking(_bidId);
+    }
+
+    function receiveProof(bytes memory _proof) public override onlyHub {
+        ProofResult result = _receiveProof(ProofCodec.decode(_proof), true);
+
+        require(result != ProofResult.NoLocalBid, "SrcSpokeBrdige: There is no corresponding local bid!");
+        require(result != ProofResult.TimeWindowExpired, "SrcSpokeBridge: Time window is expired!");
+        require(result != ProofResult.TimeWindowNotExpired, "SrcSpokeBridge: Time window is not expired!");
+        require(result != ProofResult.FalseChallenge, "SrcSpokeBridge: False challenging!");
+    }
+
+    function unlocking(
+        uint256 _lockingBidId,
+        uint256 _bidId,
+        address _to
+    )  public override onlyActiveRelayer {
+        OutgoingBid storage outgoingBid = outgoingBids[_lockingBidId];
+
+        require(outgoingBid.status == OutgoingBidStatus.Bought, "SrcSpokeBridge: the outgoing bid is not bought!");
+        require(incomingBids[_bidId].status == IncomingBidStatus.None, "SrcSpokeBridge: there is an incoming bid with the same id!");
+        require(outgoingBid.timestampOfBought + CHALLENGE_PERIOD < block.timestamp,
+            "SrcSpokeBridge: the challenging period is not expired yet!");
+
+        outgoingBid.status = OutgoingBidStatus.Unlocked;
+
+        address erc721Contract = outgoingBid.localErc721Contract;
+        uint256 tokenId = outgoingBid.tokenId;
+
+        // Every slot is written once
+        incomingBids[_bidId] = IncomingBid({
+            outgoingId:SafeCast.toUint96(_lockingBidId),
+            status:IncomingBidStatus.Relayed,
+            receiver:_to,
+            tokenId:tokenId,
+            remoteErc721Contract:erc721Contract,
+            timestampOfRelayed:uint40(block.timestamp),
+            relayer:_msgSender()
+        });
+
+        emit BidUnlocked(_msgSender(), _lockingBidId);
+        emit BidRelayed(_bidId, _msgSender(), _to, erc721Contract, tokenId);
+
+        _commitBid(false, _bidId);
+    }
+
+    function claimNFT(uint256 _incomingBidId) external override {
+        _claimNFT(_incomingBidId);
+    }
+
+    /**
+     * @dev The tokens are transferred one by one, the original contracts are not expected to have batch
+     *      transfers.
+     */
+    function claimNFTs(uint256[] calldata _incomingBidIds) external override {
+        require(_incomingBidIds.length > 0, "SrcSpokeBridge: there is no NFT to claim!");
+
+        for (uint256 i = 0; i < _incomingBidIds.length; ++i) {
+            _claimNFT(_incomingBidIds[i]);
+        }
+    }
+
+    function _claimNFT(uint256 _incomingBidId) internal {
+        IncomingBid storage bid = incomingBids[_incomingBidId];
+
+        require(bid.status == IncomingBidStatus.Relayed,
+            "SrcSpokeBride: incoming bid has no Relayed state!");
+        require(bid.timestampOfRelayed + CHALLENGE_PERIOD < block.timestamp,
+            "SrcSpokeBridge: the challenging period is not expired yet!");
+        require(bid.receiver == _msgSender(), "SrcSpokeBridge: claimer is not the owner!");
+
+        // It was set on a memory copy before, so the same bid could be claimed again
+        bid.status = IncomingBidStatus.Unlocked;
+
+        uint256 tokenId = bid.tokenId;
+        OutgoingBid storage outgoingBid = outgoingBids[bid.outgoingId];
+        address erc721Contract = outgoingBid.localErc721Contract;
+
+        // The bridging is finished, only the fields which the proofs of the bid contain are kept
+        delete outgoingBid.maker;
+        delete outgoingBid.fee;
+        delete outgoingBid.localErc721Contract;
+
+        IERC721(erc721Contract).safeTransferFrom(address(this), _msgSender(), tokenId);
+
+        emit NFTUnwrapped(erc721Contract, _incomingBidId, tokenId, _msgSender());
+    }
+
+    function _createBid(
+        address _receiver,
+        uint256 _tokenId,
+        address _erc721Contract,
+        uint96 _collectionId,
+        uint256 _fee) internal {
         IERC721(_erc721Contract).safeTransferFrom(msg.sender, address(this), _tokenId);
 
         outgoingBids[id.current()] = OutgoingBid({
             status:OutgoingBidStatus.Created,
-            fee:msg.value,
+            fee:SafeCast.toUint96(_fee),
             maker:_msgSender(),
             receiver:_receiver,
             tokenId:_tokenId,
+            collectionId:_collectionId,
             localErc721Contract:_erc721Contract,
-            remoteErc721Contract:IContractMap(contractMap).getRemote(_erc721Contract),
             timestampOfBought:0,
             buyer:address(0)
         });
 
+        openBids.push(id.current());
+
+        emit BidCreated(id.current(), _msgSender(), _receiver, _erc721Contract, _tokenId, _fee, 0);
+
         id.increment();
     }
 
-    function challengeUnlocking(uint256 _bidId) public override payable {
-        super._challengeUnlocking(_bidId);
-    }
+    /**
+     * @dev Returns the id of the collection of `_erc721Contract`, it is registered at the first use.
+     */
+    function _getCollectionId(address _erc721Contract) internal returns (uint96 collectionId) {
+        collectionId = collectionIds[_erc721Contract];
+        if (collectionId != 0) {
+            return collectionId;
+        }
 
-    function sendProof(bool _isOutgoingBid, uint256 _bidId) public override {
-        if (_isOutgoingBid) {
-            OutgoingBid memory bid = outgoingBids[_bidId];
-            bytes memory data = abi.encode(
-                _bidId,
-                bid.status,
-                bid.receiver,
-                bid.tokenId,
-                bid.remoteErc721Contract,
-                bid.buyer
-            );
+        // It reverts if the contract has no pair
+        address remoteErc721Contract = IContractMap(contractMap).getRemote(_erc721Contract);
 
-            data = abi.encode(data, true);
+        collectionId = ++collectionCount;
+        collectionIds[_erc721Contract] = collectionId;
+        remoteErc721Contracts[collectionId] = remoteErc721Contract;
 
-            _sendMessage(data);
-        } else {
-            require(incomingBids[_bidId].timestampOfRelayed + 4 hours < block.timestamp,
+        emit CollectionRegistered(collectionId, _erc721Contract, remoteErc721Contract);
+    }
+
+    function _encodeProof(bool _isOutgoingBid, uint256 _bidId) internal override returns (bytes memory) {
+        ProofCodec.Proof memory proof = _toProof(_isOutgoingBid, _bidId);
+        if (!_isOutgoingBid) {
+            require(incomingBids[_bidId].timestampOfRelayed + CHALLENGE_PERIOD < block.timestamp,
                 "SrcSpokeBridge: too early to send proof!");
 
-            IncomingBid memory bid = incomingBids[_bidId];
-            bytes memory data = abi.encode(
-                _bidId,
-                bid.status,
-                bid.receiver,
-                bid.tokenId,
-                outgoingBids[bid.outgoingId].remoteErc721Contract,
-                bid.relayer,
-                _msgSender()
-            );
+            proof.challenger = _msgSender();
+        }
 
-            data = abi.encode(data, false);
+        emit ProofSent(_msgSender(), _bidId, _isOutgoingBid);
+
+        return ProofCodec.encode(proof);
+    }
 
-            _sendMessage(data);
+    function _toProof(bool _isOutgoingBid, uint256 _bidId) internal view override returns (ProofCodec.Proof memory) {
+        if (_isOutgoingBid) {
+            OutgoingBid memory bid = outgoingBids[_bidId];
+            return ProofCodec.Proof({
+                isOutgoingBid:true,
+                status:uint8(bid.status),
+                bidId:_bidId,
+                receiver:bid.receiver,
+                tokenId:bid.tokenId,
+                erc721Contract:remoteErc721Contracts[bid.collectionId],
+                relayer:bid.buyer,
+                challenger:address(0)
+            });
         }
+
+        IncomingBid memory bid = incomingBids[_bidId];
+        return ProofCodec.Proof({
+            isOutgoingBid:false,
+            status:uint8(bid.status),
+            bidId:_bidId,
+            receiver:bid.receiver,
+            tokenId:bid.tokenId,
+            erc721Contract:remoteErc721Contracts[outgoingBids[bid.outgoingId].collectionId],
+            relayer:bid.relayer,
+            challenger:address(0)
+        });
     }
 
-    function receiveProof(bytes memory _proof) public override onlyHub {
-        (bytes memory bidBytes, bool isBidOutgoing) = abi.decode(_proof, (bytes, bool));
-        if (isBidOutgoing) {
+    function _receiveProof(ProofCodec.Proof memory _proof, bool _isCurrentState) internal override returns (ProofResult) {
+        uint256 bidId = _proof.bidId;
+        if (_proof.isOutgoingBid) {
             // On the source chain during unlocking(wrong relaying), revert the incoming messsage
-            (
-                uint256 bidId,
-                OutgoingBidStatus status, // FIXME maybe it is not useful
-                address receiver,
-                uint256 tokenId,
-                address remoteContract,
-                address relayer
-            ) = abi.decode(bidBytes, (uint256, OutgoingBidStatus, address, uint256, address, address));
-
-            IncomingBid memory localChallengedBid = incomingBids[bidId];
-
-            require(localChallengedBid.status != IncomingBidStatus.None, "SrcSpokeBrdige: There is no corresponding local bid!");
-            require(localChallengedBid.timestampOfRelayed + 4 hours > block.timestamp, "SrcSpokeBridge: Time window is expired!");
-
-            if (status == OutgoingBidStatus.Bought  &&
-                localChallengedBid.receiver == receiver &&
-                localChallengedBid.tokenId == tokenId &&
-                localChallengedBid.remoteErc721Contract == remoteContract &&
-                localChallengedBid.relayer == relayer) {
+            IncomingBid storage localChallengedBid = incomingBids[bidId];
+
+            // A replayed proof of a proved bid does not revert the other proofs of the message
+            if (localChallengedBid.status == IncomingBidStatus.None ||
+                localChallengedBid.status == IncomingBidStatus.Malicious) {
+                return ProofResult.NoLocalBid;
+            }
+            if (localChallengedBid.timestampOfRelayed + CHALLENGE_PERIOD <= block.timestamp) {
+                return ProofResult.TimeWindowExpired;
+            }
+
+            address relayer = localChallengedBid.relayer;
+            Challenge storage challenge = challengedIncomingBids[bidId];
+            // The proof contains the wrapped contract of the dest chain, `remoteErc721Contract` is the original one
+            address erc721Contract = remoteErc721Contracts[outgoingBids[localChallengedBid.outgoingId].collectionId];
+
+            if (_proof.status == uint8(OutgoingBidStatus.Bought)  &&
+                localChallengedBid.receiver == _proof.receiver &&
+                localChallengedBid.tokenId == _proof.tokenId &&
+                erc721Contract == _proof.erc721Contract &&
+                relayer == _proof.relayer) {
                 // False challenging
+                if (!_isCurrentState) {
+                    // The outgoing bid could be proved malicious since the record was committed
+                    return ProofResult.FalseChallenge;
+                }
+
+                emit ProofReceived(bidId, true);
+
                 localChallengedBid.status = IncomingBidStatus.Relayed;
-                relayers[localChallengedBid.relayer].status = RelayerStatus.Active;
-                challengedIncomingBids[bidId].status = ChallengeStatus.None;
+                relayers[relayer].status = RelayerStatus.Active;
+                challenge.status = ChallengeStatus.None;
+
+                emit ChallengeRejected(bidId, false);
+
+                return ProofResult.Rejected;
             } else {
+                emit ProofReceived(bidId, true);
+
                 // Proved malicious bid(behavior)
                 localChallengedBid.status = IncomingBidStatus.Malicious;
-                relayers[localChallengedBid.relayer].status = RelayerStatus.Malicious;
+                relayers[relayer].status = RelayerStatus.Malicious;
 
-                outgoingBids[localChallengedBid.outgoingId].status = OutgoingBidStatus.Bought;
+                // The outgoing bid can be relayed again, unless its token was given back in the meantime
+                OutgoingBid storage outgoingBid = outgoingBids[localChallengedBid.outgoingId];
+                if (outgoingBid.status == OutgoingBidStatus.Unlocked) {
+                    outgoingBid.status = OutgoingBidStatus.Bought;
+                }
 
                 // Dealing with the challenger
-                if (challengedIncomingBids[bidId].status == ChallengeStatus.Challenged) {
-                    incomingChallengeRewards[bidId].challenger = challengedIncomingBids[bidId].challenger;
-                    incomingChallengeRewards[bidId].amount = CHALLENGE_AMOUNT + STAKE_AMOUNT / 4;
+                address challenger = challenge.challenger;
+                if (challenge.status == ChallengeStatus.Challenged) {
+                    incomingChallengeRewards[bidId] = Reward({
+                        challenger:challenger,
+                        amount:SafeCast.toUint96(CHALLENGE_AMOUNT + STAKE_AMOUNT / 4)
+                    });
                 }
-                challengedIncomingBids[bidId].status = ChallengeStatus.Proved;
+                challenge.status = ChallengeStatus.Proved;
+
+                emit RelayerSlashed(relayer, bidId);
+                emit ChallengeProved(bidId, false, challenger);
+
+                return ProofResult.Proved;
             }
         } else {
             // On the source chain during locking(no relaying), revert locking
-            (
-                uint256 bidId,
-                IncomingBidStatus status, // FIXME maybe not useful
-                address receiver,
-                uint256 tokenId,
-                address remoteContract,
-                address relayer,
-                address challenger
-            ) = abi.decode(bidBytes, (uint256, IncomingBidStatus, address, uint256, address, address, address));
-
-            OutgoingBid memory localChallengedBid = outgoingBids[bidId];
-
-            require(localChallengedBid.status != OutgoingBidStatus.None, "SrcSpokeBrdige: There is no corresponding local bid!");
-            require(localChallengedBid.timestampOfBought + 4 hours < block.timestamp, "SrcSpokeBridge: Time window is not expired!");
-
-            if (status != IncomingBidStatus.Malicious &&
-                localChallengedBid.receiver == receiver &&
-                localChallengedBid.tokenId == tokenId &&
-                localChallengedBid.remoteErc721Contract == remoteContract &&
-                localChallengedBid.buyer == relayer
+            OutgoingBid storage localChallengedBid = outgoingBids[bidId];
+
+            // Only a locked token can be given back, the token of a proved or claimed bid is already gone,
+            // so a replayed proof does not revert the other proofs of the message
+            if (localChallengedBid.status != OutgoingBidStatus.Bought &&
+                (localChallengedBid.status != OutgoingBidStatus.Unlocked ||
+                    localChallengedBid.localErc721Contract == address(0))) {
+                return ProofResult.NoLocalBid;
+            }
+            if (localChallengedBid.timestampOfBought + CHALLENGE_PERIOD >= block.timestamp) {
+                return ProofResult.TimeWindowNotExpired;
+            }
+
+            address buyer = localChallengedBid.buyer;
+            uint256 tokenId = localChallengedBid.tokenId;
+
+            if (_proof.status != uint8(IncomingBidStatus.Malicious) &&
+                localChallengedBid.receiver == _proof.receiver &&
+                tokenId == _proof.tokenId &&
+                remoteErc721Contracts[localChallengedBid.collectionId] == _proof.erc721Contract &&
+                buyer == _proof.relayer
             ) {
                 // False challenging
-                require(false, "SrcSpokeBridge: False challenging!");
-
+                return ProofResult.FalseChallenge;
             } else {
-                // Proved malicious bid - no relaying
-                localChallengedBid.status = OutgoingBidStatus.Malicious;
-                relayers[localChallengedBid.buyer].status = RelayerStatus.Malicious;
+                emit ProofReceived(bidId, false);
 
-                IERC721(localChallengedBid.localErc721Contract)
-                    .safeTransferFrom(address(this), localChallengedBid.maker, localChallengedBid.tokenId);
-
-                outgoingChallengeRewards[bidId].challenger = challenger;
-                outgoingChallengeRewards[bidId].amount = STAKE_AMOUNT / 4;
-
-                challengedIncomingBids[bidId].status = ChallengeStatus.Proved;
-            }
-        }
-    }
-
-    function unlocking(
-        uint256 _lockingBidId,
-        uint256 _bidId,
-        address _to
-    )  public override onlyActiveRelayer {
-        require(outgoingBids[_lockingBidId].status == OutgoingBidStatus.Bought, "SrcSpokeBridge: the outgoing bid is not bought!");
-        require(incomingBids[_bidId].status == IncomingBidStatus.None, "SrcSpokeBridge: there is an incoming bid with the same id!");
-        require(outgoingBids[_lockingBidId].timestampOfBought + 4 hours < block.timestamp,
-            "SrcSpokeBridge: the challenging period is not expired yet!");
+                // The fields are cleared by `_finalizeMaliciousOutgoingBid`
+                address maker = localChallengedBid.maker;
+                address erc721Contract = localChallengedBid.localErc721Contract;
 
-        require(IERC721(outgoingBids[_lockingBidId].localErc721Contract).ownerOf(outgoingBids[_lockingBidId].tokenId) == address(this),  "SrcSpokeBridge: there is no locked token!");
+                // Proved malicious bid - no relaying
+                relayers[buyer].status = RelayerStatus.Malicious;
+                _finalizeMaliciousOutgoingBid(bidId);
 
-        outgoingBids[_lockingBidId].status = OutgoingBidStatus.Unlocked;
+                IERC721(erc721Contract).safeTransferFrom(address(this), maker, tokenId);
 
-        incomingBids[_bidId] = IncomingBid({
-            outgoingId:_lockingBidId,
-            status:IncomingBidStatus.Relayed,
-            receiver:_to,
-            tokenId:outgoingBids[_lockingBidId].tokenId,
-            remoteErc721Contract:outgoingBids[_lockingBidId].localErc721Contract,
-            timestampOfRelayed:block.timestamp,
-            relayer:_msgSender()
-        });
-    }
+                outgoingChallengeRewards[bidId] = Reward({
+                    challenger:_proof.challenger,
+                    amount:SafeCast.toUint96(STAKE_AMOUNT / 4)
+                });
 
-    function claimNFT(uint256 _incomingBidId) external {
-        IncomingBid memory bid = incomingBids[_incomingBidId];
+                challengedIncomingBids[bidId].status = ChallengeStatus.Proved;
 
-        require(bid.status == IncomingBidStatus.Relayed,
-            "SrcSpokeBride: incoming bid has no Relayed state!");
-        require(bid.timestampOfRelayed + 4 hours < block.timestamp,
-            "SrcSpokeBridge: the challenging period is not expired yet!");
-        require(bid.receiver == _msgSender(), "SrcSpokeBridge: claimer is not the owner!");
+                emit RelayerSlashed(buyer, bidId);
+                emit ChallengeProved(bidId, true, _proof.challenger);
 
-        bid.status = IncomingBidStatus.Unlocked;
-        IERC721(outgoingBids[incomingBids[_incomingBidId].outgoingId].localErc721Contract)
-            .safeTransferFrom(address(this), _msgSender(), bid.tokenId);
+                return ProofResult.Proved;
+            }
+        }
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,63 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.4.22 <0.9.0;
+
+import {IWrappedERC721} from "./interfaces/IWrappedERC721.sol";
+import {IWrappedERC721Factory} from "./interfaces/IWrappedERC721Factory.sol";
+
+import {WrappedERC721} from "./WrappedERC721.sol";
+
+import {Clones} from "@openzeppelin/contracts/proxy/Clones.sol";
+
+/**
+ * @notice This contract deploys the wrapped contracts as EIP-1167 minimal proxies of one implementation.
+ * The address of a wrapped contract depends only on its original contract, name, symbol and owner, so it
+ * can be added to the `ContractMap` of the other chain before it is deployed.
+ */
+contract WrappedERC721Factory is IWrappedERC721Factory {
+    address public immutable IMPLEMENTATION;
+
+    constructor() {
+        IMPLEMENTATION = address(new WrappedERC721("", ""));
+    }
+
+    /**
+     * @dev Anyone can deploy, the owner is part of the salt, so nobody can take the address of a collection
+     *      with another owner.
+     */
+    function deploy(
+        address _originalErc721Contract,
+        string calldata _name,
+        string calldata _symbol,
+        address _owner
+    ) public override returns (address wrappedErc721Contract) {
+        wrappedErc721Contract = Clones.cloneDeterministic(
+            IMPLEMENTATION,
+            _getSalt(_originalErc721Contract, _name, _symbol, _owner)
+        );
+
+        IWrappedERC721(wrappedErc721Contract).initialize(_name, _symbol, _owner);
+
+        emit WrappedERC721Deployed(_originalErc721Contract, wrappedErc721Contract, _owner, _name, _symbol);
+    }
+
+    function predictAddress(
+        address _originalErc721Contract,
+        string calldata _name,
+        string calldata _symbol,
+        address _owner
+    ) public view override returns (address) {
+        return Clones.predictDeterministicAddress(
+            IMPLEMENTATION,
+            _getSalt(_originalErc721Contract, _name, _symbol, _owner)
+        );
+    }
+
+    function _getSalt(
+        address _originalErc721Contract,
+        string calldata _name,
+        string calldata _symbol,
+        address _owner
+    ) internal pure returns (bytes32) {
+        return keccak256(abi.encode(_originalErc721Contract, _name, _symbol, _owner));
+    }
+}
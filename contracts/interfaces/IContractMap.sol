@@ -9,6 +9,8 @@ interface IContractMap {
 
     function addPair(address _local, address _remote) external;
 
+    function addPairs(address[] calldata _locals, address[] calldata _remotes) external;
+
     function getRemote(address _local) external view returns (address);
 
     function getLocal(address _remote) external view returns (address);
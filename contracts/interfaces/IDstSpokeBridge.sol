@@ -3,6 +3,8 @@ pragma solidity >=0.4.22 <0.9.0;
 import {ISpokeBridge} from "./ISpokeBridge.sol";
 
 interface IDstSpokeBridge is ISpokeBridge {
+    event WrappedErc721FactorySet(address indexed factory);
+
     function createBid(
         address _receiver,
         uint256 _tokenId,
@@ -10,7 +12,32 @@ interface IDstSpokeBridge is ISpokeBridge {
         uint256 _incomingBidId
     ) external payable;
 
+    function createBids(
+        address _receiver,
+        uint256[] calldata _tokenIds,
+        address _erc721Contract,
+        uint256[] calldata _incomingBidIds
+    ) external payable;
+
     function challengeMinting(uint256 _bidId) external payable;
 
     function minting(uint256 _bidId, address _to, uint256 _tokenId, address erc721Contract) external;
+
+    function mintingWithDeployment(
+        uint256 _bidId,
+        address _to,
+        uint256 _tokenId,
+        address _originalErc721Contract,
+        string calldata _name,
+        string calldata _symbol
+    ) external;
+
+    function setWrappedErc721Factory(address _factory) external;
+
+    function mintingBatch(
+        uint256[] calldata _bidIds,
+        address[] calldata _to,
+        uint256[] calldata _tokenIds,
+        address _erc721Contract
+    ) external;
 }
\ No newline at end of file
@@ -5,7 +5,21 @@ pragma solidity >=0.4.22 <0.9.0;
  * @notice This interface sends and receives messages from the spoke bridge contracts.
  */
 interface IHub {
+    event SpokeBridgesAdded(address indexed srcContract, address indexed dstContract);
+
+    event MessageProcessed(address indexed from, address indexed to);
+
     function processMessage(bytes memory _data) external;
 
+    /**
+     * @dev Delivers a batch of proofs in one message.
+     */
+    function processMessages(bytes memory _data) external;
+
+    /**
+     * @dev Delivers the root of the bid tree of a spoke bridge.
+     */
+    function processRoot(bytes32 _root, uint256 _leafCount) external;
+
     function addSpokeBridge(address _srcContract, address _dstContract) external;
 }
\ No newline at end of file
@@ -7,23 +7,99 @@ import "@openzeppelin/contracts/token/ERC721/IERC721Receiver.sol";
  * @notice This interface will send and receive messages.
  */
 interface ISpokeBridge is IERC721Receiver {
-    // TODO defines and uses these events
-    event BidCreated();
+    /**
+     * @dev `incomingBidId` is the incoming bid of the token on the destination side, which is the locking bid
+     * of the source side that `unlocking` needs. It is always zero on the source side.
+     */
+    event BidCreated(
+        uint256 indexed bidId,
+        address indexed maker,
+        address receiver,
+        address indexed erc721Contract,
+        uint256 tokenId,
+        uint256 fee,
+        uint256 incomingBidId
+    );
 
-    event BidBought(address relayer, uint256 bidId);
+    event BidBought(address indexed relayer, uint256 indexed bidId);
 
-    event BidChallenged(address challenger, address relayer, uint256 bidId);
+    event BidRelayed(
+        uint256 indexed bidId,
+        address indexed relayer,
+        address indexed receiver,
+        address erc721Contract,
+        uint256 tokenId
+    );
 
-    event ProofSent();
+    event BidUnlocked(address indexed relayer, uint256 indexed bidId);
 
-    event NFTUnwrapped(address contractAddress, uint256 bidId, uint256 id, address owner);
+    event NFTUnwrapped(address indexed contractAddress, uint256 indexed bidId, uint256 id, address indexed owner);
+
+    event RelayerDeposited(address indexed relayer, uint256 amount);
+
+    event RelayerUndeposited(address indexed relayer);
+
+    event DepositClaimed(address indexed relayer, uint256 amount);
+
+    event RelayerSlashed(address indexed relayer, uint256 indexed bidId);
+
+    event BidChallenged(address indexed challenger, address indexed relayer, uint256 indexed bidId);
+
+    /**
+     * @dev `isOutgoingBid` is seen from the local side, the same way as in `claimChallengeReward`.
+     */
+    event ChallengeProved(uint256 indexed bidId, bool isOutgoingBid, address indexed challenger);
+
+    event ChallengeRejected(uint256 indexed bidId, bool isOutgoingBid);
+
+    event ChallengeRewardClaimed(address indexed challenger, uint256 indexed challengeId, bool isOutgoingBid, uint256 amount);
+
+    /**
+     * @dev `isOutgoingBid` is seen from the side of the sender of the proof.
+     */
+    event ProofSent(address indexed sender, uint256 indexed bidId, bool isOutgoingBid);
+
+    event ProofReceived(uint256 indexed bidId, bool isOutgoingBid);
+
+    /**
+     * @dev Emitted for every entry of a proof batch, `result` is a `SpokeBridge.ProofResult`.
+     */
+    event ProofProcessed(uint256 indexed bidId, bool isOutgoingBid, uint8 result);
+
+    /**
+     * @dev `record` is the compact proof encoding of the bid, the leaf of the bid tree is its keccak256 hash.
+     */
+    event BidCommitted(uint256 indexed bidId, bool isOutgoingBid, uint256 leafIndex, bytes record);
+
+    event RootCommitted(bytes32 indexed root, uint256 leafCount);
+
+    event RootReceived(bytes32 indexed root, uint256 leafCount);
 
     function buyBid(uint256 _bidId) external;
 
+    function buyBids(uint256[] calldata _bidIds) external;
+
     function sendProof(bool _isOutgoingBid, uint256 _bidId) external;
 
+    function sendProofs(bool[] calldata _isOutgoingBids, uint256[] calldata _bidIds) external;
+
     function receiveProof(bytes memory _proof) external;
 
+    function receiveProofs(bytes memory _proofs) external;
+
+    function setCommittingBids(bool _isCommittingBids) external;
+
+    function commitRoot() external;
+
+    function receiveRoot(bytes32 _root, uint256 _leafCount) external;
+
+    function proveBids(
+        bytes32 _root,
+        bytes memory _proofs,
+        uint256[] calldata _leafIndices,
+        bytes32[32][] calldata _siblings
+    ) external;
+
     function deposite() external payable;
 
     function undeposite() external;
@@ -31,4 +107,6 @@ interface ISpokeBridge is IERC721Receiver {
     function claimDeposite() external;
 
     function claimChallengeReward(uint256 _challengeId, bool _isOutgoingBid) external;
+
+    function claimChallengeRewards(uint256[] calldata _challengeIds, bool[] calldata _isOutgoingBids) external;
 }
\ No newline at end of file
@@ -4,11 +4,19 @@ pragma solidity >=0.4.22 <0.9.0;
 import {ISpokeBridge} from "./ISpokeBridge.sol";
 
 interface ISrcSpokeBridge is ISpokeBridge {
+    event CollectionRegistered(uint96 indexed collectionId, address indexed localErc721Contract, address remoteErc721Contract);
+
     function createBid(address _receiver, uint256 _tokenId, address _erc721Contract) external payable;
 
+    function createBids(address _receiver, uint256[] calldata _tokenIds, address _erc721Contract) external payable;
+
+    function registerCollections(address[] calldata _erc721Contracts) external;
+
     function challengeUnlocking(uint256 _bidId) external payable;
 
     function unlocking(uint256 _lockingBidId, uint256 _bidId, address _to) external;
 
     function claimNFT(uint256 _bidId) external;
+
+    function claimNFTs(uint256[] calldata _bidIds) external;
 }
\ No newline at end of file
@@ -4,7 +4,16 @@ pragma solidity >=0.4.22 <0.9.0;
 import {IERC721} from "@openzeppelin/contracts/token/ERC721/IERC721.sol";
 
 interface IWrappedERC721 is IERC721 {
+    /**
+     * @dev Sets up a clone, it can be called only once.
+     */
+    function initialize(string calldata _name, string calldata _symbol, address _owner) external;
+
     function burn(uint256 _id) external;
 
+    function burnBatch(uint256[] calldata _ids) external;
+
     function mint(address _to, uint256 _id) external;
+
+    function mintBatch(address _to, uint256[] calldata _ids) external;
 }
\ No newline at end of file
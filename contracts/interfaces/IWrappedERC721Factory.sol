@@ -0,0 +1,29 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.4.22 <0.9.0;
+
+/**
+ * @notice This interface deploys the wrapped contracts of the bridged collections.
+ */
+interface IWrappedERC721Factory {
+    event WrappedERC721Deployed(
+        address indexed originalErc721Contract,
+        address indexed wrappedErc721Contract,
+        address owner,
+        string name,
+        string symbol
+    );
+
+    function deploy(
+        address _originalErc721Contract,
+        string calldata _name,
+        string calldata _symbol,
+        address _owner
+    ) external returns (address);
+
+    function predictAddress(
+        address _originalErc721Contract,
+        string calldata _name,
+        string calldata _symbol,
+        address _owner
+    ) external view returns (address);
+}
@@ -0,0 +1,113 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.4.22 <0.9.0;
+
+import {SafeCast} from "@openzeppelin/contracts/utils/math/SafeCast.sol";
+
+/**
+ * @notice This library implements an ordered set of bid ids as a doubly linked list.
+ * Pushing and removing a bid are O(1) and the bids are kept in the order of pushing.
+ */
+library BidQueue {
+    /**
+     * @dev The nodes are keyed by the bid id plus one, so 0 marks the end of the list.
+     */
+    struct Node {
+        uint96 prev;
+        uint96 next;
+    }
+
+    struct Queue {
+        mapping(uint256 => Node) nodes;
+        uint96 head;
+        uint96 tail;
+        uint64 length;
+    }
+
+    function contains(Queue storage _queue, uint256 _bidId) internal view returns (bool) {
+        uint256 key = _bidId + 1;
+        return _queue.head == key || _queue.nodes[key].prev != 0;
+    }
+
+    function push(Queue storage _queue, uint256 _bidId) internal {
+        require(!contains(_queue, _bidId), "BidQueue: bid is already in the queue!");
+
+        uint96 key = SafeCast.toUint96(_bidId + 1);
+        uint96 tail = _queue.tail;
+
+        if (tail == 0) {
+            _queue.head = key;
+        } else {
+            _queue.nodes[tail].next = key;
+            _queue.nodes[key].prev = tail;
+        }
+
+        _queue.tail = key;
+        _queue.length += 1;
+    }
+
+    /**
+     * @dev Returns false if the bid is not in the queue.
+     */
+    function remove(Queue storage _queue, uint256 _bidId) internal returns (bool) {
+        if (!contains(_queue, _bidId)) {
+            return false;
+        }
+
+        uint256 key = _bidId + 1;
+        Node memory node = _queue.nodes[key];
+
+        if (node.prev == 0) {
+            _queue.head = node.next;
+        } else {
+            _queue.nodes[node.prev].next = node.next;
+        }
+
+        if (node.next == 0) {
+            _queue.tail = node.prev;
+        } else {
+            _queue.nodes[node.next].prev = node.prev;
+        }
+
+        delete _queue.nodes[key];
+        _queue.length -= 1;
+
+        return true;
+    }
+
+    /**
+     * @dev Returns at most `_count` bid ids starting from `_cursor`. A zero cursor starts from the oldest bid.
+     *      The returned cursor continues the iteration and it is zero at the end of the queue.
+     */
+    function page(
+        Queue storage _queue,
+        uint256 _cursor,
+        uint256 _count
+    ) internal view returns (uint256[] memory bidIds, uint256 nextCursor) {
+        require(_cursor == 0 || contains(_queue, _cursor - 1), "BidQueue: cursor is not in the queue!");
+
+        uint256 key = _cursor == 0 ? _queue.head : _cursor;
+        if (_count > _queue.length) {
+            _count = _queue.length;
+        }
+
+        bidIds = new uint256[](_count);
+
+        uint256 i = 0;
+        while (i < _count && key != 0) {
+            bidIds[i] = key - 1;
+            key = _queue.nodes[key].next;
+            ++i;
+        }
+
+        nextCursor = key;
+
+        if (i < _count) {
+            // The queue ended before the page was full
+            uint256[] memory cutBidIds = new uint256[](i);
+            for (uint256 j = 0; j < i; ++j) {
+                cutBidIds[j] = bidIds[j];
+            }
+            bidIds = cutBidIds;
+        }
+    }
+}
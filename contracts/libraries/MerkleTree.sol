@@ -0,0 +1,72 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.4.22 <0.9.0;
+
+/**
+ * @notice This library implements an append-only incremental Merkle tree with a fixed depth.
+ * Only the rightmost branch is stored, so appending a leaf and computing the root are O(depth).
+ * The empty leaves are zero and the nodes are keccak256(left, right).
+ */
+library MerkleTree {
+    uint256 internal constant DEPTH = 32;
+
+    struct Tree {
+        bytes32[32] branch;
+        uint256 count;
+    }
+
+    /**
+     * @return index The index of the inserted leaf.
+     */
+    function insert(Tree storage _tree, bytes32 _leaf) internal returns (uint256 index) {
+        index = _tree.count;
+        require(index < 2 ** DEPTH - 1, "MerkleTree: tree is full!");
+
+        uint256 size = index + 1;
+        _tree.count = size;
+
+        bytes32 node = _leaf;
+        for (uint256 i = 0; i < DEPTH; ++i) {
+            if ((size & 1) == 1) {
+                _tree.branch[i] = node;
+                return index;
+            }
+            node = keccak256(abi.encodePacked(_tree.branch[i], node));
+            size /= 2;
+        }
+
+        // unreachable, the tree is not full
+        assert(false);
+    }
+
+    function root(Tree storage _tree) internal view returns (bytes32 node) {
+        uint256 size = _tree.count;
+        bytes32 zero;
+        for (uint256 i = 0; i < DEPTH; ++i) {
+            if ((size & 1) == 1) {
+                node = keccak256(abi.encodePacked(_tree.branch[i], node));
+            } else {
+                node = keccak256(abi.encodePacked(node, zero));
+            }
+            zero = keccak256(abi.encodePacked(zero, zero));
+            size /= 2;
+        }
+    }
+
+    function verify(
+        bytes32 _root,
+        bytes32 _leaf,
+        uint256 _index,
+        bytes32[32] memory _siblings
+    ) internal pure returns (bool) {
+        bytes32 node = _leaf;
+        for (uint256 i = 0; i < DEPTH; ++i) {
+            if (((_index >> i) & 1) == 1) {
+                node = keccak256(abi.encodePacked(_siblings[i], node));
+            } else {
+                node = keccak256(abi.encodePacked(node, _siblings[i]));
+            }
+        }
+
+        return node == _root && _index < 2 ** DEPTH;
+    }
+}
@@ -0,0 +1,113 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.4.22 <0.9.0;
+
+/**
+ * @notice This library encodes the proofs sent between the spoke bridges in a tightly packed format.
+ * @dev Layout of a proof:
+ *  | header (1) | bidId (32) | receiver (20) | tokenId (32) | erc721Contract (20) | relayer (20) | challenger (20) |
+ * The challenger is only part of the proofs of incoming bids. The header holds the version in the upper
+ * four bits, the kind of the bid (1 - outgoing, 0 - incoming) in the next bit and the status of the bid
+ * in the lower three bits. A batch of proofs is the concatenation of the proofs.
+ */
+library ProofCodec {
+    uint8 internal constant VERSION = 1;
+
+    uint256 internal constant OUTGOING_PROOF_LENGTH = 125;
+    uint256 internal constant INCOMING_PROOF_LENGTH = 145;
+
+    uint8 private constant OUTGOING_FLAG = 0x08;
+    uint8 private constant STATUS_MASK = 0x07;
+
+    struct Proof {
+        bool isOutgoingBid;
+        uint8 status;
+        uint256 bidId;
+        address receiver;
+        uint256 tokenId;
+        address erc721Contract;
+        address relayer;
+        address challenger;
+    }
+
+    function encode(Proof memory _proof) internal pure returns (bytes memory) {
+        require(_proof.status <= STATUS_MASK, "ProofCodec: status does not fit in the header!");
+
+        uint8 header = (VERSION << 4) | _proof.status;
+        if (_proof.isOutgoingBid) {
+            header |= OUTGOING_FLAG;
+            return abi.encodePacked(
+                header,
+                _proof.bidId,
+                _proof.receiver,
+                _proof.tokenId,
+                _proof.erc721Contract,
+                _proof.relayer
+            );
+        }
+
+        return abi.encodePacked(
+            header,
+            _proof.bidId,
+            _proof.receiver,
+            _proof.tokenId,
+            _proof.erc721Contract,
+            _proof.relayer,
+            _proof.challenger
+        );
+    }
+
+    function decode(bytes memory _data) internal pure returns (Proof memory proof) {
+        uint256 end;
+        (proof, end) = decodeAt(_data, 0);
+
+        require(end == _data.length, "ProofCodec: invalid proof length!");
+    }
+
+    /**
+     * @dev Decodes the proof which starts at `_offset` of a batch of concatenated proofs.
+     * @return proof The decoded proof.
+     * @return next The offset of the following proof.
+     */
+    function decodeAt(bytes memory _data, uint256 _offset) internal pure returns (Proof memory proof, uint256 next) {
+        require(_data.length > _offset, "ProofCodec: invalid proof length!");
+
+        uint8 header = uint8(_data[_offset]);
+        require(header >> 4 == VERSION, "ProofCodec: unsupported proof version!");
+
+        proof.isOutgoingBid = (header & OUTGOING_FLAG) != 0;
+        proof.status = header & STATUS_MASK;
+
+        next = _offset + (proof.isOutgoingBid ? OUTGOING_PROOF_LENGTH : INCOMING_PROOF_LENGTH);
+        require(next <= _data.length, "ProofCodec: invalid proof length!");
+
+        uint256 bidId;
+        address receiver;
+        uint256 tokenId;
+        address erc721Contract;
+        address relayer;
+        address challenger;
+
+        // the offsets are the positions in the layout plus the 32 bytes of the length prefix
+        assembly {
+            let ptr := add(_data, _offset)
+            bidId := mload(add(ptr, 33))
+            receiver := shr(96, mload(add(ptr, 65)))
+            tokenId := mload(add(ptr, 85))
+            erc721Contract := shr(96, mload(add(ptr, 117)))
+            relayer := shr(96, mload(add(ptr, 137)))
+        }
+
+        if (!proof.isOutgoingBid) {
+            assembly {
+                challenger := shr(96, mload(add(add(_data, _offset), 157)))
+            }
+        }
+
+        proof.bidId = bidId;
+        proof.receiver = receiver;
+        proof.tokenId = tokenId;
+        proof.erc721Contract = erc721Contract;
+        proof.relayer = relayer;
+        proof.challenger = challenger;
+    }
+}
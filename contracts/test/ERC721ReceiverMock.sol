@@ -0,0 +1,40 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.4.22 <0.9.0;
+
+import {IERC721Receiver} from "@openzeppelin/contracts/token/ERC721/IERC721Receiver.sol";
+
+/**
+ * @notice Accepts every token, unless it is set to reject them, and emits an event for every call of the
+ * receiver hook. It forwards calls by `execute`, so it can be the maker of a bid.
+ */
+contract ERC721ReceiverMock is IERC721Receiver {
+    event Received(address operator, address from, uint256 tokenId);
+
+    bool public isRejecting;
+
+    function setRejecting(bool _isRejecting) external {
+        isRejecting = _isRejecting;
+    }
+
+    function execute(address _target, bytes calldata _data) external payable {
+        (bool isSuccess, bytes memory result) = _target.call{value: msg.value}(_data);
+        if (!isSuccess) {
+            assembly {
+                revert(add(result, 32), mload(result))
+            }
+        }
+    }
+
+    function onERC721Received(
+        address _operator,
+        address _from,
+        uint256 _tokenId,
+        bytes calldata
+    ) public override returns (bytes4) {
+        require(!isRejecting, "ERC721ReceiverMock: the token is rejected!");
+
+        emit Received(_operator, _from, _tokenId);
+
+        return IERC721Receiver.onERC721Received.selector;
+    }
+}
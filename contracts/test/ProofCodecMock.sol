@@ -0,0 +1,69 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.4.22 <0.9.0;
+
+import {ProofCodec} from "../libraries/ProofCodec.sol";
+
+/**
+ * @notice Exposes the proof codec for the tests. The abi variants are the former proof format
+ * of the spoke bridges and they are kept only to compare the size and the decoding gas.
+ */
+contract ProofCodecMock {
+    function encode(ProofCodec.Proof memory _proof) public pure returns (bytes memory) {
+        return ProofCodec.encode(_proof);
+    }
+
+    function decode(bytes memory _data) public pure returns (ProofCodec.Proof memory) {
+        return ProofCodec.decode(_data);
+    }
+
+    function encodeAbi(ProofCodec.Proof memory _proof) public pure returns (bytes memory data) {
+        if (_proof.isOutgoingBid) {
+            data = abi.encode(
+                _proof.bidId,
+                _proof.status,
+                _proof.receiver,
+                _proof.tokenId,
+                _proof.erc721Contract,
+                _proof.relayer
+            );
+        } else {
+            data = abi.encode(
+                _proof.bidId,
+                _proof.status,
+                _proof.receiver,
+                _proof.tokenId,
+                _proof.erc721Contract,
+                _proof.relayer,
+                _proof.challenger
+            );
+        }
+
+        data = abi.encode(data, _proof.isOutgoingBid);
+    }
+
+    function decodeAbi(bytes memory _data) public pure returns (ProofCodec.Proof memory proof) {
+        (bytes memory bidBytes, bool isBidOutgoing) = abi.decode(_data, (bytes, bool));
+        proof.isOutgoingBid = isBidOutgoing;
+
+        if (isBidOutgoing) {
+            (
+                proof.bidId,
+                proof.status,
+                proof.receiver,
+                proof.tokenId,
+                proof.erc721Contract,
+                proof.relayer
+            ) = abi.decode(bidBytes, (uint256, uint8, address, uint256, address, address));
+        } else {
+            (
+                proof.bidId,
+                proof.status,
+                proof.receiver,
+                proof.tokenId,
+                proof.erc721Contract,
+                proof.relayer,
+                proof.challenger
+            ) = abi.decode(bidBytes, (uint256, uint8, address, uint256, address, address, address));
+        }
+    }
+}
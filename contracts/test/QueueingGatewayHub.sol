@@ -0,0 +1,113 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.4.22 <0.9.0;
+
+import {IHub} from "../interfaces/IHub.sol";
+import {ISpokeBridge} from "../interfaces/ISpokeBridge.sol";
+
+import {Ownable} from "@openzeppelin/contracts/access/Ownable.sol";
+
+/**
+ * @notice This hub connects spoke bridges on two different chains. Each chain has its own hub, the outgoing
+ * messages of the local spoke bridge are queued as events and an off-chain relayer (the owner) delivers them
+ * to the hub of the other chain. The relayer can delay, reorder and drop the messages, like a real
+ * cross-chain messaging layer.
+ */
+contract QueueingGatewayHub is IHub, Ownable {
+    enum MessageKind {
+        Proof,
+        Proofs,
+        Root
+    }
+
+    event MessageQueued(uint256 indexed nonce, MessageKind kind, bytes data);
+
+    event MessageDelivered(uint256 indexed nonce, bool success);
+
+    // the spoke bridge on the chain of the hub
+    address public localSpokeBridge;
+
+    // its pair on the other chain, only the hub of the other chain calls it
+    address public remoteSpokeBridge;
+
+    uint256 public nonce;
+
+    // the nonces of the delivered messages of the other chain
+    mapping(uint256 => bool) public delivered;
+
+    function processMessage(bytes memory _data) public override {
+        _queue(MessageKind.Proof, _data);
+    }
+
+    function processMessages(bytes memory _data) public override {
+        _queue(MessageKind.Proofs, _data);
+    }
+
+    function processRoot(bytes32 _root, uint256 _leafCount) public override {
+        _queue(MessageKind.Root, abi.encode(_root, _leafCount));
+    }
+
+    /**
+     * @dev The first contract is the local spoke bridge, the second one is its pair on the other chain.
+     */
+    function addSpokeBridge(address _localContract, address _remoteContract) public override onlyOwner {
+        require(localSpokeBridge == address(0), "Hub: src contract already has a pair!");
+
+        localSpokeBridge = _localContract;
+        remoteSpokeBridge = _remoteContract;
+
+        emit SpokeBridgesAdded(_localContract, _remoteContract);
+    }
+
+    /**
+     * @notice Delivers messages of the other chain to the local spoke bridge in any order. A failing message
+     * does not revert the others and it is not marked as delivered, so it can be delivered again. Every message
+     * is delivered at most once, an already delivered one is skipped without a `MessageDelivered` event.
+     */
+    function deliverMessages(
+        uint256[] calldata _nonces,
+        MessageKind[] calldata _kinds,
+        bytes[] calldata _data
+    ) public onlyOwner {
+        require(_nonces.length > 0, "Hub: there is no message to deliver!");
+        require(_nonces.length == _kinds.length && _nonces.length == _data.length,
+            "Hub: array lengths are not equal!");
+
+        address spokeBridge = localSpokeBridge;
+        require(spokeBridge != address(0), "Hub: contract has no pair!");
+
+        for (uint256 i = 0; i < _nonces.length; ++i) {
+            if (delivered[_nonces[i]]) {
+                continue;
+            }
+
+            bool success;
+            if (_kinds[i] == MessageKind.Proof) {
+                try ISpokeBridge(spokeBridge).receiveProof(_data[i]) {
+                    success = true;
+                } catch {}
+            } else if (_kinds[i] == MessageKind.Proofs) {
+                try ISpokeBridge(spokeBridge).receiveProofs(_data[i]) {
+                    success = true;
+                } catch {}
+            } else {
+                (bytes32 root, uint256 leafCount) = abi.decode(_data[i], (bytes32, uint256));
+                try ISpokeBridge(spokeBridge).receiveRoot(root, leafCount) {
+                    success = true;
+                } catch {}
+            }
+
+            if (success) {
+                delivered[_nonces[i]] = true;
+            }
+
+            emit MessageDelivered(_nonces[i], success);
+            emit MessageProcessed(remoteSpokeBridge, spokeBridge);
+        }
+    }
+
+    function _queue(MessageKind _kind, bytes memory _data) internal {
+        require(_msgSender() == localSpokeBridge, "Hub: contract has no pair!");
+
+        emit MessageQueued(nonce++, _kind, _data);
+    }
+}
@@ -13,6 +13,24 @@ contract SimpleGatewayHub is IHub, Ownable {
         require(bridgeToBrdige[_msgSender()] != address(0), "Hub: contract has no pair!");
 
         ISpokeBridge(bridgeToBrdige[_msgSender()]).receiveProof(_data);
+
+        emit MessageProcessed(_msgSender(), bridgeToBrdige[_msgSender()]);
+    }
+
+    function processMessages(bytes memory _data) public override {
+        require(bridgeToBrdige[_msgSender()] != address(0), "Hub: contract has no pair!");
+
+        ISpokeBridge(bridgeToBrdige[_msgSender()]).receiveProofs(_data);
+
+        emit MessageProcessed(_msgSender(), bridgeToBrdige[_msgSender()]);
+    }
+
+    function processRoot(bytes32 _root, uint256 _leafCount) public override {
+        require(bridgeToBrdige[_msgSender()] != address(0), "Hub: contract has no pair!");
+
+        ISpokeBridge(bridgeToBrdige[_msgSender()]).receiveRoot(_root, _leafCount);
+
+        emit MessageProcessed(_msgSender(), bridgeToBrdige[_msgSender()]);
     }
 
     function addSpokeBridge(address _srcContract, address _dstContract) public override onlyOwner {
@@ -21,5 +39,7 @@ contract SimpleGatewayHub is IHub, Ownable {
 
         bridgeToBrdige[_srcContract] = _dstContract;
         bridgeToBrdige[_dstContract] = _srcContract;
+
+        emit SpokeBridgesAdded(_srcContract, _dstContract);
     }
 }
\ No newline at end of file
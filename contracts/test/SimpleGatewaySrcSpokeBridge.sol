@@ -6,13 +6,28 @@ import {IHub} from "../interfaces/IHub.sol";
 import {SrcSpokeBridge} from "../SrcSpokeBridge.sol";
 
 contract SimpleGatewaySrcSpokeBrdige is SrcSpokeBridge {
-    constructor(address _hub, address _contractMap) SrcSpokeBridge(_contractMap, _hub) {
+    constructor(
+        address _hub,
+        address _contractMap,
+        uint256 _challengePeriod,
+        uint256 _stakeAmount,
+        uint256 _challengeAmount,
+        uint256 _timeLimitOfUndeposit
+    ) SrcSpokeBridge(_contractMap, _hub, _challengePeriod, _stakeAmount, _challengeAmount, _timeLimitOfUndeposit) {
     }
 
     function _sendMessage(bytes memory _data) internal override {
         IHub(HUB).processMessage(_data);
     }
 
+    function _sendMessages(bytes memory _data) internal override {
+        IHub(HUB).processMessages(_data);
+    }
+
+    function _sendRoot(bytes32 _root, uint256 _leafCount) internal override {
+        IHub(HUB).processRoot(_root, _leafCount);
+    }
+
     function _getCrossMessageSender() internal override returns (address) {
         return _msgSender();
     }
@@ -0,0 +1,6 @@
+"""
+Python tools for the spoke bridges. The reference model, the proof codec and the simulation run without a
+node, the client, the relayers, the watchtower and the indexer talk to the nodes of the chains.
+"""
+from .enums import ChallengeStatus, IncomingBidStatus, OutgoingBidStatus, ProofResult, RelayerStatus
+from .model import BridgeModel, DstSpokeModel, HubModel, Proof, Revert, SrcSpokeModel
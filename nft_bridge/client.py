@@ -0,0 +1,392 @@
+"""
+A typed client of the spoke bridges. The getters are read by `eth_call`s which are sent in JSON-RPC batches
+over a pooled HTTP session, so reading a thousand bids costs a few round trips instead of a thousand. The
+structs of `SpokeBridge` are returned as the dataclasses of this module with the enums of
+`nft_bridge.enums`, the immutable parameters of a spoke are read once and cached.
+
+    python -m nft_bridge.client --rpc http://127.0.0.1:8545 --spoke 0x... --bids 0 100
+
+The proofs of `sendProof` and `receiveProof` are encoded and decoded by `nft_bridge.proof_codec`.
+"""
+import argparse
+
+from dataclasses import dataclass
+
+import requests
+
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+from requests.adapters import HTTPAdapter
+
+try:
+    from eth_abi import decode as decode_abi, encode as encode_abi
+except ImportError:  # eth-abi < 4, the version of web3 v5
+    from eth_abi import decode_abi, encode_abi
+
+from .enums import ChallengeStatus, IncomingBidStatus, OutgoingBidStatus, RelayerStatus
+
+# the types of the structs of `SpokeBridge`, in the order of their fields
+OUTGOING_BID_TYPE = "(address,uint96,address,uint96,address,address,uint40,uint8,uint256)"
+INCOMING_BID_TYPE = "(address,uint96,address,address,uint40,uint8,uint256)"
+RELAYER_TYPE = "(uint8,uint40,uint96)"
+CHALLENGE_TYPE = "(address,uint8)"
+REWARD_TYPE = "(address,uint96)"
+BID_SNAPSHOT_TYPE = "({},{},{},{},{},{},{})".format(OUTGOING_BID_TYPE, INCOMING_BID_TYPE, CHALLENGE_TYPE,
+    REWARD_TYPE, REWARD_TYPE, RELAYER_TYPE, RELAYER_TYPE)
+
+DEFAULT_BATCH_SIZE = 500
+
+# `SpokeBridge.MAX_PAGE_SIZE`, the range views return at most this many bids
+MAX_PAGE_SIZE = 500
+
+
+class RpcError(Exception):
+    """
+    An error reply of the node, `index` is the position of the failed request in its batch.
+    """
+
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.index = index
+
+
+@dataclass(frozen=True)
+class OutgoingBid:
+    __slots__ = ("maker", "fee", "receiver", "collection_id", "local_erc721_contract", "buyer",
+        "timestamp_of_bought", "status", "token_id")
+
+    maker: str
+    fee: int
+    receiver: str
+    collection_id: int
+    local_erc721_contract: str
+    buyer: str
+    timestamp_of_bought: int
+    status: OutgoingBidStatus
+    token_id: int
+
+    @classmethod
+    def from_tuple(cls, fields):
+        fields = list(fields)
+        for i in (0, 2, 4, 5):
+            fields[i] = to_checksum_address(fields[i])
+        fields[7] = OutgoingBidStatus(fields[7])
+        return cls(*fields)
+
+
+@dataclass(frozen=True)
+class IncomingBid:
+    __slots__ = ("receiver", "outgoing_id", "remote_erc721_contract", "relayer", "timestamp_of_relayed",
+        "status", "token_id")
+
+    receiver: str
+    outgoing_id: int
+    remote_erc721_contract: str
+    relayer: str
+    timestamp_of_relayed: int
+    status: IncomingBidStatus
+    token_id: int
+
+    @classmethod
+    def from_tuple(cls, fields):
+        fields = list(fields)
+        for i in (0, 2, 3):
+            fields[i] = to_checksum_address(fields[i])
+        fields[5] = IncomingBidStatus(fields[5])
+        return cls(*fields)
+
+
+@dataclass(frozen=True)
+class Relayer:
+    __slots__ = ("status", "date_of_undeposited", "staked_amount")
+
+    status: RelayerStatus
+    date_of_undeposited: int
+    staked_amount: int
+
+    @classmethod
+    def from_tuple(cls, fields):
+        status, date_of_undeposited, staked_amount = fields
+        return cls(RelayerStatus(status), date_of_undeposited, staked_amount)
+
+
+@dataclass(frozen=True)
+class Challenge:
+    __slots__ = ("challenger", "status")
+
+    challenger: str
+    status: ChallengeStatus
+
+    @classmethod
+    def from_tuple(cls, fields):
+        challenger, status = fields
+        return cls(to_checksum_address(challenger), ChallengeStatus(status))
+
+
+@dataclass(frozen=True)
+class Reward:
+    __slots__ = ("challenger", "amount")
+
+    challenger: str
+    amount: int
+
+    @classmethod
+    def from_tuple(cls, fields):
+        challenger, amount = fields
+        return cls(to_checksum_address(challenger), amount)
+
+
+@dataclass(frozen=True)
+class BidSnapshot:
+    __slots__ = ("outgoing_bid", "incoming_bid", "challenge", "outgoing_challenge_reward",
+        "incoming_challenge_reward", "buyer", "relayer")
+
+    outgoing_bid: OutgoingBid
+    incoming_bid: IncomingBid
+    challenge: Challenge
+    outgoing_challenge_reward: Reward
+    incoming_challenge_reward: Reward
+    # the relayer who bought the outgoing bid
+    buyer: Relayer
+    # the relayer who relayed the incoming bid
+    relayer: Relayer
+
+    @classmethod
+    def from_tuple(cls, fields):
+        return cls(*(model.from_tuple(field) for model, field in zip(
+            (OutgoingBid, IncomingBid, Challenge, Reward, Reward, Relayer, Relayer), fields)))
+
+
+@dataclass(frozen=True)
+class SpokeParams:
+    """
+    The immutable parameters of a spoke bridge.
+    """
+    __slots__ = ("stake_amount", "challenge_amount", "time_limit_of_undeposit", "challenge_period", "hub")
+
+    stake_amount: int
+    challenge_amount: int
+    time_limit_of_undeposit: int
+    challenge_period: int
+    hub: str
+
+
+class Call:
+    """
+    A call of a view function, `decode` turns the decoded outputs into the returned value.
+    """
+    __slots__ = ("signature", "input_types", "args", "output_types", "decode")
+
+    def __init__(self, signature, args, output_types, decode=None):
+        self.signature = signature
+        self.input_types = signature[signature.index("(") + 1:-1].split(",") if args else []
+        self.args = args
+        self.output_types = output_types
+        self.decode = decode or (lambda outputs: outputs[0])
+
+    def data(self):
+        selector = function_signature_to_4byte_selector(self.signature)
+        return "0x" + (selector + encode_abi(self.input_types, self.args)).hex()
+
+    def result(self, data):
+        return self.decode(decode_abi(self.output_types, bytes.fromhex(data[2:])))
+
+
+class JsonRpc:
+    """
+    A JSON-RPC client which sends the requests in batches. The HTTP connections are kept alive in a pool of
+    `pool_size` connections, so the client can be shared by the threads of an executor.
+    """
+
+    def __init__(self, endpoint_uri, batch_size=DEFAULT_BATCH_SIZE, pool_size=10, timeout=30):
+        self.endpoint_uri = endpoint_uri
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.requests = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def request(self, method, params):
+        return self.batch([(method, params)])[0]
+
+    def batch(self, calls):
+        """
+        Sends the `(method, params)` pairs in batches of `batch_size` and returns their results in order.
+        """
+        results = []
+        for start in range(0, len(calls), self.batch_size):
+            chunk = calls[start:start + self.batch_size]
+            payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+                for i, (method, params) in enumerate(chunk)]
+
+            response = self.session.post(self.endpoint_uri, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            self.requests += 1
+
+            replies = response.json()
+            # a node which cannot parse the batch answers with a single error object
+            if isinstance(replies, dict):
+                raise RpcError(replies.get("error", {}).get("message", "invalid batch reply"))
+
+            replies = {reply["id"]: reply for reply in replies}
+            for i in range(len(chunk)):
+                reply = replies.get(i)
+                if reply is None:
+                    raise RpcError("missing reply", start + i)
+                if "error" in reply:
+                    raise RpcError(reply["error"].get("message", ""), start + i)
+                results.append(reply["result"])
+        return results
+
+
+class SpokeClient:
+    """
+    Reads the state of a spoke bridge. Every getter takes a list of keys and reads them in JSON-RPC batches,
+    `block` pins the reads to a block number, so the results of several getters are consistent.
+    """
+
+    def __init__(self, rpc, address, block="latest"):
+        self.rpc = rpc if isinstance(rpc, JsonRpc) else JsonRpc(rpc)
+        self.address = to_checksum_address(address)
+        self.block = block
+        self._params = None
+
+    def call(self, calls, block=None):
+        """
+        Sends the calls in batches and returns their decoded results.
+        """
+        block = self.block if block is None else block
+        if isinstance(block, int):
+            block = hex(block)
+
+        results = self.rpc.batch([("eth_call", [{"to": self.address, "data": call.data()}, block])
+            for call in calls])
+        return [call.result(result) for call, result in zip(calls, results)]
+
+    @property
+    def params(self):
+        """
+        The immutable parameters, they are read by the first access only.
+        """
+        if self._params is None:
+            values = self.call([Call(name + "()", [], [output_type]) for name, output_type in (
+                ("STAKE_AMOUNT", "uint256"), ("CHALLENGE_AMOUNT", "uint256"), ("TIME_LIMIT_OF_UNDEPOSIT", "uint256"),
+                ("CHALLENGE_PERIOD", "uint256"), ("HUB", "address"))], "latest")
+            values[-1] = to_checksum_address(values[-1])
+            self._params = SpokeParams(*values)
+        return self._params
+
+    @property
+    def stake_amount(self):
+        return self.params.stake_amount
+
+    @property
+    def challenge_amount(self):
+        return self.params.challenge_amount
+
+    @property
+    def time_limit_of_undeposit(self):
+        return self.params.time_limit_of_undeposit
+
+    @property
+    def challenge_period(self):
+        return self.params.challenge_period
+
+    @property
+    def hub(self):
+        return self.params.hub
+
+    def bid_count(self, block=None):
+        """
+        Returns the number of outgoing bids, which is the id of the next one.
+        """
+        return self.call([Call("id()", [], ["uint256"])], block)[0]
+
+    def outgoing_bids(self, bid_ids, block=None):
+        return self._structs("outgoingBids(uint256)", bid_ids, OUTGOING_BID_TYPE, OutgoingBid, block)
+
+    def incoming_bids(self, bid_ids, block=None):
+        return self._structs("incomingBids(uint256)", bid_ids, INCOMING_BID_TYPE, IncomingBid, block)
+
+    def relayers(self, addresses, block=None):
+        return self._structs("relayers(address)", addresses, RELAYER_TYPE, Relayer, block)
+
+    def challenges(self, bid_ids, block=None):
+        return self._structs("challengedIncomingBids(uint256)", bid_ids, CHALLENGE_TYPE, Challenge, block)
+
+    def challenge_rewards(self, bid_ids, is_outgoing_bid, block=None):
+        getter = "outgoingChallengeRewards(uint256)" if is_outgoing_bid else "incomingChallengeRewards(uint256)"
+        return self._structs(getter, bid_ids, REWARD_TYPE, Reward, block)
+
+    def snapshots(self, bid_ids, block=None):
+        """
+        Returns everything that belongs to the bids, one `getBidSnapshot` per bid.
+        """
+        return self.call([Call("getBidSnapshot(uint256)", [bid_id], [BID_SNAPSHOT_TYPE],
+            lambda outputs: BidSnapshot.from_tuple(outputs[0])) for bid_id in bid_ids], block)
+
+    def outgoing_bid_range(self, from_id, count, page_size=100, block=None):
+        """
+        Returns the outgoing bids of a range of ids by `getOutgoingBids`, the range is cut at the last bid.
+        """
+        return self._range("getOutgoingBids(uint256,uint256)", from_id, count, page_size,
+            OUTGOING_BID_TYPE, OutgoingBid, block)
+
+    def incoming_bid_range(self, from_id, count, page_size=100, block=None):
+        """
+        Returns the incoming bids of a range of ids by `getIncomingBids`, the bids which are not relayed yet
+        have None status.
+        """
+        return self._range("getIncomingBids(uint256,uint256)", from_id, count, page_size,
+            INCOMING_BID_TYPE, IncomingBid, block)
+
+    def open_bids(self, cursor=0, count=100, block=None):
+        """
+        Returns a page of the bids in Created state and the cursor of the next page, which is zero at the end.
+        """
+        ids, cursor = self.call([Call("getOpenBids(uint256,uint256)", [cursor, count], ["uint256[]", "uint256"],
+            lambda outputs: outputs)], block)[0]
+        return list(ids), cursor
+
+    def _structs(self, getter, keys, struct_type, model, block):
+        # the public getters return the fields of a struct as separate outputs, they decode like a tuple
+        return self.call([Call(getter, [key], [struct_type], lambda outputs: model.from_tuple(outputs[0]))
+            for key in keys], block)
+
+    def _range(self, getter, from_id, count, page_size, struct_type, model, block):
+        page_size = min(page_size, MAX_PAGE_SIZE)
+        pages = self.call([Call(getter, [start, min(page_size, from_id + count - start)], [struct_type + "[]"],
+            lambda outputs: [model.from_tuple(fields) for fields in outputs[0]])
+            for start in range(from_id, from_id + count, page_size)], block)
+        return [bid for page in pages for bid in page]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc", default="http://127.0.0.1:8545")
+    parser.add_argument("--spoke", required=True)
+    parser.add_argument("--bids", type=int, nargs=2, metavar=("FROM", "COUNT"), default=(0, 10))
+    args = parser.parse_args()
+
+    client = SpokeClient(args.rpc, args.spoke)
+    params = client.params
+    print(f"stake amount: {params.stake_amount}")
+    print(f"challenge amount: {params.challenge_amount}")
+    print(f"challenge period: {params.challenge_period}")
+    print(f"hub: {params.hub}")
+
+    from_id, count = args.bids
+    for bid_id, bid in enumerate(client.outgoing_bid_range(from_id, count), from_id):
+        print(f"outgoing bid {bid_id}: {bid.status.name} token {bid.token_id} buyer {bid.buyer}")
+    print(f"requests: {client.rpc.requests}")
+
+    client.rpc.close()
+
+
+if __name__ == "__main__":
+    main()
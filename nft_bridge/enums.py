@@ -0,0 +1,51 @@
+"""
+The enums of the spoke contracts, with the same values as in `SpokeBridge.sol`.
+"""
+from enum import IntEnum
+
+
+class OutgoingBidStatus(IntEnum):
+    NONE = 0
+    CREATED = 1
+    BOUGHT = 2
+    CHALLENGED = 3
+    MALICIOUS = 4
+    # it is used only on src
+    UNLOCKED = 5
+
+
+class IncomingBidStatus(IntEnum):
+    NONE = 0
+    RELAYED = 1
+    CHALLENGED = 2
+    MALICIOUS = 3
+    # it is used only on src
+    UNLOCKED = 4
+
+
+class RelayerStatus(IntEnum):
+    NONE = 0
+    ACTIVE = 1
+    UNDEPOSITED = 2
+    CHALLENGED = 3
+    MALICIOUS = 4
+
+
+class ChallengeStatus(IntEnum):
+    NONE = 0
+    CHALLENGED = 1
+    PROVED = 2
+
+
+class ProofResult(IntEnum):
+    """
+    The outcome of a received proof, emitted in `ProofProcessed`.
+    """
+    PROVED = 0
+    REJECTED = 1
+    NO_LOCAL_BID = 2
+    TIME_WINDOW_EXPIRED = 3
+    TIME_WINDOW_NOT_EXPIRED = 4
+    FALSE_CHALLENGE = 5
+    # a proof of a batch reverted, it changed nothing
+    REVERTED = 6
@@ -0,0 +1,473 @@
+"""
+Indexes the spoke bridges into SQLite, so the history of the bridge can be queried without scanning the
+contract mappings.
+
+    python -m nft_bridge.indexer --db bridge.db --src-rpc http://127.0.0.1:8645 --src-spoke 0x... \\
+        --dst-rpc http://127.0.0.1:8646 --dst-spoke 0x... --follow
+
+The events of a block range are read by one `eth_getLogs` per side and only their topics are decoded, they
+tell which bids, relayers, challenges and rewards changed. Their state is read at the last block of the
+range, the bids by `getOutgoingBids` and `getIncomingBids` in ranges of consecutive ids. The rows and the
+checkpoint of a range are written in one SQLite transaction, so an interrupted run resumes after the last
+written range.
+
+The amounts and the token ids do not fit into the 64 bit integers of SQLite, they are stored as decimal
+strings.
+"""
+import argparse
+import sqlite3
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+from .client import MAX_PAGE_SIZE
+from .enums import ChallengeStatus, IncomingBidStatus, OutgoingBidStatus
+from .two_chains import load_artifact
+from .watchtower import DST, SRC
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outgoing_bids (
+    side INTEGER NOT NULL,
+    bid_id INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    maker TEXT NOT NULL,
+    receiver TEXT NOT NULL,
+    erc721_contract TEXT NOT NULL,
+    token_id TEXT NOT NULL,
+    fee TEXT NOT NULL,
+    collection_id INTEGER NOT NULL,
+    buyer TEXT NOT NULL,
+    bought_at INTEGER NOT NULL,
+    PRIMARY KEY (side, bid_id)
+);
+CREATE INDEX IF NOT EXISTS outgoing_bids_status ON outgoing_bids (side, status, bought_at);
+CREATE INDEX IF NOT EXISTS outgoing_bids_maker ON outgoing_bids (maker, status);
+CREATE INDEX IF NOT EXISTS outgoing_bids_buyer ON outgoing_bids (buyer, status);
+
+CREATE TABLE IF NOT EXISTS incoming_bids (
+    side INTEGER NOT NULL,
+    bid_id INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    receiver TEXT NOT NULL,
+    outgoing_id INTEGER NOT NULL,
+    erc721_contract TEXT NOT NULL,
+    relayer TEXT NOT NULL,
+    relayed_at INTEGER NOT NULL,
+    token_id TEXT NOT NULL,
+    PRIMARY KEY (side, bid_id)
+);
+CREATE INDEX IF NOT EXISTS incoming_bids_status ON incoming_bids (side, status, relayed_at);
+CREATE INDEX IF NOT EXISTS incoming_bids_relayer ON incoming_bids (relayer, status);
+CREATE INDEX IF NOT EXISTS incoming_bids_receiver ON incoming_bids (receiver, status);
+
+CREATE TABLE IF NOT EXISTS relayers (
+    side INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    undeposited_at INTEGER NOT NULL,
+    staked_amount TEXT NOT NULL,
+    PRIMARY KEY (side, address)
+);
+CREATE INDEX IF NOT EXISTS relayers_status ON relayers (side, status);
+
+CREATE TABLE IF NOT EXISTS challenges (
+    side INTEGER NOT NULL,
+    bid_id INTEGER NOT NULL,
+    challenger TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    PRIMARY KEY (side, bid_id)
+);
+CREATE INDEX IF NOT EXISTS challenges_challenger ON challenges (challenger, status);
+
+CREATE TABLE IF NOT EXISTS rewards (
+    side INTEGER NOT NULL,
+    bid_id INTEGER NOT NULL,
+    is_outgoing INTEGER NOT NULL,
+    challenger TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    claimed INTEGER NOT NULL,
+    PRIMARY KEY (side, bid_id, is_outgoing)
+);
+CREATE INDEX IF NOT EXISTS rewards_challenger ON rewards (challenger, claimed);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    side INTEGER PRIMARY KEY,
+    spoke TEXT NOT NULL,
+    block INTEGER NOT NULL
+);
+"""
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# the fields which are cleared when a bridging is finished or proved malicious, the indexed values are kept
+UPSERT_OUTGOING_BID = """
+INSERT INTO outgoing_bids VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (side, bid_id) DO UPDATE SET
+    status = excluded.status,
+    maker = CASE WHEN excluded.maker = '{zero}' THEN maker ELSE excluded.maker END,
+    receiver = CASE WHEN excluded.receiver = '{zero}' THEN receiver ELSE excluded.receiver END,
+    erc721_contract = CASE WHEN excluded.erc721_contract = '{zero}' THEN erc721_contract
+        ELSE excluded.erc721_contract END,
+    token_id = CASE WHEN excluded.maker = '{zero}' THEN token_id ELSE excluded.token_id END,
+    fee = CASE WHEN excluded.fee = '0' THEN fee ELSE excluded.fee END,
+    collection_id = CASE WHEN excluded.collection_id = 0 THEN collection_id ELSE excluded.collection_id END,
+    buyer = excluded.buyer,
+    bought_at = excluded.bought_at
+""".format(zero=ZERO_ADDRESS)
+
+UPSERT_INCOMING_BID = "INSERT OR REPLACE INTO incoming_bids VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+UPSERT_RELAYER = "INSERT OR REPLACE INTO relayers VALUES (?, ?, ?, ?, ?)"
+
+UPSERT_CHALLENGE = "INSERT OR REPLACE INTO challenges VALUES (?, ?, ?, ?)"
+
+# a reward is deleted by the contract when it is claimed, the claimed rows come from the events
+UPSERT_REWARD = """
+INSERT INTO rewards VALUES (?, ?, ?, ?, ?, 0)
+ON CONFLICT (side, bid_id, is_outgoing) DO UPDATE SET
+    challenger = excluded.challenger,
+    amount = excluded.amount
+WHERE NOT claimed
+"""
+
+CLAIM_REWARD = "INSERT OR REPLACE INTO rewards VALUES (?, ?, ?, ?, ?, 1)"
+
+UPSERT_CHECKPOINT = "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)"
+
+
+def _signature(abi):
+    return Web3.keccak(text=f"{abi['name']}({','.join(arg['type'] for arg in abi['inputs'])})")
+
+
+def _uint(data):
+    return int.from_bytes(data, "big")
+
+
+def _address(topic):
+    return Web3.toChecksumAddress(HexBytes(topic)[-20:])
+
+
+class Changes:
+    """
+    The ids and the addresses which are touched in a block range, and the claimed rewards by their events.
+    """
+    __slots__ = ("outgoing_bids", "incoming_bids", "relayers", "challenges", "rewards", "rejected", "claims")
+
+    def __init__(self):
+        self.outgoing_bids = set()
+        self.incoming_bids = set()
+        self.relayers = set()
+        self.challenges = set()
+        # (bid id, is outgoing)
+        self.rewards = set()
+        # the relayers of these incoming bids are active again
+        self.rejected = set()
+        # (bid id, is outgoing, challenger, amount)
+        self.claims = []
+
+
+def _decode_changes(logs, topics):
+    """
+    Collects the changes of the logs from their topics, the data is decoded only for the flags and the amounts.
+    """
+    changes = Changes()
+    for log in logs:
+        log_topics = log["topics"]
+        name = topics.get(HexBytes(log_topics[0]))
+        if name is None:
+            continue
+
+        if name == "BidCreated":
+            changes.outgoing_bids.add(_uint(log_topics[1]))
+        elif name == "BidBought":
+            changes.relayers.add(_address(log_topics[1]))
+            changes.outgoing_bids.add(_uint(log_topics[2]))
+        elif name == "BidRelayed":
+            changes.incoming_bids.add(_uint(log_topics[1]))
+            changes.relayers.add(_address(log_topics[2]))
+        elif name == "BidUnlocked":
+            # the locking bid of the source side
+            changes.outgoing_bids.add(_uint(log_topics[2]))
+        elif name == "NFTUnwrapped":
+            changes.incoming_bids.add(_uint(log_topics[2]))
+        elif name in ("RelayerDeposited", "RelayerUndeposited", "DepositClaimed", "RelayerSlashed"):
+            changes.relayers.add(_address(log_topics[1]))
+        elif name == "BidChallenged":
+            changes.relayers.add(_address(log_topics[2]))
+            bid_id = _uint(log_topics[3])
+            changes.incoming_bids.add(bid_id)
+            changes.challenges.add(bid_id)
+        elif name == "ChallengeProved":
+            bid_id = _uint(log_topics[1])
+            is_outgoing = bool(_uint(HexBytes(log["data"])[:32]))
+            (changes.outgoing_bids if is_outgoing else changes.incoming_bids).add(bid_id)
+            changes.challenges.add(bid_id)
+            changes.rewards.add((bid_id, is_outgoing))
+        elif name == "ChallengeRejected":
+            bid_id = _uint(log_topics[1])
+            changes.incoming_bids.add(bid_id)
+            changes.challenges.add(bid_id)
+            changes.rejected.add(bid_id)
+        elif name == "ChallengeRewardClaimed":
+            data = HexBytes(log["data"])
+            changes.claims.append(
+                (_uint(log_topics[2]), bool(_uint(data[:32])), _address(log_topics[1]), str(_uint(data[32:64]))))
+
+    return changes
+
+
+class BridgeIndexer:
+    """
+    Indexes `src_spoke` and `dst_spoke` (web3 contracts on their own chains) into the SQLite database of
+    `path`. The sides are indexed from `start_block` in ranges of at most `block_range` blocks, up to
+    `confirmations` blocks behind the latest one. The bids are read in ranges of `batch_size` ids by
+    `workers` threads.
+    """
+
+    def __init__(self, path, src_spoke, dst_spoke, start_block=0, block_range=5000, batch_size=500,
+                 confirmations=0, workers=8):
+        self.spokes = (src_spoke, dst_spoke)
+        self.start_block = start_block
+        self.block_range = block_range
+        # the range views of the spokes return at most `MAX_PAGE_SIZE` bids
+        self.batch_size = min(batch_size, MAX_PAGE_SIZE)
+        self.confirmations = confirmations
+
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+
+        self._executor = ThreadPoolExecutor(workers)
+        self._topics = {}
+        for spoke in self.spokes:
+            for abi in spoke.abi:
+                if abi["type"] == "event":
+                    self._topics[_signature(abi)] = abi["name"]
+
+        for side, spoke in enumerate(self.spokes):
+            row = self.db.execute("SELECT spoke FROM checkpoints WHERE side = ?", (side,)).fetchone()
+            if row is not None and row["spoke"] != spoke.address:
+                raise ValueError(f"the database indexes {row['spoke']}, not {spoke.address}")
+
+    def close(self):
+        self._executor.shutdown()
+        self.db.close()
+
+    def checkpoint(self, side):
+        """
+        Returns the last indexed block of the side, `start_block - 1` before the first range.
+        """
+        row = self.db.execute("SELECT block FROM checkpoints WHERE side = ?", (side,)).fetchone()
+        return self.start_block - 1 if row is None else row["block"]
+
+    def sync(self):
+        """
+        Indexes both sides up to their latest confirmed blocks, returns the number of the indexed blocks.
+        """
+        blocks = 0
+        for side, spoke in enumerate(self.spokes):
+            latest = spoke.web3.eth.block_number - self.confirmations
+            from_block = self.checkpoint(side) + 1
+            while from_block <= latest:
+                to_block = min(from_block + self.block_range - 1, latest)
+                self.index_range(side, from_block, to_block)
+                blocks += to_block - from_block + 1
+                from_block = to_block + 1
+
+        return blocks
+
+    def follow(self, poll_interval=1.0, stop=None):
+        """
+        Keeps syncing until `stop()` returns true.
+        """
+        while stop is None or not stop():
+            if not self.sync():
+                time.sleep(poll_interval)
+
+    def index_range(self, side, from_block, to_block):
+        spoke = self.spokes[side]
+        logs = spoke.web3.eth.get_logs({'address': spoke.address, 'fromBlock': from_block, 'toBlock': to_block})
+        changes = _decode_changes(logs, self._topics)
+
+        outgoing_bids = self._executor.submit(self._read_bids, spoke, "getOutgoingBids", changes.outgoing_bids,
+            to_block)
+        incoming_bids = self._executor.submit(self._read_bids, spoke, "getIncomingBids", changes.incoming_bids,
+            to_block)
+        challenges = self._executor.map(
+            lambda bid_id: spoke.functions.challengedIncomingBids(bid_id).call(block_identifier=to_block),
+            sorted(changes.challenges))
+        rewards = self._executor.map(lambda key: self._read_reward(spoke, key, to_block), sorted(changes.rewards))
+
+        outgoing_bids, incoming_bids = outgoing_bids.result(), incoming_bids.result()
+        challenges, rewards = list(challenges), list(rewards)
+
+        # the challenges do not emit the relayers who are active again
+        relayers = changes.relayers | {incoming_bids[bid_id][3] for bid_id in changes.rejected}
+        relayers = list(self._executor.map(
+            lambda address: (address, spoke.functions.relayers(address).call(block_identifier=to_block)),
+            sorted(relayers)))
+
+        with self.db:
+            self.db.executemany(UPSERT_OUTGOING_BID, (
+                (side, bid_id, bid[7], bid[0], bid[2], bid[4], str(bid[8]), str(bid[1]), bid[3], bid[5], bid[6])
+                for bid_id, bid in outgoing_bids.items()
+            ))
+            self.db.executemany(UPSERT_INCOMING_BID, (
+                (side, bid_id, bid[5], bid[0], bid[1], bid[2], bid[3], bid[4], str(bid[6]))
+                for bid_id, bid in incoming_bids.items()
+            ))
+            self.db.executemany(UPSERT_CHALLENGE, (
+                (side, bid_id, challenger, status)
+                for bid_id, (challenger, status) in zip(sorted(changes.challenges), challenges)
+            ))
+            self.db.executemany(UPSERT_REWARD, (
+                (side, bid_id, is_outgoing, challenger, str(amount))
+                for (bid_id, is_outgoing), (challenger, amount) in zip(sorted(changes.rewards), rewards)
+                if amount > 0
+            ))
+            self.db.executemany(CLAIM_REWARD, (
+                (side, bid_id, is_outgoing, challenger, amount)
+                for bid_id, is_outgoing, challenger, amount in changes.claims
+            ))
+            self.db.executemany(UPSERT_RELAYER, (
+                (side, address, status, undeposited_at, str(staked_amount))
+                for address, (status, undeposited_at, staked_amount) in relayers
+            ))
+            self.db.execute(UPSERT_CHECKPOINT, (side, spoke.address, to_block))
+
+    def _read_bids(self, spoke, getter, ids, block):
+        """
+        Reads the bids of `ids` by ranges of consecutive ids, returns the raw tuples by the ids.
+        """
+        ranges = []
+        for bid_id in sorted(ids):
+            if ranges and ranges[-1][0] + ranges[-1][1] == bid_id and ranges[-1][1] < self.batch_size:
+                ranges[-1][1] += 1
+            else:
+                ranges.append([bid_id, 1])
+
+        function = getattr(spoke.functions, getter)
+        results = self._executor.map(lambda r: function(*r).call(block_identifier=block), ranges)
+        return {start + i: row for (start, _), rows in zip(ranges, results) for i, row in enumerate(rows)}
+
+    def _read_reward(self, spoke, key, block):
+        bid_id, is_outgoing = key
+        rewards = spoke.functions.outgoingChallengeRewards if is_outgoing else spoke.functions.incomingChallengeRewards
+        return rewards(bid_id).call(block_identifier=block)
+
+    # the queries of the relayers
+
+    def open_bids(self, side, limit=100):
+        """
+        The bids of the side which are not bought yet, the oldest first.
+        """
+        return self.db.execute(
+            "SELECT * FROM outgoing_bids WHERE side = ? AND status = ? ORDER BY bid_id LIMIT ?",
+            (side, OutgoingBidStatus.CREATED, limit)).fetchall()
+
+    def bids_of_maker(self, maker, status=None):
+        """
+        The outgoing bids of `maker` on both sides, optionally only the ones in `status`.
+        """
+        if status is None:
+            return self.db.execute("SELECT * FROM outgoing_bids WHERE maker = ? ORDER BY side, bid_id",
+                (maker,)).fetchall()
+        return self.db.execute("SELECT * FROM outgoing_bids WHERE maker = ? AND status = ? ORDER BY side, bid_id",
+            (maker, status)).fetchall()
+
+    def bids_of_relayer(self, relayer, status=OutgoingBidStatus.BOUGHT):
+        """
+        The bids bought by `relayer`, by default the ones which are not finished yet.
+        """
+        return self.db.execute("SELECT * FROM outgoing_bids WHERE buyer = ? AND status = ? ORDER BY side, bid_id",
+            (relayer, status)).fetchall()
+
+    def relayer(self, side, address):
+        return self.db.execute("SELECT * FROM relayers WHERE side = ? AND address = ?", (side, address)).fetchone()
+
+    # the queries of the watchtowers
+
+    def unrelayed_bids(self, side, bought_before):
+        """
+        The bought bids of the side which are bought before `bought_before` and are not relayed on the other side.
+        """
+        return self.db.execute("""
+            SELECT o.* FROM outgoing_bids o
+            LEFT JOIN incoming_bids i ON i.side = ? AND i.bid_id = o.bid_id
+            WHERE o.side = ? AND o.status = ? AND o.bought_at < ? AND i.bid_id IS NULL
+            ORDER BY o.bought_at
+        """, (1 - side, side, OutgoingBidStatus.BOUGHT, bought_before)).fetchall()
+
+    def mismatched_relayings(self, side, relayed_after=0):
+        """
+        The relayed bids of the side since `relayed_after` whose receiver, token or relayer differs from the
+        outgoing bid of the other side, or the outgoing bid is not bought.
+        """
+        return self.db.execute("""
+            SELECT i.*, o.status AS outgoing_status FROM incoming_bids i
+            LEFT JOIN outgoing_bids o ON o.side = ? AND o.bid_id = i.bid_id
+            WHERE i.side = ? AND i.status = ? AND i.relayed_at > ? AND (
+                o.bid_id IS NULL OR o.status != ? OR o.receiver != i.receiver OR o.token_id != i.token_id
+                OR o.buyer != i.relayer
+            )
+            ORDER BY i.relayed_at
+        """, (1 - side, side, IncomingBidStatus.RELAYED, relayed_after, OutgoingBidStatus.BOUGHT)).fetchall()
+
+    def open_challenges(self, challenger=None):
+        if challenger is None:
+            return self.db.execute("SELECT * FROM challenges WHERE status = ? ORDER BY side, bid_id",
+                (ChallengeStatus.CHALLENGED,)).fetchall()
+        return self.db.execute("SELECT * FROM challenges WHERE challenger = ? AND status = ? ORDER BY side, bid_id",
+            (challenger, ChallengeStatus.CHALLENGED)).fetchall()
+
+    def unclaimed_rewards(self, challenger):
+        return self.db.execute("SELECT * FROM rewards WHERE challenger = ? AND NOT claimed ORDER BY side, bid_id",
+            (challenger,)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default="bridge.db")
+    parser.add_argument("--src-rpc", default="http://127.0.0.1:8645")
+    parser.add_argument("--dst-rpc", default="http://127.0.0.1:8646")
+    parser.add_argument("--src-spoke", required=True)
+    parser.add_argument("--dst-spoke", required=True)
+    parser.add_argument("--start-block", type=int, default=0)
+    parser.add_argument("--block-range", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--confirmations", type=int, default=0)
+    parser.add_argument("--follow", action="store_true")
+    args = parser.parse_args()
+
+    src_web3 = Web3(Web3.HTTPProvider(args.src_rpc))
+    dst_web3 = Web3(Web3.HTTPProvider(args.dst_rpc))
+    src_spoke = src_web3.eth.contract(address=args.src_spoke, abi=load_artifact("SrcSpokeBridge")[0])
+    dst_spoke = dst_web3.eth.contract(address=args.dst_spoke, abi=load_artifact("DstSpokeBridge")[0])
+
+    indexer = BridgeIndexer(args.db, src_spoke, dst_spoke, args.start_block, args.block_range, args.batch_size,
+        args.confirmations)
+    try:
+        started = time.perf_counter()
+        blocks = indexer.sync()
+        seconds = time.perf_counter() - started
+
+        for side, name in ((SRC, "src"), (DST, "dst")):
+            count = indexer.db.execute("SELECT COUNT(*) FROM outgoing_bids WHERE side = ?", (side,)).fetchone()[0]
+            print(f"{name}: {count} outgoing bids, checkpoint {indexer.checkpoint(side)}")
+        print(f"{blocks} blocks in {seconds:.3f} s")
+
+        if args.follow:
+            indexer.follow()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        indexer.close()
+
+
+if __name__ == "__main__":
+    main()
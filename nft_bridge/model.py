@@ -0,0 +1,1184 @@
+"""
+A reference model of `SrcSpokeBridge`, `DstSpokeBridge` and `SimpleGatewayHub` in pure Python.
+
+The spokes of the model run the same checks in the same order as the contracts and raise `Revert` with the
+same messages, so a sequence of calls leaves the model in the same state as the deployed contracts. A call
+which reverts does not change the state. The model keeps the bids in `__slots__` rows and skips everything
+the state does not depend on (events, hashing, gas), so it runs orders of magnitude faster than the EVM.
+
+The addresses are any hashable values, the differential tests use the addresses of the deployed contracts
+and accounts. The leaves of the bid tree never change, so a Merkle root is modelled by the leaf count of
+the tree and the records are kept as `Proof` tuples. `mintingWithDeployment` is not modelled.
+"""
+from abc import ABC, abstractmethod
+from collections import defaultdict, namedtuple
+
+from .enums import ChallengeStatus, IncomingBidStatus, OutgoingBidStatus, ProofResult, RelayerStatus
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# the values of the enums as plain ints, the rows are compared with the tuples returned by the contracts
+_CREATED = int(OutgoingBidStatus.CREATED)
+_BOUGHT = int(OutgoingBidStatus.BOUGHT)
+_OUTGOING_MALICIOUS = int(OutgoingBidStatus.MALICIOUS)
+_OUTGOING_UNLOCKED = int(OutgoingBidStatus.UNLOCKED)
+
+_RELAYED = int(IncomingBidStatus.RELAYED)
+_INCOMING_CHALLENGED = int(IncomingBidStatus.CHALLENGED)
+_INCOMING_MALICIOUS = int(IncomingBidStatus.MALICIOUS)
+_INCOMING_UNLOCKED = int(IncomingBidStatus.UNLOCKED)
+
+_ACTIVE = int(RelayerStatus.ACTIVE)
+_UNDEPOSITED = int(RelayerStatus.UNDEPOSITED)
+_RELAYER_CHALLENGED = int(RelayerStatus.CHALLENGED)
+_RELAYER_MALICIOUS = int(RelayerStatus.MALICIOUS)
+
+_CHALLENGE_NONE = int(ChallengeStatus.NONE)
+_CHALLENGE_CHALLENGED = int(ChallengeStatus.CHALLENGED)
+_CHALLENGE_PROVED = int(ChallengeStatus.PROVED)
+
+# it marks a missing row in the journal of a batch, see `SpokeModel._capture`
+_MISSING = object()
+
+
+class Revert(Exception):
+    """
+    A call of the model reverted. `message` is the revert string of the contract, it is empty when the
+    contract reverts without a message (e.g. calling an address without code).
+    """
+
+    def __init__(self, message=""):
+        super().__init__(message)
+        self.message = message
+
+
+Proof = namedtuple(
+    "Proof", "is_outgoing_bid status bid_id receiver token_id erc721_contract relayer challenger")
+
+
+class OutgoingBid:
+    """
+    A row of `outgoingBids`, `as_tuple` is in the order of the getter of the contract.
+    """
+    __slots__ = ("maker", "fee", "receiver", "collection_id", "local_erc721_contract", "buyer",
+                 "timestamp_of_bought", "status", "token_id")
+
+    def __init__(self, maker=ZERO_ADDRESS, fee=0, receiver=ZERO_ADDRESS, collection_id=0,
+                 local_erc721_contract=ZERO_ADDRESS, buyer=ZERO_ADDRESS, timestamp_of_bought=0, status=0,
+                 token_id=0):
+        self.maker = maker
+        self.fee = fee
+        self.receiver = receiver
+        self.collection_id = collection_id
+        self.local_erc721_contract = local_erc721_contract
+        self.buyer = buyer
+        self.timestamp_of_bought = timestamp_of_bought
+        self.status = status
+        self.token_id = token_id
+
+    def copy(self):
+        return OutgoingBid(*self.as_tuple())
+
+    def as_tuple(self):
+        return (self.maker, self.fee, self.receiver, self.collection_id, self.local_erc721_contract,
+                self.buyer, self.timestamp_of_bought, self.status, self.token_id)
+
+
+class IncomingBid:
+    """
+    A row of `incomingBids`, `as_tuple` is in the order of the getter of the contract.
+    """
+    __slots__ = ("receiver", "outgoing_id", "remote_erc721_contract", "relayer", "timestamp_of_relayed",
+                 "status", "token_id")
+
+    def __init__(self, receiver=ZERO_ADDRESS, outgoing_id=0, remote_erc721_contract=ZERO_ADDRESS,
+                 relayer=ZERO_ADDRESS, timestamp_of_relayed=0, status=0, token_id=0):
+        self.receiver = receiver
+        self.outgoing_id = outgoing_id
+        self.remote_erc721_contract = remote_erc721_contract
+        self.relayer = relayer
+        self.timestamp_of_relayed = timestamp_of_relayed
+        self.status = status
+        self.token_id = token_id
+
+    def copy(self):
+        return IncomingBid(*self.as_tuple())
+
+    def as_tuple(self):
+        return (self.receiver, self.outgoing_id, self.remote_erc721_contract, self.relayer,
+                self.timestamp_of_relayed, self.status, self.token_id)
+
+
+class Relayer:
+    __slots__ = ("status", "date_of_undeposited", "staked_amount")
+
+    def __init__(self, status=0, date_of_undeposited=0, staked_amount=0):
+        self.status = status
+        self.date_of_undeposited = date_of_undeposited
+        self.staked_amount = staked_amount
+
+    def copy(self):
+        return Relayer(self.status, self.date_of_undeposited, self.staked_amount)
+
+    def as_tuple(self):
+        return (self.status, self.date_of_undeposited, self.staked_amount)
+
+
+class Challenge:
+    __slots__ = ("challenger", "status")
+
+    def __init__(self, challenger=ZERO_ADDRESS, status=0):
+        self.challenger = challenger
+        self.status = status
+
+    def copy(self):
+        return Challenge(self.challenger, self.status)
+
+    def as_tuple(self):
+        return (self.challenger, self.status)
+
+
+# the rows which are read but not stored, they must not be modified
+_EMPTY_OUTGOING_BID = OutgoingBid()
+_EMPTY_INCOMING_BID = IncomingBid()
+_EMPTY_RELAYER = Relayer()
+_EMPTY_CHALLENGE = Challenge()
+_EMPTY_REWARD = (ZERO_ADDRESS, 0)
+
+
+class Erc721Model:
+    """
+    The part of an OpenZeppelin 4.8 `ERC721` and `Ownable` which the bridge uses. The receivers are assumed
+    to be accounts, `onERC721Received` is not modelled.
+    """
+    __slots__ = ("address", "owner", "owners", "token_approvals", "operators")
+
+    def __init__(self, address, owner):
+        self.address = address
+        self.owner = owner
+        self.owners = {}
+        self.token_approvals = {}
+        self.operators = set()
+
+    def owner_of(self, token_id):
+        owner = self.owners.get(token_id)
+        if owner is None:
+            raise Revert("ERC721: invalid token ID")
+        return owner
+
+    def approve(self, caller, to, token_id):
+        owner = self.owner_of(token_id)
+        if to == owner:
+            raise Revert("ERC721: approval to current owner")
+        if caller != owner and (owner, caller) not in self.operators:
+            raise Revert("ERC721: approve caller is not token owner or approved for all")
+        self.token_approvals[token_id] = to
+
+    def set_approval_for_all(self, caller, operator, approved):
+        if caller == operator:
+            raise Revert("ERC721: approve to caller")
+        if approved:
+            self.operators.add((caller, operator))
+        else:
+            self.operators.discard((caller, operator))
+
+    def check_transfer(self, caller, sender, to, token_id):
+        owner = self.owner_of(token_id)
+        if caller != owner and (owner, caller) not in self.operators \
+                and self.token_approvals.get(token_id) != caller:
+            raise Revert("ERC721: caller is not token owner or approved")
+        if owner != sender:
+            raise Revert("ERC721: transfer from incorrect owner")
+        if to == ZERO_ADDRESS:
+            raise Revert("ERC721: transfer to the zero address")
+
+    def safe_transfer_from(self, caller, sender, to, token_id):
+        self.check_transfer(caller, sender, to, token_id)
+        self.token_approvals.pop(token_id, None)
+        self.owners[token_id] = to
+
+    def check_mint(self, caller, to, token_id):
+        self.check_owner(caller)
+        if to == ZERO_ADDRESS:
+            raise Revert("ERC721: mint to the zero address")
+        if token_id in self.owners:
+            raise Revert("ERC721: token already minted")
+
+    def mint(self, caller, to, token_id):
+        self.check_mint(caller, to, token_id)
+        self.owners[token_id] = to
+
+    def burn(self, caller, token_id):
+        self.check_owner(caller)
+        self.owner_of(token_id)
+        self.token_approvals.pop(token_id, None)
+        del self.owners[token_id]
+
+    def check_owner(self, caller):
+        if caller != self.owner:
+            raise Revert("Ownable: caller is not the owner")
+
+
+class ChainModel:
+    """
+    The environment of the spokes: the time, the ERC721 contracts and the ETH flows. The spokes of the
+    `SimpleGatewayHub` are on the same chain, so they share it.
+    """
+    __slots__ = ("now", "erc721s", "eth")
+
+    def __init__(self, now=0):
+        self.now = now
+        self.erc721s = {}
+        # the net ETH received by the accounts from the spokes, it is negative for the payers
+        self.eth = defaultdict(int)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def add_erc721(self, address, owner):
+        erc721 = Erc721Model(address, owner)
+        self.erc721s[address] = erc721
+        return erc721
+
+    def erc721(self, address):
+        """
+        Returns the contract at `address`, a call to an address without code reverts without a message.
+        """
+        erc721 = self.erc721s.get(address)
+        if erc721 is None:
+            raise Revert()
+        return erc721
+
+
+class HubModel:
+    """
+    `SimpleGatewayHub`: it delivers the messages of a spoke to its pair in the same call.
+    """
+    __slots__ = ("pairs",)
+
+    def __init__(self):
+        self.pairs = {}
+
+    def add_spoke_bridge(self, src, dst):
+        if src.address in self.pairs:
+            raise Revert("Hub: src contract already has a pair!")
+        if dst.address in self.pairs:
+            raise Revert("Hub: dst contract already has a pair!")
+
+        self.pairs[src.address] = dst
+        self.pairs[dst.address] = src
+
+    def pair_of(self, spoke):
+        pair = self.pairs.get(spoke.address)
+        if pair is None:
+            raise Revert("Hub: contract has no pair!")
+        return pair
+
+    def process_message(self, sender, proof):
+        self.pair_of(sender).receive_proof(proof)
+
+    def process_messages(self, sender, proofs):
+        return self.pair_of(sender).receive_proofs(proofs)
+
+    def process_root(self, sender, leaf_count):
+        self.pair_of(sender).receive_root(leaf_count)
+
+
+class SpokeModel(ABC):
+    """
+    The common part of the spokes, `SpokeBridge.sol`. The public methods are the functions of the contract
+    in snake case, their first argument is `msg.sender` and the payable ones take `msg.value` as `value`.
+    """
+    # the prefix of the revert messages of `receiveProof`, they differ in the typos
+    NO_LOCAL_BID = ""
+    TIME_WINDOW_EXPIRED = ""
+    TIME_WINDOW_NOT_EXPIRED = ""
+    FALSE_CHALLENGE = ""
+    TOO_EARLY_TO_SEND_PROOF = ""
+
+    __slots__ = ("address", "chain", "hub", "challenge_period", "stake_amount", "challenge_amount",
+                 "time_limit_of_undeposit", "relayers", "outgoing_bids", "incoming_bids", "challenges",
+                 "incoming_challenge_rewards", "outgoing_challenge_rewards", "open_bids", "records",
+                 "is_committing_bids", "remote_roots", "balance")
+
+    def __init__(self, address, chain, hub, challenge_period, stake_amount, challenge_amount,
+                 time_limit_of_undeposit):
+        if challenge_period <= 0:
+            raise Revert("SpokeBridge: challenge period is zero!")
+
+        self.address = address
+        self.chain = chain
+        self.hub = hub
+        self.challenge_period = challenge_period
+        self.stake_amount = stake_amount
+        self.challenge_amount = challenge_amount
+        self.time_limit_of_undeposit = time_limit_of_undeposit
+
+        self.relayers = {}
+        # the ids of the outgoing bids are sequential, the incoming ones are set by the other side
+        self.outgoing_bids = []
+        self.incoming_bids = {}
+        self.challenges = {}
+        self.incoming_challenge_rewards = {}
+        self.outgoing_challenge_rewards = {}
+        # the bids in Created state as an ordered set
+        self.open_bids = {}
+        # the leaves of the bid tree, the roots of the other side are their leaf counts
+        self.records = []
+        self.is_committing_bids = False
+        self.remote_roots = set()
+        self.balance = 0
+
+    # --- getters, in the format of the getters of the contract
+
+    def outgoing_bid(self, bid_id):
+        return self._outgoing(bid_id).as_tuple()
+
+    def incoming_bid(self, bid_id):
+        return self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID).as_tuple()
+
+    def relayer(self, address):
+        return self.relayers.get(address, _EMPTY_RELAYER).as_tuple()
+
+    def challenge(self, bid_id):
+        return self.challenges.get(bid_id, _EMPTY_CHALLENGE).as_tuple()
+
+    def incoming_challenge_reward(self, bid_id):
+        return self.incoming_challenge_rewards.get(bid_id, _EMPTY_REWARD)
+
+    def outgoing_challenge_reward(self, bid_id):
+        return self.outgoing_challenge_rewards.get(bid_id, _EMPTY_REWARD)
+
+    @property
+    def id(self):
+        return len(self.outgoing_bids)
+
+    def get_open_bids(self):
+        return list(self.open_bids)
+
+    def get_leaf_count(self):
+        return len(self.records)
+
+    # --- relayers
+
+    def deposite(self, sender, value):
+        if self.relayers.get(sender, _EMPTY_RELAYER).status != 0:
+            raise Revert("SpokeBridge: caller cannot be a relayer!")
+        if value != self.stake_amount:
+            raise Revert("SpokeBridge: msg.value is not appropriate!")
+
+        relayer = self.relayers.setdefault(sender, Relayer())
+        relayer.status = _ACTIVE
+        relayer.staked_amount = value
+
+        self._receive_eth(sender, value)
+
+    def undeposite(self, sender):
+        relayer = self._only_active_relayer(sender)
+        relayer.status = _UNDEPOSITED
+        relayer.date_of_undeposited = self.chain.now
+
+    def claim_deposite(self, sender):
+        relayer = self.relayers.get(sender, _EMPTY_RELAYER)
+        if relayer.status != _UNDEPOSITED:
+            raise Revert("SpokeBridge: caller is not in undeposited state!")
+        if self.chain.now <= relayer.date_of_undeposited + self.time_limit_of_undeposit:
+            raise Revert("SpokeBridge: the undepositing period is not expired yet!")
+
+        self._send_eth(sender, self.stake_amount)
+        del self.relayers[sender]
+
+    # --- bids
+
+    def buy_bid(self, sender, bid_id):
+        self._only_active_relayer(sender)
+
+        bid = self._outgoing(bid_id)
+        if bid.status != _CREATED:
+            raise Revert("SpokeBridge: bid does not have Created state")
+        self._check_send_eth(bid.fee)
+        self._check_buying([bid])
+
+        self._buy_bid(sender, bid_id, bid)
+        self._send_eth(sender, bid.fee)
+        self._bought([bid])
+
+        return bid.fee
+
+    def buy_bids(self, sender, bid_ids):
+        self._only_active_relayer(sender)
+        if not bid_ids:
+            raise Revert("SpokeBridge: there is no bid to buy!")
+
+        bids = []
+        seen = set()
+        fees = 0
+        for bid_id in bid_ids:
+            bid = self._outgoing(bid_id)
+            if bid.status != _CREATED or bid_id in seen:
+                raise Revert("SpokeBridge: bid does not have Created state")
+            seen.add(bid_id)
+            bids.append(bid)
+            fees += bid.fee
+        self._check_send_eth(fees)
+        self._check_buying(bids)
+
+        for bid_id, bid in zip(bid_ids, bids):
+            self._buy_bid(sender, bid_id, bid)
+        self._send_eth(sender, fees)
+        self._bought(bids)
+
+        return fees
+
+    def claim_challenge_reward(self, sender, challenge_id, is_outgoing_bid):
+        return self._claim_challenge_rewards(sender, [(challenge_id, is_outgoing_bid)])
+
+    def claim_challenge_rewards(self, sender, challenge_ids, is_outgoing_bids):
+        if not challenge_ids:
+            raise Revert("SpokeBridge: there is no reward to claim!")
+        if len(challenge_ids) != len(is_outgoing_bids):
+            raise Revert("SpokeBridge: array lengths are not equal!")
+
+        return self._claim_challenge_rewards(sender, list(zip(challenge_ids, is_outgoing_bids)))
+
+    def _claim_challenge_rewards(self, sender, keys):
+        seen = set()
+        amount = 0
+        for challenge_id, is_outgoing_bid in keys:
+            rewards = self.outgoing_challenge_rewards if is_outgoing_bid else self.incoming_challenge_rewards
+            challenger, reward = rewards.get(challenge_id, _EMPTY_REWARD)
+            # a reward is deleted by its first claim
+            if challenger != sender or (challenge_id, is_outgoing_bid) in seen:
+                raise Revert("SpokeBridge: challenger is not the sender!")
+            seen.add((challenge_id, is_outgoing_bid))
+            amount += reward
+        self._check_send_eth(amount)
+
+        for challenge_id, is_outgoing_bid in keys:
+            if is_outgoing_bid:
+                del self.outgoing_challenge_rewards[challenge_id]
+            else:
+                del self.incoming_challenge_rewards[challenge_id]
+                self.challenges.pop(challenge_id, None)
+
+        self._send_eth(sender, amount)
+
+        return amount
+
+    # --- proofs
+
+    def send_proof(self, sender, is_outgoing_bid, bid_id):
+        self.hub.process_message(self, self._encode_proof(sender, is_outgoing_bid, bid_id))
+
+    def send_proofs(self, sender, is_outgoing_bids, bid_ids):
+        if not bid_ids:
+            raise Revert("SpokeBridge: there is no proof to send!")
+        if len(is_outgoing_bids) != len(bid_ids):
+            raise Revert("SpokeBridge: array lengths are not equal!")
+
+        proofs = [self._encode_proof(sender, is_outgoing_bid, bid_id)
+                  for is_outgoing_bid, bid_id in zip(is_outgoing_bids, bid_ids)]
+
+        return self.hub.process_messages(self, proofs)
+
+    def receive_proof(self, proof):
+        result = self._receive_atomically([proof], True)[0]
+
+        if result == ProofResult.NO_LOCAL_BID:
+            raise Revert(self.NO_LOCAL_BID)
+        if result == ProofResult.TIME_WINDOW_EXPIRED:
+            raise Revert(self.TIME_WINDOW_EXPIRED)
+        if result == ProofResult.TIME_WINDOW_NOT_EXPIRED:
+            raise Revert(self.TIME_WINDOW_NOT_EXPIRED)
+        if result == ProofResult.FALSE_CHALLENGE:
+            raise Revert(self.FALSE_CHALLENGE)
+
+        return result
+
+    def receive_proofs(self, proofs):
+        """
+        Returns the results of the proofs, one failing proof does not revert the others. A reverting proof
+        is rolled back alone, like the call frame of `receiveProofEntry`. The gas limit of the frame is not
+        modelled.
+        """
+        results = []
+        for proof in proofs:
+            try:
+                results.append(self._receive_atomically([proof], True)[0])
+            except Revert:
+                results.append(ProofResult.REVERTED)
+        return results
+
+    def set_committing_bids(self, sender, is_committing_bids):
+        """
+        The owner of the spokes is not modelled, so anybody can call it.
+        """
+        self.is_committing_bids = is_committing_bids
+
+    def commit_root(self):
+        leaf_count = len(self.records)
+        self.hub.process_root(self, leaf_count)
+        return leaf_count
+
+    def receive_root(self, leaf_count):
+        self.remote_roots.add(leaf_count)
+
+    def prove_bids(self, sender, leaf_count, leaf_indices):
+        """
+        `proveBids` with the root of `leaf_count` leaves. The records are taken from the other side, an index
+        out of the tree is an invalid inclusion proof.
+        """
+        if leaf_count not in self.remote_roots:
+            raise Revert("SpokeBridge: root is not committed by the other side!")
+        if not leaf_indices:
+            raise Revert("SpokeBridge: there is no proof to verify!")
+
+        records = self.hub.pair_of(self).records
+
+        def proofs():
+            # the inclusion of a record is checked right before it is processed, like in the contract
+            for index in leaf_indices:
+                if index >= leaf_count:
+                    raise Revert("SpokeBridge: invalid inclusion proof!")
+                # the records have no challenger, the reward goes to the prover
+                yield records[index]._replace(challenger=sender)
+
+        return self._receive_atomically(proofs(), False)
+
+    # --- internals
+
+    def _outgoing(self, bid_id):
+        if 0 <= bid_id < len(self.outgoing_bids):
+            return self.outgoing_bids[bid_id]
+        return _EMPTY_OUTGOING_BID
+
+    def _only_active_relayer(self, sender):
+        relayer = self.relayers.get(sender, _EMPTY_RELAYER)
+        if relayer.status != _ACTIVE:
+            raise Revert("SpokeBridge: caller is not a relayer!")
+        return relayer
+
+    def _relayer_for_write(self, address):
+        relayer = self.relayers.get(address)
+        if relayer is None:
+            relayer = self.relayers[address] = Relayer()
+        return relayer
+
+    def _challenge_for_write(self, bid_id):
+        challenge = self.challenges.get(bid_id)
+        if challenge is None:
+            challenge = self.challenges[bid_id] = Challenge()
+        return challenge
+
+    def _receive_eth(self, sender, value):
+        self.balance += value
+        self.chain.eth[sender] -= value
+
+    def _check_send_eth(self, amount):
+        if amount > self.balance:
+            raise Revert("Failed to send Ether")
+
+    def _send_eth(self, to, amount):
+        self.balance -= amount
+        self.chain.eth[to] += amount
+
+    def _create_bid(self, sender, receiver, token_id, erc721_contract, collection_id, fee):
+        bid_id = len(self.outgoing_bids)
+        self.outgoing_bids.append(OutgoingBid(
+            maker=sender,
+            fee=fee,
+            receiver=receiver,
+            collection_id=collection_id,
+            local_erc721_contract=erc721_contract,
+            status=_CREATED,
+            token_id=token_id,
+        ))
+        self.open_bids[bid_id] = None
+        return bid_id
+
+    def _buy_bid(self, sender, bid_id, bid):
+        bid.buyer = sender
+        bid.timestamp_of_bought = self.chain.now
+        bid.status = _BOUGHT
+
+        self.open_bids.pop(bid_id, None)
+        self._commit_bid(True, bid_id)
+
+    def _check_buying(self, bids):
+        """
+        Checks the calls of the other contracts after buying `bids`.
+        """
+
+    def _bought(self, bids):
+        """
+        Calls the other contracts after buying `bids`.
+        """
+
+    def _commit_bid(self, is_outgoing_bid, bid_id):
+        if self.is_committing_bids:
+            self.records.append(self._to_proof(is_outgoing_bid, bid_id))
+
+    def _challenge_unlocking(self, sender, bid_id, value):
+        if value != self.challenge_amount:
+            raise Revert("SpokeBridge: No enough amount of ETH to stake!")
+        bid = self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID)
+        if bid.status != _RELAYED:
+            raise Revert("SpokeBridge: Corresponding incoming bid status is not relayed!")
+        if bid.timestamp_of_relayed + self.challenge_period <= self.chain.now:
+            raise Revert("SpokeBridge: The dispute period is expired!")
+        if self.challenges.get(bid_id, _EMPTY_CHALLENGE).status != _CHALLENGE_NONE:
+            raise Revert("SpokeBridge: bid is already challenged!")
+
+        bid.status = _INCOMING_CHALLENGED
+
+        challenge = self._challenge_for_write(bid_id)
+        challenge.challenger = sender
+        challenge.status = _CHALLENGE_CHALLENGED
+
+        self._relayer_for_write(bid.relayer).status = _RELAYER_CHALLENGED
+
+        self._receive_eth(sender, value)
+
+    def _encode_proof(self, sender, is_outgoing_bid, bid_id):
+        proof = self._to_proof(is_outgoing_bid, bid_id)
+        if not is_outgoing_bid:
+            bid = self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID)
+            if bid.timestamp_of_relayed + self.challenge_period >= self.chain.now:
+                raise Revert(self.TOO_EARLY_TO_SEND_PROOF)
+
+            proof = proof._replace(challenger=sender)
+
+        return proof
+
+    def _finalize_malicious_outgoing_bid(self, bid):
+        bid.status = _OUTGOING_MALICIOUS
+        bid.maker = ZERO_ADDRESS
+        bid.fee = 0
+        bid.receiver = ZERO_ADDRESS
+        bid.collection_id = 0
+        bid.local_erc721_contract = ZERO_ADDRESS
+        bid.token_id = 0
+
+    def _receive_atomically(self, proofs, is_current_state):
+        """
+        Processes `proofs` and restores the rows they touched if one of them reverts.
+        """
+        journal = []
+        try:
+            results = []
+            for proof in proofs:
+                self._capture(journal, proof)
+                results.append(self._receive_proof(proof, is_current_state))
+            return results
+        except Revert:
+            for container, key, row in reversed(journal):
+                if row is _MISSING:
+                    # the same row can be saved twice, e.g. when both bids refer to the same token
+                    container.pop(key, None)
+                else:
+                    container[key] = row
+            raise
+
+    def _capture(self, journal, proof):
+        """
+        Saves the rows which `_receive_proof` can change for `proof` into `journal`.
+        """
+        bid_id = proof.bid_id
+
+        def save(container, key):
+            row = container.get(key, _MISSING) if isinstance(container, dict) else container[key]
+            # the rows of the bids are mutable, the rewards and the owners of the tokens are not
+            journal.append((container, key, row.copy() if hasattr(row, "copy") else row))
+
+        incoming = self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID)
+        outgoing = self._outgoing(bid_id)
+
+        if bid_id in self.incoming_bids:
+            save(self.incoming_bids, bid_id)
+        if outgoing is not _EMPTY_OUTGOING_BID:
+            save(self.outgoing_bids, bid_id)
+        if 0 <= incoming.outgoing_id < len(self.outgoing_bids):
+            save(self.outgoing_bids, incoming.outgoing_id)
+        save(self.relayers, incoming.relayer)
+        save(self.relayers, outgoing.buyer)
+        save(self.challenges, bid_id)
+        save(self.incoming_challenge_rewards, bid_id)
+        save(self.outgoing_challenge_rewards, bid_id)
+
+        for erc721_contract, token_id in ((incoming.remote_erc721_contract, incoming.token_id),
+                                          (outgoing.local_erc721_contract, outgoing.token_id)):
+            erc721 = self.chain.erc721s.get(erc721_contract)
+            if erc721 is not None:
+                save(erc721.owners, token_id)
+                save(erc721.token_approvals, token_id)
+
+    @abstractmethod
+    def _to_proof(self, is_outgoing_bid, bid_id):
+        """
+        Returns the `Proof` of a local bid, it is what `_toProof` encodes.
+        """
+
+    @abstractmethod
+    def _receive_proof(self, proof, is_current_state):
+        """
+        Checks a proof of the other side against the local bid and returns the `ProofResult`.
+        """
+
+
+class SrcSpokeModel(SpokeModel):
+    """
+    `SrcSpokeBridge`, `contract_map` is the `localToRemote` mapping of its `ContractMap`.
+    """
+    NO_LOCAL_BID = "SrcSpokeBrdige: There is no corresponding local bid!"
+    TIME_WINDOW_EXPIRED = "SrcSpokeBridge: Time window is expired!"
+    TIME_WINDOW_NOT_EXPIRED = "SrcSpokeBridge: Time window is not expired!"
+    FALSE_CHALLENGE = "SrcSpokeBridge: False challenging!"
+    TOO_EARLY_TO_SEND_PROOF = "SrcSpokeBridge: too early to send proof!"
+
+    __slots__ = ("contract_map", "collection_ids", "remote_erc721_contracts")
+
+    def __init__(self, address, chain, hub, contract_map, challenge_period, stake_amount, challenge_amount,
+                 time_limit_of_undeposit):
+        super().__init__(address, chain, hub, challenge_period, stake_amount, challenge_amount,
+                         time_limit_of_undeposit)
+
+        self.contract_map = contract_map
+        self.collection_ids = {}
+        # the ids of the collections start from one
+        self.remote_erc721_contracts = [ZERO_ADDRESS]
+
+    @property
+    def collection_count(self):
+        return len(self.remote_erc721_contracts) - 1
+
+    def remote_erc721_contract(self, collection_id):
+        if collection_id < len(self.remote_erc721_contracts):
+            return self.remote_erc721_contracts[collection_id]
+        return ZERO_ADDRESS
+
+    def create_bid(self, sender, receiver, token_id, erc721_contract, value):
+        if value <= 0:
+            raise Revert("SrcSpokeBridge: there is no fee for relayers!")
+        self._check_collection(erc721_contract)
+        erc721 = self.chain.erc721(erc721_contract)
+        erc721.check_transfer(self.address, sender, self.address, token_id)
+
+        collection_id = self._get_collection_id(erc721_contract)
+        erc721.safe_transfer_from(self.address, sender, self.address, token_id)
+        self._receive_eth(sender, value)
+
+        return self._create_bid(sender, receiver, token_id, erc721_contract, collection_id, value)
+
+    def create_bids(self, sender, receiver, token_ids, erc721_contract, value):
+        count = len(token_ids)
+        if count == 0:
+            raise Revert("SrcSpokeBridge: there is no token to bridge!")
+        if value < count:
+            raise Revert("SrcSpokeBridge: there is no fee for relayers!")
+        self._check_collection(erc721_contract)
+        erc721 = self.chain.erc721(erc721_contract)
+        _check_transfers(erc721, self.address, sender, token_ids)
+
+        collection_id = self._get_collection_id(erc721_contract)
+        fee = value // count
+        bid_ids = []
+        for i, token_id in enumerate(token_ids):
+            erc721.safe_transfer_from(self.address, sender, self.address, token_id)
+            # the last bid gets the remainder of the division
+            bid_fee = value - fee * (count - 1) if i == count - 1 else fee
+            bid_ids.append(self._create_bid(sender, receiver, token_id, erc721_contract, collection_id, bid_fee))
+        self._receive_eth(sender, value)
+
+        return bid_ids
+
+    def register_collections(self, sender, erc721_contracts):
+        if not erc721_contracts:
+            raise Revert("SrcSpokeBridge: there is no contract to register!")
+        for erc721_contract in erc721_contracts:
+            self._check_collection(erc721_contract)
+
+        for erc721_contract in erc721_contracts:
+            self._get_collection_id(erc721_contract)
+
+    def challenge_unlocking(self, sender, bid_id, value):
+        self._challenge_unlocking(sender, bid_id, value)
+
+    def unlocking(self, sender, locking_bid_id, bid_id, to):
+        self._only_active_relayer(sender)
+
+        outgoing = self._outgoing(locking_bid_id)
+        if outgoing.status != _BOUGHT:
+            raise Revert("SrcSpokeBridge: the outgoing bid is not bought!")
+        if self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID).status != 0:
+            raise Revert("SrcSpokeBridge: there is an incoming bid with the same id!")
+        if outgoing.timestamp_of_bought + self.challenge_period >= self.chain.now:
+            raise Revert("SrcSpokeBridge: the challenging period is not expired yet!")
+
+        outgoing.status = _OUTGOING_UNLOCKED
+
+        self.incoming_bids[bid_id] = IncomingBid(
+            receiver=to,
+            outgoing_id=locking_bid_id,
+            remote_erc721_contract=outgoing.local_erc721_contract,
+            relayer=sender,
+            timestamp_of_relayed=self.chain.now,
+            status=_RELAYED,
+            token_id=outgoing.token_id,
+        )
+
+        self._commit_bid(False, bid_id)
+
+    def claim_nft(self, sender, incoming_bid_id):
+        self._claim_nfts(sender, [incoming_bid_id])
+
+    def claim_nfts(self, sender, incoming_bid_ids):
+        if not incoming_bid_ids:
+            raise Revert("SrcSpokeBridge: there is no NFT to claim!")
+
+        self._claim_nfts(sender, incoming_bid_ids)
+
+    def _claim_nfts(self, sender, incoming_bid_ids):
+        bids = []
+        seen = set()
+        for incoming_bid_id in incoming_bid_ids:
+            bid = self.incoming_bids.get(incoming_bid_id, _EMPTY_INCOMING_BID)
+            # a bid is Unlocked by its first claim
+            if bid.status != _RELAYED or incoming_bid_id in seen:
+                raise Revert("SrcSpokeBride: incoming bid has no Relayed state!")
+            if bid.timestamp_of_relayed + self.challenge_period >= self.chain.now:
+                raise Revert("SrcSpokeBridge: the challenging period is not expired yet!")
+            if bid.receiver != sender:
+                raise Revert("SrcSpokeBridge: claimer is not the owner!")
+            seen.add(incoming_bid_id)
+            bids.append(bid)
+
+        for bid in bids:
+            outgoing = self._outgoing(bid.outgoing_id)
+            self.chain.erc721(outgoing.local_erc721_contract).safe_transfer_from(
+                self.address, self.address, sender, bid.token_id)
+
+            bid.status = _INCOMING_UNLOCKED
+            # the bridging is finished, only the fields which the proofs of the bid contain are kept
+            outgoing.maker = ZERO_ADDRESS
+            outgoing.fee = 0
+            outgoing.local_erc721_contract = ZERO_ADDRESS
+
+    def _check_collection(self, erc721_contract):
+        if erc721_contract not in self.collection_ids and erc721_contract not in self.contract_map:
+            raise Revert("ContractMap: addr is not in the localToRemote!")
+
+    def _get_collection_id(self, erc721_contract):
+        collection_id = self.collection_ids.get(erc721_contract)
+        if collection_id is None:
+            collection_id = self.collection_ids[erc721_contract] = len(self.remote_erc721_contracts)
+            self.remote_erc721_contracts.append(self.contract_map[erc721_contract])
+        return collection_id
+
+    def _to_proof(self, is_outgoing_bid, bid_id):
+        if is_outgoing_bid:
+            bid = self._outgoing(bid_id)
+            return Proof(True, bid.status, bid_id, bid.receiver, bid.token_id,
+                         self.remote_erc721_contract(bid.collection_id), bid.buyer, ZERO_ADDRESS)
+
+        bid = self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID)
+        erc721_contract = self.remote_erc721_contract(self._outgoing(bid.outgoing_id).collection_id)
+        return Proof(False, bid.status, bid_id, bid.receiver, bid.token_id, erc721_contract, bid.relayer,
+                     ZERO_ADDRESS)
+
+    def _receive_proof(self, proof, is_current_state):
+        bid_id = proof.bid_id
+        now = self.chain.now
+
+        if proof.is_outgoing_bid:
+            # on the source chain during unlocking (wrong relaying), revert the incoming message
+            local = self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID)
+            # a replayed proof of a proved bid does not revert the other proofs of the message
+            if local.status in (0, _INCOMING_MALICIOUS):
+                return ProofResult.NO_LOCAL_BID
+            if local.timestamp_of_relayed + self.challenge_period <= now:
+                return ProofResult.TIME_WINDOW_EXPIRED
+
+            relayer = local.relayer
+            # the proof contains the wrapped contract, `remote_erc721_contract` is the original one
+            erc721_contract = self.remote_erc721_contract(self._outgoing(local.outgoing_id).collection_id)
+            if (proof.status == _BOUGHT and local.receiver == proof.receiver and local.token_id == proof.token_id
+                    and erc721_contract == proof.erc721_contract and relayer == proof.relayer):
+                if not is_current_state:
+                    return ProofResult.FALSE_CHALLENGE
+
+                local.status = _RELAYED
+                self._relayer_for_write(relayer).status = _ACTIVE
+                self._challenge_for_write(bid_id).status = _CHALLENGE_NONE
+                return ProofResult.REJECTED
+
+            local.status = _INCOMING_MALICIOUS
+            self._relayer_for_write(relayer).status = _RELAYER_MALICIOUS
+            # the outgoing bid can be relayed again, unless its token was given back in the meantime
+            outgoing = self._outgoing(local.outgoing_id)
+            if outgoing.status == _OUTGOING_UNLOCKED:
+                outgoing.status = _BOUGHT
+
+            challenge = self._challenge_for_write(bid_id)
+            if challenge.status == _CHALLENGE_CHALLENGED:
+                self.incoming_challenge_rewards[bid_id] = (
+                    challenge.challenger, self.challenge_amount + self.stake_amount // 4)
+            challenge.status = _CHALLENGE_PROVED
+            return ProofResult.PROVED
+
+        # on the source chain during locking (no relaying), revert locking
+        local = self._outgoing(bid_id)
+        # only a locked token can be given back, a claimed bid has no local contract any more
+        claimed = local.local_erc721_contract == ZERO_ADDRESS
+        if local.status != _BOUGHT and (local.status != _OUTGOING_UNLOCKED or claimed):
+            return ProofResult.NO_LOCAL_BID
+        if local.timestamp_of_bought + self.challenge_period >= now:
+            return ProofResult.TIME_WINDOW_NOT_EXPIRED
+
+        if (proof.status != _INCOMING_MALICIOUS and local.receiver == proof.receiver
+                and local.token_id == proof.token_id
+                and self.remote_erc721_contract(local.collection_id) == proof.erc721_contract
+                and local.buyer == proof.relayer):
+            return ProofResult.FALSE_CHALLENGE
+
+        maker = local.maker
+        token_id = local.token_id
+        erc721_contract = local.local_erc721_contract
+
+        self._relayer_for_write(local.buyer).status = _RELAYER_MALICIOUS
+        self._finalize_malicious_outgoing_bid(local)
+
+        self.chain.erc721(erc721_contract).safe_transfer_from(self.address, self.address, maker, token_id)
+
+        self.outgoing_challenge_rewards[bid_id] = (proof.challenger, self.stake_amount // 4)
+        self._challenge_for_write(bid_id).status = _CHALLENGE_PROVED
+        return ProofResult.PROVED
+
+
+class DstSpokeModel(SpokeModel):
+    """
+    `DstSpokeBridge`, the wrapped contracts are owned by it.
+    """
+    NO_LOCAL_BID = "DstSpokeBrdige: There is no corresponding local bid!"
+    TIME_WINDOW_EXPIRED = "DstSpokeBridge: Time window is expired!"
+    TIME_WINDOW_NOT_EXPIRED = "DstSpokeBridge: Time window is not expired!"
+    FALSE_CHALLENGE = "DstSpokeBridge: False challenging!"
+    TOO_EARLY_TO_SEND_PROOF = "DstSpokeBridge: too early to send proof!"
+
+    __slots__ = ()
+
+    def create_bid(self, sender, receiver, token_id, erc721_contract, incoming_bid_id, value):
+        if value <= 0:
+            raise Revert("DstSpokeBridge: there is no fee for relayers!")
+        self._check_unwrapping(incoming_bid_id)
+        erc721 = self.chain.erc721(erc721_contract)
+
+        erc721.safe_transfer_from(self.address, sender, self.address, token_id)
+        self._receive_eth(sender, value)
+
+        return self._create_bid(sender, receiver, token_id, erc721_contract, 0, value)
+
+    def create_bids(self, sender, receiver, token_ids, erc721_contract, incoming_bid_ids, value):
+        count = len(token_ids)
+        if count == 0:
+            raise Revert("DstSpokeBridge: there is no token to bridge!")
+        if count != len(incoming_bid_ids):
+            raise Revert("DstSpokeBridge: array lengths are not equal!")
+        if value < count:
+            raise Revert("DstSpokeBridge: there is no fee for relayers!")
+
+        # the checks of a bid come before the transfer of its token
+        erc721 = None
+        seen = set()
+        for token_id, incoming_bid_id in zip(token_ids, incoming_bid_ids):
+            self._check_unwrapping(incoming_bid_id)
+            if erc721 is None:
+                erc721 = self.chain.erc721(erc721_contract)
+            if token_id in seen:
+                raise Revert("ERC721: transfer from incorrect owner")
+            erc721.check_transfer(self.address, sender, self.address, token_id)
+            seen.add(token_id)
+
+        fee = value // count
+        bid_ids = []
+        for i, token_id in enumerate(token_ids):
+            erc721.safe_transfer_from(self.address, sender, self.address, token_id)
+            bid_fee = value - fee * (count - 1) if i == count - 1 else fee
+            bid_ids.append(self._create_bid(sender, receiver, token_id, erc721_contract, 0, bid_fee))
+        self._receive_eth(sender, value)
+
+        return bid_ids
+
+    def challenge_minting(self, sender, bid_id, value):
+        self._challenge_unlocking(sender, bid_id, value)
+
+    def minting(self, sender, bid_id, to, token_id, erc721_contract):
+        self._only_active_relayer(sender)
+        if self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID).status != 0:
+            raise Revert("DstSpokeBridge: there is an incoming bid with the same id!")
+        erc721 = self.chain.erc721(erc721_contract)
+        erc721.check_mint(self.address, to, token_id)
+
+        self._relay_incoming_bid(sender, bid_id, to, token_id, erc721_contract)
+        erc721.mint(self.address, to, token_id)
+
+    def minting_batch(self, sender, bid_ids, to, token_ids, erc721_contract):
+        self._only_active_relayer(sender)
+        if not bid_ids:
+            raise Revert("DstSpokeBridge: there is no bid to relay!")
+        if len(bid_ids) != len(to) or len(bid_ids) != len(token_ids):
+            raise Revert("DstSpokeBridge: array lengths are not equal!")
+
+        seen = set()
+        for bid_id in bid_ids:
+            if self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID).status != 0 or bid_id in seen:
+                raise Revert("DstSpokeBridge: there is an incoming bid with the same id!")
+            seen.add(bid_id)
+
+        erc721 = self.chain.erc721(erc721_contract)
+        minted = set()
+        for receiver, token_id in zip(to, token_ids):
+            if token_id in minted:
+                raise Revert("ERC721: token already minted")
+            erc721.check_mint(self.address, receiver, token_id)
+            minted.add(token_id)
+
+        for bid_id, receiver, token_id in zip(bid_ids, to, token_ids):
+            self._relay_incoming_bid(sender, bid_id, receiver, token_id, erc721_contract)
+        for receiver, token_id in zip(to, token_ids):
+            erc721.mint(self.address, receiver, token_id)
+
+    def _check_unwrapping(self, incoming_bid_id):
+        incoming = self.incoming_bids.get(incoming_bid_id, _EMPTY_INCOMING_BID)
+        if incoming.status != _RELAYED:
+            raise Revert("DstSpokeBridge: incoming bid is not relayed!")
+        if incoming.timestamp_of_relayed + self.challenge_period >= self.chain.now:
+            raise Revert("DstSpokeBridge: too early unwrapping!")
+
+    def _relay_incoming_bid(self, sender, bid_id, to, token_id, erc721_contract):
+        self.incoming_bids[bid_id] = IncomingBid(
+            receiver=to,
+            remote_erc721_contract=erc721_contract,
+            relayer=sender,
+            timestamp_of_relayed=self.chain.now,
+            status=_RELAYED,
+            token_id=token_id,
+        )
+
+        self._commit_bid(False, bid_id)
+
+    def _check_buying(self, bids):
+        # a proved malicious minting can burn a token which is held by this contract
+        for bid in bids:
+            erc721 = self.chain.erc721(bid.local_erc721_contract)
+            erc721.check_owner(self.address)
+            erc721.owner_of(bid.token_id)
+
+    def _bought(self, bids):
+        for bid in bids:
+            self.chain.erc721(bid.local_erc721_contract).burn(self.address, bid.token_id)
+
+    def _to_proof(self, is_outgoing_bid, bid_id):
+        if is_outgoing_bid:
+            bid = self._outgoing(bid_id)
+            return Proof(True, bid.status, bid_id, bid.receiver, bid.token_id, bid.local_erc721_contract,
+                         bid.buyer, ZERO_ADDRESS)
+
+        bid = self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID)
+        return Proof(False, bid.status, bid_id, bid.receiver, bid.token_id, bid.remote_erc721_contract,
+                     bid.relayer, ZERO_ADDRESS)
+
+    def _receive_proof(self, proof, is_current_state):
+        bid_id = proof.bid_id
+        now = self.chain.now
+
+        if proof.is_outgoing_bid:
+            # on the dest chain during minting (wrong relaying), revert minting
+            local = self.incoming_bids.get(bid_id, _EMPTY_INCOMING_BID)
+            # a replayed proof of a proved bid does not revert the other proofs of the message
+            if local.status in (0, _INCOMING_MALICIOUS):
+                return ProofResult.NO_LOCAL_BID
+            if local.timestamp_of_relayed + self.challenge_period <= now:
+                return ProofResult.TIME_WINDOW_EXPIRED
+
+            relayer = local.relayer
+            if (proof.status == _BOUGHT and local.receiver == proof.receiver and local.token_id == proof.token_id
+                    and local.remote_erc721_contract == proof.erc721_contract and relayer == proof.relayer):
+                if not is_current_state:
+                    return ProofResult.FALSE_CHALLENGE
+
+                local.status = _RELAYED
+                self._relayer_for_write(relayer).status = _ACTIVE
+                self._challenge_for_write(bid_id).status = _CHALLENGE_NONE
+                return ProofResult.REJECTED
+
+            local.status = _INCOMING_MALICIOUS
+            self._relayer_for_write(relayer).status = _RELAYER_MALICIOUS
+
+            # burning the wrong minted token
+            self.chain.erc721(local.remote_erc721_contract).burn(self.address, local.token_id)
+
+            challenge = self._challenge_for_write(bid_id)
+            if challenge.status == _CHALLENGE_CHALLENGED:
+                self.incoming_challenge_rewards[bid_id] = (
+                    challenge.challenger, self.challenge_amount + self.stake_amount // 4)
+            challenge.status = _CHALLENGE_PROVED
+            return ProofResult.PROVED
+
+        # on the dest chain during burning (no relaying), revert burning
+        local = self._outgoing(bid_id)
+        # only the burned token of a bought bid can be minted back
+        if local.status != _BOUGHT:
+            return ProofResult.NO_LOCAL_BID
+        if local.timestamp_of_bought + self.challenge_period >= now:
+            return ProofResult.TIME_WINDOW_NOT_EXPIRED
+
+        # the source side sets the relayed bid to Unlocked when its receiver claims the token
+        if (proof.status in (_RELAYED, _INCOMING_UNLOCKED) and local.receiver == proof.receiver
+                and local.token_id == proof.token_id and local.local_erc721_contract == proof.erc721_contract
+                and local.buyer == proof.relayer):
+            return ProofResult.FALSE_CHALLENGE
+
+        maker = local.maker
+        token_id = local.token_id
+        erc721_contract = local.local_erc721_contract
+
+        self._relayer_for_write(local.buyer).status = _RELAYER_MALICIOUS
+        self._finalize_malicious_outgoing_bid(local)
+
+        # minting the wrong burned token
+        self.chain.erc721(erc721_contract).mint(self.address, maker, token_id)
+
+        self.outgoing_challenge_rewards[bid_id] = (proof.challenger, self.stake_amount // 4)
+        self._challenge_for_write(bid_id).status = _CHALLENGE_PROVED
+        return ProofResult.PROVED
+
+
+class BridgeModel:
+    """
+    A source and a destination spoke connected by a hub, like the `bridge` fixture of the tests.
+    """
+    __slots__ = ("chain", "hub", "src", "dst")
+
+    def __init__(self, challenge_period, stake_amount, challenge_amount, time_limit_of_undeposit,
+                 contract_map=None, src_address="src", dst_address="dst", now=0):
+        params = (challenge_period, stake_amount, challenge_amount, time_limit_of_undeposit)
+
+        self.chain = ChainModel(now)
+        self.hub = HubModel()
+        self.src = SrcSpokeModel(src_address, self.chain, self.hub, {} if contract_map is None else contract_map,
+                                 *params)
+        self.dst = DstSpokeModel(dst_address, self.chain, self.hub, *params)
+
+        self.hub.add_spoke_bridge(self.src, self.dst)
+
+
+def _check_transfers(erc721, bridge, sender, token_ids):
+    """
+    Checks the transfers of `token_ids` to `bridge` one after the other, a token cannot be sent twice.
+    """
+    seen = set()
+    for token_id in token_ids:
+        if token_id in seen:
+            raise Revert("ERC721: transfer from incorrect owner")
+        erc721.check_transfer(bridge, sender, bridge, token_id)
+        seen.add(token_id)
@@ -0,0 +1,115 @@
+"""
+The Python counterpart of `ProofCodec.sol`, it encodes and decodes the payloads of `sendProof`, `sendProofs`,
+`receiveProof` and `receiveProofs` byte for byte:
+
+    | header (1) | bidId (32) | receiver (20) | tokenId (32) | erc721Contract (20) | relayer (20) | challenger (20) |
+
+The challenger is only part of the proofs of incoming bids. The header holds the version in the upper four
+bits, the kind of the bid in the next bit and the status in the lower three bits. The errors have the same
+messages as the reverts of the library.
+"""
+from eth_utils import to_checksum_address
+
+from .model import Proof
+
+VERSION = 1
+
+OUTGOING_PROOF_LENGTH = 125
+INCOMING_PROOF_LENGTH = 145
+
+OUTGOING_FLAG = 0x08
+STATUS_MASK = 0x07
+
+
+class ProofCodecError(ValueError):
+    pass
+
+
+def _address(address):
+    data = bytes.fromhex(address[2:] if address.startswith("0x") else address)
+    if len(data) != 20:
+        raise ProofCodecError(f"invalid address: {address}")
+    return data
+
+
+def encode_proof(proof):
+    """
+    Returns the packed bytes of a `Proof`, the challenger of an outgoing proof is not encoded.
+    """
+    if not 0 <= proof.status <= STATUS_MASK:
+        raise ProofCodecError("ProofCodec: status does not fit in the header!")
+
+    header = VERSION << 4 | proof.status
+    if proof.is_outgoing_bid:
+        header |= OUTGOING_FLAG
+
+    data = b"".join((
+        bytes([header]),
+        proof.bid_id.to_bytes(32, "big"),
+        _address(proof.receiver),
+        proof.token_id.to_bytes(32, "big"),
+        _address(proof.erc721_contract),
+        _address(proof.relayer),
+    ))
+    if proof.is_outgoing_bid:
+        return data
+    return data + _address(proof.challenger)
+
+
+def encode_proofs(proofs):
+    """
+    Returns the payload of `sendProofs`, the concatenation of the proofs.
+    """
+    return b"".join(encode_proof(proof) for proof in proofs)
+
+
+def decode_proof_at(data, offset=0):
+    """
+    Decodes the proof which starts at `offset` of a batch, returns it and the offset of the next proof.
+    """
+    data = bytes(data)
+    if len(data) <= offset:
+        raise ProofCodecError("ProofCodec: invalid proof length!")
+
+    header = data[offset]
+    if header >> 4 != VERSION:
+        raise ProofCodecError("ProofCodec: unsupported proof version!")
+
+    is_outgoing_bid = bool(header & OUTGOING_FLAG)
+    end = offset + (OUTGOING_PROOF_LENGTH if is_outgoing_bid else INCOMING_PROOF_LENGTH)
+    if end > len(data):
+        raise ProofCodecError("ProofCodec: invalid proof length!")
+
+    proof = Proof(
+        is_outgoing_bid,
+        header & STATUS_MASK,
+        int.from_bytes(data[offset + 1:offset + 33], "big"),
+        to_checksum_address(data[offset + 33:offset + 53]),
+        int.from_bytes(data[offset + 53:offset + 85], "big"),
+        to_checksum_address(data[offset + 85:offset + 105]),
+        to_checksum_address(data[offset + 105:offset + 125]),
+        "0x" + "00" * 20 if is_outgoing_bid else to_checksum_address(data[offset + 125:offset + 145]),
+    )
+    return proof, end
+
+
+def decode_proof(data):
+    """
+    Decodes the payload of `receiveProof`, it has to be exactly one proof.
+    """
+    proof, end = decode_proof_at(data)
+    if end != len(data):
+        raise ProofCodecError("ProofCodec: invalid proof length!")
+    return proof
+
+
+def decode_proofs(data):
+    """
+    Decodes the payload of `receiveProofs`.
+    """
+    proofs = []
+    offset = 0
+    while offset < len(data):
+        proof, offset = decode_proof_at(data, offset)
+        proofs.append(proof)
+    return proofs
@@ -0,0 +1,172 @@
+"""
+An asyncio relayer of the messages of `QueueingGatewayHub`, it replaces the synchronous delivery of the
+`SimpleGatewayHub`. The relayer polls the queued messages of the hub of one chain and delivers them in
+batches to the hub of the other chain. A `DeliveryPolicy` delays, reorders and drops the messages, so the
+challenge flows can be measured under realistic cross-chain latency and ordering.
+
+The endpoints are duck typed, they have two coroutines:
+
+    fetch_messages() -> the messages queued since the previous call, as `Message`s
+    deliver(messages) -> whether the delivery of each message succeeded, in the same order
+"""
+import asyncio
+import heapq
+import random
+import time
+
+from collections import namedtuple
+
+# `kind` is a `QueueingGatewayHub.MessageKind`: 0 - proof, 1 - batch of proofs, 2 - root
+Message = namedtuple("Message", "nonce kind data")
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of `values` by the nearest-rank method, zero if there is no value.
+    """
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)]
+
+
+class DeliveryPolicy:
+    """
+    Every message is delivered `delay` plus a random jitter of at most `jitter` seconds after it is noticed,
+    at most `batch_size` messages in one transaction. A batch is shuffled if `reorder` is set, so the jitter
+    and the shuffling reorder the messages. A message is dropped with the probability of `drop_rate`.
+    """
+    __slots__ = ("delay", "jitter", "batch_size", "reorder", "drop_rate", "rng")
+
+    def __init__(self, delay=0.0, jitter=0.0, batch_size=16, reorder=False, drop_rate=0.0, seed=None):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        self.delay = delay
+        self.jitter = jitter
+        self.batch_size = batch_size
+        self.reorder = reorder
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+
+    def due_time(self, now):
+        return now + self.delay + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def is_dropped(self):
+        return self.drop_rate > 0 and self.rng.random() < self.drop_rate
+
+
+class RelayMetrics:
+    """
+    The times are `time.perf_counter` values. The latency of a message is the time between noticing and
+    delivering it, `delivered_at` can be joined with the sending times of the messages for the end-to-end
+    latency. Only the successful deliveries have a latency, the failed ones are counted by `failed`.
+    """
+    __slots__ = ("noticed", "dropped", "failed", "batches", "latencies", "delivered_at", "started")
+
+    def __init__(self):
+        self.noticed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.latencies = []
+        self.delivered_at = {}
+        self.started = time.perf_counter()
+
+    @property
+    def delivered(self):
+        return len(self.latencies)
+
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            "noticed": self.noticed,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "messages_per_second": self.delivered / seconds if seconds else 0.0,
+            "latency_p50": percentile(self.latencies, 50),
+            "latency_p90": percentile(self.latencies, 90),
+            "latency_p99": percentile(self.latencies, 99),
+            "latency_max": max(self.latencies, default=0),
+        }
+
+
+class MessageRelayer:
+    """
+    Relays the messages of `source` to `destination` in one direction, run one relayer for each direction.
+    """
+
+    def __init__(self, source, destination, policy=None, poll_interval=0.1):
+        self.source = source
+        self.destination = destination
+        self.policy = policy or DeliveryPolicy()
+        self.poll_interval = poll_interval
+        self.metrics = RelayMetrics()
+
+        # (due time, sequence, noticing time, message), the sequence keeps the order of the equal due times
+        self._pending = []
+        self._sequence = 0
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    async def poll(self):
+        """
+        Schedules the newly queued messages.
+        """
+        now = time.perf_counter()
+        for message in await self.source.fetch_messages():
+            self.metrics.noticed += 1
+            if self.policy.is_dropped():
+                self.metrics.dropped += 1
+                continue
+
+            heapq.heappush(self._pending, (self.policy.due_time(now), self._sequence, now, message))
+            self._sequence += 1
+
+    async def deliver_due(self):
+        """
+        Delivers the due messages in batches, returns the number of the delivered messages.
+        """
+        count = 0
+        while self._pending and self._pending[0][0] <= time.perf_counter():
+            batch = []
+            while self._pending and self._pending[0][0] <= time.perf_counter() \
+                    and len(batch) < self.policy.batch_size:
+                batch.append(heapq.heappop(self._pending))
+            if self.policy.reorder:
+                self.policy.rng.shuffle(batch)
+
+            results = await self.destination.deliver([message for _, _, _, message in batch])
+
+            now = time.perf_counter()
+            self.metrics.batches += 1
+            for (_, _, noticed_at, message), success in zip(batch, results):
+                if success:
+                    self.metrics.latencies.append(now - noticed_at)
+                    self.metrics.delivered_at[message.nonce] = now
+                else:
+                    self.metrics.failed += 1
+            count += len(batch)
+
+        return count
+
+    async def run(self, stop):
+        """
+        Relays until `stop` (an `asyncio.Event`) is set, then delivers the pending messages without delay.
+        """
+        while not stop.is_set():
+            await self.poll()
+            await self.deliver_due()
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        await self.poll()
+        self._pending = [(0.0, sequence, noticed_at, message) for _, sequence, noticed_at, message in self._pending]
+        heapq.heapify(self._pending)
+        await self.deliver_due()
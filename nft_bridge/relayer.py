@@ -0,0 +1,445 @@
+"""
+An asyncio relayer daemon. It watches the `BidCreated` events of both spoke bridges, buys every new bid and
+relays it to the other side: the bids of the source side are minted by `DstSpokeBridge.minting`, the bids
+of the destination side are unlocked by `SrcSpokeBridge.unlocking`. Several daemons race for the same bids,
+the losers move on to the next ones.
+
+    python -m nft_bridge.relayer --bids 200 --racers 3 --round-trip
+
+The command starts two dev chains like `nft_bridge.two_chains` and lets the racers relay the bids of a user.
+With `--src-rpc`, `--dst-rpc`, `--src-spoke` and `--dst-spoke` it relays on running chains instead, the
+account has to be unlocked on both nodes.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import time
+
+from collections import namedtuple
+
+from web3 import Web3
+
+from .enums import OutgoingBidStatus
+from .relay import percentile
+from .two_chains import SPOKE_PARAMS, DevChain, TwoChainBridge, load_artifact, transact
+
+# the fields of the `outgoingBids` getter, in the order of `SpokeBridge.OutgoingBid`
+OutgoingBid = namedtuple("OutgoingBid",
+    "maker fee receiver collectionId localErc721Contract buyer timestampOfBought status tokenId")
+
+# the revert message of buying a bid which is already bought or does not exist yet
+LOST_RACE_MESSAGE = "bid does not have Created state"
+
+# the transactions are not estimated, so they can be submitted before the previous ones are mined
+DEFAULT_GAS = 500_000
+
+
+def run_blocking(function, *args):
+    """
+    Runs a blocking web3 call in the default executor.
+    """
+    return asyncio.get_running_loop().run_in_executor(None, functools.partial(function, *args))
+
+
+class TxFailed(Exception):
+    """
+    A transaction is rejected by the node or reverted, `reason` is the revert message if it is known.
+    """
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TransactionPipeline:
+    """
+    Submits the transactions of `account` in the order of local nonces without waiting for the previous
+    ones to be mined, at most `max_in_flight` of them are unconfirmed at once. The nonce is synchronized
+    with the node at the first use and after every rejected submission.
+    """
+
+    def __init__(self, web3, account, max_in_flight=16, gas=DEFAULT_GAS, timeout=120):
+        self.web3 = web3
+        self.account = account
+        self.gas = gas
+        self.timeout = timeout
+
+        self._nonce = None
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def send(self, function, value=0):
+        """
+        Returns the receipt of the mined transaction, raises `TxFailed` if it is rejected or reverted.
+        """
+        async with self._in_flight:
+            async with self._lock:
+                if self._nonce is None:
+                    self._nonce = await run_blocking(self.web3.eth.get_transaction_count, self.account, "pending")
+
+                tx = {'from': self.account, 'nonce': self._nonce, 'gas': self.gas, 'value': value}
+                try:
+                    tx_hash = await run_blocking(function.transact, tx)
+                except Exception as e:
+                    # the node may or may not have used the nonce, it is read again for the next one
+                    self._nonce = None
+                    raise TxFailed(str(e)) from e
+                self._nonce += 1
+
+            receipt = await run_blocking(self.web3.eth.wait_for_transaction_receipt, tx_hash, self.timeout, 0.05)
+
+        if receipt.status == 0:
+            raise TxFailed(await self._revert_reason(function, receipt))
+
+        return receipt
+
+    async def _revert_reason(self, function, receipt):
+        # the reverted call is replayed on the state of its block
+        try:
+            await run_blocking(functools.partial(function.call, {'from': self.account},
+                block_identifier=receipt.blockNumber))
+        except Exception as e:
+            return str(e)
+        return "reverted"
+
+
+class RelayerMetrics:
+    """
+    The latency of a relaying is the time between noticing the `BidCreated` event of a bid and the receipt
+    of its minting or unlocking. `errors` counts the reasons of the given up bids.
+    """
+    __slots__ = ("seen", "bought", "lost", "relayed", "failed", "errors", "latencies", "started")
+
+    def __init__(self):
+        self.seen = 0
+        self.bought = 0
+        self.lost = 0
+        self.relayed = 0
+        self.failed = 0
+        self.errors = {}
+        self.latencies = []
+        self.started = time.perf_counter()
+
+    def fail(self, reason):
+        self.failed += 1
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            "seen": self.seen,
+            "bought": self.bought,
+            "lost": self.lost,
+            "relayed": self.relayed,
+            "failed": self.failed,
+            "relays_per_second": self.relayed / seconds if seconds else 0.0,
+            "latency_p50": percentile(self.latencies, 50),
+            "latency_p90": percentile(self.latencies, 90),
+            "latency_p99": percentile(self.latencies, 99),
+            "latency_max": max(self.latencies, default=0),
+        }
+
+
+class RelayerDaemon:
+    """
+    Relays the bids of `src_spoke` and `dst_spoke` (web3 contracts on their own chains) as `account`, which
+    has to be an active relayer on both sides. At most `concurrency` bids are relayed at once, a failed
+    transaction is retried `retries` times with exponential backoff from `retry_delay` seconds.
+
+    The events are read from `from_block` of both chains, the default is the latest block. The id of the
+    locking bid, which `unlocking` needs, is the `incomingBidId` of the `BidCreated` event of the destination
+    side.
+    """
+
+    def __init__(self, src_spoke, dst_spoke, account, concurrency=8, max_in_flight=16, retries=3,
+                 retry_delay=0.2, poll_interval=0.1, from_block=None, gas=DEFAULT_GAS):
+        self.src_spoke = src_spoke
+        self.dst_spoke = dst_spoke
+        self.account = account
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.from_block = from_block
+        self.metrics = RelayerMetrics()
+
+        self.src_pipeline = TransactionPipeline(src_spoke.web3, account, max_in_flight, gas)
+        # the nonces of one chain are managed by one pipeline, e.g. in the tests both sides are on the same chain
+        self.dst_pipeline = self.src_pipeline if dst_spoke.web3 is src_spoke.web3 \
+            else TransactionPipeline(dst_spoke.web3, account, max_in_flight, gas)
+
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+
+        # the next blocks to read, (src, dst)
+        self._cursors = None
+        # the remote contracts of the collections, they cannot change after the registration
+        self._remote_contracts = {}
+
+    @property
+    def in_flight(self):
+        return len(self._tasks)
+
+    async def poll(self):
+        """
+        Reads the new events of both sides and starts relaying the new bids.
+        """
+        if self._cursors is None:
+            await self._start()
+
+        src_from, dst_from = self._cursors
+        src_latest = await run_blocking(lambda: self.src_spoke.web3.eth.block_number)
+        dst_latest = await run_blocking(lambda: self.dst_spoke.web3.eth.block_number)
+
+        src_bids = await self._logs(self.src_spoke.events.BidCreated, src_from, src_latest)
+        dst_bids = await self._logs(self.dst_spoke.events.BidCreated, dst_from, dst_latest)
+        self._cursors = (max(src_from, src_latest + 1), max(dst_from, dst_latest + 1))
+
+        noticed_at = time.perf_counter()
+        for log in src_bids:
+            self._spawn(self._relay_src_bid(log.args, noticed_at))
+        for log in dst_bids:
+            self._spawn(self._relay_dst_bid(log.args, noticed_at))
+
+    async def run(self, stop):
+        """
+        Relays until `stop` (an `asyncio.Event`) is set, then waits for the started relayings.
+        """
+        while not stop.is_set():
+            await self.poll()
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        await asyncio.gather(*self._tasks)
+
+    async def _start(self):
+        src_latest = await run_blocking(lambda: self.src_spoke.web3.eth.block_number)
+        dst_latest = await run_blocking(lambda: self.dst_spoke.web3.eth.block_number)
+
+        if self.from_block is None:
+            self._cursors = (src_latest + 1, dst_latest + 1)
+        else:
+            self._cursors = (self.from_block, self.from_block)
+
+    async def _logs(self, event, from_block, to_block):
+        if from_block > to_block:
+            return []
+        return await run_blocking(functools.partial(event.getLogs, fromBlock=from_block, toBlock=to_block))
+
+    def _spawn(self, coroutine):
+        self.metrics.seen += 1
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _relay_src_bid(self, bid, noticed_at):
+        async with self._slots:
+            if not await self._buy(self.src_spoke, self.src_pipeline, bid.bidId):
+                return
+
+            remote = await self._remote_contract(bid.erc721Contract)
+            await self._relay(self.dst_pipeline,
+                self.dst_spoke.functions.minting(bid.bidId, bid.receiver, bid.tokenId, remote), noticed_at)
+
+    async def _relay_dst_bid(self, bid, noticed_at):
+        async with self._slots:
+            if not await self._buy(self.dst_spoke, self.dst_pipeline, bid.bidId):
+                return
+
+            await self._relay(self.src_pipeline,
+                self.src_spoke.functions.unlocking(bid.incomingBidId, bid.bidId, bid.receiver), noticed_at)
+
+    async def _buy(self, spoke, pipeline, bid_id):
+        """
+        Returns whether the bid is bought by the daemon. A reverted buying is checked on the bid, it is retried
+        only if the bid is still not bought, e.g. the node of the event is ahead of the node of the transaction.
+        """
+        reason = None
+        for attempt in range(self.retries + 1):
+            try:
+                await pipeline.send(spoke.functions.buyBid(bid_id))
+                self.metrics.bought += 1
+                return True
+            except TxFailed as e:
+                reason = e.reason
+
+            bid = OutgoingBid(*await run_blocking(spoke.functions.outgoingBids(bid_id).call))
+            if bid.status == OutgoingBidStatus.BOUGHT and bid.buyer == self.account:
+                # the receipt was lost, but the transaction went through
+                self.metrics.bought += 1
+                return True
+            if bid.status not in (OutgoingBidStatus.NONE, OutgoingBidStatus.CREATED):
+                self.metrics.lost += 1
+                return False
+
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+        self.metrics.fail(LOST_RACE_MESSAGE if LOST_RACE_MESSAGE in reason else reason)
+        return False
+
+    async def _relay(self, pipeline, function, noticed_at):
+        reason = None
+        for attempt in range(self.retries + 1):
+            try:
+                await pipeline.send(function)
+                self.metrics.relayed += 1
+                self.metrics.latencies.append(time.perf_counter() - noticed_at)
+                return
+            except TxFailed as e:
+                reason = e.reason
+
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+        self.metrics.fail(reason)
+
+    async def _remote_contract(self, erc721_contract):
+        remote = self._remote_contracts.get(erc721_contract)
+        if remote is None:
+            collection_id = await run_blocking(self.src_spoke.functions.collectionIds(erc721_contract).call)
+            remote = await run_blocking(self.src_spoke.functions.remoteErc721Contracts(collection_id).call)
+            self._remote_contracts[erc721_contract] = remote
+        return remote
+
+
+def increase_time(web3, seconds):
+    """
+    Moves the clock of a dev chain forward and mines a block with the new time.
+    """
+    web3.provider.make_request("evm_increaseTime", [seconds])
+    web3.provider.make_request("evm_mine", [])
+
+
+async def run_race_benchmark(bridge, bids, racers, round_trip=False, timeout=300, **daemon_args):
+    """
+    `racers` daemons of different accounts race for the `bids` bids of the user on the source side of a
+    `TwoChainBridge`. If `round_trip` is set, the minted tokens are bridged back after the challenge period.
+    Returns the daemons.
+    """
+    accounts = [bridge.relayer] + bridge.src_web3.eth.accounts[4:4 + racers - 1]
+    if len(accounts) < racers:
+        raise ValueError(f"there are only {len(accounts)} accounts for the racers")
+
+    for account in accounts[1:]:
+        for spoke in (bridge.src_spoke_bridge, bridge.dst_spoke_bridge):
+            transact(spoke.functions.deposite(), account, SPOKE_PARAMS[1])
+
+    daemons = [RelayerDaemon(bridge.src_spoke_bridge, bridge.dst_spoke_bridge, account, **daemon_args)
+        for account in accounts]
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(daemon.run(stop)) for daemon in daemons]
+
+    async def relayed(count):
+        deadline = time.monotonic() + timeout
+        while sum(daemon.metrics.relayed + daemon.metrics.failed for daemon in daemons) < count:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"only {sum(d.metrics.relayed for d in daemons)} of {count} bids are relayed")
+            await asyncio.sleep(0.05)
+
+    def create_src_bids():
+        token_ids = range(1, bids + 1)
+        for token_id in token_ids:
+            transact(bridge.erc721.functions.mint(bridge.user, token_id), bridge.owner)
+        transact(bridge.erc721.functions.setApprovalForAll(bridge.src_spoke_bridge.address, True), bridge.user)
+        for token_id in token_ids:
+            transact(bridge.src_spoke_bridge.functions.createBid(bridge.user, token_id, bridge.erc721.address),
+                bridge.user, Web3.toWei(0.01, "ether"))
+
+    def create_dst_bids():
+        for web3 in (bridge.src_web3, bridge.dst_web3):
+            increase_time(web3, SPOKE_PARAMS[0] + 1)
+
+        transact(bridge.wrapped_erc721.functions.setApprovalForAll(bridge.dst_spoke_bridge.address, True),
+            bridge.user)
+        for bid_id in range(bids):
+            transact(bridge.dst_spoke_bridge.functions.createBid(bridge.user, bid_id + 1,
+                bridge.wrapped_erc721.address, bid_id), bridge.user, Web3.toWei(0.01, "ether"))
+
+    try:
+        # every daemon has read the starting blocks before the first bid
+        await asyncio.gather(*(daemon.poll() for daemon in daemons))
+
+        await run_blocking(create_src_bids)
+        await relayed(bids)
+        if round_trip:
+            await run_blocking(create_dst_bids)
+            await relayed(2 * bids)
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    return daemons
+
+
+def _print_summary(daemons):
+    for daemon in daemons:
+        print(f"{daemon.account}: {json.dumps(daemon.metrics.summary())}")
+        for reason, count in daemon.metrics.errors.items():
+            print(f"    {count} x {reason}")
+
+    latencies = [latency for daemon in daemons for latency in daemon.metrics.latencies]
+    seconds = max(time.perf_counter() - daemon.metrics.started for daemon in daemons)
+    print(f"relays_per_second: {len(latencies) / seconds:.3f}")
+    print(f"latency_p50: {percentile(latencies, 50):.3f}")
+    print(f"latency_p90: {percentile(latencies, 90):.3f}")
+    print(f"latency_p99: {percentile(latencies, 99):.3f}")
+    print(f"latency_max: {max(latencies, default=0):.3f}")
+
+
+async def _relay_forever(args):
+    src_web3 = Web3(Web3.HTTPProvider(args.src_rpc))
+    dst_web3 = Web3(Web3.HTTPProvider(args.dst_rpc))
+    src_spoke = src_web3.eth.contract(address=args.src_spoke, abi=load_artifact("SrcSpokeBridge")[0])
+    dst_spoke = dst_web3.eth.contract(address=args.dst_spoke, abi=load_artifact("DstSpokeBridge")[0])
+
+    account = Web3.toChecksumAddress(args.account) if args.account else src_web3.eth.accounts[0]
+    daemon = RelayerDaemon(src_spoke, dst_spoke, account,
+        args.concurrency, args.max_in_flight, args.retries, from_block=args.from_block)
+
+    stop = asyncio.Event()
+    task = asyncio.create_task(daemon.run(stop))
+    try:
+        while not task.done():
+            await asyncio.sleep(args.report_interval)
+            _print_summary([daemon])
+    finally:
+        stop.set()
+        await task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bids", type=int, default=100)
+    parser.add_argument("--racers", type=int, default=2)
+    parser.add_argument("--round-trip", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--ports", type=int, nargs=2, default=(8645, 8646))
+    parser.add_argument("--src-rpc")
+    parser.add_argument("--dst-rpc")
+    parser.add_argument("--src-spoke")
+    parser.add_argument("--dst-spoke")
+    parser.add_argument("--account")
+    parser.add_argument("--from-block", type=int)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.src_spoke:
+        try:
+            asyncio.run(_relay_forever(args))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    with DevChain(args.ports[0], 1337) as src_web3, DevChain(args.ports[1], 1338) as dst_web3:
+        bridge = TwoChainBridge(src_web3, dst_web3)
+        daemons = asyncio.run(run_race_benchmark(bridge, args.bids, args.racers, args.round_trip,
+            concurrency=args.concurrency, max_in_flight=args.max_in_flight, retries=args.retries))
+
+    _print_summary(daemons)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Simulates bridging from the source to the destination side on the reference model, to plan the stake of
+the relayers and the economics of the challengers without running the EVM.
+
+    python -m nft_bridge.simulation --bids 1000000 --relayers 20 --malicious-rate 0.001
+"""
+import argparse
+import random
+import time
+
+from .enums import RelayerStatus
+from .model import BridgeModel
+
+# challenge period, stake amount, challenge amount, undepositing period, the same as in the tests
+DEFAULT_PARAMS = (4 * 60 * 60, 20 * 10 ** 18, 10 * 10 ** 18, 2 * 24 * 60 * 60)
+
+ERC721 = "erc721"
+WRAPPED_ERC721 = "wrappedErc721"
+
+
+def simulate(bids, relayers, malicious_rate=0.0, challenge_rate=1.0, fee=10 ** 16, batch_size=100, seed=0,
+             params=DEFAULT_PARAMS):
+    """
+    Bridges `bids` tokens in batches. Every batch is bought by an active relayer, who mints it wrongly
+    with the probability of `malicious_rate`. A wrong minting is challenged with the probability of
+    `challenge_rate` and proved by the outgoing bid. Returns the totals of the run in a dict.
+    """
+    rng = random.Random(seed)
+    challenge_period, stake_amount, challenge_amount, _ = params
+
+    model = BridgeModel(*params, contract_map={ERC721: WRAPPED_ERC721})
+    src, dst, chain = model.src, model.dst, model.chain
+    chain.add_erc721(ERC721, "owner")
+    chain.add_erc721(WRAPPED_ERC721, dst.address)
+
+    names = [f"relayer{i}" for i in range(relayers)]
+    for name in names:
+        src.deposite(name, stake_amount)
+        dst.deposite(name, stake_amount)
+
+    user, receiver, challenger = "user", "receiver", "challenger"
+    erc721 = chain.erc721s[ERC721]
+    erc721.set_approval_for_all(user, src.address, True)
+
+    stats = dict(bids=0, malicious=0, challenged=0, slashed=0, unpunished=0, rewards=0, seconds=0.0)
+    started = time.perf_counter()
+
+    next_token_id = 0
+    while stats["bids"] < bids:
+        active = [name for name in names if dst.relayer(name)[0] == RelayerStatus.ACTIVE]
+        if not active:
+            break
+        relayer = rng.choice(active)
+
+        count = min(batch_size, bids - stats["bids"])
+        token_ids = range(next_token_id, next_token_id + count)
+        next_token_id += count
+        for token_id in token_ids:
+            erc721.mint("owner", user, token_id)
+
+        bid_ids = src.create_bids(user, receiver, token_ids, ERC721, fee * count)
+        src.buy_bids(relayer, bid_ids)
+
+        is_malicious = rng.random() < malicious_rate
+        dst.minting_batch(relayer, bid_ids, [relayer if is_malicious else receiver] * count, token_ids,
+                          WRAPPED_ERC721)
+
+        if is_malicious:
+            stats["malicious"] += 1
+            if rng.random() < challenge_rate:
+                # one proved bid slashes the relayer, the other bids of the batch are not challenged
+                dst.challenge_minting(challenger, bid_ids[0], challenge_amount)
+                src.send_proof(challenger, True, bid_ids[0])
+                stats["rewards"] += dst.claim_challenge_reward(challenger, bid_ids[0], False)
+                stats["challenged"] += 1
+                stats["slashed"] += 1
+            else:
+                stats["unpunished"] += 1
+
+        stats["bids"] += count
+        chain.sleep(challenge_period + 1)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["fees"] = sum(chain.eth[name] for name in names) + len(names) * 2 * stake_amount
+    stats["locked_stake"] = stats["slashed"] * stake_amount
+    stats["bids_per_second"] = stats["bids"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bids", type=int, default=100000)
+    parser.add_argument("--relayers", type=int, default=10)
+    parser.add_argument("--malicious-rate", type=float, default=0.0)
+    parser.add_argument("--challenge-rate", type=float, default=1.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stats = simulate(args.bids, args.relayers, args.malicious_rate, args.challenge_rate,
+                     batch_size=args.batch_size, seed=args.seed)
+    for name, value in stats.items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Runs the spoke bridges on two independent local dev chains connected by `QueueingGatewayHub`s and the
+asyncio `MessageRelayer`. The contracts are deployed from the artifacts of `brownie compile`.
+
+    python -m nft_bridge.two_chains --proofs 200 --delay 0.5 --jitter 0.5 --reorder --drop-rate 0.05
+
+`DEV_CHAIN_COMMAND` is the command which starts a dev chain, `{port}` and `{chain_id}` are substituted.
+The accounts have to be the same on both chains, the proofs compare the addresses of the two sides.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import subprocess
+import time
+
+from web3 import Web3
+
+from .relay import DeliveryPolicy, Message, MessageRelayer, percentile
+
+DEV_CHAIN_COMMAND = os.environ.get(
+    "DEV_CHAIN_COMMAND",
+    "ganache-cli --port {port} --chainId {chain_id} --deterministic --accounts 10 --defaultBalanceEther 1000 "
+    "--gasLimit 12000000",
+)
+
+BUILD_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build", "contracts")
+
+# challenge period, stake amount, challenge amount, undepositing period, the same as in the tests
+SPOKE_PARAMS = (4 * 60 * 60, Web3.toWei(20, "ether"), Web3.toWei(10, "ether"), 2 * 24 * 60 * 60)
+
+
+class DevChain:
+    """
+    Starts a dev chain as a subprocess, it is stopped at the end of the `with` block.
+    """
+
+    def __init__(self, port, chain_id, command=DEV_CHAIN_COMMAND, timeout=30):
+        self.port = port
+        self.chain_id = chain_id
+        self.command = command
+        self.timeout = timeout
+        self.process = None
+        self.web3 = Web3(Web3.HTTPProvider(f"http://127.0.0.1:{port}"))
+
+    def __enter__(self):
+        args = shlex.split(self.command.format(port=self.port, chain_id=self.chain_id))
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + self.timeout
+        while not self.web3.isConnected():
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.process.kill()
+                raise RuntimeError(f"the dev chain did not start: {self.command}")
+            time.sleep(0.2)
+
+        return self.web3
+
+    def __exit__(self, *args):
+        self.process.terminate()
+        self.process.wait()
+
+
+def load_artifact(name, build_path=BUILD_PATH):
+    with open(os.path.join(build_path, f"{name}.json")) as f:
+        artifact = json.load(f)
+    return artifact["abi"], artifact["bytecode"]
+
+
+def deploy(web3, name, *args, sender=None):
+    abi, bytecode = load_artifact(name)
+    sender = sender or web3.eth.accounts[0]
+
+    tx = web3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact({'from': sender})
+    receipt = web3.eth.wait_for_transaction_receipt(tx)
+    return web3.eth.contract(address=receipt.contractAddress, abi=abi)
+
+
+def transact(function, sender, value=0):
+    web3 = function.web3
+    return web3.eth.wait_for_transaction_receipt(function.transact({'from': sender, 'value': value}))
+
+
+class Web3HubEndpoint:
+    """
+    The endpoint of a `QueueingGatewayHub` for the `MessageRelayer`, `relayer` is the owner of the hub.
+    The blocking calls of web3 run in the default executor.
+    """
+
+    def __init__(self, hub, relayer, from_block=0):
+        self.hub = hub
+        self.relayer = relayer
+        self.from_block = from_block
+
+    async def fetch_messages(self):
+        return await asyncio.get_running_loop().run_in_executor(None, self._fetch_messages)
+
+    async def deliver(self, messages):
+        return await asyncio.get_running_loop().run_in_executor(None, self._deliver, messages)
+
+    def _fetch_messages(self):
+        latest = self.hub.web3.eth.block_number
+        if latest < self.from_block:
+            return []
+
+        logs = self.hub.events.MessageQueued.getLogs(fromBlock=self.from_block, toBlock=latest)
+        self.from_block = latest + 1
+        return [Message(log.args.nonce, log.args.kind, bytes(log.args.data)) for log in logs]
+
+    def _deliver(self, messages):
+        receipt = transact(self.hub.functions.deliverMessages(
+            [message.nonce for message in messages],
+            [message.kind for message in messages],
+            [message.data for message in messages],
+        ), self.relayer)
+
+        # an already delivered message is skipped by the hub without an event
+        results = {event.args.nonce: event.args.success
+            for event in self.hub.events.MessageDelivered().processReceipt(receipt)}
+        return [results.get(message.nonce, False) for message in messages]
+
+
+class TwoChainBridge:
+    """
+    The source side is deployed on `src_web3` and the destination side on `dst_web3`. The first account of
+    both chains is the owner and the relayer of the hubs, the user, the relayer of the bids and the
+    challenger are the next ones.
+    """
+
+    def __init__(self, src_web3, dst_web3):
+        if src_web3.eth.accounts[:4] != dst_web3.eth.accounts[:4]:
+            raise ValueError("the chains have different accounts")
+
+        self.src_web3 = src_web3
+        self.dst_web3 = dst_web3
+
+        self.owner, self.user, self.relayer, self.challenger = src_web3.eth.accounts[:4]
+
+        self.erc721 = deploy(src_web3, "WrappedERC721", "ValueNFT", "NFT")
+        self.contract_map = deploy(src_web3, "ContractMap")
+        self.src_hub = deploy(src_web3, "QueueingGatewayHub")
+        self.src_spoke_bridge = deploy(src_web3, "SimpleGatewaySrcSpokeBrdige", self.src_hub.address,
+            self.contract_map.address, *SPOKE_PARAMS)
+
+        # the hub is deployed first, otherwise the wrapped contract would get the address of the original one
+        self.dst_hub = deploy(dst_web3, "QueueingGatewayHub")
+        self.wrapped_erc721 = deploy(dst_web3, "WrappedERC721", "Wrapped", "WRP")
+        self.dst_spoke_bridge = deploy(dst_web3, "SimpleGatewayDstSpokeBrdige", self.dst_hub.address,
+            *SPOKE_PARAMS)
+
+        transact(self.contract_map.functions.addPair(self.erc721.address, self.wrapped_erc721.address), self.owner)
+        transact(self.src_hub.functions.addSpokeBridge(self.src_spoke_bridge.address,
+            self.dst_spoke_bridge.address), self.owner)
+        transact(self.dst_hub.functions.addSpokeBridge(self.dst_spoke_bridge.address,
+            self.src_spoke_bridge.address), self.owner)
+        transact(self.wrapped_erc721.functions.transferOwnership(self.dst_spoke_bridge.address), self.owner)
+
+        for spoke_bridge in (self.src_spoke_bridge, self.dst_spoke_bridge):
+            transact(spoke_bridge.functions.deposite(), self.relayer, SPOKE_PARAMS[1])
+
+    def relayers(self, policy_factory, poll_interval=0.05):
+        """
+        Returns the relayers of both directions, `policy_factory` returns a new `DeliveryPolicy`.
+        """
+        return (
+            MessageRelayer(Web3HubEndpoint(self.src_hub, self.owner), Web3HubEndpoint(self.dst_hub, self.owner),
+                policy_factory(), poll_interval),
+            MessageRelayer(Web3HubEndpoint(self.dst_hub, self.owner), Web3HubEndpoint(self.src_hub, self.owner),
+                policy_factory(), poll_interval),
+        )
+
+    def challenged_relayings(self, count):
+        """
+        Bridges `count` tokens correctly and challenges their minting, so every proof of them rejects
+        a challenge. Returns the ids of the bids.
+        """
+        token_ids = list(range(1, count + 1))
+        for token_id in token_ids:
+            transact(self.erc721.functions.mint(self.user, token_id), self.owner)
+        transact(self.erc721.functions.setApprovalForAll(self.src_spoke_bridge.address, True), self.user)
+
+        transact(self.src_spoke_bridge.functions.createBids(self.user, token_ids, self.erc721.address), self.user,
+            Web3.toWei(0.01, "ether") * count)
+        bid_ids = list(range(count))
+        transact(self.src_spoke_bridge.functions.buyBids(bid_ids), self.relayer)
+
+        transact(self.dst_spoke_bridge.functions.mintingBatch(bid_ids, [self.user] * count, token_ids,
+            self.wrapped_erc721.address), self.relayer)
+        for bid_id in bid_ids:
+            transact(self.dst_spoke_bridge.functions.challengeMinting(bid_id), self.challenger, SPOKE_PARAMS[2])
+
+        return bid_ids
+
+    def send_proofs(self, bid_ids):
+        """
+        Sends the proofs of the outgoing bids one by one, returns the sending times by the nonces.
+        """
+        sent_at = {}
+        for bid_id in bid_ids:
+            started = time.perf_counter()
+            receipt = transact(self.src_spoke_bridge.functions.sendProof(True, bid_id), self.relayer)
+            for event in self.src_hub.events.MessageQueued().processReceipt(receipt):
+                sent_at[event.args.nonce] = started
+        return sent_at
+
+
+async def run_challenge_benchmark(bridge, proofs, policy_factory):
+    """
+    Resolves `proofs` challenges by proofs which go through the relayer, returns the metrics of the relayer
+    and the end-to-end latencies of the proofs.
+    """
+    bid_ids = bridge.challenged_relayings(proofs)
+    forward, backward = bridge.relayers(policy_factory)
+
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(forward.run(stop)), asyncio.create_task(backward.run(stop))]
+
+    sent_at = await asyncio.get_running_loop().run_in_executor(None, bridge.send_proofs, bid_ids)
+    while forward.metrics.noticed < len(sent_at) or forward.pending:
+        await asyncio.sleep(forward.poll_interval)
+
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    latencies = [forward.metrics.delivered_at[nonce] - sent_at[nonce]
+        for nonce in sent_at if nonce in forward.metrics.delivered_at]
+    return forward.metrics, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--proofs", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--reorder", action="store_true")
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ports", type=int, nargs=2, default=(8645, 8646))
+    args = parser.parse_args()
+
+    def policy_factory():
+        return DeliveryPolicy(args.delay, args.jitter, args.batch_size, args.reorder, args.drop_rate, args.seed)
+
+    with DevChain(args.ports[0], 1337) as src_web3, DevChain(args.ports[1], 1338) as dst_web3:
+        bridge = TwoChainBridge(src_web3, dst_web3)
+        metrics, latencies = asyncio.run(run_challenge_benchmark(bridge, args.proofs, policy_factory))
+
+    for name, value in metrics.summary().items():
+        print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+    print(f"end_to_end_p50: {percentile(latencies, 50):.3f}")
+    print(f"end_to_end_p90: {percentile(latencies, 90):.3f}")
+    print(f"end_to_end_max: {max(latencies, default=0):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""
+A watchtower of the relayings. It checks every relayed bid against the outgoing bid of the other side and
+challenges the wrong ones while their challenge period is open, then sends the proof and claims the reward.
+It also proves the bought bids which are not relayed until the end of their challenge period, by the
+incoming proof of the other side.
+
+    python -m nft_bridge.watchtower --relays 1000 --wrong-rate 0.01 --missing-rate 0.01
+
+The command starts two dev chains like `nft_bridge.two_chains`, relays the bids with some wrong and missing
+relayings and measures how fast the watchtower catches them.
+
+The deadlines are kept in one heap per chain, keyed by the timestamps of the chain. A correct relaying is
+dropped right after its verification and a bought bid after its challenge period, so the memory is bounded
+by the bids of one challenge period.
+"""
+import argparse
+import asyncio
+import heapq
+import random
+import time
+
+from collections import namedtuple
+
+from web3 import Web3
+
+from .client import MAX_PAGE_SIZE
+from .enums import IncomingBidStatus, OutgoingBidStatus
+from .relay import DeliveryPolicy, percentile
+from .relayer import DEFAULT_GAS, OutgoingBid, TransactionPipeline, TxFailed, run_blocking, increase_time
+from .two_chains import DevChain, TwoChainBridge, transact
+
+SRC, DST = 0, 1
+
+# the fields of the `incomingBids` getter, in the order of `SpokeBridge.IncomingBid`
+IncomingBid = namedtuple("IncomingBid",
+    "receiver outgoingId remoteErc721Contract relayer timestampOfRelayed status tokenId")
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+NO_OUTGOING_BID = OutgoingBid(ZERO_ADDRESS, 0, ZERO_ADDRESS, 0, ZERO_ADDRESS, ZERO_ADDRESS, 0, 0, 0)
+
+# the statuses of the incoming bids of a side which do not prove the outgoing bid of the other side malicious,
+# the same as the locking branches of `_receiveProof` accept
+RELAYED_STATUSES = (
+    (IncomingBidStatus.RELAYED, IncomingBidStatus.UNLOCKED),
+    (IncomingBidStatus.RELAYED, IncomingBidStatus.CHALLENGED),
+)
+
+# the actions of the timers
+PROVE_MISSING = 0
+CLAIM_INCOMING = 1
+CLAIM_OUTGOING = 2
+
+
+class WatchtowerMetrics:
+    """
+    The latency of a verification is the time between noticing the `BidRelayed` event and the verdict.
+    `missed` counts the wrong relayings whose challenge period was over by the time they were verified.
+    """
+    __slots__ = ("verified", "wrong", "challenged", "proved_missing", "claimed", "missed", "failed", "errors",
+        "latencies", "peak_timers", "started")
+
+    def __init__(self):
+        self.verified = 0
+        self.wrong = 0
+        self.challenged = 0
+        self.proved_missing = 0
+        self.claimed = 0
+        self.missed = 0
+        self.failed = 0
+        self.errors = {}
+        self.latencies = []
+        self.peak_timers = 0
+        self.started = time.perf_counter()
+
+    def fail(self, reason):
+        self.failed += 1
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            "verified": self.verified,
+            "wrong": self.wrong,
+            "challenged": self.challenged,
+            "proved_missing": self.proved_missing,
+            "claimed": self.claimed,
+            "missed": self.missed,
+            "failed": self.failed,
+            "peak_timers": self.peak_timers,
+            "relays_per_hour": self.verified * 3600 / seconds if seconds else 0.0,
+            "latency_p50": percentile(self.latencies, 50),
+            "latency_p90": percentile(self.latencies, 90),
+            "latency_p99": percentile(self.latencies, 99),
+            "latency_max": max(self.latencies, default=0),
+        }
+
+
+class Watchtower:
+    """
+    Watches `src_spoke` and `dst_spoke` (web3 contracts on their own chains) as `account`, which pays the
+    stakes of the challenges. The bids are read by `getIncomingBids` and `getOutgoingBids` in ranges of at
+    most `batch_size` consecutive ids, at most `concurrency` reads and transactions run at once.
+
+    `from_blocks` are the first blocks of the two chains to read, the default is the latest ones. A timer
+    fires when the latest block of its chain is at least `margin` seconds past the deadline, so the next
+    block is surely after it. A reward is looked up at most `claim_attempts` times, the proof can be on
+    its way through the hubs.
+    """
+
+    def __init__(self, src_spoke, dst_spoke, account, batch_size=100, concurrency=16, poll_interval=1.0,
+                 from_blocks=None, margin=1, claim_attempts=20, gas=DEFAULT_GAS):
+        self.spokes = (src_spoke, dst_spoke)
+        self.account = account
+        # the range views of the spokes return at most `MAX_PAGE_SIZE` bids
+        self.batch_size = min(batch_size, MAX_PAGE_SIZE)
+        self.poll_interval = poll_interval
+        self.from_blocks = from_blocks
+        self.margin = margin
+        self.claim_attempts = claim_attempts
+        self.metrics = WatchtowerMetrics()
+
+        src_pipeline = TransactionPipeline(src_spoke.web3, account, concurrency, gas)
+        # the nonces of one chain are managed by one pipeline, e.g. in the tests both sides are on the same chain
+        self.pipelines = (src_pipeline, src_pipeline if dst_spoke.web3 is src_spoke.web3
+            else TransactionPipeline(dst_spoke.web3, account, concurrency, gas))
+
+        self._slots = asyncio.Semaphore(concurrency)
+
+        # (deadline, sequence, action, side of the bid, bid id, attempts) by the chains of the deadlines
+        self._timers = ([], [])
+        self._sequence = 0
+        # the timestamps of the latest blocks
+        self._now = [0, 0]
+        self._cursors = None
+
+        self._challenge_period = None
+        self._challenge_amount = None
+        # the remote contracts by the collection ids of the source side
+        self._remote_contracts = {}
+
+    @property
+    def timers(self):
+        return len(self._timers[SRC]) + len(self._timers[DST])
+
+    async def poll(self):
+        """
+        Verifies the new relayings, schedules the new bought bids and fires the due timers.
+        """
+        if self._cursors is None:
+            await self._start()
+
+        blocks = await asyncio.gather(*(run_blocking(spoke.web3.eth.get_block, "latest") for spoke in self.spokes))
+        self._now = [block.timestamp for block in blocks]
+
+        logs = []
+        for side, spoke in enumerate(self.spokes):
+            logs.append(await asyncio.gather(
+                self._logs(spoke.events.BidRelayed, self._cursors[side], blocks[side].number),
+                self._logs(spoke.events.BidBought, self._cursors[side], blocks[side].number),
+            ))
+        self._cursors = [max(cursor, block.number + 1) for cursor, block in zip(self._cursors, blocks)]
+
+        noticed_at = time.perf_counter()
+        await asyncio.gather(*(
+            coroutine
+            for side, (relayings, boughts) in enumerate(logs)
+            for coroutine in (
+                self._verify(side, [log.args.bidId for log in relayings], noticed_at),
+                self._schedule_missing(side, [log.args.bidId for log in boughts]),
+            )
+        ))
+
+        await self._fire_due()
+
+    async def run(self, stop):
+        """
+        Watches until `stop` (an `asyncio.Event`) is set.
+        """
+        while not stop.is_set():
+            await self.poll()
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _start(self):
+        src_spoke = self.spokes[SRC]
+        self._challenge_period = await run_blocking(src_spoke.functions.CHALLENGE_PERIOD().call)
+        self._challenge_amount = await run_blocking(src_spoke.functions.CHALLENGE_AMOUNT().call)
+
+        if self.from_blocks is None:
+            latest = await asyncio.gather(
+                *(run_blocking(lambda s=spoke: s.web3.eth.block_number) for spoke in self.spokes))
+            self._cursors = [number + 1 for number in latest]
+        else:
+            self._cursors = list(self.from_blocks)
+
+    async def _logs(self, event, from_block, to_block):
+        if from_block > to_block:
+            return []
+        return await run_blocking(lambda: event.getLogs(fromBlock=from_block, toBlock=to_block))
+
+    async def _read_bids(self, side, getter, ids):
+        """
+        Reads the bids of `ids` by ranges of consecutive ids, returns the raw tuples by the ids.
+        """
+        ranges = []
+        for bid_id in sorted(set(ids)):
+            if ranges and ranges[-1][0] + ranges[-1][1] == bid_id and ranges[-1][1] < self.batch_size:
+                ranges[-1][1] += 1
+            else:
+                ranges.append([bid_id, 1])
+
+        function = getattr(self.spokes[side].functions, getter)
+
+        async def read(start, count):
+            async with self._slots:
+                return await run_blocking(function(start, count).call)
+
+        results = await asyncio.gather(*(read(start, count) for start, count in ranges))
+        return {start + i: row for (start, _), rows in zip(ranges, results) for i, row in enumerate(rows)}
+
+    async def _outgoing_bids(self, side, ids):
+        # `getOutgoingBids` cuts the range at the last bid, the missing ones do not exist
+        rows = await self._read_bids(side, "getOutgoingBids", ids)
+        return {bid_id: OutgoingBid(*rows[bid_id]) if bid_id in rows else NO_OUTGOING_BID for bid_id in ids}
+
+    async def _incoming_bids(self, side, ids):
+        rows = await self._read_bids(side, "getIncomingBids", ids)
+        return {bid_id: IncomingBid(*rows[bid_id]) for bid_id in ids}
+
+    async def _verify(self, side, ids, noticed_at):
+        """
+        Checks the incoming bids of `side` against the outgoing bids of the other side, challenges the wrong ones.
+        """
+        if not ids:
+            return
+
+        incoming_bids, outgoing_bids = await asyncio.gather(
+            self._incoming_bids(side, ids), self._outgoing_bids(1 - side, ids))
+        locked_bids = await self._locked_bids(side, incoming_bids.values())
+
+        challenges = []
+        for bid_id in ids:
+            incoming_bid = incoming_bids[bid_id]
+            # it is already challenged or finished
+            if incoming_bid.status != IncomingBidStatus.RELAYED:
+                continue
+
+            if await self._is_correct(side, incoming_bid, outgoing_bids[bid_id], locked_bids):
+                self.metrics.verified += 1
+            else:
+                self.metrics.wrong += 1
+                if self._now[side] + self.margin < incoming_bid.timestampOfRelayed + self._challenge_period:
+                    challenges.append(self._challenge(side, bid_id))
+                else:
+                    self.metrics.missed += 1
+            self.metrics.latencies.append(time.perf_counter() - noticed_at)
+
+        await asyncio.gather(*challenges)
+
+    async def _locked_bids(self, side, incoming_bids):
+        """
+        Returns the outgoing bids of the source side which the incoming bids of `side` unlock, by their ids.
+        """
+        if side == DST:
+            return {}
+        return await self._outgoing_bids(SRC, [bid.outgoingId for bid in incoming_bids])
+
+    async def _is_correct(self, side, incoming_bid, outgoing_bid, locked_bids):
+        """
+        The comparison of `_receiveProof` of the side of the incoming bid with the proof of `outgoing_bid`.
+        The proof contains the contract of the other side, so both sides compare the remote contract of
+        a collection of the source side, on the source side it is the collection of the locked bid.
+        """
+        if outgoing_bid.status != OutgoingBidStatus.BOUGHT \
+                or outgoing_bid.receiver != incoming_bid.receiver \
+                or outgoing_bid.tokenId != incoming_bid.tokenId \
+                or outgoing_bid.buyer != incoming_bid.relayer:
+            return False
+
+        if side == DST:
+            return incoming_bid.remoteErc721Contract == await self._remote_contract(outgoing_bid.collectionId)
+
+        locked_bid = locked_bids[incoming_bid.outgoingId]
+        return outgoing_bid.localErc721Contract == await self._remote_contract(locked_bid.collectionId)
+
+    async def _remote_contract(self, collection_id):
+        remote = self._remote_contracts.get(collection_id)
+        if remote is None:
+            remote = await run_blocking(self.spokes[SRC].functions.remoteErc721Contracts(collection_id).call)
+            self._remote_contracts[collection_id] = remote
+        return remote
+
+    async def _schedule_missing(self, side, ids):
+        """
+        Sets the timers of the bought outgoing bids of `side` to the end of their challenge periods.
+        """
+        if not ids:
+            return
+
+        for bid_id, bid in (await self._outgoing_bids(side, ids)).items():
+            if bid.status == OutgoingBidStatus.BOUGHT:
+                self._push(side, bid.timestampOfBought + self._challenge_period + self.margin,
+                    PROVE_MISSING, side, bid_id)
+
+    def _push(self, clock, deadline, action, side, bid_id, attempts=0):
+        heapq.heappush(self._timers[clock], (deadline, self._sequence, action, side, bid_id, attempts))
+        self._sequence += 1
+        self.metrics.peak_timers = max(self.metrics.peak_timers, self.timers)
+
+    async def _fire_due(self):
+        missing = ([], [])
+        claims = []
+        for clock, timers in enumerate(self._timers):
+            while timers and timers[0][0] <= self._now[clock]:
+                _, _, action, side, bid_id, attempts = heapq.heappop(timers)
+                if action == PROVE_MISSING:
+                    missing[side].append(bid_id)
+                else:
+                    claims.append(self._claim(side, bid_id, action == CLAIM_OUTGOING, attempts))
+
+        await asyncio.gather(*claims, *(self._prove_missing(side, ids) for side, ids in enumerate(missing)))
+
+    async def _send(self, side, function, value=0):
+        """
+        Returns whether the transaction succeeded, the failures are counted by their reasons.
+        """
+        async with self._slots:
+            try:
+                await self.pipelines[side].send(function, value)
+                return True
+            except TxFailed as e:
+                self.metrics.fail(e.reason)
+                return False
+
+    async def _challenge(self, side, bid_id):
+        spoke = self.spokes[side]
+        challenge = spoke.functions.challengeMinting if side == DST else spoke.functions.challengeUnlocking
+        if not await self._send(side, challenge(bid_id), self._challenge_amount):
+            return
+        self.metrics.challenged += 1
+
+        # the outgoing bid of the other side proves the wrong relaying
+        if await self._send(1 - side, self.spokes[1 - side].functions.sendProof(True, bid_id)):
+            self._push(side, self._now[side], CLAIM_INCOMING, side, bid_id)
+
+    async def _prove_missing(self, side, ids):
+        """
+        The outgoing bids of `side` are at the end of their challenge periods, the incoming bids of the other
+        side prove them malicious if they are not relayed correctly.
+        """
+        if not ids:
+            return
+
+        other = 1 - side
+        outgoing_bids, incoming_bids = await asyncio.gather(
+            self._outgoing_bids(side, ids), self._incoming_bids(other, ids))
+        locked_bids = await self._locked_bids(
+            other, [bid for bid in incoming_bids.values() if bid.status != IncomingBidStatus.NONE])
+
+        proofs = []
+        for bid_id in ids:
+            outgoing_bid, incoming_bid = outgoing_bids[bid_id], incoming_bids[bid_id]
+            if outgoing_bid.status != OutgoingBidStatus.BOUGHT:
+                continue
+
+            if incoming_bid.status != IncomingBidStatus.NONE:
+                if incoming_bid.status in RELAYED_STATUSES[other] \
+                        and await self._is_correct(other, incoming_bid, outgoing_bid, locked_bids):
+                    continue
+
+                # a wrong relaying can be sent only after its own challenge period
+                deadline = incoming_bid.timestampOfRelayed + self._challenge_period + self.margin
+                if deadline > self._now[other]:
+                    self._push(other, deadline, PROVE_MISSING, side, bid_id)
+                    continue
+
+            proofs.append(self._send_missing_proof(side, bid_id))
+
+        await asyncio.gather(*proofs)
+
+    async def _send_missing_proof(self, side, bid_id):
+        other = 1 - side
+        if await self._send(other, self.spokes[other].functions.sendProof(False, bid_id)):
+            self.metrics.proved_missing += 1
+            self._push(side, self._now[side], CLAIM_OUTGOING, side, bid_id)
+
+    async def _claim(self, side, bid_id, is_outgoing, attempts):
+        spoke = self.spokes[side]
+        rewards = spoke.functions.outgoingChallengeRewards if is_outgoing else spoke.functions.incomingChallengeRewards
+        challenger, amount = await run_blocking(rewards(bid_id).call)
+
+        if challenger == self.account and amount > 0:
+            if await self._send(side, spoke.functions.claimChallengeReward(bid_id, is_outgoing)):
+                self.metrics.claimed += 1
+        elif attempts + 1 < self.claim_attempts:
+            # the proof may not be delivered yet
+            self._push(side, self._now[side], CLAIM_OUTGOING if is_outgoing else CLAIM_INCOMING, side, bid_id,
+                attempts + 1)
+        else:
+            self.metrics.fail("there is no reward to claim")
+
+
+def _chunks(values, size):
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+async def run_watchtower_benchmark(bridge, relays, wrong_rate=0.01, missing_rate=0.01, seed=0, chunk_size=50,
+                                   timeout=600, **watchtower_args):
+    """
+    Bridges `relays` tokens of the user on a `TwoChainBridge`. The relayer relays every bid wrongly with
+    the probability of `wrong_rate` and does not relay it with the probability of `missing_rate`. The
+    watchtower of the challenger catches up with the relayings, then the clocks of both chains are moved
+    past the challenge period for the missing relayings. Returns the watchtower.
+    """
+    rng = random.Random(seed)
+    token_ids = list(range(1, relays + 1))
+    bid_ids = list(range(relays))
+    wrong = {bid_id for bid_id in bid_ids if rng.random() < wrong_rate}
+    missing = {bid_id for bid_id in bid_ids if bid_id not in wrong and rng.random() < missing_rate}
+
+    from_blocks = (bridge.src_web3.eth.block_number + 1, bridge.dst_web3.eth.block_number + 1)
+
+    def relay():
+        transact(bridge.erc721.functions.mintBatch(bridge.user, token_ids), bridge.owner)
+        transact(bridge.erc721.functions.setApprovalForAll(bridge.src_spoke_bridge.address, True), bridge.user)
+        for chunk in _chunks(token_ids, chunk_size):
+            transact(bridge.src_spoke_bridge.functions.createBids(bridge.user, chunk, bridge.erc721.address),
+                bridge.user, Web3.toWei(0.01, "ether") * len(chunk))
+        for chunk in _chunks(bid_ids, chunk_size):
+            transact(bridge.src_spoke_bridge.functions.buyBids(chunk), bridge.relayer)
+
+        # the wrong tokens are minted to the relayer
+        relayed = [bid_id for bid_id in bid_ids if bid_id not in missing]
+        for chunk in _chunks(relayed, chunk_size):
+            receivers = [bridge.relayer if bid_id in wrong else bridge.user for bid_id in chunk]
+            transact(bridge.dst_spoke_bridge.functions.mintingBatch(chunk, receivers,
+                [bid_id + 1 for bid_id in chunk], bridge.wrapped_erc721.address), bridge.relayer)
+
+    watchtower = Watchtower(bridge.src_spoke_bridge, bridge.dst_spoke_bridge, bridge.challenger,
+        from_blocks=from_blocks, **watchtower_args)
+    forward, backward = bridge.relayers(DeliveryPolicy)
+
+    await run_blocking(relay)
+
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(runner.run(stop)) for runner in (watchtower, forward, backward)]
+
+    async def caught_up(condition):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"the watchtower did not catch up: {watchtower.metrics.summary()}")
+            await asyncio.sleep(0.05)
+
+    metrics = watchtower.metrics
+    try:
+        await caught_up(lambda: metrics.verified + metrics.wrong == relays - len(missing)
+            and metrics.claimed + metrics.failed >= len(wrong))
+
+        for web3 in (bridge.src_web3, bridge.dst_web3):
+            await run_blocking(increase_time, web3, watchtower._challenge_period + 2 * watchtower.margin)
+        # the wrong relayings are proved on the source side too, after their own challenge period
+        await caught_up(lambda: metrics.claimed + metrics.failed >= 2 * len(wrong) + len(missing))
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    return watchtower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--relays", type=int, default=1000)
+    parser.add_argument("--wrong-rate", type=float, default=0.01)
+    parser.add_argument("--missing-rate", type=float, default=0.01)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ports", type=int, nargs=2, default=(8645, 8646))
+    args = parser.parse_args()
+
+    with DevChain(args.ports[0], 1337) as src_web3, DevChain(args.ports[1], 1338) as dst_web3:
+        bridge = TwoChainBridge(src_web3, dst_web3)
+        watchtower = asyncio.run(run_watchtower_benchmark(bridge, args.relays, args.wrong_rate, args.missing_rate,
+            args.seed, batch_size=args.batch_size, concurrency=args.concurrency, poll_interval=args.poll_interval))
+
+    for name, value in watchtower.metrics.summary().items():
+        print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+    for reason, count in watchtower.metrics.errors.items():
+        print(f"    {count} x {reason}")
+
+
+if __name__ == "__main__":
+    main()
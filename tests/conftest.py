@@ -0,0 +1,199 @@
+import json
+import os
+
+from collections import namedtuple
+
+import pytest
+
+from brownie import accounts, Wei
+from brownie import WrappedERC721, WrappedERC721Factory, ContractMap
+from brownie import SimpleGatewaySrcSpokeBrdige, SimpleGatewayHub, SimpleGatewayDstSpokeBrdige
+
+# challenge period, stake amount, challenge amount, undepositing period
+SPOKE_PARAMS = (4 * 60 * 60, Wei("20 ether"), Wei("10 ether"), 2 * 24 * 60 * 60)
+
+Bridge = namedtuple("Bridge", "srcSpokeBridge dstSpokeBridge contractMap hub erc721 wrappedErc721")
+
+# the recorded gas usage of the bridge entry points, see `gas_profile`
+GAS_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+
+# how much more gas in percent a call may use compared to the baseline
+GAS_TOLERANCE = float(os.environ.get("GAS_TOLERANCE", "5"))
+
+# writes the results of the run into the baseline instead of checking against it, the baseline file is
+# written only in this mode, or by the first run when there is no baseline file yet
+UPDATE_GAS_BASELINE = os.environ.get("UPDATE_GAS_BASELINE", "0") == "1"
+
+
+class GasProfile:
+    """
+    Collects the gas used by the transactions of the gas tests and checks them against the baseline.
+    The names of the entries are `<flow>.<contract>.<function>`. With `update` the results are only
+    recorded, and `save` writes them into the baseline.
+    """
+
+    def __init__(self, baseline, update):
+        self.baseline = baseline
+        self.update = update
+        self.results = {}
+
+    def record(self, name, tx):
+        self.record_gas(name, tx.gas_used)
+
+    def record_gas(self, name, gas):
+        self.results[name] = gas
+
+        if self.update:
+            return
+
+        assert name in self.baseline, \
+            f"{name} is not in the gas baseline, regenerate it with UPDATE_GAS_BASELINE=1"
+
+        limit = self.baseline[name] * (100 + GAS_TOLERANCE) / 100
+        assert gas <= limit, \
+            f"{name} uses {gas} gas, the baseline is {self.baseline[name]} (+{GAS_TOLERANCE}%)"
+
+    def report(self):
+        for name in sorted(self.results):
+            baseline = self.baseline.get(name)
+            if baseline is None:
+                print(f"{name}: {self.results[name]} gas (new)")
+            else:
+                diff = (self.results[name] - baseline) * 100 / baseline
+                print(f"{name}: {self.results[name]} gas ({diff:+.2f}%)")
+
+        print(self.function_table())
+
+    def function_table(self):
+        """
+        Returns the gas usage of every `<contract>.<function>` over the flows as a table.
+        """
+        functions = {}
+        for name, gas in self.results.items():
+            parts = name.split(".")
+            if len(parts) == 3:
+                functions.setdefault(".".join(parts[1:]), []).append(gas)
+
+        rows = [f"{'function':<32} {'calls':>5} {'min':>9} {'avg':>9} {'max':>9}"]
+        for function in sorted(functions):
+            gas = functions[function]
+            rows.append(
+                f"{function:<32} {len(gas):>5} {min(gas):>9} {sum(gas) // len(gas):>9} {max(gas):>9}")
+
+        return "\n".join(rows)
+
+    def save(self):
+        if not self.update:
+            return
+
+        baseline = {**self.baseline, **self.results}
+        if baseline != self.baseline:
+            with open(GAS_BASELINE_PATH, "w") as f:
+                json.dump(baseline, f, indent=4, sort_keys=True)
+                f.write("\n")
+
+
+@pytest.fixture(scope="session")
+def gas_profile():
+    baseline = {}
+    if os.path.exists(GAS_BASELINE_PATH):
+        with open(GAS_BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    # there is nothing to check against without a baseline, the first run generates it
+    profile = GasProfile(baseline, UPDATE_GAS_BASELINE or not os.path.exists(GAS_BASELINE_PATH))
+    yield profile
+
+    profile.report()
+    profile.save()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shared_setup(module_isolation):
+    """
+    Reverts the chain after every module, so the module scoped deployments do not leak.
+    """
+    pass
+
+
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    """
+    Takes a snapshot before every test and reverts to it afterwards instead of redeploying the contracts.
+    """
+    pass
+
+
+@pytest.fixture(scope="module")
+def bridge():
+    """
+    Deploys the contracts of both sides once per module. The user (accounts[1]) owns the token 1
+    and it is approved for the source spoke.
+    """
+    erc721 = accounts[0].deploy(WrappedERC721, "ValueNFT", "NFT")
+    wrappedErc721 = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")
+
+    contractMap = accounts[0].deploy(ContractMap)
+    contractMap.addPair(erc721.address, wrappedErc721.address)
+
+    hub = accounts[0].deploy(SimpleGatewayHub)
+
+    srcSpokeBridge = accounts[0].deploy(SimpleGatewaySrcSpokeBrdige, hub, contractMap, *SPOKE_PARAMS)
+    dstSpokeBridge = accounts[0].deploy(SimpleGatewayDstSpokeBrdige, hub, *SPOKE_PARAMS)
+
+    hub.addSpokeBridge(srcSpokeBridge.address, dstSpokeBridge.address, {'from': accounts[0]})
+
+    erc721.mint(accounts[1], 1, {'from': accounts[0]})
+    erc721.approve(srcSpokeBridge.address, 1, {'from': accounts[1]})
+
+    wrappedErc721.transferOwnership(dstSpokeBridge.address)
+
+    return Bridge(srcSpokeBridge, dstSpokeBridge, contractMap, hub, erc721, wrappedErc721)
+
+
+@pytest.fixture(scope="module")
+def wrapped_factory(bridge):
+    """
+    Deploys the factory of the wrapped contracts and sets it for the destination spoke.
+    """
+    factory = accounts[0].deploy(WrappedERC721Factory)
+    bridge.dstSpokeBridge.setWrappedErc721Factory(factory.address, {'from': accounts[0]})
+
+    return factory
+
+
+@pytest.fixture
+def deposited_relayer(bridge):
+    """
+    The relayer (accounts[4]) has deposited on both sides.
+    """
+    relayer = accounts[4]
+
+    bridge.srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    bridge.dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    return relayer
+
+
+@pytest.fixture
+def bought_bid(bridge, deposited_relayer):
+    """
+    The user (accounts[1]) has created a bid on the source side to bridge the token 1 to the receiver
+    (accounts[3]) and the relayer has bought it. Returns the id of the bid.
+    """
+    bridge.srcSpokeBridge.createBid(accounts[3], 1, bridge.erc721.address,
+        {'from': accounts[1], 'amount': Wei("0.01 ether")})
+    bridge.srcSpokeBridge.buyBid(0, {'from': deposited_relayer})
+
+    return 0
+
+
+@pytest.fixture
+def relayed_bid(bridge, deposited_relayer, bought_bid):
+    """
+    The bought bid is relayed correctly to the destination side. Returns the id of the bid.
+    """
+    bridge.dstSpokeBridge.minting(bought_bid, accounts[3], 1, bridge.wrappedErc721.address,
+        {'from': deposited_relayer})
+
+    return bought_bid
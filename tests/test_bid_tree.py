@@ -0,0 +1,214 @@
+import pytest
+
+from brownie import accounts, chain, reverts, Wei
+from eth_utils import keccak
+
+DEPTH = 32
+
+ZERO_HASHES = [bytes(32)]
+for _ in range(DEPTH):
+    ZERO_HASHES.append(keccak(ZERO_HASHES[-1] * 2))
+
+def merkle_path(leaves, index):
+    """
+    Returns the root of the tree of `leaves` and the siblings of the leaf at `index`.
+    """
+    layer = list(leaves)
+    siblings = []
+    for level in range(DEPTH):
+        sibling = index ^ 1
+        siblings.append(layer[sibling] if sibling < len(layer) else ZERO_HASHES[level])
+
+        if len(layer) % 2 == 1:
+            layer.append(ZERO_HASHES[level])
+        layer = [keccak(layer[i] + layer[i + 1]) for i in range(0, len(layer), 2)]
+        index //= 2
+
+    return layer[0], siblings
+
+@pytest.fixture(scope="module")
+def init_contracts(bridge):
+    bridge.srcSpokeBridge.setCommittingBids(True, {'from': accounts[0]})
+    bridge.dstSpokeBridge.setCommittingBids(True, {'from': accounts[0]})
+
+    return bridge.srcSpokeBridge, bridge.dstSpokeBridge, bridge.erc721, bridge.wrappedErc721
+
+def test_not_committing_bids(init_contracts, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, erc721, wrappedErc721 = init_contracts
+
+    with reverts("Ownable: caller is not the owner"):
+        srcSpokeBridge.setCommittingBids(False, {'from': accounts[1]})
+
+    srcSpokeBridge.setCommittingBids(False, {'from': accounts[0]})
+    dstSpokeBridge.setCommittingBids(False, {'from': accounts[0]})
+
+    srcSpokeBridge.createBid(accounts[3], 1, erc721.address, {'from': accounts[1], 'amount': Wei("0.01 ether")})
+    tx = srcSpokeBridge.buyBid(0, {'from': deposited_relayer})
+    assert "BidCommitted" not in tx.events
+    assert srcSpokeBridge.getLeafCount() == 0
+
+    tx = dstSpokeBridge.minting(0, accounts[3], 1, wrappedErc721.address, {'from': deposited_relayer})
+    assert "BidCommitted" not in tx.events
+    assert dstSpokeBridge.getLeafCount() == 0
+
+def test_committing_bids(init_contracts, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = deposited_relayer
+
+    assert srcSpokeBridge.getLeafCount() == 0
+
+    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    tx = srcSpokeBridge.buyBid(0, {'from': relayer})
+
+    record = bytes(tx.events["BidCommitted"]["record"])
+    assert tx.events["BidCommitted"]["bidId"] == 0
+    assert tx.events["BidCommitted"]["isOutgoingBid"] == True
+    assert tx.events["BidCommitted"]["leafIndex"] == 0
+    assert len(record) == 125
+
+    tx = dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+    assert tx.events["BidCommitted"]["isOutgoingBid"] == False
+    assert len(tx.events["BidCommitted"]["record"]) == 145
+    assert dstSpokeBridge.getLeafCount() == 1
+
+    root, _ = merkle_path([keccak(record)], 0)
+    assert srcSpokeBridge.getLeafCount() == 1
+    assert srcSpokeBridge.getRoot() == root
+
+    tx = srcSpokeBridge.commitRoot({'from': accounts[5]})
+    assert tx.events["RootCommitted"]["root"] == root
+    assert tx.events["RootReceived"]["leafCount"] == 1
+    assert dstSpokeBridge.remoteRoots(root) == True
+
+def test_root_of_many_bids(init_contracts, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = deposited_relayer
+
+    tokenIds = list(range(1, 6))
+    for tokenId in tokenIds[1:]:
+        erc721.mint(user, tokenId, {'from': accounts[0]})
+    erc721.setApprovalForAll(srcSpokeBridge.address, True, {'from': user})
+
+    srcSpokeBridge.createBids(receiver, tokenIds, erc721.address, {'from': user, 'amount': Wei("0.05 ether")})
+    tx = srcSpokeBridge.buyBids([0, 1, 2, 3, 4], {'from': relayer})
+
+    leaves = [keccak(bytes(e["record"])) for e in tx.events["BidCommitted"]]
+    assert [e["leafIndex"] for e in tx.events["BidCommitted"]] == [0, 1, 2, 3, 4]
+    assert srcSpokeBridge.getRoot() == merkle_path(leaves, 0)[0]
+
+def bought_bid_record(srcSpokeBridge, erc721, relayer):
+    srcSpokeBridge.createBid(accounts[3], 1, erc721.address, {'from': accounts[1], 'amount': Wei("0.01 ether")})
+    tx = srcSpokeBridge.buyBid(0, {'from': relayer})
+
+    return bytes(tx.events["BidCommitted"]["record"])
+
+def test_proving_malicious_minting(init_contracts, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, erc721, wrappedErc721 = init_contracts
+
+    challenger = accounts[2]
+    relayer = deposited_relayer
+
+    record = bought_bid_record(srcSpokeBridge, erc721, relayer)
+
+    # wrong relaying
+    dstSpokeBridge.minting(0, relayer, 1, wrappedErc721.address, {'from': relayer})
+    dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")})
+
+    root, siblings = merkle_path([keccak(record)], 0)
+
+    with reverts("SpokeBridge: root is not committed by the other side!"):
+        dstSpokeBridge.proveBids(root, record, [0], [siblings], {'from': challenger})
+
+    srcSpokeBridge.commitRoot({'from': challenger})
+
+    with reverts("SpokeBridge: invalid inclusion proof!"):
+        dstSpokeBridge.proveBids(root, record, [1], [siblings], {'from': challenger})
+    with reverts("SpokeBridge: array lengths are not equal!"):
+        dstSpokeBridge.proveBids(root, record, [0, 1], [siblings], {'from': challenger})
+
+    # no message is sent through the hub
+    tx = dstSpokeBridge.proveBids(root, record, [0], [siblings], {'from': challenger})
+    assert "MessageProcessed" not in tx.events
+    assert tx.events["ProofProcessed"]["bidId"] == 0
+    assert tx.events["ProofProcessed"]["result"] == 0
+    assert tx.events["RelayerSlashed"]["relayer"] == relayer
+
+    retRelayer = dstSpokeBridge.relayers(relayer)
+    assert retRelayer["status"] == 4
+
+    prev_challenger_balance = challenger.balance()
+    dstSpokeBridge.claimChallengeReward(0, False, {'from': challenger})
+    assert prev_challenger_balance + Wei("15 ether") == challenger.balance()
+
+def test_record_cannot_reject_challenge(init_contracts, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, erc721, wrappedErc721 = init_contracts
+
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = deposited_relayer
+
+    record = bought_bid_record(srcSpokeBridge, erc721, relayer)
+
+    # correct relaying
+    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+    dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")})
+
+    srcSpokeBridge.commitRoot({'from': relayer})
+    root, siblings = merkle_path([keccak(record)], 0)
+
+    # FalseChallenge, the challenge stays open until a proof is sent
+    tx = dstSpokeBridge.proveBids(root, record, [0], [siblings], {'from': relayer})
+    assert tx.events["ProofProcessed"]["result"] == 5
+    assert "ChallengeRejected" not in tx.events
+    assert dstSpokeBridge.relayers(relayer)["status"] == 3
+
+    tx = srcSpokeBridge.sendProof(True, 0, {'from': relayer})
+    assert tx.events["ChallengeRejected"]["bidId"] == 0
+    assert dstSpokeBridge.relayers(relayer)["status"] == 1
+
+def test_proving_honest_unlocking(init_contracts, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = deposited_relayer
+
+    bought_bid_record(srcSpokeBridge, erc721, relayer)
+    tx = dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+    leaves = [keccak(bytes(tx.events["BidCommitted"]["record"]))]
+
+    chain.sleep(14400000) # it's 4 hours
+
+    # bridging back
+    wrappedErc721.approve(dstSpokeBridge.address, 1, {'from': receiver})
+    dstSpokeBridge.createBid(user, 1, wrappedErc721.address, 0, {'from': receiver, 'amount': Wei("0.01 ether")})
+    tx = dstSpokeBridge.buyBid(0, {'from': relayer})
+
+    record = bytes(tx.events["BidCommitted"]["record"])
+    leafIndex = tx.events["BidCommitted"]["leafIndex"]
+    leaves.append(keccak(record))
+
+    # correct relaying
+    srcSpokeBridge.unlocking(0, 0, user, {'from': relayer})
+
+    dstSpokeBridge.commitRoot({'from': relayer})
+    root, siblings = merkle_path(leaves, leafIndex)
+
+    # the record contains the wrapped contract, it matches the original one of the outgoing bid
+    tx = srcSpokeBridge.proveBids(root, record, [leafIndex], [siblings], {'from': challenger})
+    assert tx.events["ProofProcessed"]["result"] == 5
+    assert "RelayerSlashed" not in tx.events
+    assert srcSpokeBridge.incomingBids(0)["status"] == 1
+    assert srcSpokeBridge.relayers(relayer)["status"] == 1
+
+    srcSpokeBridge.challengeUnlocking(0, {'from': challenger, 'amount': Wei("10 ether")})
+    tx = dstSpokeBridge.sendProof(True, 0, {'from': relayer})
+    assert tx.events["ChallengeRejected"]["bidId"] == 0
+    assert srcSpokeBridge.relayers(relayer)["status"] == 1
@@ -1,32 +1,14 @@
 import pytest
 
 from brownie import accounts, reverts, Wei, chain
-from brownie import WrappedERC721, ContractMap
+from brownie import WrappedERC721, ContractMap, ERC721ReceiverMock
 from brownie import SimpleGatewaySrcSpokeBrdige, SimpleGatewayHub, SimpleGatewayDstSpokeBrdige
 
-@pytest.fixture
-def init_contracts():
-    erc721 = accounts[0].deploy(WrappedERC721, "ValueNFT", "NFT")
-    wrappedErc721 = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")
-
-    contractMap = accounts[0].deploy(ContractMap)
-    contractMap.addPair(erc721.address, wrappedErc721.address)
-
-    hub = accounts[0].deploy(SimpleGatewayHub)
-
-    srcSpokeBridge = accounts[0].deploy(SimpleGatewaySrcSpokeBrdige, hub, contractMap)
-    dstSpokeBridge = accounts[0].deploy(SimpleGatewayDstSpokeBrdige, hub)
+@pytest.fixture(scope="module")
+def init_contracts(bridge):
+    return bridge.srcSpokeBridge, bridge.dstSpokeBridge, bridge.contractMap, bridge.erc721, bridge.wrappedErc721
 
-    hub.addSpokeBridge(srcSpokeBridge.address, dstSpokeBridge.address, {'from': accounts[0]})
-
-    erc721.mint(accounts[1], 1, {'from': accounts[0]})
-    erc721.approve(srcSpokeBridge.address, 1, {'from': accounts[1]})
-
-    wrappedErc721.transferOwnership(dstSpokeBridge.address)
-
-    return srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721
-
-def test_one_token_briging_circle_without_challenge(init_contracts):
+def test_one_token_briging_circle_without_challenge(init_contracts, relayed_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
@@ -34,14 +16,6 @@ def test_one_token_briging_circle_without_challenge(init_contracts):
     receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
-
-    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
-
     chain.sleep(14400000) # it's 4 hours
 
     wrappedErc721.approve(dstSpokeBridge.address, 1, {'from': receiver})
@@ -70,17 +44,30 @@ def test_challenge_on_source_during_locking(init_contracts):
     # sending the proof of # id incoming message
     dstSpokeBridge.sendProof(False, 0, {'from': challenger})
 
+    # only the buyer, the timestamp and the status are kept
+    retBid = srcSpokeBridge.outgoingBids(0)
+    assert retBid["status"] == 4
+    assert retBid["buyer"] == relayer
+    assert retBid["maker"] == "0x0000000000000000000000000000000000000000"
+    assert retBid["tokenId"] == 0
+    assert erc721.ownerOf(1) == user
+
     prev_challenger_balance = challenger.balance()
     srcSpokeBridge.claimChallengeReward(0, True, {'from': challenger})
     assert prev_challenger_balance + Wei("5 ether") == challenger.balance()
 
+    # the reward is deleted after claiming
+    assert srcSpokeBridge.outgoingChallengeRewards(0) == ("0x0000000000000000000000000000000000000000", 0)
+    with reverts("SpokeBridge: challenger is not the sender!"):
+        srcSpokeBridge.claimChallengeReward(0, True, {'from': challenger})
+
     with reverts("SpokeBridge: caller is not a relayer!"):
         dstSpokeBridge.undeposite({'from': relayer})
 
     retRelayer = srcSpokeBridge.relayers(relayer)
     assert retRelayer["status"] == 4
 
-def test_false_challenge_on_source_during_locking(init_contracts):
+def test_false_challenge_on_source_during_locking(init_contracts, bought_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
@@ -88,12 +75,6 @@ def test_false_challenge_on_source_during_locking(init_contracts):
     receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
-
     # before time window sending the proof of # id incoming message
     with reverts("SrcSpokeBridge: Time window is not expired!"):
         dstSpokeBridge.sendProof(False, 0, {'from': challenger})
@@ -146,7 +127,7 @@ def test_false_challenge_on_source_during_locking_wrong_proof(init_contracts):
     retRelayer = srcSpokeBridge.relayers(relayer)
     assert retRelayer["status"] == 1
 
-def test_challenge_on_dest_during_burning(init_contracts):
+def test_challenge_on_dest_during_burning(init_contracts, relayed_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
@@ -154,14 +135,6 @@ def test_challenge_on_dest_during_burning(init_contracts):
     receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
-
-    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
-
     # it's 4 hours
     chain.sleep(14400000)
 
@@ -186,7 +159,7 @@ def test_challenge_on_dest_during_burning(init_contracts):
     assert retRelayer["status"] == 4
 
 
-def test_false_challenge_on_dest_during_burning(init_contracts):
+def test_false_challenge_on_dest_during_burning(init_contracts, relayed_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
@@ -194,14 +167,6 @@ def test_false_challenge_on_dest_during_burning(init_contracts):
     receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
-
-    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
-
     # it's 4 hours
     chain.sleep(14400000)
 
@@ -229,10 +194,16 @@ def test_false_challenge_on_dest_during_burning(init_contracts):
     with reverts("DstSpokeBridge: False challenging!"):
         srcSpokeBridge.sendProof(False, 0, {'from': challenger})
 
+    # the claimed bid is Unlocked, it proves the relaying as well
+    srcSpokeBridge.claimNFT(0, {'from': user})
+    assert srcSpokeBridge.incomingBids(0)["status"] == 4
+    with reverts("DstSpokeBridge: False challenging!"):
+        srcSpokeBridge.sendProof(False, 0, {'from': challenger})
+
     retRelayer = dstSpokeBridge.relayers(relayer)
     assert retRelayer["status"] == 1
 
-def test_false_challenge_on_dest_during_burning_wrong_proof(init_contracts):
+def test_false_challenge_on_dest_during_burning_wrong_proof(init_contracts, relayed_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
@@ -240,14 +211,6 @@ def test_false_challenge_on_dest_during_burning_wrong_proof(init_contracts):
     receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
-
-    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
-
     # it's 4 hours
     chain.sleep(14400000)
 
@@ -293,6 +256,13 @@ def test_challenge_on_source_during_unlocking(init_contracts):
     srcSpokeBridge.challengeUnlocking(0, {'from': challenger, 'amount': Wei("10 ether")});
     dstSpokeBridge.sendProof(True, 0, {'from': challenger})
 
+    # the incoming bid cannot be claimed, the outgoing one can be relayed again
+    assert srcSpokeBridge.incomingBids(0)["status"] == 3
+    assert srcSpokeBridge.outgoingBids(0)["status"] == 2
+    chain.sleep(14400000) # it's 4 hours
+    with reverts("SrcSpokeBride: incoming bid has no Relayed state!"):
+        srcSpokeBridge.claimNFT(0, {'from': relayer})
+
     prev_challenger_balance = challenger.balance()
     srcSpokeBridge.claimChallengeReward(0, False, {'from': challenger})
     assert prev_challenger_balance + Wei("15 ether") == challenger.balance()
@@ -303,21 +273,35 @@ def test_challenge_on_source_during_unlocking(init_contracts):
     retRelayer = srcSpokeBridge.relayers(relayer)
     assert retRelayer["status"] == 4
 
-def test_false_challenge_on_source_during_unlocking(init_contracts):
+def test_challenge_on_source_during_unlocking_of_given_back_token(init_contracts, bought_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
     challenger = accounts[2]
-    receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    chain.sleep(14400000) # it's 4 hours
 
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
+    # no relaying, wrong unlocking
+    srcSpokeBridge.unlocking(0, 0, relayer, {'from': relayer});
 
-    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+    # the locking is proved first, the token is given back
+    dstSpokeBridge.sendProof(False, 0, {'from': challenger})
+    assert erc721.ownerOf(1) == user
+
+    dstSpokeBridge.sendProof(True, 0, {'from': challenger})
+    assert srcSpokeBridge.incomingBids(0)["status"] == 3
+
+    # the outgoing bid is not restored, so it cannot be unlocked again
+    assert srcSpokeBridge.outgoingBids(0)["status"] == 4
+
+def test_false_challenge_on_source_during_unlocking(init_contracts, relayed_bid):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
 
     chain.sleep(14400000) # it's 4 hours
 
@@ -347,7 +331,7 @@ def test_false_challenge_on_source_during_unlocking(init_contracts):
     retRelayer = srcSpokeBridge.relayers(relayer)
     assert retRelayer["status"] == 1
 
-def test_false_challenge_on_source_during_unlocking_wrong_proof(init_contracts):
+def test_false_challenge_on_source_during_unlocking_wrong_proof(init_contracts, relayed_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
@@ -355,14 +339,6 @@ def test_false_challenge_on_source_during_unlocking_wrong_proof(init_contracts):
     receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
-
-    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
-
     chain.sleep(14400000) # it's 4 hours
 
     wrappedErc721.approve(dstSpokeBridge.address, 1, {'from': receiver})
@@ -405,8 +381,21 @@ def test_challenge_on_dest_during_minting(init_contracts):
     dstSpokeBridge.minting(0, relayer, 1, wrappedErc721.address, {'from': relayer})
 
     # challenging
-    dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")});
-    srcSpokeBridge.sendProof(True, 0, {'from': challenger})
+    tx = dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")});
+    assert tx.events["BidChallenged"]["challenger"] == challenger
+    assert tx.events["BidChallenged"]["relayer"] == relayer
+    assert tx.events["BidChallenged"]["bidId"] == 0
+
+    tx = srcSpokeBridge.sendProof(True, 0, {'from': challenger})
+    assert tx.events["ProofSent"]["sender"] == challenger
+    assert tx.events["ProofSent"]["isOutgoingBid"] == True
+    assert tx.events["MessageProcessed"]["from"] == srcSpokeBridge.address
+    assert tx.events["MessageProcessed"]["to"] == dstSpokeBridge.address
+    assert tx.events["ProofReceived"]["bidId"] == 0
+    assert tx.events["RelayerSlashed"]["relayer"] == relayer
+    assert tx.events["ChallengeProved"]["bidId"] == 0
+    assert tx.events["ChallengeProved"]["isOutgoingBid"] == False
+    assert tx.events["ChallengeProved"]["challenger"] == challenger
 
     prev_challenger_balance = challenger.balance()
     dstSpokeBridge.claimChallengeReward(0, False, {'from': challenger})
@@ -418,7 +407,7 @@ def test_challenge_on_dest_during_minting(init_contracts):
     retRelayer = dstSpokeBridge.relayers(relayer)
     assert retRelayer["status"] == 4
 
-def test_false_challenge_on_dest_during_minting(init_contracts):
+def test_false_challenge_on_dest_during_minting(init_contracts, bought_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
@@ -426,12 +415,6 @@ def test_false_challenge_on_dest_during_minting(init_contracts):
     receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
-
     # challenging
     with reverts("SpokeBridge: Corresponding incoming bid status is not relayed!"):
         dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")});
@@ -453,7 +436,7 @@ def test_false_challenge_on_dest_during_minting(init_contracts):
     retRelayer = dstSpokeBridge.relayers(relayer)
     assert retRelayer["status"] == 1
 
-def test_challenge_on_dest_during_minting_wrong_proof(init_contracts):
+def test_challenge_on_dest_during_minting_wrong_proof(init_contracts, bought_bid):
     srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
 
     user = accounts[1]
@@ -461,12 +444,6 @@ def test_challenge_on_dest_during_minting_wrong_proof(init_contracts):
     receiver = accounts[3]
     relayer = accounts[4]
 
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
-
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
-    srcSpokeBridge.buyBid(0, {'from': relayer})
-
     # challenging
     with reverts("SpokeBridge: Corresponding incoming bid status is not relayed!"):
         dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")});
@@ -486,4 +463,276 @@ def test_challenge_on_dest_during_minting_wrong_proof(init_contracts):
     with reverts("DstSpokeBrdige: There is no corresponding local bid!"):
         srcSpokeBridge.sendProof(False, 0, {'from': challenger})
     retRelayer = dstSpokeBridge.relayers(relayer)
-    assert retRelayer["status"] == 1
\ No newline at end of file
+    assert retRelayer["status"] == 1
+
+
+def test_rejected_challenge_on_dest_during_minting(init_contracts, bought_bid):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    # correct relaying
+    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+
+    # false challenging
+    dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")});
+    retRelayer = dstSpokeBridge.relayers(relayer)
+    assert retRelayer["status"] == 3
+
+    tx = srcSpokeBridge.sendProof(True, 0, {'from': challenger})
+    assert tx.events["ProofReceived"]["bidId"] == 0
+    assert tx.events["ChallengeRejected"]["bidId"] == 0
+    assert tx.events["ChallengeRejected"]["isOutgoingBid"] == False
+    assert "RelayerSlashed" not in tx.events
+
+    retRelayer = dstSpokeBridge.relayers(relayer)
+    assert retRelayer["status"] == 1
+
+    # the incoming bid is Relayed again, so it can be bridged back
+    assert dstSpokeBridge.incomingBids(0)["status"] == 1
+
+def test_batch_of_proofs_on_source_during_locking(init_contracts, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = deposited_relayer
+
+    erc721.mint(user, 2, {'from': accounts[0]})
+    erc721.approve(srcSpokeBridge.address, 2, {'from': user})
+
+    srcSpokeBridge.createBids(receiver, [1, 2], erc721.address, {'from': user, 'amount': Wei("0.02 ether")})
+    srcSpokeBridge.buyBids([0, 1], {'from': relayer})
+
+    # only the first bid is relayed
+    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    with reverts("SpokeBridge: array lengths are not equal!"):
+        dstSpokeBridge.sendProofs([False], [0, 1], {'from': challenger})
+    with reverts("SpokeBridge: there is no proof to send!"):
+        dstSpokeBridge.sendProofs([], [], {'from': challenger})
+
+    # the false challenge of the first bid does not revert the proof of the second one
+    tx = dstSpokeBridge.sendProofs([False, False], [0, 1], {'from': challenger})
+    assert len(tx.events["ProofSent"]) == 2
+    assert tx.events["MessageProcessed"]["from"] == dstSpokeBridge.address
+    assert [e["bidId"] for e in tx.events["ProofProcessed"]] == [0, 1]
+    # FalseChallenge, Proved
+    assert [e["result"] for e in tx.events["ProofProcessed"]] == [5, 0]
+    assert tx.events["ChallengeProved"]["bidId"] == 1
+
+    assert srcSpokeBridge.outgoingBids(0)["status"] == 2
+    assert srcSpokeBridge.outgoingBids(1)["status"] == 4
+    assert erc721.ownerOf(2) == user
+
+    prev_challenger_balance = challenger.balance()
+    srcSpokeBridge.claimChallengeReward(1, True, {'from': challenger})
+    assert prev_challenger_balance + Wei("5 ether") == challenger.balance()
+
+    retRelayer = srcSpokeBridge.relayers(relayer)
+    assert retRelayer["status"] == 4
+
+def test_replayed_proof_in_batch(init_contracts, bought_bid):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+
+    # no relaying
+    chain.sleep(14400000) # it's 4 hours
+
+    # the token is given back by the first proof, the replayed one does not revert the message
+    tx = dstSpokeBridge.sendProofs([False, False], [0, 0], {'from': challenger})
+    assert tx.events["MessageProcessed"]["from"] == dstSpokeBridge.address
+    # Proved, NoLocalBid
+    assert [e["result"] for e in tx.events["ProofProcessed"]] == [0, 2]
+    assert len(tx.events["ChallengeProved"]) == 1
+
+    assert erc721.ownerOf(1) == user
+    assert srcSpokeBridge.outgoingBids(0)["status"] == 4
+
+    # it is replayed by a later message too
+    tx = dstSpokeBridge.sendProofs([False], [0], {'from': challenger})
+    assert tx.events["ProofProcessed"]["result"] == 2
+    with reverts("SrcSpokeBrdige: There is no corresponding local bid!"):
+        dstSpokeBridge.sendProof(False, 0, {'from': challenger})
+
+def test_reverting_proof_in_batch(init_contracts, bought_bid):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    # the maker of the second bid is a contract
+    maker = accounts[0].deploy(ERC721ReceiverMock)
+    erc721.mint(maker, 2, {'from': accounts[0]})
+    maker.execute(erc721.address, erc721.approve.encode_input(srcSpokeBridge.address, 2))
+    maker.execute(srcSpokeBridge.address, srcSpokeBridge.createBid.encode_input(receiver, 2, erc721.address),
+        {'value': Wei("0.01 ether")})
+    srcSpokeBridge.buyBid(1, {'from': relayer})
+
+    # no relaying
+    chain.sleep(14400000) # it's 4 hours
+
+    # the maker does not take its token back, only its proof is rolled back
+    maker.setRejecting(True)
+    tx = dstSpokeBridge.sendProofs([False, False], [1, 0], {'from': challenger})
+    assert tx.events["MessageProcessed"]["from"] == dstSpokeBridge.address
+    # Reverted, Proved
+    assert [e["result"] for e in tx.events["ProofProcessed"]] == [6, 0]
+
+    assert erc721.ownerOf(1) == user
+    assert erc721.ownerOf(2) == srcSpokeBridge.address
+    assert srcSpokeBridge.outgoingBids(1)["status"] == 2
+
+    with reverts("SpokeBridge: caller is not the bridge!"):
+        srcSpokeBridge.receiveProofEntry((True, 1, 1, receiver, 2, erc721.address, relayer, challenger),
+            {'from': challenger})
+
+    maker.setRejecting(False)
+    tx = dstSpokeBridge.sendProofs([False], [1], {'from': challenger})
+    assert tx.events["ProofProcessed"]["result"] == 0
+    assert erc721.ownerOf(2) == maker
+
+def test_batch_of_reward_claims(init_contracts, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = deposited_relayer
+
+    for tokenId in (2, 3):
+        erc721.mint(user, tokenId, {'from': accounts[0]})
+        erc721.approve(srcSpokeBridge.address, tokenId, {'from': user})
+
+    srcSpokeBridge.createBids(receiver, [1, 2, 3], erc721.address, {'from': user, 'amount': Wei("0.03 ether")})
+    srcSpokeBridge.buyBids([0, 1, 2], {'from': relayer})
+
+    # no relaying
+    chain.sleep(14400000) # it's 4 hours
+
+    dstSpokeBridge.sendProofs([False, False, False], [0, 1, 2], {'from': challenger})
+    amount = sum(srcSpokeBridge.outgoingChallengeRewards(i)["amount"] for i in range(3))
+    assert amount > 0
+
+    with reverts("SpokeBridge: there is no reward to claim!"):
+        srcSpokeBridge.claimChallengeRewards([], [], {'from': challenger})
+    with reverts("SpokeBridge: array lengths are not equal!"):
+        srcSpokeBridge.claimChallengeRewards([0, 1], [True], {'from': challenger})
+    # the first claim of a reward deletes it
+    with reverts("SpokeBridge: challenger is not the sender!"):
+        srcSpokeBridge.claimChallengeRewards([0, 1, 0], [True, True, True], {'from': challenger})
+    with reverts("SpokeBridge: challenger is not the sender!"):
+        srcSpokeBridge.claimChallengeRewards([0, 1, 2], [True, True, True], {'from': user})
+
+    prev_challenger_balance = challenger.balance()
+    tx = srcSpokeBridge.claimChallengeRewards([0, 1, 2], [True, True, True], {'from': challenger})
+    assert prev_challenger_balance + amount == challenger.balance()
+    assert [e["challengeId"] for e in tx.events["ChallengeRewardClaimed"]] == [0, 1, 2]
+
+    # the rewards are paid out by one transfer
+    assert len(tx.internal_transfers) == 1
+    assert tx.internal_transfers[0]["value"] == amount
+
+def test_one_token_briging_circle_with_short_challenge_period():
+    challengePeriod = 15 * 60 # it's 15 minutes
+
+    erc721 = accounts[0].deploy(WrappedERC721, "ValueNFT", "NFT")
+    wrappedErc721 = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")
+
+    contractMap = accounts[0].deploy(ContractMap)
+    contractMap.addPair(erc721.address, wrappedErc721.address)
+
+    hub = accounts[0].deploy(SimpleGatewayHub)
+
+    params = (challengePeriod, Wei("2 ether"), Wei("1 ether"), 60 * 60)
+    srcSpokeBridge = accounts[0].deploy(SimpleGatewaySrcSpokeBrdige, hub, contractMap, *params)
+    dstSpokeBridge = accounts[0].deploy(SimpleGatewayDstSpokeBrdige, hub, *params)
+
+    hub.addSpokeBridge(srcSpokeBridge.address, dstSpokeBridge.address, {'from': accounts[0]})
+    wrappedErc721.transferOwnership(dstSpokeBridge.address)
+
+    assert srcSpokeBridge.CHALLENGE_PERIOD() == challengePeriod
+    assert dstSpokeBridge.STAKE_AMOUNT() == Wei("2 ether")
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    erc721.mint(user, 1, {'from': accounts[0]})
+    erc721.approve(srcSpokeBridge.address, 1, {'from': user})
+
+    with reverts("SpokeBridge: msg.value is not appropriate!"):
+        srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("2 ether")})
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("2 ether")})
+
+    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    srcSpokeBridge.buyBid(0, {'from': relayer})
+
+    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+
+    wrappedErc721.approve(dstSpokeBridge.address, 1, {'from': receiver})
+
+    with reverts("DstSpokeBridge: too early unwrapping!"):
+        dstSpokeBridge.createBid(user, 1, wrappedErc721.address, 0, {'from': receiver, 'amount': Wei("0.01 ether")})
+
+    chain.sleep(challengePeriod + 1)
+
+    dstSpokeBridge.createBid(user, 1, wrappedErc721.address, 0, {'from': receiver, 'amount': Wei("0.01 ether")})
+    dstSpokeBridge.buyBid(0, {'from': relayer})
+
+    srcSpokeBridge.unlocking(0, 0, user, {'from': relayer})
+
+    with reverts("SrcSpokeBridge: the challenging period is not expired yet!"):
+        srcSpokeBridge.claimNFT(0, {'from': user})
+
+    chain.sleep(challengePeriod + 1)
+
+    srcSpokeBridge.claimNFT(0, {'from': user})
+    assert erc721.ownerOf(1) == user
+
+def test_zero_challenge_period():
+    hub = accounts[0].deploy(SimpleGatewayHub)
+
+    with reverts("SpokeBridge: challenge period is zero!"):
+        accounts[0].deploy(SimpleGatewayDstSpokeBrdige, hub, 0, Wei("20 ether"), Wei("10 ether"), 2 * 24 * 60 * 60)
+
+def test_bridging_to_deployed_wrapped_contract(init_contracts, wrapped_factory, deposited_relayer):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = deposited_relayer
+
+    # a new collection is mapped to its wrapped contract before it is deployed
+    collection = accounts[0].deploy(WrappedERC721, "Collection", "COL")
+    collection.mint(user, 1, {'from': accounts[0]})
+    collection.approve(srcSpokeBridge.address, 1, {'from': user})
+
+    wrapped = wrapped_factory.predictAddress(collection.address, "Wrapped Collection", "wCOL", dstSpokeBridge.address)
+    contractMap.addPair(collection.address, wrapped, {'from': accounts[0]})
+
+    srcSpokeBridge.createBid(receiver, 1, collection.address, {'from': user, 'amount': Wei("0.01 ether")})
+    srcSpokeBridge.buyBid(0, {'from': relayer})
+
+    dstSpokeBridge.mintingWithDeployment(0, receiver, 1, collection.address, "Wrapped Collection", "wCOL",
+        {'from': relayer})
+    assert WrappedERC721.at(wrapped).ownerOf(1) == receiver
+    assert WrappedERC721.at(wrapped).name() == "Wrapped Collection"
+
+    # the relaying is correct
+    dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")})
+    tx = srcSpokeBridge.sendProof(True, 0, {'from': challenger})
+    assert tx.events["ChallengeRejected"]["bidId"] == 0
+    assert dstSpokeBridge.relayers(relayer)["status"] == 1
@@ -0,0 +1,96 @@
+import pytest
+
+from brownie import accounts, web3, Wei
+
+from nft_bridge.client import JsonRpc, RpcError, SpokeClient
+from nft_bridge.enums import ChallengeStatus, IncomingBidStatus, OutgoingBidStatus, RelayerStatus
+
+@pytest.fixture
+def rpc():
+    rpc = JsonRpc(web3.provider.endpoint_uri, batch_size=4)
+    yield rpc
+    rpc.close()
+
+def test_reading_params_once(bridge, rpc):
+    client = SpokeClient(rpc, bridge.srcSpokeBridge.address)
+
+    assert client.stake_amount == Wei("20 ether")
+    assert client.challenge_amount == Wei("10 ether")
+    assert client.challenge_period == 4 * 60 * 60
+    assert client.time_limit_of_undeposit == 2 * 24 * 60 * 60
+    assert client.hub == bridge.hub.address
+
+    # the five parameters are read by one batch
+    assert rpc.requests == 1
+
+def test_reading_bids_in_batches(bridge, rpc, relayed_bid):
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    for tokenId in range(2, 8):
+        bridge.erc721.mint(user, tokenId, {'from': accounts[0]})
+        bridge.erc721.approve(bridge.srcSpokeBridge.address, tokenId, {'from': user})
+        bridge.srcSpokeBridge.createBid(receiver, tokenId, bridge.erc721.address,
+            {'from': user, 'amount': Wei("0.01 ether")})
+
+    src = SpokeClient(rpc, bridge.srcSpokeBridge.address)
+    dst = SpokeClient(rpc, bridge.dstSpokeBridge.address)
+
+    assert src.bid_count() == 7
+    requests = rpc.requests
+
+    bids = src.outgoing_bids(range(7))
+    assert rpc.requests == requests + 2
+    assert [bid.status for bid in bids] == [OutgoingBidStatus.BOUGHT] + 6 * [OutgoingBidStatus.CREATED]
+    assert [bid.token_id for bid in bids] == list(range(1, 8))
+    assert bids[0].buyer == relayer.address
+    assert bids[0].local_erc721_contract == bridge.erc721.address
+
+    # the range is cut at the last bid
+    assert src.outgoing_bid_range(0, 10, page_size=3) == bids
+
+    incomingBid = dst.incoming_bids([relayed_bid])[0]
+    assert incomingBid.status == IncomingBidStatus.RELAYED
+    assert incomingBid.receiver == receiver.address
+    assert incomingBid.remote_erc721_contract == bridge.wrappedErc721.address
+    assert dst.incoming_bid_range(0, 2)[1].status == IncomingBidStatus.NONE
+
+    assert src.open_bids(0, 10) == ([1, 2, 3, 4, 5, 6], 0)
+
+    snapshot = src.snapshots([relayed_bid])[0]
+    assert snapshot.outgoing_bid == bids[0]
+    assert snapshot.buyer.status == RelayerStatus.ACTIVE
+
+def test_reading_challenges(bridge, rpc, relayed_bid):
+    challenger = accounts[2]
+    relayer = accounts[4]
+
+    bridge.dstSpokeBridge.challengeMinting(relayed_bid, {'from': challenger, 'amount': Wei("10 ether")})
+
+    dst = SpokeClient(rpc, bridge.dstSpokeBridge.address)
+
+    challenge = dst.challenges([relayed_bid])[0]
+    assert challenge.challenger == challenger.address
+    assert challenge.status == ChallengeStatus.CHALLENGED
+
+    relayers = dst.relayers([relayer.address, accounts[5].address])
+    assert relayers[0].status == RelayerStatus.CHALLENGED
+    assert relayers[0].staked_amount == Wei("20 ether")
+    assert relayers[1].status == RelayerStatus.NONE
+
+    assert dst.challenge_rewards([relayed_bid], False)[0].amount == 0
+
+def test_pinning_block(bridge, rpc, deposited_relayer):
+    client = SpokeClient(rpc, bridge.srcSpokeBridge.address)
+    block = web3.eth.block_number
+
+    bridge.srcSpokeBridge.createBid(accounts[3], 1, bridge.erc721.address,
+        {'from': accounts[1], 'amount': Wei("0.01 ether")})
+
+    assert client.bid_count(block) == 0
+    assert client.bid_count() == 1
+
+def test_failing_request(rpc):
+    with pytest.raises(RpcError):
+        rpc.request("eth_unknownMethod", [])
@@ -2,7 +2,7 @@ import pytest
 
 from brownie import accounts, reverts, ContractMap, WrappedERC721
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def init_contracts():
     erc721 = accounts[0].deploy(WrappedERC721, "ValueNFT", "NFT")
     wrapped_erc721 = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")    
@@ -11,8 +11,10 @@ def init_contracts():
 
 def test_add_pair(init_contracts):
     contract_map, localAddr, remoteAddr = init_contracts
-    contract_map.addPair(localAddr, remoteAddr, {'from': accounts[0]})
+    tx = contract_map.addPair(localAddr, remoteAddr, {'from': accounts[0]})
     assert contract_map.getRemote(localAddr) == remoteAddr
+    assert tx.events["PairAdded"]["_local"] == localAddr
+    assert tx.events["PairAdded"]["_remote"] == remoteAddr
     assert contract_map.getLocal(remoteAddr) == localAddr
 
 def test_not_owner_add_pair(init_contracts):
@@ -30,4 +32,28 @@ def test_add_exist_addr(init_contracts):
     new_wrapped_erc721 = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")    
 
     with reverts("ContractMap: addr is already in the remoteToLocal!"):
-        contract_map.addPair(new_wrapped_erc721.address, remoteAddr, {'from': accounts[0]})
\ No newline at end of file
+        contract_map.addPair(new_wrapped_erc721.address, remoteAddr, {'from': accounts[0]})
+
+def test_add_pairs(init_contracts):
+    contract_map, localAddr, remoteAddr = init_contracts
+    other_local = accounts[0].deploy(WrappedERC721, "Other", "OTH").address
+    other_remote = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP").address
+
+    with reverts("ContractMap: there is no pair to add!"):
+        contract_map.addPairs([], [], {'from': accounts[0]})
+    with reverts("ContractMap: array lengths are not equal!"):
+        contract_map.addPairs([localAddr, other_local], [remoteAddr], {'from': accounts[0]})
+    with reverts("Ownable: caller is not the owner"):
+        contract_map.addPairs([localAddr], [remoteAddr], {'from': accounts[1]})
+
+    tx = contract_map.addPairs([localAddr, other_local], [remoteAddr, other_remote], {'from': accounts[0]})
+    assert len(tx.events["PairAdded"]) == 2
+    assert contract_map.getRemote(localAddr) == remoteAddr
+    assert contract_map.getRemote(other_local) == other_remote
+    assert contract_map.getLocal(other_remote) == other_local
+
+    # the batch is reverted as a whole
+    with reverts("ContractMap: addr is already in the localToRemote!"):
+        contract_map.addPairs([accounts[5], localAddr], [accounts[6], accounts[7]], {'from': accounts[0]})
+    with reverts("ContractMap: addr is not in the localToRemote!"):
+        contract_map.getRemote(accounts[5])
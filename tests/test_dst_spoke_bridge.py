@@ -1,19 +1,10 @@
 import pytest
 
-from brownie import accounts, reverts, Wei, chain
-from brownie import WrappedERC721, SimpleGatewayDstSpokeBrdige, SimpleGatewayHub
+from brownie import accounts, reverts, Wei, chain, WrappedERC721
 
-@pytest.fixture
-def init_contracts():
-    wrappedErc721 = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")
-
-    hub = accounts[0].deploy(SimpleGatewayHub)
-
-    dstSpokeBridge = accounts[0].deploy(SimpleGatewayDstSpokeBrdige, hub)
-
-    wrappedErc721.transferOwnership(dstSpokeBridge.address)
-
-    return dstSpokeBridge, wrappedErc721
+@pytest.fixture(scope="module")
+def init_contracts(bridge):
+    return bridge.dstSpokeBridge, bridge.wrappedErc721
 
 def test_relayer_depositing(init_contracts):
     dstSpokeBridge, wrappedErc721 = init_contracts
@@ -39,7 +30,7 @@ def test_relayer_undepositing(init_contracts):
     prev_relayer_balance = relayer.balance()
 
     dstSpokeBridge.undeposite({'from': relayer})
-    with reverts("SpokeBridge: 2 days is not expired from the undepositing!"):
+    with reverts("SpokeBridge: the undepositing period is not expired yet!"):
         dstSpokeBridge.claimDeposite({'from': relayer})
 
     chain.sleep(14400000) # it's 4 hours
@@ -61,7 +52,13 @@ def test_relayer_relaying(init_contracts):
 
     dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
 
-    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+    tx = dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+
+    assert tx.events["BidRelayed"]["bidId"] == 0
+    assert tx.events["BidRelayed"]["relayer"] == relayer
+    assert tx.events["BidRelayed"]["receiver"] == receiver
+    assert tx.events["BidRelayed"]["erc721Contract"] == wrappedErc721.address
+    assert tx.events["BidRelayed"]["tokenId"] == 1
 
     retBid = dstSpokeBridge.incomingBids(0)
     assert retBid["status"] == 1
@@ -72,6 +69,38 @@ def test_relayer_relaying(init_contracts):
 
     assert wrappedErc721.ownerOf(1) == receiver
 
+def test_relayer_minting_with_deployment(init_contracts, wrapped_factory):
+    dstSpokeBridge, wrappedErc721 = init_contracts
+
+    receiver = accounts[3]
+    relayer = accounts[4]
+    original = accounts[5]
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    with reverts("Ownable: caller is not the owner"):
+        dstSpokeBridge.setWrappedErc721Factory(wrapped_factory.address, {'from': relayer})
+
+    predicted = wrapped_factory.predictAddress(original, "Wrapped", "WRP", dstSpokeBridge.address)
+
+    tx = dstSpokeBridge.mintingWithDeployment(0, receiver, 1, original, "Wrapped", "WRP", {'from': relayer})
+    assert tx.events["WrappedERC721Deployed"]["wrappedErc721Contract"] == predicted
+    assert tx.events["BidRelayed"]["erc721Contract"] == predicted
+    assert dstSpokeBridge.incomingBids(0)["remoteErc721Contract"] == predicted
+
+    clone = WrappedERC721.at(predicted)
+    assert clone.ownerOf(1) == receiver
+    assert clone.owner() == dstSpokeBridge.address
+
+    # the contract is deployed only at the first minting
+    tx = dstSpokeBridge.mintingWithDeployment(1, receiver, 2, original, "Wrapped", "WRP", {'from': relayer})
+    assert "WrappedERC721Deployed" not in tx.events
+    assert clone.ownerOf(2) == receiver
+
+    dstSpokeBridge.setWrappedErc721Factory("0x0000000000000000000000000000000000000000", {'from': accounts[0]})
+    with reverts("DstSpokeBridge: there is no factory of wrapped contracts!"):
+        dstSpokeBridge.mintingWithDeployment(2, receiver, 3, original, "Wrapped", "WRP", {'from': relayer})
+
 def test_user_creating_bid(init_contracts):
     dstSpokeBridge, wrappedErc721 = init_contracts
 
@@ -96,7 +125,9 @@ def test_user_creating_bid(init_contracts):
     with reverts("ERC721: transfer from incorrect owner"):
         dstSpokeBridge.createBid(user, 1, wrappedErc721.address, 0, {'from': user, 'amount': Wei("0.01 ether")})
 
-    dstSpokeBridge.createBid(user, 1, wrappedErc721.address, 0, {'from': receiver, 'amount': Wei("0.01 ether")})
+    tx = dstSpokeBridge.createBid(user, 1, wrappedErc721.address, 0, {'from': receiver, 'amount': Wei("0.01 ether")})
+    assert tx.events["BidCreated"]["bidId"] == 0
+    assert tx.events["BidCreated"]["incomingBidId"] == 0
 
     retBid = dstSpokeBridge.outgoingBids(0)
     assert retBid["status"] == 1
@@ -132,4 +163,139 @@ def test_relayer_buying_bid(init_contracts):
 
     retBid = dstSpokeBridge.outgoingBids(0)
     assert retBid["status"] == 2
-    assert retBid["buyer"] == relayer
\ No newline at end of file
+    assert retBid["buyer"] == relayer
+
+def test_user_creating_bids(init_contracts):
+    dstSpokeBridge, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+    dstSpokeBridge.minting(1, receiver, 2, wrappedErc721.address, {'from': relayer})
+
+    wrappedErc721.setApprovalForAll(dstSpokeBridge.address, True, {'from': receiver})
+
+    with reverts("DstSpokeBridge: too early unwrapping!"):
+        dstSpokeBridge.createBids(user, [1, 2], wrappedErc721.address, [0, 1], {'from': receiver, 'amount': 10})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    with reverts("DstSpokeBridge: array lengths are not equal!"):
+        dstSpokeBridge.createBids(user, [1, 2], wrappedErc721.address, [0], {'from': receiver, 'amount': 10})
+    with reverts("DstSpokeBridge: there is no fee for relayers!"):
+        dstSpokeBridge.createBids(user, [1, 2], wrappedErc721.address, [0, 1], {'from': receiver, 'amount': 1})
+    with reverts("DstSpokeBridge: incoming bid is not relayed!"):
+        dstSpokeBridge.createBids(user, [1, 2], wrappedErc721.address, [0, 2], {'from': receiver, 'amount': 10})
+
+    dstSpokeBridge.createBids(user, [1, 2], wrappedErc721.address, [0, 1], {'from': receiver, 'amount': 11})
+
+    assert dstSpokeBridge.id() == 2
+    for bidId, tokenId in enumerate([1, 2]):
+        retBid = dstSpokeBridge.outgoingBids(bidId)
+        assert retBid["status"] == 1
+        assert retBid["receiver"] == user
+        assert retBid["tokenId"] == tokenId
+        assert wrappedErc721.ownerOf(tokenId) == dstSpokeBridge.address
+
+    assert [dstSpokeBridge.outgoingBids(i)["fee"] for i in range(2)] == [5, 6]
+
+def test_relayer_buying_bids(init_contracts):
+    dstSpokeBridge, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    person = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    for tokenId in [1, 2, 3]:
+        dstSpokeBridge.minting(tokenId - 1, receiver, tokenId, wrappedErc721.address, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    wrappedErc721.setApprovalForAll(dstSpokeBridge.address, True, {'from': receiver})
+    dstSpokeBridge.createBids(user, [1, 2, 3], wrappedErc721.address, [0, 1, 2],
+        {'from': receiver, 'amount': Wei("0.03 ether")})
+
+    with reverts("SpokeBridge: caller is not a relayer!"):
+        dstSpokeBridge.buyBids([0, 1, 2], {'from': person})
+
+    prev_relayer_balance = relayer.balance()
+    tx = dstSpokeBridge.buyBids([0, 1, 2], {'from': relayer})
+    assert prev_relayer_balance + Wei("0.03 ether") == relayer.balance()
+
+    with reverts("SpokeBridge: bid does not have Created state"):
+        dstSpokeBridge.buyBids([0], {'from': relayer})
+
+    for bidId, tokenId in enumerate([1, 2, 3]):
+        retBid = dstSpokeBridge.outgoingBids(bidId)
+        assert retBid["status"] == 2
+        assert retBid["buyer"] == relayer
+        assert retBid["timestampOfBought"] == tx.timestamp
+        with reverts("ERC721: invalid token ID"):
+            wrappedErc721.ownerOf(tokenId)
+
+def test_relayer_relaying_batch(init_contracts):
+    dstSpokeBridge, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    person = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    bidIds = [0, 1, 2, 3]
+    receivers = [receiver, receiver, user, receiver]
+    tokenIds = [1, 2, 3, 4]
+
+    with reverts("SpokeBridge: caller is not a relayer!"):
+        dstSpokeBridge.mintingBatch(bidIds, receivers, tokenIds, wrappedErc721.address, {'from': person})
+    with reverts("DstSpokeBridge: array lengths are not equal!"):
+        dstSpokeBridge.mintingBatch(bidIds, receivers, [1, 2, 3], wrappedErc721.address, {'from': relayer})
+
+    dstSpokeBridge.mintingBatch(bidIds, receivers, tokenIds, wrappedErc721.address, {'from': relayer})
+
+    with reverts("DstSpokeBridge: there is an incoming bid with the same id!"):
+        dstSpokeBridge.mintingBatch([3], [receiver], [5], wrappedErc721.address, {'from': relayer})
+
+    for bidId, to, tokenId in zip(bidIds, receivers, tokenIds):
+        retBid = dstSpokeBridge.incomingBids(bidId)
+        assert retBid["status"] == 1
+        assert retBid["tokenId"] == tokenId
+        assert retBid["remoteErc721Contract"] == wrappedErc721.address
+        assert retBid["receiver"] == to
+        assert retBid["relayer"] == relayer
+        assert wrappedErc721.ownerOf(tokenId) == to
+
+    assert wrappedErc721.balanceOf(receiver) == 3
+    assert wrappedErc721.balanceOf(user) == 1
+
+def test_open_bids(init_contracts):
+    dstSpokeBridge, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    dstSpokeBridge.mintingBatch([0, 1], [receiver, receiver], [1, 2], wrappedErc721.address, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    wrappedErc721.setApprovalForAll(dstSpokeBridge.address, True, {'from': receiver})
+    dstSpokeBridge.createBids(user, [1, 2], wrappedErc721.address, [0, 1], {'from': receiver, 'amount': Wei("0.02 ether")})
+
+    bidIds, cursor = dstSpokeBridge.getOpenBids(0, 10)
+    assert list(bidIds) == [0, 1]
+
+    dstSpokeBridge.buyBid(0, {'from': relayer})
+
+    bidIds, cursor = dstSpokeBridge.getOpenBids(0, 10)
+    assert list(bidIds) == [1]
+    assert dstSpokeBridge.getOpenBidCount() == 1
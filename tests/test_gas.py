@@ -0,0 +1,506 @@
+import pytest
+
+from brownie import accounts, Wei, chain, ProofCodecMock, WrappedERC721, WrappedERC721Factory
+
+BATCH_SIZE = 10
+
+@pytest.fixture(scope="module")
+def init_contracts(bridge):
+    # the token 1 is minted by the shared deployment
+    for tokenId in range(2, 2 * BATCH_SIZE + 1):
+        bridge.erc721.mint(accounts[1], tokenId, {'from': accounts[0]})
+    bridge.erc721.setApprovalForAll(bridge.srcSpokeBridge.address, True, {'from': accounts[1]})
+    # the collection is registered at its first use otherwise, that would be measured by the first bid
+    bridge.srcSpokeBridge.registerCollections([bridge.erc721.address], {'from': accounts[0]})
+
+    return bridge.srcSpokeBridge, bridge.dstSpokeBridge, bridge.contractMap, bridge.erc721, bridge.wrappedErc721
+
+def test_create_bids_gas(init_contracts, gas_profile):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+
+    separate = 0
+    for tokenId in range(1, BATCH_SIZE + 1):
+        tx = srcSpokeBridge.createBid(receiver, tokenId, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+        separate += tx.gas_used
+
+    tokenIds = list(range(BATCH_SIZE + 1, 2 * BATCH_SIZE + 1))
+    tx = srcSpokeBridge.createBids(receiver, tokenIds, erc721.address,
+        {'from': user, 'amount': Wei("0.01 ether") * BATCH_SIZE})
+    gas_profile.record(f"batch{BATCH_SIZE}.src.createBids", tx)
+    batched = tx.gas_used
+
+    print(f"createBid x{BATCH_SIZE}: {separate} gas ({separate // BATCH_SIZE} per bid)")
+    print(f"createBids({BATCH_SIZE}): {batched} gas ({batched // BATCH_SIZE} per bid)")
+
+    assert srcSpokeBridge.id() == 2 * BATCH_SIZE
+    assert batched < separate
+
+def test_dst_create_bids_gas(init_contracts, gas_profile):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    for tokenId in range(1, 2 * BATCH_SIZE + 1):
+        dstSpokeBridge.minting(tokenId - 1, receiver, tokenId, wrappedErc721.address, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    wrappedErc721.setApprovalForAll(dstSpokeBridge.address, True, {'from': receiver})
+
+    separate = 0
+    for tokenId in range(1, BATCH_SIZE + 1):
+        tx = dstSpokeBridge.createBid(user, tokenId, wrappedErc721.address, tokenId - 1,
+            {'from': receiver, 'amount': Wei("0.01 ether")})
+        separate += tx.gas_used
+
+    tokenIds = list(range(BATCH_SIZE + 1, 2 * BATCH_SIZE + 1))
+    tx = dstSpokeBridge.createBids(user, tokenIds, wrappedErc721.address, [i - 1 for i in tokenIds],
+        {'from': receiver, 'amount': Wei("0.01 ether") * BATCH_SIZE})
+    gas_profile.record(f"batch{BATCH_SIZE}.dst.createBids", tx)
+    batched = tx.gas_used
+
+    print(f"createBid x{BATCH_SIZE}: {separate} gas ({separate // BATCH_SIZE} per bid)")
+    print(f"createBids({BATCH_SIZE}): {batched} gas ({batched // BATCH_SIZE} per bid)")
+
+    assert batched < separate
+
+@pytest.mark.parametrize("batch_size", [1, 5, BATCH_SIZE])
+def test_buy_bids_gas(init_contracts, gas_profile, batch_size):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    tokenIds = list(range(1, 2 * batch_size + 1))
+    srcSpokeBridge.createBids(receiver, tokenIds, erc721.address,
+        {'from': user, 'amount': Wei("0.01 ether") * len(tokenIds)})
+
+    separate = 0
+    for bidId in range(batch_size):
+        separate += srcSpokeBridge.buyBid(bidId, {'from': relayer}).gas_used
+
+    tx = srcSpokeBridge.buyBids(list(range(batch_size, 2 * batch_size)), {'from': relayer})
+    gas_profile.record(f"batch{batch_size}.src.buyBids", tx)
+    batched = tx.gas_used
+
+    print(f"buyBid x{batch_size}: {separate} gas ({separate // batch_size} per bid)")
+    print(f"buyBids({batch_size}): {batched} gas ({batched // batch_size} per bid)")
+
+    if batch_size > 1:
+        assert batched < separate
+
+@pytest.mark.parametrize("batch_size", [1, 5, BATCH_SIZE])
+def test_dst_buy_bids_gas(init_contracts, gas_profile, batch_size):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    tokenIds = list(range(1, 2 * batch_size + 1))
+    for tokenId in tokenIds:
+        dstSpokeBridge.minting(tokenId - 1, receiver, tokenId, wrappedErc721.address, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    wrappedErc721.setApprovalForAll(dstSpokeBridge.address, True, {'from': receiver})
+    dstSpokeBridge.createBids(user, tokenIds, wrappedErc721.address, [i - 1 for i in tokenIds],
+        {'from': receiver, 'amount': Wei("0.01 ether") * len(tokenIds)})
+
+    separate = 0
+    for bidId in range(batch_size):
+        separate += dstSpokeBridge.buyBid(bidId, {'from': relayer}).gas_used
+
+    tx = dstSpokeBridge.buyBids(list(range(batch_size, 2 * batch_size)), {'from': relayer})
+    gas_profile.record(f"batch{batch_size}.dst.buyBids", tx)
+    batched = tx.gas_used
+
+    print(f"buyBid x{batch_size}: {separate} gas ({separate // batch_size} per bid)")
+    print(f"buyBids({batch_size}): {batched} gas ({batched // batch_size} per bid)")
+
+    if batch_size > 1:
+        assert batched < separate
+
+@pytest.mark.parametrize("batch_size", [1, 5, BATCH_SIZE])
+def test_minting_batch_gas(init_contracts, gas_profile, batch_size):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    separate = 0
+    for bidId in range(batch_size):
+        separate += dstSpokeBridge.minting(bidId, receiver, bidId + 1, wrappedErc721.address, {'from': relayer}).gas_used
+
+    bidIds = list(range(batch_size, 2 * batch_size))
+    tx = dstSpokeBridge.mintingBatch(bidIds, [receiver] * batch_size, [i + 1 for i in bidIds],
+        wrappedErc721.address, {'from': relayer})
+    gas_profile.record(f"batch{batch_size}.dst.mintingBatch", tx)
+    batched = tx.gas_used
+
+    print(f"minting x{batch_size}: {separate} gas ({separate // batch_size} per bid)")
+    print(f"mintingBatch({batch_size}): {batched} gas ({batched // batch_size} per bid)")
+
+    if batch_size > 1:
+        assert batched < separate
+
+@pytest.mark.parametrize("batch_size", [1, 5, BATCH_SIZE])
+def test_send_proofs_gas(init_contracts, gas_profile, batch_size):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    tokenIds = list(range(1, 2 * batch_size + 1))
+    srcSpokeBridge.createBids(receiver, tokenIds, erc721.address,
+        {'from': user, 'amount': Wei("0.01 ether") * len(tokenIds)})
+    srcSpokeBridge.buyBids(list(range(2 * batch_size)), {'from': relayer})
+
+    # no relaying
+    chain.sleep(14400000) # it's 4 hours
+
+    separate = 0
+    for bidId in range(batch_size):
+        separate += dstSpokeBridge.sendProof(False, bidId, {'from': challenger}).gas_used
+
+    bidIds = list(range(batch_size, 2 * batch_size))
+    tx = dstSpokeBridge.sendProofs([False] * batch_size, bidIds, {'from': challenger})
+    gas_profile.record(f"batch{batch_size}.dst.sendProofs", tx)
+    batched = tx.gas_used
+
+    print(f"sendProof x{batch_size}: {separate} gas ({separate // batch_size} per proof)")
+    print(f"sendProofs({batch_size}): {batched} gas ({batched // batch_size} per proof)")
+
+    if batch_size > 1:
+        assert batched < separate
+
+@pytest.mark.parametrize("batch_size", [1, 5, BATCH_SIZE])
+def test_claim_nfts_gas(init_contracts, gas_profile, batch_size):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    tokenIds = list(range(1, 2 * batch_size + 1))
+    srcSpokeBridge.createBids(receiver, tokenIds, erc721.address,
+        {'from': user, 'amount': Wei("0.01 ether") * len(tokenIds)})
+    srcSpokeBridge.buyBids(list(range(2 * batch_size)), {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    # the tokens are bridged back to the user, the ids of the incoming bids are the same
+    for bidId in range(2 * batch_size):
+        srcSpokeBridge.unlocking(bidId, bidId, user, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    separate = 0
+    for bidId in range(batch_size):
+        separate += srcSpokeBridge.claimNFT(bidId, {'from': user}).gas_used
+
+    tx = srcSpokeBridge.claimNFTs(list(range(batch_size, 2 * batch_size)), {'from': user})
+    gas_profile.record(f"batch{batch_size}.src.claimNFTs", tx)
+    batched = tx.gas_used
+
+    print(f"claimNFT x{batch_size}: {separate} gas ({separate // batch_size} per token)")
+    print(f"claimNFTs({batch_size}): {batched} gas ({batched // batch_size} per token)")
+
+    assert all(erc721.ownerOf(tokenId) == user for tokenId in tokenIds)
+    if batch_size > 1:
+        assert batched < separate
+
+@pytest.mark.parametrize("batch_size", [1, 5, BATCH_SIZE])
+def test_claim_challenge_rewards_gas(init_contracts, gas_profile, batch_size):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    # a quarter of a stake is paid for every proved bid, the deposits of the other relayers cover them
+    for account in [relayer] + accounts[5:10]:
+        srcSpokeBridge.deposite({'from': account, 'amount': Wei("20 ether")})
+
+    tokenIds = list(range(1, 2 * batch_size + 1))
+    srcSpokeBridge.createBids(receiver, tokenIds, erc721.address,
+        {'from': user, 'amount': Wei("0.01 ether") * len(tokenIds)})
+    srcSpokeBridge.buyBids(list(range(2 * batch_size)), {'from': relayer})
+
+    # no relaying
+    chain.sleep(14400000) # it's 4 hours
+    dstSpokeBridge.sendProofs([False] * 2 * batch_size, list(range(2 * batch_size)), {'from': challenger})
+
+    separate = 0
+    for bidId in range(batch_size):
+        separate += srcSpokeBridge.claimChallengeReward(bidId, True, {'from': challenger}).gas_used
+
+    bidIds = list(range(batch_size, 2 * batch_size))
+    tx = srcSpokeBridge.claimChallengeRewards(bidIds, [True] * batch_size, {'from': challenger})
+    gas_profile.record(f"batch{batch_size}.src.claimChallengeRewards", tx)
+    batched = tx.gas_used
+
+    print(f"claimChallengeReward x{batch_size}: {separate} gas ({separate // batch_size} per reward)")
+    print(f"claimChallengeRewards({batch_size}): {batched} gas ({batched // batch_size} per reward)")
+
+    if batch_size > 1:
+        assert batched < separate
+
+def test_full_circle_gas(init_contracts, gas_profile):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    txs = []
+    def record(name, tx):
+        txs.append(tx)
+        gas_profile.record(f"full_circle.{name}", tx)
+
+    record("src.deposite", srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")}))
+    record("dst.deposite", dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")}))
+
+    record("src.createBid",
+        srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")}))
+    record("src.buyBid", srcSpokeBridge.buyBid(0, {'from': relayer}))
+    record("dst.minting", dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer}))
+
+    chain.sleep(14400000) # it's 4 hours
+
+    wrappedErc721.approve(dstSpokeBridge.address, 1, {'from': receiver})
+    record("dst.createBid",
+        dstSpokeBridge.createBid(user, 1, wrappedErc721.address, 0, {'from': receiver, 'amount': Wei("0.01 ether")}))
+    record("dst.buyBid", dstSpokeBridge.buyBid(0, {'from': relayer}))
+
+    chain.sleep(14400000) # it's 4 hours
+
+    record("src.unlocking", srcSpokeBridge.unlocking(0, 0, user, {'from': relayer}))
+
+    chain.sleep(14400000) # it's 4 hours
+
+    record("src.claimNFT", srcSpokeBridge.claimNFT(0, {'from': user}))
+    record("src.undeposite", srcSpokeBridge.undeposite({'from': relayer}))
+
+    chain.sleep(14400000) # it's 4 hours
+
+    record("src.claimDeposite", srcSpokeBridge.claimDeposite({'from': relayer}))
+
+    assert erc721.ownerOf(1) == user
+
+    # the gas used of the receipts is net of the refunds of the cleared slots
+    total = sum(tx.gas_used for tx in txs)
+    print(f"full circle: {total} gas")
+    gas_profile.record_gas("full_circle.total", total)
+
+@pytest.mark.parametrize("is_committing_bids", [False, True])
+def test_committing_bids_gas(init_contracts, gas_profile, is_committing_bids):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    relayer = accounts[4]
+    flow = "commit" if is_committing_bids else "no_commit"
+
+    srcSpokeBridge.setCommittingBids(is_committing_bids, {'from': accounts[0]})
+    dstSpokeBridge.setCommittingBids(is_committing_bids, {'from': accounts[0]})
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    srcSpokeBridge.createBid(accounts[3], 1, erc721.address, {'from': accounts[1], 'amount': Wei("0.01 ether")})
+    gas_profile.record(f"{flow}.src.buyBid", srcSpokeBridge.buyBid(0, {'from': relayer}))
+    gas_profile.record(f"{flow}.dst.minting",
+        dstSpokeBridge.minting(0, accounts[3], 1, wrappedErc721.address, {'from': relayer}))
+
+# The gas of `sendProof` includes the `receiveProof` of the other side, because the hub delivers synchronously.
+
+def test_challenge_on_source_during_locking_gas(init_contracts, gas_profile):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    record = lambda name, tx: gas_profile.record(f"challenge_locking.{name}", tx)
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    srcSpokeBridge.buyBid(0, {'from': relayer})
+
+    # no relaying
+    chain.sleep(14400000) # it's 4 hours
+
+    record("dst.sendProof", dstSpokeBridge.sendProof(False, 0, {'from': challenger}))
+    record("src.claimChallengeReward", srcSpokeBridge.claimChallengeReward(0, True, {'from': challenger}))
+
+    assert erc721.ownerOf(1) == user
+
+def test_challenge_on_dest_during_burning_gas(init_contracts, gas_profile):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    record = lambda name, tx: gas_profile.record(f"challenge_burning.{name}", tx)
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    srcSpokeBridge.buyBid(0, {'from': relayer})
+    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    wrappedErc721.approve(dstSpokeBridge.address, 1, {'from': receiver})
+    dstSpokeBridge.createBid(user, 1, wrappedErc721.address, 0, {'from': receiver, 'amount': Wei("0.01 ether")})
+    dstSpokeBridge.buyBid(0, {'from': relayer})
+
+    # no relaying
+    chain.sleep(14400000) # it's 4 hours
+
+    record("src.sendProof", srcSpokeBridge.sendProof(False, 0, {'from': challenger}))
+    record("dst.claimChallengeReward", dstSpokeBridge.claimChallengeReward(0, True, {'from': challenger}))
+
+    assert wrappedErc721.ownerOf(1) == receiver
+
+def test_challenge_on_source_during_unlocking_gas(init_contracts, gas_profile):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    record = lambda name, tx: gas_profile.record(f"challenge_unlocking.{name}", tx)
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    srcSpokeBridge.buyBid(0, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    # wrong relaying
+    srcSpokeBridge.unlocking(0, 0, relayer, {'from': relayer})
+
+    record("src.challengeUnlocking",
+        srcSpokeBridge.challengeUnlocking(0, {'from': challenger, 'amount': Wei("10 ether")}))
+    record("dst.sendProof", dstSpokeBridge.sendProof(True, 0, {'from': challenger}))
+    record("src.claimChallengeReward", srcSpokeBridge.claimChallengeReward(0, False, {'from': challenger}))
+
+def test_challenge_on_dest_during_minting_gas(init_contracts, gas_profile):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    challenger = accounts[2]
+    relayer = accounts[4]
+
+    record = lambda name, tx: gas_profile.record(f"challenge_minting.{name}", tx)
+
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    # wrong relaying
+    dstSpokeBridge.minting(0, relayer, 1, wrappedErc721.address, {'from': relayer})
+
+    record("dst.challengeMinting",
+        dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")}))
+    record("src.sendProof", srcSpokeBridge.sendProof(True, 0, {'from': challenger}))
+    record("dst.claimChallengeReward", dstSpokeBridge.claimChallengeReward(0, False, {'from': challenger}))
+
+def test_rejected_challenge_on_dest_during_minting_gas(init_contracts, gas_profile):
+    srcSpokeBridge, dstSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    record = lambda name, tx: gas_profile.record(f"rejected_challenge_minting.{name}", tx)
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    dstSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    srcSpokeBridge.buyBid(0, {'from': relayer})
+    dstSpokeBridge.minting(0, receiver, 1, wrappedErc721.address, {'from': relayer})
+
+    record("dst.challengeMinting",
+        dstSpokeBridge.challengeMinting(0, {'from': challenger, 'amount': Wei("10 ether")}))
+    record("src.sendProof", srcSpokeBridge.sendProof(True, 0, {'from': challenger}))
+
+def test_proof_decode_gas(gas_profile):
+    codec = accounts[0].deploy(ProofCodecMock)
+
+    zero = "0x0000000000000000000000000000000000000000"
+    proofs = {
+        "outgoing": (True, 2, 0, accounts[3].address, 1, accounts[5].address, accounts[4].address, zero),
+        "incoming": (False, 1, 0, accounts[3].address, 1, accounts[5].address, accounts[4].address, accounts[2].address),
+    }
+
+    for kind, proof in proofs.items():
+        compact = codec.encode(proof)
+        legacy = codec.encodeAbi(proof)
+        print(f"{kind} proof: {len(compact)} bytes, it was {len(legacy)} bytes with abi.encode")
+
+        # the estimation includes the intrinsic gas and the calldata of the call
+        gas_profile.record_gas(f"proof.{kind}.decode", codec.decode.estimate_gas(compact))
+        gas_profile.record_gas(f"proof.{kind}.decodeAbi", codec.decodeAbi.estimate_gas(legacy))
+
+def test_wrapped_erc721_deployment_gas(gas_profile):
+    factory = accounts[0].deploy(WrappedERC721Factory)
+
+    full = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP").tx
+    clone = factory.deploy(accounts[5], "Wrapped", "WRP", accounts[0], {'from': accounts[0]})
+
+    print(f"WrappedERC721: {full.gas_used} gas deployed, {clone.gas_used} gas cloned")
+    gas_profile.record("collection.full.deploy", full)
+    gas_profile.record("collection.clone.deploy", clone)
+
+    assert clone.gas_used < full.gas_used
+
+@pytest.mark.parametrize("batch_size", [1, 5, BATCH_SIZE])
+def test_wrapped_erc721_batch_gas(gas_profile, batch_size):
+    wrapped = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")
+    owner = accounts[0]
+    receiver = accounts[3]
+
+    tokenIds = list(range(1, batch_size + 1))
+    separate = sum(wrapped.mint(receiver, tokenId, {'from': owner}).gas_used for tokenId in tokenIds)
+    gas_profile.record_gas(f"batch{batch_size}.wrapped.mint", separate)
+
+    batchIds = [tokenId + batch_size for tokenId in tokenIds]
+    tx = wrapped.mintBatch(receiver, batchIds, {'from': owner})
+    gas_profile.record(f"batch{batch_size}.wrapped.mintBatch", tx)
+
+    print(f"mint x{batch_size}: {separate} gas ({separate // batch_size} per token)")
+    print(f"mintBatch({batch_size}): {tx.gas_used} gas ({tx.gas_used // batch_size} per token)")
+
+    separate = sum(wrapped.burn(tokenId, {'from': owner}).gas_used for tokenId in tokenIds)
+    gas_profile.record_gas(f"batch{batch_size}.wrapped.burn", separate)
+
+    tx = wrapped.burnBatch(batchIds, {'from': owner})
+    gas_profile.record(f"batch{batch_size}.wrapped.burnBatch", tx)
+
+    print(f"burn x{batch_size}: {separate} gas ({separate // batch_size} per token)")
+    print(f"burnBatch({batch_size}): {tx.gas_used} gas ({tx.gas_used // batch_size} per token)")
@@ -0,0 +1,105 @@
+import pytest
+
+from brownie import accounts, web3, Wei
+
+from nft_bridge.enums import ChallengeStatus, IncomingBidStatus, OutgoingBidStatus, RelayerStatus
+from nft_bridge.indexer import BridgeIndexer
+from nft_bridge.watchtower import DST, SRC
+
+@pytest.fixture(scope="module")
+def spokes(bridge):
+    """
+    The spoke bridges as web3 contracts, the way the indexer uses them.
+    """
+    return tuple(web3.eth.contract(address=spoke.address, abi=spoke.abi)
+        for spoke in (bridge.srcSpokeBridge, bridge.dstSpokeBridge))
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "bridge.db")
+
+def test_indexing_bridging(bridge, spokes, db_path, relayed_bid):
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    # the second token is minted to the relayer, it is challenged and proved
+    bridge.erc721.mint(user, 2, {'from': accounts[0]})
+    bridge.erc721.approve(bridge.srcSpokeBridge.address, 2, {'from': user})
+    bridge.srcSpokeBridge.createBid(receiver, 2, bridge.erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    bridge.srcSpokeBridge.buyBid(1, {'from': relayer})
+    bridge.dstSpokeBridge.minting(1, relayer, 2, bridge.wrappedErc721.address, {'from': relayer})
+
+    bridge.dstSpokeBridge.challengeMinting(1, {'from': challenger, 'amount': Wei("10 ether")})
+    bridge.srcSpokeBridge.sendProof(True, 1, {'from': challenger})
+    bridge.dstSpokeBridge.claimChallengeReward(1, False, {'from': challenger})
+
+    indexer = BridgeIndexer(db_path, *spokes, block_range=3)
+    assert indexer.sync() == 2 * (web3.eth.block_number + 1)
+
+    assert [bid["bid_id"] for bid in indexer.bids_of_maker(user.address, OutgoingBidStatus.BOUGHT)] == [0, 1]
+    assert [bid["bid_id"] for bid in indexer.bids_of_relayer(relayer.address)] == [0, 1]
+    assert indexer.open_bids(SRC) == []
+
+    incomingBids = indexer.db.execute("SELECT * FROM incoming_bids WHERE side = ? ORDER BY bid_id", (DST,)).fetchall()
+    assert [bid["status"] for bid in incomingBids] == [IncomingBidStatus.RELAYED, IncomingBidStatus.MALICIOUS]
+    assert incomingBids[0]["receiver"] == receiver.address
+    assert incomingBids[0]["token_id"] == "1"
+
+    assert indexer.relayer(SRC, relayer.address)["status"] == RelayerStatus.ACTIVE
+    assert indexer.relayer(DST, relayer.address)["status"] == RelayerStatus.MALICIOUS
+    assert indexer.relayer(DST, relayer.address)["staked_amount"] == str(Wei("20 ether"))
+
+    challenge = indexer.db.execute("SELECT * FROM challenges WHERE side = ? AND bid_id = 1", (DST,)).fetchone()
+    assert challenge["challenger"] == challenger.address
+    assert challenge["status"] == ChallengeStatus.PROVED
+
+    reward = indexer.db.execute("SELECT * FROM rewards WHERE side = ? AND bid_id = 1", (DST,)).fetchone()
+    assert reward["claimed"]
+    assert reward["amount"] == str(Wei("15 ether"))
+    assert indexer.unclaimed_rewards(challenger.address) == []
+
+    assert indexer.unrelayed_bids(SRC, 2 ** 40) == []
+    assert indexer.mismatched_relayings(DST) == []
+
+    indexer.close()
+
+def test_resuming_from_checkpoint(bridge, spokes, db_path, bought_bid):
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    indexer = BridgeIndexer(db_path, *spokes)
+    indexer.sync()
+    checkpoint = indexer.checkpoint(SRC)
+
+    assert checkpoint == web3.eth.block_number
+    assert [bid["bid_id"] for bid in indexer.unrelayed_bids(SRC, 2 ** 40)] == [bought_bid]
+    indexer.close()
+
+    bridge.dstSpokeBridge.minting(bought_bid, accounts[2], 1, bridge.wrappedErc721.address, {'from': relayer})
+    bridge.erc721.mint(user, 2, {'from': accounts[0]})
+    bridge.erc721.approve(bridge.srcSpokeBridge.address, 2, {'from': user})
+    bridge.srcSpokeBridge.createBid(receiver, 2, bridge.erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+
+    # only the new blocks are indexed after the restart
+    indexer = BridgeIndexer(db_path, *spokes)
+    assert indexer.checkpoint(SRC) == checkpoint
+    assert indexer.sync() == 2 * (web3.eth.block_number - checkpoint)
+
+    assert indexer.unrelayed_bids(SRC, 2 ** 40) == []
+    assert [bid["bid_id"] for bid in indexer.open_bids(SRC)] == [1]
+
+    # the token is minted to a wrong receiver
+    assert [bid["bid_id"] for bid in indexer.mismatched_relayings(DST)] == [bought_bid]
+
+    indexer.close()
+
+def test_checking_spokes(bridge, spokes, db_path):
+    indexer = BridgeIndexer(db_path, *spokes)
+    indexer.sync()
+    indexer.close()
+
+    with pytest.raises(ValueError):
+        BridgeIndexer(db_path, *reversed(spokes))
@@ -0,0 +1,282 @@
+import pytest
+
+from nft_bridge import BridgeModel, Revert
+from nft_bridge import ChallengeStatus, IncomingBidStatus, OutgoingBidStatus, ProofResult, RelayerStatus
+from nft_bridge.simulation import simulate
+
+CHALLENGE_PERIOD = 4 * 60 * 60
+STAKE_AMOUNT = 20 * 10 ** 18
+CHALLENGE_AMOUNT = 10 * 10 ** 18
+TIME_LIMIT_OF_UNDEPOSIT = 2 * 24 * 60 * 60
+
+FEE = 10 ** 16
+
+USER = "user"
+CHALLENGER = "challenger"
+RECEIVER = "receiver"
+RELAYER = "relayer"
+
+@pytest.fixture
+def model():
+    """
+    The same setup as the `bridge` fixture: the user owns the token 1, which is approved for the source
+    spoke, and the relayer has deposited on both sides.
+    """
+    model = BridgeModel(CHALLENGE_PERIOD, STAKE_AMOUNT, CHALLENGE_AMOUNT, TIME_LIMIT_OF_UNDEPOSIT,
+        contract_map={"erc721": "wrappedErc721"})
+
+    erc721 = model.chain.add_erc721("erc721", "owner")
+    erc721.mint("owner", USER, 1)
+    erc721.approve(USER, model.src.address, 1)
+    model.chain.add_erc721("wrappedErc721", model.dst.address)
+
+    model.src.deposite(RELAYER, STAKE_AMOUNT)
+    model.dst.deposite(RELAYER, STAKE_AMOUNT)
+
+    return model
+
+def test_full_circle(model):
+    src, dst, chain = model.src, model.dst, model.chain
+    erc721, wrappedErc721 = chain.erc721s["erc721"], chain.erc721s["wrappedErc721"]
+
+    src.set_committing_bids("owner", True)
+    dst.set_committing_bids("owner", True)
+
+    src.create_bid(USER, RECEIVER, 1, "erc721", FEE)
+    assert src.get_open_bids() == [0]
+    assert erc721.owner_of(1) == src.address
+    assert src.collection_ids["erc721"] == 1
+
+    assert src.buy_bid(RELAYER, 0) == FEE
+    assert src.get_open_bids() == []
+    assert src.outgoing_bid(0)[7] == OutgoingBidStatus.BOUGHT
+    assert src.get_leaf_count() == 1
+
+    dst.minting(RELAYER, 0, RECEIVER, 1, "wrappedErc721")
+    assert wrappedErc721.owner_of(1) == RECEIVER
+
+    chain.sleep(CHALLENGE_PERIOD + 1)
+
+    # bridging back
+    wrappedErc721.approve(RECEIVER, dst.address, 1)
+    dst.create_bid(RECEIVER, USER, 1, "wrappedErc721", 0, FEE)
+    dst.buy_bid(RELAYER, 0)
+    with pytest.raises(Revert, match="ERC721: invalid token ID"):
+        wrappedErc721.owner_of(1)
+
+    chain.sleep(CHALLENGE_PERIOD + 1)
+    src.unlocking(RELAYER, 0, 0, USER)
+    assert src.outgoing_bid(0)[7] == OutgoingBidStatus.UNLOCKED
+
+    # the record of the honest burning proves nothing
+    assert src.prove_bids(CHALLENGER, dst.commit_root(), [1]) == [ProofResult.FALSE_CHALLENGE]
+    assert src.incoming_bid(0)[5] == IncomingBidStatus.RELAYED
+
+    chain.sleep(CHALLENGE_PERIOD + 1)
+    src.claim_nft(USER, 0)
+    assert erc721.owner_of(1) == USER
+    assert src.incoming_bid(0)[5] == IncomingBidStatus.UNLOCKED
+    assert src.outgoing_bid(0)[:2] == ("0x0000000000000000000000000000000000000000", 0)
+
+    # the relayer got both fees
+    assert chain.eth[RELAYER] == 2 * FEE - 2 * STAKE_AMOUNT
+
+    with pytest.raises(Revert, match="SrcSpokeBride: incoming bid has no Relayed state!"):
+        src.claim_nft(USER, 0)
+
+def test_proving_malicious_minting(model):
+    src, dst, chain = model.src, model.dst, model.chain
+
+    src.create_bid(USER, RECEIVER, 1, "erc721", FEE)
+    src.buy_bid(RELAYER, 0)
+
+    # wrong relaying
+    dst.minting(RELAYER, 0, RELAYER, 1, "wrappedErc721")
+    dst.challenge_minting(CHALLENGER, 0, CHALLENGE_AMOUNT)
+    assert dst.relayer(RELAYER)[0] == RelayerStatus.CHALLENGED
+
+    src.send_proof(CHALLENGER, True, 0)
+    assert dst.relayer(RELAYER)[0] == RelayerStatus.MALICIOUS
+    assert dst.incoming_bid(0)[5] == IncomingBidStatus.MALICIOUS
+    assert dst.challenge(0) == (CHALLENGER, ChallengeStatus.PROVED)
+    assert 1 not in chain.erc721s["wrappedErc721"].owners
+
+    assert dst.claim_challenge_reward(CHALLENGER, 0, False) == CHALLENGE_AMOUNT + STAKE_AMOUNT // 4
+    assert dst.challenge(0) == ("0x0000000000000000000000000000000000000000", 0)
+
+    with pytest.raises(Revert, match="SpokeBridge: challenger is not the sender!"):
+        dst.claim_challenge_reward(CHALLENGER, 0, False)
+
+def test_rejecting_challenge(model):
+    src, dst = model.src, model.dst
+
+    src.set_committing_bids("owner", True)
+    src.create_bid(USER, RECEIVER, 1, "erc721", FEE)
+    src.buy_bid(RELAYER, 0)
+    dst.minting(RELAYER, 0, RECEIVER, 1, "wrappedErc721")
+    dst.challenge_minting(CHALLENGER, 0, CHALLENGE_AMOUNT)
+
+    src.send_proof(RELAYER, True, 0)
+    assert dst.relayer(RELAYER)[0] == RelayerStatus.ACTIVE
+    assert dst.incoming_bid(0)[5] == IncomingBidStatus.RELAYED
+    assert dst.challenge(0) == (CHALLENGER, ChallengeStatus.NONE)
+
+    # the records cannot reject a challenge
+    src.commit_root()
+    assert dst.prove_bids(CHALLENGER, 1, [0]) == [ProofResult.FALSE_CHALLENGE]
+
+    with pytest.raises(Revert, match="SpokeBridge: root is not committed by the other side!"):
+        dst.prove_bids(CHALLENGER, 2, [0])
+    with pytest.raises(Revert, match="SpokeBridge: invalid inclusion proof!"):
+        dst.prove_bids(CHALLENGER, 1, [1])
+
+def test_proving_missing_relaying(model):
+    src, dst, chain = model.src, model.dst, model.chain
+
+    src.create_bid(USER, RECEIVER, 1, "erc721", FEE)
+    src.buy_bid(RELAYER, 0)
+
+    with pytest.raises(Revert, match="DstSpokeBridge: too early to send proof!"):
+        dst.send_proof(CHALLENGER, False, 0)
+
+    chain.sleep(CHALLENGE_PERIOD + 1)
+    dst.send_proof(CHALLENGER, False, 0)
+
+    assert src.relayer(RELAYER)[0] == RelayerStatus.MALICIOUS
+    assert src.outgoing_bid(0)[7] == OutgoingBidStatus.MALICIOUS
+    assert chain.erc721s["erc721"].owner_of(1) == USER
+    assert src.outgoing_challenge_reward(0) == (CHALLENGER, STAKE_AMOUNT // 4)
+
+    # the replayed proof does not revert the batch
+    assert dst.send_proofs(CHALLENGER, [False, False], [0, 0]) == [ProofResult.NO_LOCAL_BID] * 2
+    assert src.relayer(RELAYER)[0] == RelayerStatus.MALICIOUS
+
+def test_proving_unlocking_of_given_back_token(model):
+    src, dst, chain = model.src, model.dst, model.chain
+
+    src.create_bid(USER, RECEIVER, 1, "erc721", FEE)
+    src.buy_bid(RELAYER, 0)
+    chain.sleep(CHALLENGE_PERIOD + 1)
+
+    # no relaying, wrong unlocking
+    src.unlocking(RELAYER, 0, 0, RELAYER)
+
+    # the locking is proved first, the token is given back
+    assert dst.send_proofs(CHALLENGER, [False, True], [0, 0]) == [ProofResult.PROVED] * 2
+    assert chain.erc721s["erc721"].owner_of(1) == USER
+    assert src.incoming_bid(0)[5] == IncomingBidStatus.MALICIOUS
+
+    # the outgoing bid is not restored, so it cannot be unlocked again
+    assert src.outgoing_bid(0)[7] == OutgoingBidStatus.MALICIOUS
+
+def test_reverting_proof_in_batch(model):
+    src, dst, chain = model.src, model.dst, model.chain
+    wrappedErc721 = chain.erc721s["wrappedErc721"]
+
+    src.create_bid(USER, RECEIVER, 1, "erc721", FEE)
+    src.buy_bid(RELAYER, 0)
+    dst.minting(RELAYER, 0, RECEIVER, 1, "wrappedErc721")
+    chain.sleep(CHALLENGE_PERIOD + 1)
+
+    # the token is bridged back, but it is not unlocked, and the relayer mints it again by a wrong relaying
+    wrappedErc721.approve(RECEIVER, dst.address, 1)
+    dst.create_bid(RECEIVER, USER, 1, "wrappedErc721", 0, FEE)
+    dst.buy_bid(RELAYER, 0)
+    chain.sleep(CHALLENGE_PERIOD + 1)
+    dst.minting(RELAYER, 1, RECEIVER, 1, "wrappedErc721")
+
+    # the burned token cannot be minted back while the wrong one exists, only that proof is rolled back
+    assert src.send_proofs(CHALLENGER, [False, True], [0, 1]) == [ProofResult.REVERTED, ProofResult.PROVED]
+    assert dst.outgoing_bid(0)[7] == OutgoingBidStatus.BOUGHT
+    assert dst.incoming_bid(1)[5] == IncomingBidStatus.MALICIOUS
+
+    assert src.send_proofs(CHALLENGER, [False], [0]) == [ProofResult.PROVED]
+    assert wrappedErc721.owner_of(1) == RECEIVER
+
+def test_reverted_batch_does_not_change_state(model):
+    src, chain = model.src, model.chain
+    erc721 = chain.erc721s["erc721"]
+
+    erc721.mint("owner", USER, 2)
+    erc721.set_approval_for_all(USER, src.address, True)
+
+    with pytest.raises(Revert, match="ERC721: transfer from incorrect owner"):
+        src.create_bids(USER, RECEIVER, [1, 2, 1], "erc721", 3 * FEE)
+
+    assert src.id == 0
+    assert erc721.owner_of(1) == USER
+    assert src.balance == STAKE_AMOUNT
+
+    src.create_bids(USER, RECEIVER, [1, 2], "erc721", 2 * FEE + 1)
+    assert [src.outgoing_bid(i)[1] for i in range(2)] == [FEE, FEE + 1]
+
+    with pytest.raises(Revert, match="SpokeBridge: bid does not have Created state"):
+        src.buy_bids(RELAYER, [0, 1, 0])
+    assert src.get_open_bids() == [0, 1]
+    assert src.get_leaf_count() == 0
+
+def test_batch_claims(model):
+    src, dst, chain = model.src, model.dst, model.chain
+    erc721 = chain.erc721s["erc721"]
+
+    erc721.mint("owner", USER, 2)
+    erc721.set_approval_for_all(USER, src.address, True)
+    chain.erc721s["wrappedErc721"].set_approval_for_all(RECEIVER, dst.address, True)
+
+    src.create_bids(USER, RECEIVER, [1, 2], "erc721", 2 * FEE)
+    src.buy_bids(RELAYER, [0, 1])
+    dst.minting_batch(RELAYER, [0, 1], [RECEIVER, RECEIVER], [1, 2], "wrappedErc721")
+
+    chain.sleep(CHALLENGE_PERIOD + 1)
+    dst.create_bids(RECEIVER, USER, [1, 2], "wrappedErc721", [0, 1], 2 * FEE)
+    dst.buy_bids(RELAYER, [0, 1])
+
+    chain.sleep(CHALLENGE_PERIOD + 1)
+    src.unlocking(RELAYER, 0, 0, USER)
+    src.unlocking(RELAYER, 1, 1, USER)
+
+    chain.sleep(CHALLENGE_PERIOD + 1)
+    with pytest.raises(Revert, match="SrcSpokeBride: incoming bid has no Relayed state!"):
+        src.claim_nfts(USER, [0, 1, 0])
+    assert erc721.owner_of(1) == src.address
+
+    src.claim_nfts(USER, [0, 1])
+    assert erc721.owner_of(1) == erc721.owner_of(2) == USER
+
+    # nobody relays the bids of the second round
+    src.create_bids(USER, RECEIVER, [1, 2], "erc721", 2 * FEE)
+    src.buy_bids(RELAYER, [2, 3])
+    chain.sleep(CHALLENGE_PERIOD + 1)
+    dst.send_proofs(CHALLENGER, [False, False], [2, 3])
+
+    with pytest.raises(Revert, match="SpokeBridge: challenger is not the sender!"):
+        src.claim_challenge_rewards(CHALLENGER, [2, 3, 2], [True, True, True])
+    with pytest.raises(Revert, match="SpokeBridge: array lengths are not equal!"):
+        src.claim_challenge_rewards(CHALLENGER, [2, 3], [True])
+
+    assert src.claim_challenge_rewards(CHALLENGER, [2, 3], [True, True]) == 2 * (STAKE_AMOUNT // 4)
+    assert src.outgoing_challenge_reward(2) == ("0x0000000000000000000000000000000000000000", 0)
+
+def test_relayers(model):
+    src, chain = model.src, model.chain
+
+    with pytest.raises(Revert, match="SpokeBridge: caller cannot be a relayer!"):
+        src.deposite(RELAYER, STAKE_AMOUNT)
+    with pytest.raises(Revert, match="SpokeBridge: msg.value is not appropriate!"):
+        src.deposite(USER, STAKE_AMOUNT - 1)
+
+    src.undeposite(RELAYER)
+    with pytest.raises(Revert, match="SpokeBridge: the undepositing period is not expired yet!"):
+        src.claim_deposite(RELAYER)
+
+    chain.sleep(TIME_LIMIT_OF_UNDEPOSIT + 1)
+    src.claim_deposite(RELAYER)
+    assert src.relayer(RELAYER) == (0, 0, 0)
+    assert src.balance == 0
+
+def test_simulation():
+    stats = simulate(1000, 2, malicious_rate=0.5, batch_size=10, seed=1)
+
+    assert stats["bids"] <= 1000
+    assert stats["slashed"] == stats["malicious"] <= 2
+    assert stats["rewards"] == stats["slashed"] * (CHALLENGE_AMOUNT + STAKE_AMOUNT // 4)
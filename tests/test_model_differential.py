@@ -0,0 +1,195 @@
+import os
+import random
+
+import pytest
+
+from brownie import accounts, chain, Wei
+from brownie.exceptions import VirtualMachineError
+
+from nft_bridge import BridgeModel, Revert
+from nft_bridge.model import ZERO_ADDRESS
+
+# the number of random operations of a run and the seeds of the runs
+STEPS = int(os.environ.get("MODEL_DIFF_STEPS", "60"))
+SEEDS = [int(seed) for seed in os.environ.get("MODEL_DIFF_SEEDS", "1,2,3").split(",")]
+
+# none of their sums is a multiple of the challenge period (4 hours) or the undepositing period (2 days),
+# so the few seconds between the blocks cannot put a call on the other side of a time window
+SLEEPS = (75 * 60, 5 * 60 * 60)
+
+TOKEN_IDS = range(1, 6)
+
+@pytest.fixture(scope="module")
+def init_contracts(bridge):
+    """
+    The users (accounts[1] and accounts[3]) own the tokens and approved both spokes for all of them.
+    """
+    srcSpokeBridge, dstSpokeBridge, erc721, wrappedErc721 = \
+        bridge.srcSpokeBridge, bridge.dstSpokeBridge, bridge.erc721, bridge.wrappedErc721
+
+    for tokenId in TOKEN_IDS[1:]:
+        erc721.mint(accounts[1 + 2 * (tokenId % 2)], tokenId, {'from': accounts[0]})
+    for user in (accounts[1], accounts[3]):
+        erc721.setApprovalForAll(srcSpokeBridge.address, True, {'from': user})
+        wrappedErc721.setApprovalForAll(dstSpokeBridge.address, True, {'from': user})
+
+    return bridge
+
+def build_model(bridge):
+    """
+    Returns the model in the state of `init_contracts`.
+    """
+    srcSpokeBridge, dstSpokeBridge, erc721, wrappedErc721 = \
+        bridge.srcSpokeBridge, bridge.dstSpokeBridge, bridge.erc721, bridge.wrappedErc721
+
+    params = (srcSpokeBridge.CHALLENGE_PERIOD(), srcSpokeBridge.STAKE_AMOUNT(), srcSpokeBridge.CHALLENGE_AMOUNT(),
+        srcSpokeBridge.TIME_LIMIT_OF_UNDEPOSIT())
+    model = BridgeModel(*params, contract_map={erc721.address: wrappedErc721.address},
+        src_address=srcSpokeBridge.address, dst_address=dstSpokeBridge.address, now=chain.time())
+
+    modelErc721 = model.chain.add_erc721(erc721.address, accounts[0].address)
+    for tokenId in TOKEN_IDS:
+        modelErc721.owners[tokenId] = erc721.ownerOf(tokenId)
+    modelErc721.token_approvals[1] = srcSpokeBridge.address
+
+    modelWrappedErc721 = model.chain.add_erc721(wrappedErc721.address, dstSpokeBridge.address)
+    for user in (accounts[1], accounts[3]):
+        modelErc721.operators.add((user.address, srcSpokeBridge.address))
+        modelWrappedErc721.operators.add((user.address, dstSpokeBridge.address))
+
+    return model
+
+def random_operation(rng, bridge, model):
+    """
+    Returns a random call as (contract, function, args, sender, value, model function, model args).
+    The arguments are mostly valid, so the bids go through the whole state machine, but they are not checked,
+    so the reverts are compared as well.
+    """
+    src, dst = model.src, model.dst
+    srcSpokeBridge, dstSpokeBridge = bridge.srcSpokeBridge, bridge.dstSpokeBridge
+
+    user = rng.choice([accounts[1], accounts[3]]).address
+    relayer = rng.choice([accounts[4], accounts[5]]).address
+    anyone = rng.choice([accounts[1], accounts[2], accounts[3], accounts[4], accounts[5]]).address
+    tokenId = rng.choice(TOKEN_IDS)
+    tokenIds = [tokenId, rng.choice(TOKEN_IDS)]
+    srcBidId = rng.randrange(src.id + 1)
+    dstBidId = rng.randrange(dst.id + 1)
+    fee = rng.choice([0, Wei("0.01 ether")])
+    stake = rng.choice([src.stake_amount, src.stake_amount, 1])
+    challengeAmount = rng.choice([src.challenge_amount, src.challenge_amount, 1])
+    erc721 = rng.choice([bridge.erc721.address] * 4 + [bridge.wrappedErc721.address])
+    wrappedErc721 = rng.choice([bridge.wrappedErc721.address] * 4 + [bridge.erc721.address])
+    isOutgoingBid = rng.random() < 0.5
+    side = rng.choice([(srcSpokeBridge, src), (dstSpokeBridge, dst)])
+
+    operations = [
+        lambda: (side[0], "deposite", [], relayer, stake, side[1].deposite, [stake]),
+        lambda: (side[0], "undeposite", [], relayer, 0, side[1].undeposite, []),
+        lambda: (side[0], "claimDeposite", [], relayer, 0, side[1].claim_deposite, []),
+        lambda: (srcSpokeBridge, "createBid", [anyone, tokenId, erc721], user, fee,
+            src.create_bid, [anyone, tokenId, erc721, fee]),
+        lambda: (srcSpokeBridge, "createBids", [anyone, tokenIds, erc721], user, 2 * fee,
+            src.create_bids, [anyone, tokenIds, erc721, 2 * fee]),
+        lambda: (srcSpokeBridge, "buyBid", [srcBidId], relayer, 0, src.buy_bid, [srcBidId]),
+        lambda: (srcSpokeBridge, "buyBids", [[srcBidId, rng.randrange(src.id + 1)]], relayer, 0, src.buy_bids, None),
+        lambda: (dstSpokeBridge, "minting", [srcBidId, anyone, tokenId, wrappedErc721], relayer, 0,
+            dst.minting, [srcBidId, anyone, tokenId, wrappedErc721]),
+        lambda: (dstSpokeBridge, "mintingBatch",
+            [[srcBidId, srcBidId + 1], [anyone, user], tokenIds, wrappedErc721],
+            relayer, 0, dst.minting_batch, None),
+        lambda: (dstSpokeBridge, "createBid", [anyone, tokenId, wrappedErc721, srcBidId], user, fee,
+            dst.create_bid, [anyone, tokenId, wrappedErc721, srcBidId, fee]),
+        lambda: (dstSpokeBridge, "buyBid", [dstBidId], relayer, 0, dst.buy_bid, [dstBidId]),
+        lambda: (dstSpokeBridge, "buyBids", [[dstBidId, rng.randrange(dst.id + 1)]], relayer, 0, dst.buy_bids, None),
+        lambda: (srcSpokeBridge, "unlocking", [rng.randrange(src.id + 1), dstBidId, anyone], relayer, 0,
+            src.unlocking, None),
+        lambda: (srcSpokeBridge, "claimNFT", [dstBidId], user, 0, src.claim_nft, [dstBidId]),
+        lambda: (srcSpokeBridge, "claimNFTs", [[dstBidId, rng.randrange(dst.id + 1)]], user, 0, src.claim_nfts, None),
+        lambda: (dstSpokeBridge, "challengeMinting", [srcBidId], anyone, challengeAmount,
+            dst.challenge_minting, [srcBidId, challengeAmount]),
+        lambda: (srcSpokeBridge, "challengeUnlocking", [dstBidId], anyone, challengeAmount,
+            src.challenge_unlocking, [dstBidId, challengeAmount]),
+        lambda: (srcSpokeBridge, "sendProof", [isOutgoingBid, srcBidId if isOutgoingBid else dstBidId], anyone, 0,
+            src.send_proof, None),
+        lambda: (dstSpokeBridge, "sendProof", [isOutgoingBid, dstBidId if isOutgoingBid else srcBidId], anyone, 0,
+            dst.send_proof, None),
+        lambda: (side[0], "claimChallengeReward", [rng.randrange(max(src.id, dst.id) + 1), isOutgoingBid],
+            anyone, 0, side[1].claim_challenge_reward, None),
+        lambda: (side[0], "claimChallengeRewards",
+            [[rng.randrange(max(src.id, dst.id) + 1), srcBidId], [isOutgoingBid, rng.choice((False, True))]],
+            anyone, 0, side[1].claim_challenge_rewards, None),
+        lambda: None,
+    ]
+
+    operation = rng.choice(operations)()
+    if operation is None:
+        return None
+
+    contract, function, args, sender, value, modelFunction, modelArgs = operation
+    if modelArgs is None:
+        # the arguments of the model are the same as the ones of the contract
+        modelArgs = list(args)
+
+    return contract, function, args, sender, value, modelFunction, modelArgs
+
+def assert_same_state(bridge, model):
+    for contract, spoke in ((bridge.srcSpokeBridge, model.src), (bridge.dstSpokeBridge, model.dst)):
+        assert contract.id() == spoke.id
+        assert contract.balance() == spoke.balance
+        assert contract.getLeafCount() == spoke.get_leaf_count()
+        assert list(contract.getOpenBids(0, 100)[0]) == spoke.get_open_bids()
+
+        # the status of the zero address is set when a bid is proved malicious before it is bought
+        for address in [account.address for account in accounts[:6]] + [ZERO_ADDRESS]:
+            assert tuple(contract.relayers(address)) == spoke.relayer(address)
+
+        for bidId in range(max(model.src.id, model.dst.id) + 2):
+            assert tuple(contract.outgoingBids(bidId)) == spoke.outgoing_bid(bidId)
+            assert tuple(contract.incomingBids(bidId)) == spoke.incoming_bid(bidId)
+            assert tuple(contract.challengedIncomingBids(bidId)) == spoke.challenge(bidId)
+            assert tuple(contract.incomingChallengeRewards(bidId)) == spoke.incoming_challenge_reward(bidId)
+            assert tuple(contract.outgoingChallengeRewards(bidId)) == spoke.outgoing_challenge_reward(bidId)
+
+    for erc721 in (bridge.erc721, bridge.wrappedErc721):
+        owners = model.chain.erc721s[erc721.address].owners
+        for tokenId in TOKEN_IDS:
+            try:
+                owner = erc721.ownerOf(tokenId)
+            except VirtualMachineError:
+                owner = None
+            assert owner == owners.get(tokenId)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_model_matches_contracts(init_contracts, seed):
+    bridge = init_contracts
+    model = build_model(bridge)
+    rng = random.Random(seed)
+
+    bridge.srcSpokeBridge.deposite({'from': accounts[4], 'amount': model.src.stake_amount})
+    bridge.dstSpokeBridge.deposite({'from': accounts[4], 'amount': model.dst.stake_amount})
+    model.src.deposite(accounts[4].address, model.src.stake_amount)
+    model.dst.deposite(accounts[4].address, model.dst.stake_amount)
+
+    for step in range(STEPS):
+        operation = random_operation(rng, bridge, model)
+        if operation is None:
+            chain.sleep(rng.choice(SLEEPS))
+            continue
+
+        contract, function, args, sender, value, modelFunction, modelArgs = operation
+
+        try:
+            tx = getattr(contract, function)(*args, {'from': sender, 'amount': value})
+            expected, model.chain.now = None, tx.timestamp
+        except VirtualMachineError as e:
+            expected, model.chain.now = e.revert_msg or "", chain.time()
+
+        try:
+            modelFunction(sender, *modelArgs)
+            actual = None
+        except Revert as e:
+            actual = e.message
+
+        assert actual == expected, f"step {step}: {function}{tuple(args)} from {sender}"
+        assert_same_state(bridge, model)
@@ -0,0 +1,87 @@
+import pytest
+
+from brownie import accounts, reverts, ProofCodecMock
+
+from nft_bridge import Proof
+from nft_bridge.proof_codec import ProofCodecError, decode_proof, decode_proofs, encode_proof, encode_proofs
+
+OUTGOING_PROOF_LENGTH = 125
+INCOMING_PROOF_LENGTH = 145
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+@pytest.fixture(scope="module")
+def codec():
+    return accounts[0].deploy(ProofCodecMock)
+
+def outgoing_proof():
+    # isOutgoingBid, status, bidId, receiver, tokenId, erc721Contract, relayer, challenger
+    return (True, 2, 7, accounts[3].address, 2**256 - 1, accounts[5].address, accounts[4].address, ZERO_ADDRESS)
+
+def incoming_proof():
+    return (False, 1, 2**96, accounts[3].address, 42, accounts[5].address, accounts[4].address, accounts[2].address)
+
+def test_encoding_outgoing_proof(codec):
+    data = codec.encode(outgoing_proof())
+    assert len(data) == OUTGOING_PROOF_LENGTH
+    # version 1, outgoing bid, Bought status
+    assert data[0] == 0x1a
+    assert codec.decode(data) == outgoing_proof()
+
+def test_encoding_incoming_proof(codec):
+    data = codec.encode(incoming_proof())
+    assert len(data) == INCOMING_PROOF_LENGTH
+    # version 1, incoming bid, Relayed status
+    assert data[0] == 0x11
+    assert codec.decode(data) == incoming_proof()
+
+def test_compact_proof_is_smaller(codec):
+    assert len(codec.encodeAbi(outgoing_proof())) == 288
+    assert len(codec.encodeAbi(incoming_proof())) == 320
+    assert codec.decodeAbi(codec.encodeAbi(incoming_proof())) == incoming_proof()
+
+def test_decoding_invalid_proof(codec):
+    data = codec.encode(outgoing_proof())
+
+    with reverts("ProofCodec: unsupported proof version!"):
+        codec.decode(bytes([0x2a]) + bytes(data[1:]))
+
+    with reverts("ProofCodec: invalid proof length!"):
+        codec.decode(bytes(data[:-1]))
+
+    # an incoming header with the length of an outgoing proof
+    with reverts("ProofCodec: invalid proof length!"):
+        codec.decode(bytes([0x11]) + bytes(data[1:]))
+
+def test_encoding_invalid_status(codec):
+    proof = list(outgoing_proof())
+    proof[1] = 8
+
+    with reverts("ProofCodec: status does not fit in the header!"):
+        codec.encode(proof)
+
+def test_python_codec_matches_library(codec):
+    for proof in (outgoing_proof(), incoming_proof()):
+        data = encode_proof(Proof(*proof))
+        assert data == bytes(codec.encode(proof))
+        assert decode_proof(data) == proof
+
+    proofs = [Proof(*outgoing_proof()), Proof(*incoming_proof()), Proof(*outgoing_proof())]
+    data = encode_proofs(proofs)
+    assert len(data) == 2 * OUTGOING_PROOF_LENGTH + INCOMING_PROOF_LENGTH
+    assert decode_proofs(data) == proofs
+
+def test_python_codec_errors():
+    data = encode_proof(Proof(*outgoing_proof()))
+
+    with pytest.raises(ProofCodecError, match="unsupported proof version"):
+        decode_proof(bytes([0x2a]) + data[1:])
+
+    with pytest.raises(ProofCodecError, match="invalid proof length"):
+        decode_proof(data[:-1])
+
+    with pytest.raises(ProofCodecError, match="invalid proof length"):
+        decode_proofs(data + data[:-1])
+
+    with pytest.raises(ProofCodecError, match="status does not fit in the header"):
+        encode_proof(Proof(*outgoing_proof())._replace(status=8))
@@ -0,0 +1,183 @@
+import asyncio
+
+from collections import namedtuple
+
+import pytest
+
+from brownie import accounts, reverts, web3, Wei
+from brownie import WrappedERC721, ContractMap, QueueingGatewayHub
+from brownie import SimpleGatewaySrcSpokeBrdige, SimpleGatewayDstSpokeBrdige
+
+from nft_bridge.enums import RelayerStatus
+from nft_bridge.relay import DeliveryPolicy, MessageRelayer
+from nft_bridge.two_chains import SPOKE_PARAMS, Web3HubEndpoint
+
+QueuedBridge = namedtuple("QueuedBridge", "srcSpokeBridge dstSpokeBridge srcHub dstHub erc721 wrappedErc721")
+
+@pytest.fixture(scope="module")
+def queued_bridge():
+    """
+    Both sides have their own `QueueingGatewayHub`, the messages are delivered by the owner (accounts[0]).
+    The user (accounts[1]) owns the tokens 1, 2 and 3, the relayer (accounts[4]) has deposited on both sides.
+    """
+    erc721 = accounts[0].deploy(WrappedERC721, "ValueNFT", "NFT")
+    wrappedErc721 = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")
+
+    contractMap = accounts[0].deploy(ContractMap)
+    contractMap.addPair(erc721.address, wrappedErc721.address)
+
+    srcHub = accounts[0].deploy(QueueingGatewayHub)
+    dstHub = accounts[0].deploy(QueueingGatewayHub)
+
+    srcSpokeBridge = accounts[0].deploy(SimpleGatewaySrcSpokeBrdige, srcHub, contractMap, *SPOKE_PARAMS)
+    dstSpokeBridge = accounts[0].deploy(SimpleGatewayDstSpokeBrdige, dstHub, *SPOKE_PARAMS)
+
+    srcHub.addSpokeBridge(srcSpokeBridge.address, dstSpokeBridge.address, {'from': accounts[0]})
+    dstHub.addSpokeBridge(dstSpokeBridge.address, srcSpokeBridge.address, {'from': accounts[0]})
+
+    wrappedErc721.transferOwnership(dstSpokeBridge.address)
+
+    for tokenId in (1, 2, 3):
+        erc721.mint(accounts[1], tokenId, {'from': accounts[0]})
+    erc721.setApprovalForAll(srcSpokeBridge.address, True, {'from': accounts[1]})
+
+    srcSpokeBridge.deposite({'from': accounts[4], 'amount': Wei("20 ether")})
+    dstSpokeBridge.deposite({'from': accounts[4], 'amount': Wei("20 ether")})
+
+    return QueuedBridge(srcSpokeBridge, dstSpokeBridge, srcHub, dstHub, erc721, wrappedErc721)
+
+def challenged_relayings(queuedBridge, tokenIds):
+    """
+    The tokens are relayed correctly and their minting is challenged. Returns the ids of the bids.
+    """
+    user = accounts[1]
+    relayer = accounts[4]
+    challenger = accounts[2]
+
+    bidIds = list(range(len(tokenIds)))
+    queuedBridge.srcSpokeBridge.createBids(user, tokenIds, queuedBridge.erc721.address,
+        {'from': user, 'amount': Wei("0.01 ether") * len(tokenIds)})
+    queuedBridge.srcSpokeBridge.buyBids(bidIds, {'from': relayer})
+    queuedBridge.dstSpokeBridge.mintingBatch(bidIds, [user] * len(tokenIds), tokenIds,
+        queuedBridge.wrappedErc721.address, {'from': relayer})
+
+    for bidId in bidIds:
+        queuedBridge.dstSpokeBridge.challengeMinting(bidId, {'from': challenger, 'amount': Wei("10 ether")})
+
+    return bidIds
+
+def test_queueing_and_delivering_proof(queued_bridge):
+    relayer = accounts[4]
+    challenged_relayings(queued_bridge, [1])
+
+    tx = queued_bridge.srcSpokeBridge.sendProof(True, 0, {'from': relayer})
+
+    # the proof is only queued, the challenge is still open
+    event = tx.events["MessageQueued"]
+    assert event["nonce"] == 0
+    assert event["kind"] == 0
+    assert queued_bridge.srcHub.nonce() == 1
+    assert queued_bridge.dstSpokeBridge.relayers(relayer)["status"] == RelayerStatus.CHALLENGED
+
+    tx = queued_bridge.dstHub.deliverMessages([0], [event["kind"]], [event["data"]], {'from': accounts[0]})
+
+    assert tx.events["MessageDelivered"]["success"]
+    assert queued_bridge.dstHub.delivered(0)
+    assert queued_bridge.dstSpokeBridge.relayers(relayer)["status"] == RelayerStatus.ACTIVE
+
+def test_delivery_checks(queued_bridge):
+    relayer = accounts[4]
+    challenged_relayings(queued_bridge, [1])
+
+    event = queued_bridge.srcSpokeBridge.sendProof(True, 0, {'from': relayer}).events["MessageQueued"]
+
+    with reverts("Ownable: caller is not the owner"):
+        queued_bridge.dstHub.deliverMessages([0], [0], [event["data"]], {'from': relayer})
+
+    with reverts("Hub: there is no message to deliver!"):
+        queued_bridge.dstHub.deliverMessages([], [], [], {'from': accounts[0]})
+
+    with reverts("Hub: array lengths are not equal!"):
+        queued_bridge.dstHub.deliverMessages([0, 1], [0], [event["data"]], {'from': accounts[0]})
+
+    with reverts("Hub: contract has no pair!"):
+        queued_bridge.srcHub.processMessage(event["data"], {'from': relayer})
+
+    with reverts("Hub: src contract already has a pair!"):
+        queued_bridge.srcHub.addSpokeBridge(relayer, relayer, {'from': accounts[0]})
+
+    queued_bridge.dstHub.deliverMessages([0], [0], [event["data"]], {'from': accounts[0]})
+
+    # an already delivered message is skipped
+    tx = queued_bridge.dstHub.deliverMessages([0], [0], [event["data"]], {'from': accounts[0]})
+    assert "MessageDelivered" not in tx.events
+
+def test_failing_message_does_not_revert_batch(queued_bridge):
+    relayer = accounts[4]
+    challenged_relayings(queued_bridge, [1, 2])
+
+    first = queued_bridge.srcSpokeBridge.sendProof(True, 0, {'from': relayer}).events["MessageQueued"]
+    # there is no incoming bid of it on the destination side
+    missing = queued_bridge.srcSpokeBridge.sendProof(True, 5, {'from': relayer}).events["MessageQueued"]
+    second = queued_bridge.srcSpokeBridge.sendProof(True, 1, {'from': relayer}).events["MessageQueued"]
+
+    tx = queued_bridge.dstHub.deliverMessages([second["nonce"], missing["nonce"], first["nonce"]], [0, 0, 0],
+        [second["data"], missing["data"], first["data"]], {'from': accounts[0]})
+
+    assert [event["success"] for event in tx.events["MessageDelivered"]] == [True, False, True]
+    assert queued_bridge.dstSpokeBridge.relayers(relayer)["status"] == RelayerStatus.ACTIVE
+    assert queued_bridge.dstHub.delivered(first["nonce"]) and queued_bridge.dstHub.delivered(second["nonce"])
+    # the failed message can be delivered again
+    assert not queued_bridge.dstHub.delivered(missing["nonce"])
+
+def test_duplicate_message_does_not_revert_batch(queued_bridge):
+    relayer = accounts[4]
+    challenged_relayings(queued_bridge, [1, 2])
+
+    first = queued_bridge.srcSpokeBridge.sendProof(True, 0, {'from': relayer}).events["MessageQueued"]
+    second = queued_bridge.srcSpokeBridge.sendProof(True, 1, {'from': relayer}).events["MessageQueued"]
+
+    tx = queued_bridge.dstHub.deliverMessages([first["nonce"], first["nonce"], second["nonce"]], [0, 0, 0],
+        [first["data"], first["data"], second["data"]], {'from': accounts[0]})
+
+    assert [event["nonce"] for event in tx.events["MessageDelivered"]] == [first["nonce"], second["nonce"]]
+    assert all(event["success"] for event in tx.events["MessageDelivered"])
+    assert queued_bridge.dstSpokeBridge.relayers(relayer)["status"] == RelayerStatus.ACTIVE
+
+@pytest.mark.parametrize("policy", [
+    dict(batch_size=1),
+    dict(batch_size=3, reorder=True, seed=1),
+    dict(delay=0.05, jitter=0.1, batch_size=2, seed=2),
+])
+def test_relaying_proofs(queued_bridge, policy):
+    relayer = accounts[4]
+    bidIds = challenged_relayings(queued_bridge, [1, 2, 3])
+
+    async def relay():
+        messageRelayer = MessageRelayer(
+            Web3HubEndpoint(web3.eth.contract(address=queued_bridge.srcHub.address, abi=queued_bridge.srcHub.abi),
+                accounts[0].address, web3.eth.block_number),
+            Web3HubEndpoint(web3.eth.contract(address=queued_bridge.dstHub.address, abi=queued_bridge.dstHub.abi),
+                accounts[0].address),
+            DeliveryPolicy(**policy), poll_interval=0.01)
+
+        stop = asyncio.Event()
+        task = asyncio.create_task(messageRelayer.run(stop))
+
+        for bidId in bidIds:
+            queued_bridge.srcSpokeBridge.sendProof(True, bidId, {'from': relayer})
+            await asyncio.sleep(0)
+
+        while messageRelayer.metrics.noticed < len(bidIds):
+            await asyncio.sleep(0.01)
+        stop.set()
+        await task
+
+        return messageRelayer.metrics
+
+    metrics = asyncio.run(relay())
+
+    assert metrics.delivered == len(bidIds)
+    assert metrics.failed == 0
+    assert queued_bridge.dstSpokeBridge.relayers(relayer)["status"] == RelayerStatus.ACTIVE
+    assert all(queued_bridge.dstHub.delivered(nonce) for nonce in range(len(bidIds)))
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from nft_bridge.relay import DeliveryPolicy, Message, MessageRelayer, percentile
+
+class MemoryEndpoint:
+    """
+    A hub of the relayer tests, the messages of `queue` are fetched and the delivered ones are collected.
+    """
+
+    def __init__(self, failing=()):
+        self.queue = []
+        self.batches = []
+        self.failing = set(failing)
+
+    async def fetch_messages(self):
+        messages, self.queue = self.queue, []
+        return messages
+
+    async def deliver(self, messages):
+        self.batches.append([message.nonce for message in messages])
+        return [message.nonce not in self.failing for message in messages]
+
+def messages(count):
+    return [Message(nonce, 0, bytes([nonce])) for nonce in range(count)]
+
+def relay(relayer, stop_after=0.0):
+    async def run():
+        stop = asyncio.Event()
+        task = asyncio.create_task(relayer.run(stop))
+        await asyncio.sleep(stop_after)
+        stop.set()
+        await task
+
+    asyncio.run(run())
+
+def test_delivering_in_batches():
+    source, destination = MemoryEndpoint(), MemoryEndpoint()
+    source.queue = messages(5)
+
+    relayer = MessageRelayer(source, destination, DeliveryPolicy(batch_size=2), poll_interval=0.01)
+    relay(relayer, 0.05)
+
+    assert destination.batches == [[0, 1], [2, 3], [4]]
+    assert relayer.metrics.delivered == 5
+    assert relayer.metrics.batches == 3
+    assert sorted(relayer.metrics.delivered_at) == [0, 1, 2, 3, 4]
+
+def test_delaying_messages():
+    source, destination = MemoryEndpoint(), MemoryEndpoint()
+    relayer = MessageRelayer(source, destination, DeliveryPolicy(delay=60))
+
+    async def run():
+        source.queue = messages(2)
+        await relayer.poll()
+        assert await relayer.deliver_due() == 0
+        assert relayer.pending == 2
+
+    asyncio.run(run())
+    assert destination.batches == []
+
+    # the pending messages are delivered without delay at stopping
+    relay(relayer)
+    assert destination.batches == [[0, 1]]
+
+def test_reordering_messages():
+    source, destination = MemoryEndpoint(), MemoryEndpoint()
+    source.queue = messages(20)
+
+    relayer = MessageRelayer(source, destination, DeliveryPolicy(batch_size=20, reorder=True, seed=1))
+    relay(relayer)
+
+    assert len(destination.batches) == 1
+    assert sorted(destination.batches[0]) == list(range(20))
+    assert destination.batches[0] != list(range(20))
+
+def test_dropping_and_failing_messages():
+    source, destination = MemoryEndpoint(), MemoryEndpoint(failing=[1])
+    source.queue = messages(4)
+
+    relayer = MessageRelayer(source, destination, DeliveryPolicy(drop_rate=1.0))
+    relay(relayer)
+
+    assert destination.batches == []
+    assert relayer.metrics.dropped == 4
+
+    source.queue = messages(4)
+    relayer = MessageRelayer(source, destination)
+    relay(relayer)
+
+    summary = relayer.metrics.summary()
+    assert summary["noticed"] == 4
+    assert summary["delivered"] == 3
+    assert summary["failed"] == 1
+    assert sorted(relayer.metrics.delivered_at) == [0, 2, 3]
+    assert summary["dropped"] == 0
+
+def test_policy():
+    with pytest.raises(ValueError):
+        DeliveryPolicy(batch_size=0)
+
+    policy = DeliveryPolicy(delay=1.0, jitter=2.0, seed=3)
+    assert all(11.0 <= policy.due_time(10.0) <= 13.0 for _ in range(100))
+
+    assert percentile([], 50) == 0
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile([3, 1, 2, 4], 99) == 4
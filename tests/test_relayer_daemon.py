@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from brownie import accounts, chain, web3, Wei
+
+from nft_bridge.enums import OutgoingBidStatus
+from nft_bridge.relayer import RelayerDaemon
+
+@pytest.fixture(scope="module")
+def spokes(bridge):
+    """
+    The spoke bridges as web3 contracts of the same web3 instance, the way the daemon uses them.
+    """
+    return tuple(web3.eth.contract(address=spoke.address, abi=spoke.abi)
+        for spoke in (bridge.srcSpokeBridge, bridge.dstSpokeBridge))
+
+def relay(daemons, count):
+    """
+    Runs the daemons until `count` bids are relayed or given up.
+    """
+    async def run():
+        stop = asyncio.Event()
+        tasks = [asyncio.create_task(daemon.run(stop)) for daemon in daemons]
+
+        while sum(daemon.metrics.relayed + daemon.metrics.failed for daemon in daemons) < count:
+            await asyncio.sleep(0.01)
+        # the losers may still be checking their bids
+        while any(daemon.in_flight for daemon in daemons):
+            await asyncio.sleep(0.01)
+
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(asyncio.wait_for(run(), 60))
+
+def test_racing_for_bids(bridge, spokes, deposited_relayer):
+    user = accounts[1]
+    receiver = accounts[3]
+    racer = accounts[5]
+
+    bridge.srcSpokeBridge.deposite({'from': racer, 'amount': Wei("20 ether")})
+    bridge.dstSpokeBridge.deposite({'from': racer, 'amount': Wei("20 ether")})
+
+    for tokenId in (2, 3, 4):
+        bridge.erc721.mint(user, tokenId, {'from': accounts[0]})
+    bridge.erc721.setApprovalForAll(bridge.srcSpokeBridge.address, True, {'from': user})
+
+    fromBlock = web3.eth.block_number + 1
+    for tokenId in (1, 2, 3, 4):
+        bridge.srcSpokeBridge.createBid(receiver, tokenId, bridge.erc721.address,
+            {'from': user, 'amount': Wei("0.01 ether")})
+
+    daemons = [RelayerDaemon(*spokes, relayer.address, retry_delay=0.01, poll_interval=0.01, from_block=fromBlock)
+        for relayer in (deposited_relayer, racer)]
+    relay(daemons, 4)
+
+    assert sum(daemon.metrics.bought for daemon in daemons) == 4
+    assert sum(daemon.metrics.relayed for daemon in daemons) == 4
+    for daemon in daemons:
+        assert daemon.metrics.seen == 4
+        assert daemon.metrics.bought + daemon.metrics.lost == 4
+        assert daemon.metrics.failed == 0
+        assert len(daemon.metrics.latencies) == daemon.metrics.relayed
+
+    # every bid is minted by its buyer
+    for bidId, tokenId in enumerate((1, 2, 3, 4)):
+        assert bridge.wrappedErc721.ownerOf(tokenId) == receiver
+        assert bridge.dstSpokeBridge.incomingBids(bidId)["relayer"] == \
+            bridge.srcSpokeBridge.outgoingBids(bidId)["buyer"]
+
+def test_losing_race(bridge, spokes, deposited_relayer):
+    racer = accounts[5]
+
+    bridge.srcSpokeBridge.deposite({'from': racer, 'amount': Wei("20 ether")})
+
+    fromBlock = web3.eth.block_number + 1
+    bridge.srcSpokeBridge.createBid(accounts[3], 1, bridge.erc721.address,
+        {'from': accounts[1], 'amount': Wei("0.01 ether")})
+    bridge.srcSpokeBridge.buyBid(0, {'from': racer})
+
+    daemon = RelayerDaemon(*spokes, deposited_relayer.address, retry_delay=0.01, poll_interval=0.01,
+        from_block=fromBlock)
+
+    async def run():
+        await daemon.poll()
+        while daemon.in_flight:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+    assert daemon.metrics.lost == 1
+    assert daemon.metrics.bought == 0
+    assert daemon.metrics.relayed == 0
+    assert daemon.metrics.failed == 0
+
+def test_unlocking_bids(bridge, spokes, relayed_bid):
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    chain.sleep(4 * 60 * 60 + 1)
+
+    bridge.wrappedErc721.approve(bridge.dstSpokeBridge.address, 1, {'from': receiver})
+
+    fromBlock = web3.eth.block_number + 1
+    bridge.dstSpokeBridge.createBid(user, 1, bridge.wrappedErc721.address, relayed_bid,
+        {'from': receiver, 'amount': Wei("0.01 ether")})
+
+    daemon = RelayerDaemon(*spokes, relayer.address, retry_delay=0.01, poll_interval=0.01, from_block=fromBlock)
+    relay([daemon], 1)
+
+    assert daemon.metrics.bought == 1
+    assert daemon.metrics.relayed == 1
+    assert bridge.erc721.ownerOf(1) == user
+    assert bridge.srcSpokeBridge.outgoingBids(relayed_bid)["status"] == OutgoingBidStatus.UNLOCKED
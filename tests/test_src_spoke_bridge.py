@@ -1,23 +1,12 @@
 import pytest
 
 from brownie import accounts, reverts, Wei, chain
-from brownie import WrappedERC721, ContractMap, SimpleGatewaySrcSpokeBrdige, SimpleGatewayHub
 
-@pytest.fixture
-def init_contracts():
-    erc721 = accounts[0].deploy(WrappedERC721, "ValueNFT", "NFT")
-    wrappedErc721 = accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
 
-    contractMap = accounts[0].deploy(ContractMap)
-    contractMap.addPair(erc721.address, wrappedErc721.address)
-
-    hub = accounts[0].deploy(SimpleGatewayHub)
-
-    srcSpokeBridge = accounts[0].deploy(SimpleGatewaySrcSpokeBrdige, hub, contractMap)
-    erc721.mint(accounts[1], 1, {'from': accounts[0]})
-    erc721.approve(srcSpokeBridge.address, 1, {'from': accounts[1]})
-
-    return srcSpokeBridge, contractMap, erc721, wrappedErc721
+@pytest.fixture(scope="module")
+def init_contracts(bridge):
+    return bridge.srcSpokeBridge, bridge.contractMap, bridge.erc721, bridge.wrappedErc721
 
 def test_relayer_depositing(init_contracts):
     srcSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
@@ -25,8 +14,10 @@ def test_relayer_depositing(init_contracts):
     relayer = accounts[2]
 
     prev_relayer_balance = relayer.balance()
-    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+    tx = srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
     assert prev_relayer_balance == relayer.balance() + Wei("20 ether")
+    assert tx.events["RelayerDeposited"]["relayer"] == relayer
+    assert tx.events["RelayerDeposited"]["amount"] == Wei("20 ether")
 
     retRelayer = srcSpokeBridge.relayers(relayer)
     assert retRelayer["status"] == 1
@@ -42,16 +33,20 @@ def test_relayer_undepositing(init_contracts):
 
     prev_relayer_balance = relayer.balance()
 
-    srcSpokeBridge.undeposite({'from': relayer})
-    with reverts("SpokeBridge: 2 days is not expired from the undepositing!"):
+    tx = srcSpokeBridge.undeposite({'from': relayer})
+    assert tx.events["RelayerUndeposited"]["relayer"] == relayer
+    with reverts("SpokeBridge: the undepositing period is not expired yet!"):
         srcSpokeBridge.claimDeposite({'from': relayer})
 
     chain.sleep(14400000) # it's 4 hours
 
-    srcSpokeBridge.claimDeposite({'from': relayer})
+    tx = srcSpokeBridge.claimDeposite({'from': relayer})
+    assert tx.events["DepositClaimed"]["relayer"] == relayer
+    assert tx.events["DepositClaimed"]["amount"] == Wei("20 ether")
 
+    # the record is deleted
     retRelayer = srcSpokeBridge.relayers(relayer)
-    assert retRelayer["status"] == 0
+    assert retRelayer == (0, 0, 0)
 
     assert prev_relayer_balance + Wei("20 ether") == relayer.balance()
 
@@ -67,12 +62,48 @@ def test_user_creating_bid(init_contracts):
     with reverts("ERC721: transfer from incorrect owner"):
         srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': person, 'amount': Wei("20 ether")})
 
-    srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    tx = srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
 
     retBid = srcSpokeBridge.outgoingBids(0)
     assert retBid["status"] == 1
     assert retBid["receiver"] == receiver
     assert retBid["tokenId"] == 1
+    assert retBid["collectionId"] == 1
+
+    # the collection is registered by the first bid
+    assert tx.events["CollectionRegistered"]["collectionId"] == 1
+    assert tx.events["CollectionRegistered"]["localErc721Contract"] == erc721.address
+    assert tx.events["CollectionRegistered"]["remoteErc721Contract"] == wrappedErc721.address
+
+    assert tx.events["BidCreated"]["bidId"] == 0
+    assert tx.events["BidCreated"]["maker"] == user
+    assert tx.events["BidCreated"]["receiver"] == receiver
+    assert tx.events["BidCreated"]["erc721Contract"] == erc721.address
+    assert tx.events["BidCreated"]["tokenId"] == 1
+    assert tx.events["BidCreated"]["fee"] == Wei("0.01 ether")
+    assert tx.events["BidCreated"]["incomingBidId"] == 0
+
+def test_registering_collections(init_contracts):
+    srcSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+
+    with reverts("SrcSpokeBridge: there is no contract to register!"):
+        srcSpokeBridge.registerCollections([], {'from': user})
+    with reverts("ContractMap: addr is not in the localToRemote!"):
+        srcSpokeBridge.registerCollections([wrappedErc721.address], {'from': user})
+
+    tx = srcSpokeBridge.registerCollections([erc721.address, erc721.address], {'from': user})
+    assert len(tx.events["CollectionRegistered"]) == 1
+    assert srcSpokeBridge.collectionCount() == 1
+    assert srcSpokeBridge.collectionIds(erc721.address) == 1
+    assert srcSpokeBridge.remoteErc721Contracts(1) == wrappedErc721.address
+
+    # the registered collection is not looked up in the map again
+    tx = srcSpokeBridge.createBid(receiver, 1, erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    assert "CollectionRegistered" not in tx.events
+    assert srcSpokeBridge.outgoingBids(0)["collectionId"] == 1
 
 def test_relayer_buying_bid(init_contracts):
     srcSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
@@ -90,8 +121,10 @@ def test_relayer_buying_bid(init_contracts):
         srcSpokeBridge.buyBid(0, {'from': person})
 
     prev_relayer_balance = relayer.balance()
-    srcSpokeBridge.buyBid(0, {'from': relayer})
+    tx = srcSpokeBridge.buyBid(0, {'from': relayer})
     assert prev_relayer_balance + Wei("0.01 ether") == relayer.balance()
+    assert tx.events["BidBought"]["relayer"] == relayer
+    assert tx.events["BidBought"]["bidId"] == 0
 
     with reverts("SpokeBridge: bid does not have Created state"):
         srcSpokeBridge.buyBid(0, {'from': relayer})
@@ -121,7 +154,13 @@ def test_relayer_relaying(init_contracts):
     with reverts("SpokeBridge: caller is not a relayer!"):
         srcSpokeBridge.unlocking(0, 0, user, {'from': person})
 
-    srcSpokeBridge.unlocking(0, 0, user, {'from': relayer})
+    tx = srcSpokeBridge.unlocking(0, 0, user, {'from': relayer})
+    assert tx.events["BidUnlocked"]["bidId"] == 0
+    assert tx.events["BidRelayed"]["bidId"] == 0
+    assert tx.events["BidRelayed"]["relayer"] == relayer
+    assert tx.events["BidRelayed"]["receiver"] == user
+    assert tx.events["BidRelayed"]["erc721Contract"] == erc721.address
+    assert tx.events["BidRelayed"]["tokenId"] == 1
 
     with reverts("SrcSpokeBridge: the outgoing bid is not bought!"):
         srcSpokeBridge.unlocking(0, 0, user, {'from': relayer})
@@ -160,5 +199,217 @@ def test_user_claiming_nft(init_contracts):
     with reverts("SrcSpokeBridge: claimer is not the owner!"):
         srcSpokeBridge.claimNFT(0, {'from': relayer})
 
-    srcSpokeBridge.claimNFT(0, {'from': user})
-    assert erc721.ownerOf(1) == user
\ No newline at end of file
+    tx = srcSpokeBridge.claimNFT(0, {'from': user})
+    assert erc721.ownerOf(1) == user
+    assert tx.events["NFTUnwrapped"]["contractAddress"] == erc721.address
+    assert tx.events["NFTUnwrapped"]["bidId"] == 0
+    assert tx.events["NFTUnwrapped"]["id"] == 1
+    assert tx.events["NFTUnwrapped"]["owner"] == user
+
+    retBid = srcSpokeBridge.incomingBids(0)
+    assert retBid["status"] == 4
+    with reverts("SrcSpokeBride: incoming bid has no Relayed state!"):
+        srcSpokeBridge.claimNFT(0, {'from': user})
+
+    # only the fields of the proofs are kept
+    retBid = srcSpokeBridge.outgoingBids(0)
+    assert retBid["maker"] == ZERO_ADDRESS
+    assert retBid["fee"] == 0
+    assert retBid["localErc721Contract"] == ZERO_ADDRESS
+    assert retBid["receiver"] == receiver
+    assert retBid["tokenId"] == 1
+    assert retBid["buyer"] == relayer
+
+def test_user_claiming_nfts(init_contracts):
+    srcSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    erc721.mint(user, 2, {'from': accounts[0]})
+    erc721.approve(srcSpokeBridge.address, 2, {'from': user})
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    srcSpokeBridge.createBids(receiver, [1, 2], erc721.address, {'from': user, 'amount': Wei("0.02 ether")})
+    srcSpokeBridge.buyBids([0, 1], {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    srcSpokeBridge.unlocking(0, 0, user, {'from': relayer})
+    srcSpokeBridge.unlocking(1, 1, user, {'from': relayer})
+
+    chain.sleep(14400000) # it's 4 hours
+
+    with reverts("SrcSpokeBridge: there is no NFT to claim!"):
+        srcSpokeBridge.claimNFTs([], {'from': user})
+    # the first claim of a bid unlocks it
+    with reverts("SrcSpokeBride: incoming bid has no Relayed state!"):
+        srcSpokeBridge.claimNFTs([0, 1, 0], {'from': user})
+    with reverts("SrcSpokeBridge: claimer is not the owner!"):
+        srcSpokeBridge.claimNFTs([0, 1], {'from': relayer})
+
+    tx = srcSpokeBridge.claimNFTs([0, 1], {'from': user})
+    assert erc721.ownerOf(1) == user
+    assert erc721.ownerOf(2) == user
+    assert [e["bidId"] for e in tx.events["NFTUnwrapped"]] == [0, 1]
+    assert [e["id"] for e in tx.events["NFTUnwrapped"]] == [1, 2]
+
+    assert srcSpokeBridge.incomingBids(1)["status"] == 4
+
+def test_user_creating_bids(init_contracts):
+    srcSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    person = accounts[2]
+    receiver = accounts[3]
+
+    erc721.mint(user, 2, {'from': accounts[0]})
+    erc721.mint(user, 3, {'from': accounts[0]})
+    erc721.setApprovalForAll(srcSpokeBridge.address, True, {'from': user})
+
+    with reverts("SrcSpokeBridge: there is no token to bridge!"):
+        srcSpokeBridge.createBids(receiver, [], erc721.address, {'from': user, 'amount': Wei("0.01 ether")})
+    with reverts("SrcSpokeBridge: there is no fee for relayers!"):
+        srcSpokeBridge.createBids(receiver, [1, 2, 3], erc721.address, {'from': user})
+    with reverts("ERC721: transfer from incorrect owner"):
+        srcSpokeBridge.createBids(receiver, [1, 2, 3], erc721.address, {'from': person, 'amount': Wei("0.01 ether")})
+
+    srcSpokeBridge.createBids(receiver, [1, 2, 3], erc721.address, {'from': user, 'amount': 10})
+
+    assert srcSpokeBridge.id() == 3
+    for bidId, tokenId in enumerate([1, 2, 3]):
+        retBid = srcSpokeBridge.outgoingBids(bidId)
+        assert retBid["status"] == 1
+        assert retBid["maker"] == user
+        assert retBid["receiver"] == receiver
+        assert retBid["tokenId"] == tokenId
+        assert srcSpokeBridge.remoteErc721Contracts(retBid["collectionId"]) == wrappedErc721.address
+        assert erc721.ownerOf(tokenId) == srcSpokeBridge.address
+
+    # the remainder of the fee split goes to the last bid
+    assert [srcSpokeBridge.outgoingBids(i)["fee"] for i in range(3)] == [3, 3, 4]
+
+def test_relayer_buying_bids(init_contracts):
+    srcSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    person = accounts[2]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    erc721.mint(user, 2, {'from': accounts[0]})
+    erc721.mint(user, 3, {'from': accounts[0]})
+    erc721.setApprovalForAll(srcSpokeBridge.address, True, {'from': user})
+    srcSpokeBridge.createBids(receiver, [1, 2, 3], erc721.address, {'from': user, 'amount': Wei("0.03 ether")})
+
+    with reverts("SpokeBridge: caller is not a relayer!"):
+        srcSpokeBridge.buyBids([0, 1, 2], {'from': person})
+    with reverts("SpokeBridge: there is no bid to buy!"):
+        srcSpokeBridge.buyBids([], {'from': relayer})
+    with reverts("SpokeBridge: bid does not have Created state"):
+        srcSpokeBridge.buyBids([0, 1, 3], {'from': relayer})
+
+    prev_relayer_balance = relayer.balance()
+    tx = srcSpokeBridge.buyBids([0, 1, 2], {'from': relayer})
+    assert prev_relayer_balance + Wei("0.03 ether") == relayer.balance()
+
+    with reverts("SpokeBridge: bid does not have Created state"):
+        srcSpokeBridge.buyBids([2], {'from': relayer})
+
+    for bidId in range(3):
+        retBid = srcSpokeBridge.outgoingBids(bidId)
+        assert retBid["status"] == 2
+        assert retBid["buyer"] == relayer
+        assert retBid["timestampOfBought"] == tx.timestamp
+
+def test_getting_bids(init_contracts):
+    srcSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    erc721.mint(user, 2, {'from': accounts[0]})
+    erc721.mint(user, 3, {'from': accounts[0]})
+    erc721.setApprovalForAll(srcSpokeBridge.address, True, {'from': user})
+    srcSpokeBridge.createBids(receiver, [1, 2, 3], erc721.address, {'from': user, 'amount': Wei("0.03 ether")})
+    srcSpokeBridge.buyBid(0, {'from': relayer})
+
+    bids = srcSpokeBridge.getOutgoingBids(0, 10)
+    assert len(bids) == 3
+    for bidId in range(3):
+        assert bids[bidId] == srcSpokeBridge.outgoingBids(bidId)
+
+    bids = srcSpokeBridge.getOutgoingBids(1, 1)
+    assert len(bids) == 1
+    assert bids[0] == srcSpokeBridge.outgoingBids(1)
+
+    assert len(srcSpokeBridge.getOutgoingBids(3, 10)) == 0
+
+    chain.sleep(14400000) # it's 4 hours
+
+    srcSpokeBridge.unlocking(0, 0, user, {'from': relayer})
+
+    bids = srcSpokeBridge.getIncomingBids(0, 2)
+    assert len(bids) == 2
+    assert bids[0] == srcSpokeBridge.incomingBids(0)
+    assert bids[1] == srcSpokeBridge.incomingBids(1)
+
+    # the incoming range is not cut at a last bid, only at the page size
+    maxPageSize = srcSpokeBridge.MAX_PAGE_SIZE()
+    assert len(srcSpokeBridge.getIncomingBids(0, 2 ** 256 - 1)) == maxPageSize
+
+    snapshot = srcSpokeBridge.getBidSnapshot(0)
+    assert snapshot[0] == srcSpokeBridge.outgoingBids(0)
+    assert snapshot[1] == srcSpokeBridge.incomingBids(0)
+    assert snapshot[2] == srcSpokeBridge.challengedIncomingBids(0)
+    assert snapshot[3] == srcSpokeBridge.outgoingChallengeRewards(0)
+    assert snapshot[4] == srcSpokeBridge.incomingChallengeRewards(0)
+    assert snapshot[5] == srcSpokeBridge.relayers(relayer)
+    assert snapshot[6] == srcSpokeBridge.relayers(relayer)
+
+def test_open_bids(init_contracts):
+    srcSpokeBridge, contractMap, erc721, wrappedErc721 = init_contracts
+
+    user = accounts[1]
+    receiver = accounts[3]
+    relayer = accounts[4]
+
+    srcSpokeBridge.deposite({'from': relayer, 'amount': Wei("20 ether")})
+
+    for tokenId in [2, 3, 4]:
+        erc721.mint(user, tokenId, {'from': accounts[0]})
+    erc721.setApprovalForAll(srcSpokeBridge.address, True, {'from': user})
+    srcSpokeBridge.createBids(receiver, [1, 2, 3, 4], erc721.address, {'from': user, 'amount': Wei("0.04 ether")})
+
+    assert srcSpokeBridge.getOpenBidCount() == 4
+    bidIds, cursor = srcSpokeBridge.getOpenBids(0, 10)
+    assert list(bidIds) == [0, 1, 2, 3]
+    assert cursor == 0
+
+    srcSpokeBridge.buyBid(1, {'from': relayer})
+
+    assert srcSpokeBridge.getOpenBidCount() == 3
+    bidIds, cursor = srcSpokeBridge.getOpenBids(0, 2)
+    assert list(bidIds) == [0, 2]
+    bidIds, cursor = srcSpokeBridge.getOpenBids(cursor, 2)
+    assert list(bidIds) == [3]
+    assert cursor == 0
+
+    srcSpokeBridge.buyBids([0, 3], {'from': relayer})
+
+    bidIds, cursor = srcSpokeBridge.getOpenBids(0, 10)
+    assert list(bidIds) == [2]
+
+    srcSpokeBridge.buyBid(2, {'from': relayer})
+
+    assert srcSpokeBridge.getOpenBidCount() == 0
+    bidIds, cursor = srcSpokeBridge.getOpenBids(0, 10)
+    assert len(bidIds) == 0
+    assert cursor == 0
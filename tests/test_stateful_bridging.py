@@ -0,0 +1,317 @@
+import os
+import time
+
+from collections import defaultdict
+
+from brownie import accounts, chain, Wei
+from brownie.test import strategy
+
+# the number of runs and the number of steps of a run, raise them for a load test
+EXAMPLES = int(os.environ.get("STATEFUL_EXAMPLES", "10"))
+STEPS = int(os.environ.get("STATEFUL_STEPS", "50"))
+
+FEE = Wei("0.01 ether")
+STAKE_AMOUNT = Wei("20 ether")
+CHALLENGE_AMOUNT = Wei("10 ether")
+
+CHALLENGE_PERIOD = 4 * 60 * 60
+
+# none of their sums is a multiple of the challenge period, so the time windows are not hit by seconds
+SLEEPS = (75 * 60, 5 * 60 * 60)
+
+# one relaying out of ten is wrong
+WRONG_RELAYING_RATE = 26
+
+TOKEN_IDS = range(1, 10)
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of `values` by the nearest-rank method.
+    """
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)]
+
+class BridgingMachine:
+    """
+    Bridges the tokens of the users (accounts[1-3]) back and forth with the relayers (accounts[4-6]), who
+    relay some of the bids wrongly or not at all. The challenger (accounts[7]) proves every misbehaviour it
+    notices in time. The shadow state follows the bids, the invariants check it against the chain.
+    """
+
+    st_user = strategy("uint8", max_value=2)
+    st_receiver = strategy("uint8", max_value=2)
+    st_relayer = strategy("uint8", max_value=2)
+    st_index = strategy("uint16")
+    st_wrong = strategy("uint8")
+    st_sleep = strategy("uint8", max_value=len(SLEEPS) - 1)
+
+    def __init__(cls, bridge):
+        cls.srcSpokeBridge = bridge.srcSpokeBridge
+        cls.dstSpokeBridge = bridge.dstSpokeBridge
+        cls.erc721 = bridge.erc721
+        cls.wrappedErc721 = bridge.wrappedErc721
+
+        cls.users = accounts[1:4]
+        cls.relayers = accounts[4:7]
+        cls.challenger = accounts[7]
+
+        # the token 1 is minted by the fixture
+        for tokenId in TOKEN_IDS[1:]:
+            cls.erc721.mint(cls.users[(tokenId - 1) % 3], tokenId, {'from': accounts[0]})
+        for user in cls.users:
+            cls.erc721.setApprovalForAll(cls.srcSpokeBridge.address, True, {'from': user})
+            cls.wrappedErc721.setApprovalForAll(cls.dstSpokeBridge.address, True, {'from': user})
+        for relayer in cls.relayers:
+            cls.srcSpokeBridge.deposite({'from': relayer, 'amount': STAKE_AMOUNT})
+            cls.dstSpokeBridge.deposite({'from': relayer, 'amount': STAKE_AMOUNT})
+
+        cls.gas = defaultdict(list)
+        cls.started = time.perf_counter()
+
+    def setup(self):
+        self.owners = {tokenId: self.erc721.ownerOf(tokenId) for tokenId in TOKEN_IDS}
+        self.wrappedOwners = {}
+
+        # src bids: id -> (maker, receiver, tokenId) and id -> (relayer, maker, receiver, tokenId, timestamp)
+        self.srcCreated = {}
+        self.srcBought = {}
+        # the minted tokens: src bid id -> (relayer, owner, tokenId, timestamp, isWrong)
+        self.relayed = {}
+        # dst bids: id -> (maker, receiver, tokenId, lockingBidId) and the same with relayer and timestamp
+        self.dstCreated = {}
+        self.dstBought = {}
+        # the unlocked tokens: dst bid id -> (relayer, receiver, tokenId, timestamp, isWrong)
+        self.unlocked = {}
+
+        # the expected balances of the spokes
+        self.ledger = {spokeBridge.address: spokeBridge.balance()
+            for spokeBridge in (self.srcSpokeBridge, self.dstSpokeBridge)}
+        self.total = self.eth_total()
+
+    def eth_total(self):
+        return sum(account.balance() for account in accounts) + \
+            self.srcSpokeBridge.balance() + self.dstSpokeBridge.balance()
+
+    def record(self, tx):
+        self.gas[f"{tx.contract_name}.{tx.fn_name}"].append(tx.gas_used)
+        return tx
+
+    def active_relayers(self, spokeBridge):
+        return [relayer for relayer in self.relayers if spokeBridge.relayers(relayer)["status"] == 1]
+
+    def pick(self, bids, st_index):
+        return sorted(bids)[st_index % len(bids)]
+
+    def rule_create_bid(self, st_user, st_receiver, st_index):
+        user = self.users[st_user]
+        tokenIds = [tokenId for tokenId in TOKEN_IDS if self.owners[tokenId] == user]
+        if not tokenIds:
+            return
+
+        tokenId = tokenIds[st_index % len(tokenIds)]
+        receiver = self.users[st_receiver]
+        tx = self.record(self.srcSpokeBridge.createBid(receiver, tokenId, self.erc721.address,
+            {'from': user, 'amount': FEE}))
+
+        self.owners[tokenId] = self.srcSpokeBridge.address
+        self.ledger[self.srcSpokeBridge.address] += FEE
+        self.srcCreated[tx.events["BidCreated"]["bidId"]] = (user, receiver, tokenId)
+
+    def rule_buy_src_bid(self, st_relayer, st_index):
+        relayers = self.active_relayers(self.srcSpokeBridge)
+        if not self.srcCreated or not relayers:
+            return
+
+        bidId = self.pick(self.srcCreated, st_index)
+        relayer = relayers[st_relayer % len(relayers)]
+        tx = self.record(self.srcSpokeBridge.buyBid(bidId, {'from': relayer}))
+
+        self.ledger[self.srcSpokeBridge.address] -= FEE
+        self.srcBought[bidId] = (relayer, *self.srcCreated.pop(bidId), tx.timestamp)
+
+    def rule_minting(self, st_index, st_wrong):
+        relayers = self.active_relayers(self.dstSpokeBridge)
+        bidIds = [bidId for bidId in self.srcBought if self.srcBought[bidId][0] in relayers]
+        if not bidIds:
+            return
+
+        bidId = self.pick(bidIds, st_index)
+        relayer, maker, receiver, tokenId, _ = self.srcBought.pop(bidId)
+        isWrong = st_wrong < WRONG_RELAYING_RATE
+        owner = relayer if isWrong else receiver
+
+        tx = self.record(self.dstSpokeBridge.minting(bidId, owner, tokenId, self.wrappedErc721.address,
+            {'from': relayer}))
+
+        self.wrappedOwners[tokenId] = owner
+        self.relayed[bidId] = (relayer, owner, tokenId, tx.timestamp, isWrong)
+
+    def rule_challenge_minting(self, st_index):
+        bidIds = [bidId for bidId, (_, _, _, timestamp, isWrong) in self.relayed.items()
+            if isWrong and timestamp + CHALLENGE_PERIOD > chain.time()]
+        if not bidIds:
+            return
+
+        bidId = self.pick(bidIds, st_index)
+        _, _, tokenId, _, _ = self.relayed.pop(bidId)
+
+        self.record(self.dstSpokeBridge.challengeMinting(bidId,
+            {'from': self.challenger, 'amount': CHALLENGE_AMOUNT}))
+        tx = self.record(self.srcSpokeBridge.sendProof(True, bidId, {'from': self.challenger}))
+        assert tx.events["ChallengeProved"]["bidId"] == bidId
+        self.record(self.dstSpokeBridge.claimChallengeReward(bidId, False, {'from': self.challenger}))
+
+        # the challenger gets back its deposit and a quarter of the stake
+        self.ledger[self.dstSpokeBridge.address] -= STAKE_AMOUNT // 4
+
+        # the locked token stays on the source side, the bid cannot be relayed again
+        del self.wrappedOwners[tokenId]
+
+    def rule_prove_missing_minting(self, st_index):
+        bidIds = [bidId for bidId, bid in self.srcBought.items() if bid[4] + CHALLENGE_PERIOD < chain.time()]
+        if not bidIds:
+            return
+
+        bidId = self.pick(bidIds, st_index)
+        _, maker, _, tokenId, _ = self.srcBought.pop(bidId)
+
+        tx = self.record(self.dstSpokeBridge.sendProof(False, bidId, {'from': self.challenger}))
+        assert tx.events["ChallengeProved"]["bidId"] == bidId
+        self.record(self.srcSpokeBridge.claimChallengeReward(bidId, True, {'from': self.challenger}))
+
+        self.owners[tokenId] = maker
+        self.ledger[self.srcSpokeBridge.address] -= STAKE_AMOUNT // 4
+
+    def rule_create_dst_bid(self, st_receiver, st_index):
+        bidIds = [bidId for bidId, (_, owner, _, timestamp, _) in self.relayed.items()
+            if owner in self.users and timestamp + CHALLENGE_PERIOD < chain.time()]
+        if not bidIds:
+            return
+
+        incomingBidId = self.pick(bidIds, st_index)
+        _, owner, tokenId, _, _ = self.relayed.pop(incomingBidId)
+        receiver = self.users[st_receiver]
+
+        tx = self.record(self.dstSpokeBridge.createBid(receiver, tokenId, self.wrappedErc721.address, incomingBidId,
+            {'from': owner, 'amount': FEE}))
+
+        self.wrappedOwners[tokenId] = self.dstSpokeBridge.address
+        self.ledger[self.dstSpokeBridge.address] += FEE
+        self.dstCreated[tx.events["BidCreated"]["bidId"]] = (owner, receiver, tokenId, incomingBidId)
+
+    def rule_buy_dst_bid(self, st_relayer, st_index):
+        relayers = self.active_relayers(self.dstSpokeBridge)
+        if not self.dstCreated or not relayers:
+            return
+
+        bidId = self.pick(self.dstCreated, st_index)
+        relayer = relayers[st_relayer % len(relayers)]
+        tx = self.record(self.dstSpokeBridge.buyBid(bidId, {'from': relayer}))
+
+        maker, receiver, tokenId, lockingBidId = self.dstCreated.pop(bidId)
+        del self.wrappedOwners[tokenId]
+        self.ledger[self.dstSpokeBridge.address] -= FEE
+        self.dstBought[bidId] = (relayer, maker, receiver, tokenId, lockingBidId, tx.timestamp)
+
+    def rule_unlocking(self, st_index, st_wrong):
+        relayers = self.active_relayers(self.srcSpokeBridge)
+        bidIds = [bidId for bidId, bid in self.dstBought.items()
+            if bid[0] in relayers and bid[5] + CHALLENGE_PERIOD < chain.time()]
+        if not bidIds:
+            return
+
+        bidId = self.pick(bidIds, st_index)
+        relayer, _, receiver, tokenId, lockingBidId, _ = self.dstBought.pop(bidId)
+        isWrong = st_wrong < WRONG_RELAYING_RATE
+
+        tx = self.record(self.srcSpokeBridge.unlocking(lockingBidId, bidId, relayer if isWrong else receiver,
+            {'from': relayer}))
+
+        self.unlocked[bidId] = (relayer, relayer if isWrong else receiver, tokenId, tx.timestamp, isWrong)
+
+    def rule_challenge_unlocking(self, st_index):
+        bidIds = [bidId for bidId, (_, _, _, timestamp, isWrong) in self.unlocked.items()
+            if isWrong and timestamp + CHALLENGE_PERIOD > chain.time()]
+        if not bidIds:
+            return
+
+        bidId = self.pick(bidIds, st_index)
+        del self.unlocked[bidId]
+
+        self.record(self.srcSpokeBridge.challengeUnlocking(bidId,
+            {'from': self.challenger, 'amount': CHALLENGE_AMOUNT}))
+        tx = self.record(self.dstSpokeBridge.sendProof(True, bidId, {'from': self.challenger}))
+        assert tx.events["ChallengeProved"]["bidId"] == bidId
+        self.record(self.srcSpokeBridge.claimChallengeReward(bidId, False, {'from': self.challenger}))
+
+        # the locked token stays on the source side
+        self.ledger[self.srcSpokeBridge.address] -= STAKE_AMOUNT // 4
+
+    def rule_prove_missing_unlocking(self, st_index):
+        bidIds = [bidId for bidId, bid in self.dstBought.items() if bid[5] + CHALLENGE_PERIOD < chain.time()]
+        if not bidIds:
+            return
+
+        bidId = self.pick(bidIds, st_index)
+        relayer, maker, _, tokenId, lockingBidId, timestamp = self.dstBought.pop(bidId)
+
+        tx = self.record(self.srcSpokeBridge.sendProof(False, bidId, {'from': self.challenger}))
+        assert tx.events["ChallengeProved"]["bidId"] == bidId
+        self.record(self.dstSpokeBridge.claimChallengeReward(bidId, True, {'from': self.challenger}))
+        self.ledger[self.dstSpokeBridge.address] -= STAKE_AMOUNT // 4
+
+        # the token is minted back, the maker can bridge it again by the same incoming bid
+        self.wrappedOwners[tokenId] = maker
+        self.relayed[lockingBidId] = (relayer, maker, tokenId, timestamp, False)
+
+    def rule_claim_nft(self, st_index):
+        bidIds = [bidId for bidId, (_, receiver, _, timestamp, _) in self.unlocked.items()
+            if receiver in self.users and timestamp + CHALLENGE_PERIOD < chain.time()]
+        if not bidIds:
+            return
+
+        bidId = self.pick(bidIds, st_index)
+        _, receiver, tokenId, _, _ = self.unlocked.pop(bidId)
+
+        self.record(self.srcSpokeBridge.claimNFT(bidId, {'from': receiver}))
+
+        self.owners[tokenId] = receiver
+
+    def rule_sleep(self, st_sleep):
+        chain.sleep(SLEEPS[st_sleep])
+
+    def invariant_token_custody(self):
+        for tokenId in TOKEN_IDS:
+            assert self.erc721.ownerOf(tokenId) == self.owners[tokenId]
+        for tokenId, owner in self.wrappedOwners.items():
+            assert self.wrappedErc721.ownerOf(tokenId) == owner
+
+    def invariant_no_double_mint(self):
+        # every wrapped token is backed by the original token locked on the source side
+        totalSupply = sum(self.wrappedErc721.balanceOf(account) for account in accounts) + \
+            self.wrappedErc721.balanceOf(self.dstSpokeBridge.address)
+        assert totalSupply == len(self.wrappedOwners)
+        for tokenId in self.wrappedOwners:
+            assert self.erc721.ownerOf(tokenId) == self.srcSpokeBridge.address
+
+    def invariant_stake_conservation(self):
+        # the gas price of the development network is zero, so the ETH only moves between the accounts
+        assert self.eth_total() == self.total
+
+        # the spokes hold the stakes, the fees of the open bids and the challenge deposits, minus the rewards
+        for spokeBridge in (self.srcSpokeBridge, self.dstSpokeBridge):
+            assert spokeBridge.balance() == self.ledger[spokeBridge.address]
+
+    def teardown_final(cls):
+        seconds = time.perf_counter() - cls.started
+        count = sum(len(gas) for gas in cls.gas.values())
+
+        print(f"\n{count} transactions in {seconds:.1f}s ({count / seconds:.1f} tx/s)")
+        print(f"{'function':<40} {'calls':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+        for function in sorted(cls.gas):
+            gas = cls.gas[function]
+            print(f"{function:<40} {len(gas):>6} {percentile(gas, 50):>9} {percentile(gas, 90):>9} "
+                f"{percentile(gas, 99):>9} {max(gas):>9}")
+
+def test_stateful_bridging(state_machine, bridge):
+    state_machine(BridgingMachine, bridge, settings={"max_examples": EXAMPLES, "stateful_step_count": STEPS})
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from brownie import accounts, chain, web3, Wei
+
+from nft_bridge.enums import IncomingBidStatus, OutgoingBidStatus
+from nft_bridge.watchtower import Watchtower
+
+@pytest.fixture(scope="module")
+def spokes(bridge):
+    """
+    The spoke bridges as web3 contracts of the same web3 instance, the way the watchtower uses them.
+    """
+    return tuple(web3.eth.contract(address=spoke.address, abi=spoke.abi)
+        for spoke in (bridge.srcSpokeBridge, bridge.dstSpokeBridge))
+
+def poll(watchtower, times=1):
+    async def run():
+        for _ in range(times):
+            await watchtower.poll()
+
+    asyncio.run(run())
+
+def test_challenging_wrong_minting(bridge, spokes, deposited_relayer):
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+
+    bridge.erc721.mint(user, 2, {'from': accounts[0]})
+    bridge.erc721.approve(bridge.srcSpokeBridge.address, 2, {'from': user})
+
+    fromBlock = web3.eth.block_number + 1
+    for tokenId in (1, 2):
+        bridge.srcSpokeBridge.createBid(receiver, tokenId, bridge.erc721.address,
+            {'from': user, 'amount': Wei("0.01 ether")})
+    bridge.srcSpokeBridge.buyBids([0, 1], {'from': deposited_relayer})
+
+    # the second token is minted to the relayer instead of the receiver
+    bridge.dstSpokeBridge.minting(0, receiver, 1, bridge.wrappedErc721.address, {'from': deposited_relayer})
+    bridge.dstSpokeBridge.minting(1, deposited_relayer, 2, bridge.wrappedErc721.address,
+        {'from': deposited_relayer})
+
+    watchtower = Watchtower(*spokes, challenger.address, from_blocks=(fromBlock, fromBlock))
+    poll(watchtower)
+
+    assert watchtower.metrics.verified == 1
+    assert watchtower.metrics.wrong == 1
+    assert watchtower.metrics.challenged == 1
+    assert watchtower.metrics.claimed == 1
+    assert watchtower.metrics.failed == 0
+
+    assert bridge.dstSpokeBridge.incomingBids(0)["status"] == IncomingBidStatus.RELAYED
+    assert bridge.dstSpokeBridge.incomingBids(1)["status"] == IncomingBidStatus.MALICIOUS
+    assert bridge.dstSpokeBridge.incomingChallengeRewards(1) == ("0x0000000000000000000000000000000000000000", 0)
+
+    # only the timers of the bought bids are left
+    assert watchtower.timers == 2
+
+def test_proving_missing_minting(bridge, spokes, bought_bid):
+    user = accounts[1]
+    challenger = accounts[2]
+
+    watchtower = Watchtower(*spokes, challenger.address, from_blocks=(0, 0))
+    poll(watchtower)
+
+    assert watchtower.timers == 1
+    assert watchtower.metrics.proved_missing == 0
+
+    chain.sleep(4 * 60 * 60 + 2)
+    chain.mine()
+
+    # the proof is sent by the first poll, the reward is claimed by the second one
+    poll(watchtower, 2)
+
+    assert watchtower.metrics.proved_missing == 1
+    assert watchtower.metrics.claimed == 1
+    assert watchtower.timers == 0
+
+    assert bridge.srcSpokeBridge.outgoingBids(bought_bid)["status"] == OutgoingBidStatus.MALICIOUS
+    assert bridge.srcSpokeBridge.outgoingChallengeRewards(bought_bid) == \
+        ("0x0000000000000000000000000000000000000000", 0)
+    assert bridge.erc721.ownerOf(1) == user
+
+def test_dropping_correct_relayings(bridge, spokes, relayed_bid):
+    watchtower = Watchtower(*spokes, accounts[2].address, from_blocks=(0, 0))
+    poll(watchtower)
+
+    assert watchtower.metrics.verified == 1
+    assert watchtower.timers == 1
+
+    chain.sleep(4 * 60 * 60 + 2)
+    chain.mine()
+    poll(watchtower)
+
+    assert watchtower.timers == 0
+    assert watchtower.metrics.proved_missing == 0
+    assert watchtower.metrics.challenged == 0
+    assert bridge.srcSpokeBridge.outgoingBids(relayed_bid)["status"] == OutgoingBidStatus.BOUGHT
+
+def test_verifying_unlockings(bridge, spokes, deposited_relayer):
+    user = accounts[1]
+    challenger = accounts[2]
+    receiver = accounts[3]
+
+    bridge.erc721.mint(user, 2, {'from': accounts[0]})
+    bridge.erc721.approve(bridge.srcSpokeBridge.address, 2, {'from': user})
+
+    bridge.srcSpokeBridge.createBids(receiver, [1, 2], bridge.erc721.address,
+        {'from': user, 'amount': Wei("0.02 ether")})
+    bridge.srcSpokeBridge.buyBids([0, 1], {'from': deposited_relayer})
+    bridge.dstSpokeBridge.mintingBatch([0, 1], [receiver, receiver], [1, 2], bridge.wrappedErc721.address,
+        {'from': deposited_relayer})
+
+    chain.sleep(4 * 60 * 60 + 2)
+
+    # bridging back
+    bridge.wrappedErc721.setApprovalForAll(bridge.dstSpokeBridge.address, True, {'from': receiver})
+    bridge.dstSpokeBridge.createBids(user, [1, 2], bridge.wrappedErc721.address, [0, 1],
+        {'from': receiver, 'amount': Wei("0.02 ether")})
+    bridge.dstSpokeBridge.buyBids([0, 1], {'from': deposited_relayer})
+
+    chain.sleep(4 * 60 * 60 + 2)
+
+    # the second token is unlocked to the relayer instead of the user
+    fromBlock = web3.eth.block_number + 1
+    bridge.srcSpokeBridge.unlocking(0, 0, user, {'from': deposited_relayer})
+    bridge.srcSpokeBridge.unlocking(1, 1, deposited_relayer, {'from': deposited_relayer})
+
+    watchtower = Watchtower(*spokes, challenger.address, from_blocks=(fromBlock, fromBlock))
+    poll(watchtower)
+
+    # the honest unlocking refers to the original contract, the dest outgoing bid to the wrapped one
+    assert watchtower.metrics.verified == 1
+    assert watchtower.metrics.wrong == 1
+    assert watchtower.metrics.challenged == 1
+    assert watchtower.metrics.claimed == 1
+    assert watchtower.metrics.failed == 0
+
+    assert bridge.srcSpokeBridge.incomingBids(0)["status"] == IncomingBidStatus.RELAYED
+    assert bridge.srcSpokeBridge.incomingBids(1)["status"] == IncomingBidStatus.MALICIOUS
+    assert bridge.srcSpokeBridge.outgoingBids(1)["status"] == OutgoingBidStatus.BOUGHT
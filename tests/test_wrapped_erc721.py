@@ -1,8 +1,8 @@
 import pytest
 
-from brownie import accounts, reverts, WrappedERC721
+from brownie import accounts, reverts, ERC721ReceiverMock, WrappedERC721
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def wrapped_contract():
     return accounts[0].deploy(WrappedERC721, "Wrapped", "WRP")
 
@@ -23,4 +23,46 @@ def test_minting_not_only(wrapped_contract):
 
 def test_burning_not_only(wrapped_contract):
     with reverts("Ownable: caller is not the owner"):
-        wrapped_contract.burn(1, {'from': accounts[1]})
\ No newline at end of file
+        wrapped_contract.burn(1, {'from': accounts[1]})
+
+def test_burning_batch(wrapped_contract):
+    wrapped_contract.mint(accounts[1], 1, {'from': accounts[0]})
+    wrapped_contract.mint(accounts[1], 2, {'from': accounts[0]})
+    wrapped_contract.burnBatch([1, 2], {'from': accounts[0]})
+
+    assert wrapped_contract.balanceOf(accounts[1]) == 0
+    with reverts("ERC721: invalid token ID"):
+        wrapped_contract.ownerOf(2)
+
+def test_burning_batch_not_only(wrapped_contract):
+    with reverts("Ownable: caller is not the owner"):
+        wrapped_contract.burnBatch([1], {'from': accounts[1]})
+
+def test_minting_batch(wrapped_contract):
+    wrapped_contract.mintBatch(accounts[1], [1, 5, 3], {'from': accounts[0]})
+
+    assert wrapped_contract.balanceOf(accounts[1]) == 3
+    for tokenId in [1, 5, 3]:
+        assert wrapped_contract.ownerOf(tokenId) == accounts[1]
+
+    with reverts("ERC721: token already minted"):
+        wrapped_contract.mintBatch(accounts[2], [2, 3], {'from': accounts[0]})
+
+def test_minting_batch_to_non_receiver(wrapped_contract):
+    other_contract = accounts[0].deploy(WrappedERC721, "Other", "OTH")
+
+    with reverts("ERC721: transfer to non ERC721Receiver implementer"):
+        wrapped_contract.mintBatch(other_contract.address, [1, 2], {'from': accounts[0]})
+
+def test_minting_batch_to_receiver(wrapped_contract):
+    receiver = accounts[0].deploy(ERC721ReceiverMock)
+
+    tx = wrapped_contract.mintBatch(receiver.address, [1, 5, 3], {'from': accounts[0]})
+
+    # the receiver is asked for every token
+    assert [e["tokenId"] for e in tx.events["Received"]] == [1, 5, 3]
+    assert wrapped_contract.balanceOf(receiver) == 3
+
+def test_minting_batch_not_only(wrapped_contract):
+    with reverts("Ownable: caller is not the owner"):
+        wrapped_contract.mintBatch(accounts[1], [1], {'from': accounts[1]})
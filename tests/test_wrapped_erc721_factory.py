@@ -0,0 +1,59 @@
+import pytest
+
+from brownie import accounts, reverts, WrappedERC721, WrappedERC721Factory
+
+@pytest.fixture(scope="module")
+def factory():
+    return accounts[0].deploy(WrappedERC721Factory)
+
+def test_deploying(factory):
+    original = accounts[5]
+    owner = accounts[1]
+
+    predicted = factory.predictAddress(original, "Wrapped", "WRP", owner)
+    tx = factory.deploy(original, "Wrapped", "WRP", owner, {'from': accounts[2]})
+
+    assert tx.events["WrappedERC721Deployed"]["originalErc721Contract"] == original
+    assert tx.events["WrappedERC721Deployed"]["wrappedErc721Contract"] == predicted
+    assert tx.events["WrappedERC721Deployed"]["owner"] == owner
+
+    wrapped = WrappedERC721.at(predicted)
+    assert wrapped.name() == "Wrapped"
+    assert wrapped.symbol() == "WRP"
+    assert wrapped.owner() == owner
+
+    wrapped.mint(accounts[3], 1, {'from': owner})
+    assert wrapped.ownerOf(1) == accounts[3]
+    with reverts("Ownable: caller is not the owner"):
+        wrapped.mint(accounts[3], 2, {'from': accounts[2]})
+
+def test_deploying_twice(factory):
+    factory.deploy(accounts[5], "Wrapped", "WRP", accounts[1], {'from': accounts[0]})
+
+    with reverts("ERC1167: create2 failed"):
+        factory.deploy(accounts[5], "Wrapped", "WRP", accounts[1], {'from': accounts[0]})
+
+    # every parameter is part of the address
+    addresses = {
+        factory.predictAddress(accounts[5], "Wrapped", "WRP", accounts[1]),
+        factory.predictAddress(accounts[6], "Wrapped", "WRP", accounts[1]),
+        factory.predictAddress(accounts[5], "Other", "WRP", accounts[1]),
+        factory.predictAddress(accounts[5], "Wrapped", "OTH", accounts[1]),
+        factory.predictAddress(accounts[5], "Wrapped", "WRP", accounts[2]),
+    }
+    assert len(addresses) == 5
+
+def test_initializing(factory):
+    tx = factory.deploy(accounts[5], "Wrapped", "WRP", accounts[1], {'from': accounts[0]})
+    wrapped = WrappedERC721.at(tx.events["WrappedERC721Deployed"]["wrappedErc721Contract"])
+
+    with reverts("Initializable: contract is already initialized"):
+        wrapped.initialize("Other", "OTH", accounts[2], {'from': accounts[2]})
+    with reverts("Initializable: contract is already initialized"):
+        WrappedERC721.at(factory.IMPLEMENTATION()).initialize("Other", "OTH", accounts[2], {'from': accounts[2]})
+
+    # the directly deployed contracts cannot be initialized either
+    direct = accounts[0].deploy(WrappedERC721, "Direct", "DIR")
+    assert direct.name() == "Direct"
+    with reverts("Initializable: contract is already initialized"):
+        direct.initialize("Other", "OTH", accounts[2], {'from': accounts[2]})